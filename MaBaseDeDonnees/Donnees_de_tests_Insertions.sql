@@ -268,7 +268,10 @@ INSERT INTO Vente (DateVente, Id_Utilisateur) VALUES
 -- ========================================
 -- 10. LIGNES DE VENTE
 -- ========================================
-INSERT INTO LigneVente (Id_Vente, Id_Produit, QteVendue, Remise) VALUES
+-- DateVente (clé de partitionnement) reprise de la vente
+INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise)
+SELECT l.Id_Vente, v.DateVente, l.Id_Produit, l.QteVendue, l.Remise
+FROM (VALUES
 -- Vente 1
 (1, 'BV001', 3, 0), (1, 'EP001', 2, 0), (1, 'PL001', 1, 0),
 
@@ -343,12 +346,14 @@ INSERT INTO LigneVente (Id_Vente, Id_Produit, QteVendue, Remise) VALUES
 (24, 'PL001', 4, 0), (24, 'FL003', 5, 0), (24, 'SC001', 5, 0),
 
 -- Vente 25 (aujourd'hui - dernière vente)
-(25, 'BV005', 2, 0), (25, 'VP004', 3, 0), (25, 'BP002', 1, 0), (25, 'SC002', 2, 0);
+(25, 'BV005', 2, 0), (25, 'VP004', 3, 0), (25, 'BP002', 1, 0), (25, 'SC002', 2, 0)
+) AS l(Id_Vente, Id_Produit, QteVendue, Remise)
+JOIN Vente v ON v.Id_Vente = l.Id_Vente;
 
 -- ========================================
 -- 11. REÇUS (pour toutes les ventes)
 -- ========================================
-INSERT INTO Recu (DateEmission, ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente) 
+INSERT INTO Recu (DateEmission, ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente, DateVente) 
 SELECT 
     v.DateVente,
     CASE (v.Id_Vente % 4)
@@ -359,7 +364,8 @@ SELECT
     END,
     ROUND(SUM(lv.QteVendue * lv.PrixUnitaireVendu * (1 - COALESCE(lv.Remise, 0)/100.0)), 2),
     v.Id_Utilisateur,
-    v.Id_Vente
+    v.Id_Vente,
+    v.DateVente
 FROM Vente v
 JOIN LigneVente lv ON v.Id_Vente = lv.Id_Vente
 GROUP BY v.Id_Vente, v.DateVente, v.Id_Utilisateur;
@@ -7,6 +7,14 @@ CREATE INDEX IF NOT EXISTS idx_produit_nom ON Produit(Nom);
 CREATE INDEX IF NOT EXISTS idx_produit_prix_achat ON Produit(PrixAchatMoyen);
 CREATE INDEX IF NOT EXISTS idx_produit_prix_vente ON Produit(PrixUnitaireActuel);
 
+-- Recherche produits (cf. Recherche.sql) : sous-chaînes par trigrammes, mots par plein texte
+CREATE INDEX IF NOT EXISTS idx_produit_nom_trgm
+ON Produit USING gin (fn_normaliser_recherche(Nom) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_produit_description_trgm
+ON Produit USING gin (fn_normaliser_recherche(Description) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_produit_recherche_texte
+ON Produit USING gin (RechercheTexte);
+
 -- Index partiel pour alertes stock 
 CREATE INDEX IF NOT EXISTS idx_produit_stock_alerte 
 ON Produit(StockActuel, StockAlerte) 
@@ -27,7 +35,9 @@ ON Vente(DateVente, Id_Utilisateur);
 
 -- LIGNE VENTE
 CREATE INDEX IF NOT EXISTS idx_lignevente_vente ON LigneVente(Id_Vente);
-CREATE INDEX IF NOT EXISTS idx_lignevente_produit ON LigneVente(Id_Produit);
+-- Produit puis date : ventes d'un produit sur une fenêtre (statistiques de demande)
+DROP INDEX IF EXISTS idx_lignevente_produit;
+CREATE INDEX IF NOT EXISTS idx_lignevente_produit_date ON LigneVente(Id_Produit, DateVente);
 CREATE INDEX IF NOT EXISTS idx_lignevente_remise ON LigneVente(Remise) WHERE Remise > 0;
 
 -- Index composite pour analyses
@@ -49,22 +59,42 @@ CREATE INDEX IF NOT EXISTS idx_ligneachat_achat ON LigneAchat(Id_Achat);
 CREATE INDEX IF NOT EXISTS idx_ligneachat_produit ON LigneAchat(Id_Produit);
 
 -- MOUVEMENT STOCK
-CREATE INDEX IF NOT EXISTS idx_mouvementstock_produit ON MouvementStock(Id_Produit);
-CREATE INDEX IF NOT EXISTS idx_mouvementstock_date ON MouvementStock(DateMouvement);
-
--- Index composite pour historique produit
-CREATE INDEX IF NOT EXISTS idx_mouvementstock_produit_date 
-ON MouvementStock(Id_Produit, DateMouvement DESC);
-
--- Index partiels pour optimisation
-CREATE INDEX IF NOT EXISTS idx_mouvementstock_vente 
-ON MouvementStock(Id_Vente) 
+-- Journal paginé par clé (DateMouvement, Id_Mouvement) : chaque filtre a son index
+-- composite terminé par la clé de tri, une page se lit sans tri ni parcours de l'historique
+DROP INDEX IF EXISTS idx_mouvementstock_produit;
+DROP INDEX IF EXISTS idx_mouvementstock_date;
+DROP INDEX IF EXISTS idx_mouvementstock_produit_date;
+DROP INDEX IF EXISTS idx_mouvementstock_vente;
+DROP INDEX IF EXISTS idx_mouvementstock_achat;
+
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_journal
+ON MouvementStock(DateMouvement DESC, Id_Mouvement DESC);
+
+-- Historique produit (sert aussi les recherches sur Id_Produit seul)
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_produit_journal
+ON MouvementStock(Id_Produit, DateMouvement DESC, Id_Mouvement DESC);
+
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_type_journal
+ON MouvementStock(Type, DateMouvement DESC, Id_Mouvement DESC);
+
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_utilisateur_journal
+ON MouvementStock(Id_Utilisateur, DateMouvement DESC, Id_Mouvement DESC);
+
+-- Index partiels : seuls les mouvements liés à une vente / un achat
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_vente_journal
+ON MouvementStock(Id_Vente, DateMouvement DESC, Id_Mouvement DESC)
 WHERE Id_Vente IS NOT NULL;
 
-CREATE INDEX IF NOT EXISTS idx_mouvementstock_achat 
-ON MouvementStock(Id_Achat) 
+CREATE INDEX IF NOT EXISTS idx_mouvementstock_achat_journal
+ON MouvementStock(Id_Achat, DateMouvement DESC, Id_Mouvement DESC)
 WHERE Id_Achat IS NOT NULL;
 
+-- STOCK JOURNALIER (séries et valorisation tous produits confondus, par jour)
+CREATE INDEX IF NOT EXISTS idx_stockjournalier_jour ON StockJournalier(Jour);
+
+-- ALERTES (fréquence des alertes d'un produit, statistiques de demande)
+CREATE INDEX IF NOT EXISTS idx_alertestock_produit_date ON AlerteStock(Id_Produit, Date_Creation);
+
 -- RECU
 CREATE INDEX IF NOT EXISTS idx_recu_vente ON Recu(Id_Vente);
 CREATE INDEX IF NOT EXISTS idx_recu_date ON Recu(DateEmission);
@@ -105,13 +135,15 @@ ON Vente(DateVente);
 
 -- INDEX POUR VUES MATÉRIALISÉES
 
+-- Les index uniques sont requis par REFRESH MATERIALIZED VIEW CONCURRENTLY
+
 -- Index pour mv_stats_annuelles
-CREATE INDEX IF NOT EXISTS idx_mv_stats_annuelles_annee ON mv_stats_annuelles(Annee);
-CREATE INDEX IF NOT EXISTS idx_mv_stats_annuelles_ca ON mv_stats_annuelles(Chiffre_Affaires DESC);
-CREATE INDEX IF NOT EXISTS idx_mv_stats_annuelles_marge ON mv_stats_annuelles(Marge_Totale DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_stats_annuelles_annee ON mv_stats_annuelles(Annee);
+CREATE INDEX IF NOT EXISTS idx_mv_stats_annuelles_ca ON mv_stats_annuelles(CA_TTC DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_stats_annuelles_marge ON mv_stats_annuelles(Marge_Nette_HT DESC);
 
 -- Index pour mv_stats_historiques
-CREATE INDEX IF NOT EXISTS idx_mv_stats_historiques_date ON mv_stats_historiques(Date_Vente);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_stats_historiques_date ON mv_stats_historiques(Date_Vente);
 CREATE INDEX IF NOT EXISTS idx_mv_stats_historiques_annee_mois ON mv_stats_historiques(Annee, Mois);
 CREATE INDEX IF NOT EXISTS idx_mv_stats_historiques_ca ON mv_stats_historiques(Chiffre_Affaires DESC);
 CREATE INDEX IF NOT EXISTS idx_mv_stats_historiques_annee ON mv_stats_historiques(Annee DESC);
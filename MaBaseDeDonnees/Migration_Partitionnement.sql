@@ -0,0 +1,173 @@
+-- ====================================================
+-- MIGRATION : partitionnement mensuel des tables d'historique
+-- ====================================================
+-- Pour une base créée avant le partitionnement de Vente, LigneVente, MouvementStock et AlerteStock.
+-- Une base neuve (init_db.sql) est déjà partitionnée : ne pas exécuter ce script.
+-- Prérequis : tables d'agrégats et de suivi déjà présentes (AgregatVente*, EtatVueMaterialisee).
+-- Depuis ce dossier : psql -U votre_user -d votre_db -v ON_ERROR_STOP=1 -f Migration_Partitionnement.sql
+--
+-- Déroulé (une seule transaction, tables verrouillées pendant la copie) :
+-- 1. les anciennes tables sont renommées en *_avant_partition
+-- 2. les tables partitionnées sont créées (mêmes colonnes, mêmes séquences d'identifiants)
+--    avec une partition par mois couvrant tout l'historique existant
+-- 3. copie des données (sans déclencher les triggers métier : stock, mouvements, alertes)
+--    et report de la date de la vente sur Recu
+-- 4. suppression des anciennes tables, puis recréation des triggers, vues et index
+--
+-- Clés étrangères vers Vente : Vente n'est unique que sur (Id_Vente, DateVente) et ses partitions
+-- sont détachées à l'archivage, donc Recu -> Vente et MouvementStock -> Vente ne sont pas recréées.
+-- L'existence de la vente est vérifiée à l'insertion (trg_valider_recu ; mouvements écrits par les
+-- triggers de vente) et une vente encaissée ne peut être supprimée, mais une suppression manuelle
+-- ou l'archivage d'un mois peut laisser des reçus / mouvements orphelins (Id_Vente sans vente en
+-- ligne) : les jointures vers Vente les ignorent, Verif_donnees.sql les compte.
+-- Chaque table reçoit une partition par défaut (Partitions.sql) : une vente datée d'un mois
+-- sans partition y est rangée au lieu d'échouer.
+
+BEGIN;
+
+-- 1. Mise de côté des anciennes tables (les index de clé primaire portent un nom global)
+ALTER TABLE LigneVente RENAME TO lignevente_avant_partition;
+ALTER INDEX lignevente_pkey RENAME TO lignevente_avant_partition_pkey;
+ALTER TABLE Vente RENAME TO vente_avant_partition;
+ALTER INDEX vente_pkey RENAME TO vente_avant_partition_pkey;
+ALTER TABLE MouvementStock RENAME TO mouvementstock_avant_partition;
+ALTER INDEX mouvementstock_pkey RENAME TO mouvementstock_avant_partition_pkey;
+ALTER TABLE AlerteStock RENAME TO alertestock_avant_partition;
+ALTER INDEX alertestock_pkey RENAME TO alertestock_avant_partition_pkey;
+
+-- 2. Tables partitionnées (cf. Tables.sql ; les séquences SERIAL existantes sont reprises)
+CREATE TABLE Vente(
+   Id_Vente INT NOT NULL DEFAULT nextval('vente_id_vente_seq'),
+   DateVente TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   Id_Utilisateur INT NOT NULL,
+   PRIMARY KEY(Id_Vente, DateVente),
+   FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur)
+) PARTITION BY RANGE (DateVente);
+
+CREATE TABLE LigneVente(
+   Id_Vente INT NOT NULL,
+   DateVente TIMESTAMP NOT NULL,
+   Id_Produit VARCHAR(20) NOT NULL,
+   QteVendue INT NOT NULL CHECK (QteVendue > 0),
+   Remise NUMERIC(5,2) DEFAULT 0 CHECK (Remise >= 0 AND Remise <= 100),
+   PrixUnitaireVendu NUMERIC(10,2) NOT NULL CHECK (PrixUnitaireVendu >= 0),
+   TauxTVA DECIMAL(5,2) DEFAULT 18.00,
+   PRIMARY KEY(Id_Vente, Id_Produit, DateVente),
+   FOREIGN KEY(Id_Vente, DateVente) REFERENCES Vente(Id_Vente, DateVente) ON DELETE CASCADE,
+   FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit)
+) PARTITION BY RANGE (DateVente);
+
+CREATE TABLE MouvementStock(
+   Id_Mouvement INT NOT NULL DEFAULT nextval('mouvementstock_id_mouvement_seq'),
+   DateMouvement TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   Type VARCHAR(10) NOT NULL CHECK (Type IN ('ENTREE', 'SORTIE', 'AJUSTEMENT')),
+   Quantite INT NOT NULL CHECK (Quantite > 0),
+   Id_Utilisateur INT NOT NULL,
+   Id_Produit VARCHAR(20) NOT NULL,
+   Id_Vente INT,
+   Id_Achat INT,
+   Commentaire TEXT,
+   PRIMARY KEY(Id_Mouvement, DateMouvement),
+   FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur),
+   FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit),
+   FOREIGN KEY(Id_Achat) REFERENCES Achat(Id_Achat),
+   CHECK (NOT (Id_Vente IS NOT NULL AND Id_Achat IS NOT NULL))
+) PARTITION BY RANGE (DateMouvement);
+
+CREATE TABLE AlerteStock (
+    Id_Alerte INT NOT NULL DEFAULT nextval('alertestock_id_alerte_seq'),
+    Id_Produit VARCHAR(20) NOT NULL REFERENCES Produit(Id_Produit) ON DELETE CASCADE,
+    Stock_Au_Moment_Alerte INT NOT NULL,
+    Seuil_Alerte_Vise INT NOT NULL,
+    Priorite VARCHAR(20) DEFAULT 'MEDIUM' CHECK (Priorite IN ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')),
+    Statut VARCHAR(20) DEFAULT 'NON_LUE' CHECK (Statut IN ('NON_LUE', 'VU', 'EN_COURS', 'COMMANDE_PASSEE', 'ARCHIVEE')),
+    Commentaire TEXT,
+    Date_Creation TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    Date_Traitement TIMESTAMP,
+    Id_Achat_Genere INTEGER REFERENCES Achat(Id_Achat),
+    PRIMARY KEY (Id_Alerte, Date_Creation)
+) PARTITION BY RANGE (Date_Creation);
+
+-- Les séquences suivent désormais les nouvelles tables (sinon supprimées avec les anciennes)
+ALTER SEQUENCE vente_id_vente_seq OWNED BY Vente.Id_Vente;
+ALTER SEQUENCE mouvementstock_id_mouvement_seq OWNED BY MouvementStock.Id_Mouvement;
+ALTER SEQUENCE alertestock_id_alerte_seq OWNED BY AlerteStock.Id_Alerte;
+
+-- Fonctions de partitionnement (+ partitions des 12 derniers mois et 3 prochains)
+\i Partitions.sql
+
+-- Mois plus anciens de l'historique existant
+DO $$
+DECLARE
+    v_plus_ancien DATE;
+    v_mois DATE;
+    v_table TEXT;
+BEGIN
+    SELECT LEAST(
+        (SELECT MIN(DateVente) FROM vente_avant_partition),
+        (SELECT MIN(DateMouvement) FROM mouvementstock_avant_partition),
+        (SELECT MIN(Date_Creation) FROM alertestock_avant_partition),
+        CURRENT_DATE
+    )::date INTO v_plus_ancien;
+
+    FOREACH v_table IN ARRAY fn_tables_partitionnees() LOOP
+        FOR v_mois IN
+            SELECT generate_series(
+                date_trunc('month', v_plus_ancien),
+                date_trunc('month', CURRENT_DATE),
+                INTERVAL '1 month'
+            )::date
+        LOOP
+            PERFORM fn_creer_partition_mensuelle(v_table, v_mois);
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+-- 3. Copie (aucun trigger sur les nouvelles tables à ce stade)
+INSERT INTO Vente (Id_Vente, DateVente, Id_Utilisateur)
+SELECT Id_Vente, DateVente, Id_Utilisateur
+FROM vente_avant_partition;
+
+INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise, PrixUnitaireVendu, TauxTVA)
+SELECT lv.Id_Vente, v.DateVente, lv.Id_Produit, lv.QteVendue, lv.Remise, lv.PrixUnitaireVendu, lv.TauxTVA
+FROM lignevente_avant_partition lv
+JOIN vente_avant_partition v ON v.Id_Vente = lv.Id_Vente;
+
+INSERT INTO MouvementStock (Id_Mouvement, DateMouvement, Type, Quantite, Id_Utilisateur, Id_Produit, Id_Vente, Id_Achat, Commentaire)
+SELECT Id_Mouvement, DateMouvement, Type, Quantite, Id_Utilisateur, Id_Produit, Id_Vente, Id_Achat, Commentaire
+FROM mouvementstock_avant_partition;
+
+INSERT INTO AlerteStock (Id_Alerte, Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Priorite, Statut,
+                         Commentaire, Date_Creation, Date_Traitement, Id_Achat_Genere)
+SELECT Id_Alerte, Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Priorite, Statut,
+       Commentaire, COALESCE(Date_Creation, Date_Traitement, CURRENT_TIMESTAMP), Date_Traitement, Id_Achat_Genere
+FROM alertestock_avant_partition;
+
+-- Le reçu porte la date de la vente (clé de partitionnement) : contrôles et jointures
+-- vers Vente / LigneVente ne lisent que la partition concernée. Triggers de Recu suspendus
+-- (les agrégats ne changent pas).
+ALTER TABLE Recu ADD COLUMN IF NOT EXISTS DateVente TIMESTAMP;
+ALTER TABLE Recu DISABLE TRIGGER USER;
+UPDATE Recu r SET DateVente = v.DateVente
+FROM vente_avant_partition v
+WHERE v.Id_Vente = r.Id_Vente;
+ALTER TABLE Recu ENABLE TRIGGER USER;
+ALTER TABLE Recu ALTER COLUMN DateVente SET NOT NULL;
+
+-- 4. Anciennes tables (emportent vues, triggers et clés étrangères de Recu vers Vente)
+DROP TABLE lignevente_avant_partition, vente_avant_partition,
+           mouvementstock_avant_partition, alertestock_avant_partition CASCADE;
+
+CREATE INDEX idx_alerte_statut_priorite ON AlerteStock(Statut, Priorite);
+
+\i Triggers_et_Fonctions.sql
+\i Vues.sql
+\i Vues_TVA.sql
+\i Index.sql
+
+ANALYZE Vente, LigneVente, MouvementStock, AlerteStock;
+
+COMMIT;
+
+SELECT '✅ Migration vers les tables partitionnées terminée' as status;
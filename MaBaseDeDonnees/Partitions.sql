@@ -0,0 +1,155 @@
+-- ====================================================
+-- PARTITIONS MENSUELLES : création anticipée et archivage
+-- ====================================================
+-- Tables partitionnées : Vente / LigneVente (DateVente), MouvementStock (DateMouvement),
+-- AlerteStock (Date_Creation). Une partition par mois, nommée <table>_AAAA_MM.
+-- Les partitions sont créées à l'avance : fn_assurer_partitions est appelée ci-dessous à
+-- l'installation, puis périodiquement par l'application (Database.ensure_partitions).
+-- Une partition par défaut (<table>_defaut) reçoit les lignes d'un mois pas encore créé :
+-- une vente au-delà de l'horizon n'échoue pas. Elle reste normalement vide ; un mois qui y a
+-- reçu des lignes n'a pas de partition propre tant qu'elles n'en sont pas sorties (avertissement).
+-- Script rejouable (exécuté après Tables.sql, et par Migration_Partitionnement.sql).
+
+CREATE OR REPLACE FUNCTION fn_tables_partitionnees()
+RETURNS TEXT[] AS $$
+    -- Ordre d'archivage : les tables référençantes avant les tables référencées
+    SELECT ARRAY['lignevente', 'vente', 'mouvementstock', 'alertestock'];
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION fn_creer_partition_defaut(p_table TEXT)
+RETURNS BOOLEAN AS $$
+BEGIN
+    IF to_regclass(p_table || '_defaut') IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_table || '_defaut', p_table);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_creer_partition_mensuelle(p_table TEXT, p_mois DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_debut DATE := date_trunc('month', p_mois)::date;
+    v_nom TEXT := p_table || '_' || to_char(date_trunc('month', p_mois), 'YYYY_MM');
+    v_colonne TEXT;
+    v_occupe BOOLEAN;
+BEGIN
+    -- Existe déjà (ou mois archivé : la partition détachée garde son nom)
+    IF to_regclass(v_nom) IS NOT NULL OR to_regclass('archive.' || v_nom) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    -- Lignes du mois déjà dans la partition par défaut : PostgreSQL refuserait la création.
+    -- Le mois reste servi par la partition par défaut (lignes à déplacer manuellement).
+    IF to_regclass(p_table || '_defaut') IS NOT NULL THEN
+        v_colonne := substring(pg_get_partkeydef(p_table::regclass) FROM '\((\w+)\)');
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                       p_table || '_defaut', v_colonne, v_debut,
+                       v_colonne, (v_debut + INTERVAL '1 month')::date)
+        INTO v_occupe;
+        IF v_occupe THEN
+            RAISE WARNING 'Partition % non créée : lignes du mois dans %_defaut', v_nom, p_table;
+            RETURN FALSE;
+        END IF;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        v_nom, p_table, v_debut, (v_debut + INTERVAL '1 month')::date
+    );
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crée les partitions manquantes de p_mois_passes mois avant à p_mois_avance mois après le mois courant
+-- (et la partition par défaut). Retourne le nombre de partitions créées.
+CREATE OR REPLACE FUNCTION fn_assurer_partitions(p_mois_avance INT DEFAULT 3, p_mois_passes INT DEFAULT 0)
+RETURNS INT AS $$
+DECLARE
+    v_table TEXT;
+    v_mois DATE;
+    v_crees INT := 0;
+BEGIN
+    FOREACH v_table IN ARRAY fn_tables_partitionnees() LOOP
+        IF fn_creer_partition_defaut(v_table) THEN
+            v_crees := v_crees + 1;
+        END IF;
+
+        FOR v_mois IN
+            SELECT generate_series(
+                date_trunc('month', CURRENT_DATE) - make_interval(months => p_mois_passes),
+                date_trunc('month', CURRENT_DATE) + make_interval(months => p_mois_avance),
+                INTERVAL '1 month'
+            )::date
+        LOOP
+            IF fn_creer_partition_mensuelle(v_table, v_mois) THEN
+                v_crees := v_crees + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN v_crees;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Archive les mois entièrement antérieurs à p_avant : chaque partition est détachée puis déplacée
+-- dans le schéma archive (données conservées, consultables, supprimables par DROP TABLE).
+-- Les partitions d'alertes contenant encore des alertes actives sont conservées.
+-- Les agrégats de ventes (AgregatVente*) ne sont pas touchés : les tableaux de bord gardent l'historique.
+-- Retourne les partitions archivées.
+CREATE OR REPLACE FUNCTION fn_archiver_partitions(p_avant DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_table TEXT;
+    v_part RECORD;
+    v_actives BOOLEAN;
+    v_fk TEXT;
+BEGIN
+    CREATE SCHEMA IF NOT EXISTS archive;
+
+    FOREACH v_table IN ARRAY fn_tables_partitionnees() LOOP
+        FOR v_part IN
+            SELECT c.relname,
+                   (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::timestamp AS fin
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = v_table::regclass
+            ORDER BY c.relname
+        LOOP
+            CONTINUE WHEN v_part.fin IS NULL OR v_part.fin > p_avant;
+
+            IF v_table = 'alertestock' THEN
+                EXECUTE format(
+                    'SELECT EXISTS (SELECT 1 FROM %I WHERE Statut IN (''NON_LUE'', ''VU'', ''EN_COURS''))',
+                    v_part.relname
+                ) INTO v_actives;
+                IF v_actives THEN
+                    RAISE NOTICE 'Partition % conservée : alertes encore actives', v_part.relname;
+                    CONTINUE;
+                END IF;
+            END IF;
+
+            EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', v_table, v_part.relname);
+
+            -- Une partition détachée garde ses clés étrangères : les retirer (données figées),
+            -- sinon le détachement du mois correspondant de Vente serait refusé
+            FOR v_fk IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = v_part.relname::regclass AND contype = 'f'
+            LOOP
+                EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_part.relname, v_fk);
+            END LOOP;
+
+            EXECUTE format('ALTER TABLE %I SET SCHEMA archive', v_part.relname);
+            RETURN NEXT v_part.relname::text;
+        END LOOP;
+    END LOOP;
+
+    -- Les vues matérialisées ne couvrent plus que l'historique en ligne
+    UPDATE EtatVueMaterialisee SET A_Rafraichir = TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions initiales : 12 mois d'historique et 3 mois d'avance
+SELECT fn_assurer_partitions(3, 12);
@@ -0,0 +1,37 @@
+-- ====================================================
+-- RECHERCHE PRODUITS (pg_trgm + plein texte français sans accents)
+-- ====================================================
+-- Sert Database.search_products :
+-- - sous-chaîne (ancien ILIKE '%mot%') sur le texte normalisé (minuscules, sans accents),
+--   accélérée par des index GIN trigrammes (cf. Index.sql)
+-- - mots du français (pluriels, formes fléchies) par la colonne tsvector RechercheTexte
+-- - tri : préfixe du nom, puis similarité trigramme, puis rang plein texte
+-- Rejouable sur une base existante : psql ... -f Recherche.sql puis -f Index.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() est STABLE (dictionnaire modifiable) : version IMMUTABLE pour les index
+CREATE OR REPLACE FUNCTION fn_normaliser_recherche(p_texte TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, p_texte))
+$$;
+
+-- Configuration plein texte : racinisation française après suppression des accents
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'francais_sans_accent') THEN
+        CREATE TEXT SEARCH CONFIGURATION francais_sans_accent (COPY = pg_catalog.french);
+        ALTER TEXT SEARCH CONFIGURATION francais_sans_accent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+    END IF;
+END;
+$$;
+
+-- Nom (poids A) et description (poids B), recalculés par PostgreSQL à chaque mise à jour
+ALTER TABLE Produit ADD COLUMN IF NOT EXISTS RechercheTexte tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('francais_sans_accent', coalesce(Nom, '')), 'A') ||
+        setweight(to_tsvector('francais_sans_accent', coalesce(Description, '')), 'B')
+    ) STORED;
@@ -1,6 +1,13 @@
 
 -- SUPPRESSION DES TABLES EXISTANTES 
 
+DROP TABLE IF EXISTS EtatStatistiqueDemande CASCADE;
+DROP TABLE IF EXISTS StatistiqueDemande CASCADE;
+DROP TABLE IF EXISTS ClotureStock CASCADE;
+DROP TABLE IF EXISTS StockJournalier CASCADE;
+DROP TABLE IF EXISTS EtatVueMaterialisee CASCADE;
+DROP TABLE IF EXISTS AgregatVenteCaisse CASCADE;
+DROP TABLE IF EXISTS AgregatVenteCategorie CASCADE;
 DROP TABLE IF EXISTS fournir CASCADE;
 DROP TABLE IF EXISTS Recu CASCADE;
 DROP TABLE IF EXISTS MouvementStock CASCADE;
@@ -11,6 +18,7 @@ DROP TABLE IF EXISTS Achat CASCADE;
 DROP TABLE IF EXISTS Produit CASCADE;
 DROP TABLE IF EXISTS Fournisseur CASCADE;
 DROP TABLE IF EXISTS Utilisateur CASCADE;
+DROP TABLE IF EXISTS AlerteActive CASCADE;
 DROP TABLE IF EXISTS AlerteStock CASCADE;
 DROP TABLE IF EXISTS Categorie CASCADE;
 
@@ -63,6 +71,7 @@ CREATE TABLE Produit(
    ImagePath VARCHAR(255) DEFAULT 'assets/default.png',
    -- On ajoute le taux de TVA (ex: 18.00, 5.5, 0)
    TauxTVA DECIMAL(5,2) DEFAULT 18.00,
+   -- Colonne de recherche plein texte RechercheTexte : ajoutée par Recherche.sql
    PRIMARY KEY(Id_Produit),
    UNIQUE(Nom),
    FOREIGN KEY (Id_Categorie) REFERENCES Categorie(Id_Categorie)
@@ -92,6 +101,13 @@ CREATE TABLE LigneAchat(
 );
 
 -- Table Vente
+-- Tables d'historique partitionnées par mois (Vente, LigneVente, MouvementStock, AlerteStock)
+-- - Les requêtes bornées dans le temps ne lisent que les partitions concernées (élagage)
+-- - Archivage = détachement d'une partition (fn_archiver_partitions), sans DELETE
+-- - Partitions créées par fn_assurer_partitions (Partitions.sql), plus une partition par défaut
+--   pour un mois pas encore créé
+-- La clé primaire d'une table partitionnée inclut la colonne de partitionnement.
+
 CREATE TABLE Vente(
    Id_Vente SERIAL,
    DateVente TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -99,22 +115,25 @@ CREATE TABLE Vente(
         Le prix sera calculé par une vue.
    */
    Id_Utilisateur INT NOT NULL,
-   PRIMARY KEY(Id_Vente),
+   PRIMARY KEY(Id_Vente, DateVente),
    FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur)
-);
+) PARTITION BY RANGE (DateVente);
 
 -- Table LigneVente
+-- DateVente (recopiée de la vente) sert de clé de partitionnement : une vente et ses lignes
+-- tombent dans le même mois, et la clé étrangère composite vers Vente reste possible.
 CREATE TABLE LigneVente(
    Id_Vente INT NOT NULL,
+   DateVente TIMESTAMP NOT NULL,
    Id_Produit VARCHAR(20) NOT NULL,
    QteVendue INT NOT NULL CHECK (QteVendue > 0),
    Remise NUMERIC(5,2) DEFAULT 0 CHECK (Remise >= 0 AND Remise <= 100),
    PrixUnitaireVendu NUMERIC(10,2) NOT NULL CHECK (PrixUnitaireVendu >= 0),  -- Prix TTC d'une unité de ce produit figé lors de la vente.
    TauxTVA DECIMAL(5,2) DEFAULT 18.00,  -- Taux TVA au moment de la vente (pour historique)
-   PRIMARY KEY(Id_Vente, Id_Produit),
-   FOREIGN KEY(Id_Vente) REFERENCES Vente(Id_Vente) ON DELETE CASCADE,
+   PRIMARY KEY(Id_Vente, Id_Produit, DateVente),
+   FOREIGN KEY(Id_Vente, DateVente) REFERENCES Vente(Id_Vente, DateVente) ON DELETE CASCADE,
    FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit)
-);
+) PARTITION BY RANGE (DateVente);
 
 CREATE TABLE MouvementStock(
    Id_Mouvement SERIAL,
@@ -126,15 +145,16 @@ CREATE TABLE MouvementStock(
    Id_Vente INT,
    Id_Achat INT,
    Commentaire TEXT,
-   PRIMARY KEY(Id_Mouvement),
+   PRIMARY KEY(Id_Mouvement, DateMouvement),
    FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur),
    FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit),
-   FOREIGN KEY(Id_Vente) REFERENCES Vente(Id_Vente),
+   -- Id_Vente : pas de clé étrangère (Vente n'est unique que sur (Id_Vente, DateVente)) ;
+   -- ces lignes sont écrites par les triggers de vente.
    FOREIGN KEY(Id_Achat) REFERENCES Achat(Id_Achat),
    
    -- Contrainte : Impossible d'être lié à une Vente ET un Achat en même temps
    CHECK (NOT (Id_Vente IS NOT NULL AND Id_Achat IS NOT NULL))
-);
+) PARTITION BY RANGE (DateMouvement);
 
 -- Table Reçu
 CREATE TABLE Recu(
@@ -143,12 +163,124 @@ CREATE TABLE Recu(
    ModePaiement VARCHAR(20) NOT NULL CHECK (ModePaiement IN ('ESPECES', 'CARTE', 'CHEQUE', 'VIREMENT')),
    MontantTotal NUMERIC(10,2) NOT NULL CHECK (MontantTotal >= 0),
    Id_Utilisateur INT NOT NULL,
-   Id_Vente INT NOT NULL,
+   Id_Vente INT NOT NULL,  -- Existence de la vente vérifiée par trg_valider_recu (Vente est partitionnée)
+   DateVente TIMESTAMP NOT NULL,  -- Date de la vente (clé de partitionnement) : accès élagué à Vente/LigneVente
    PRIMARY KEY(Id_Recu),
-   FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur),
-   FOREIGN KEY(Id_Vente) REFERENCES Vente(Id_Vente)
+   FOREIGN KEY(Id_Utilisateur) REFERENCES Utilisateur(Id_Utilisateur)
+);
+
+-- Agrégats de ventes maintenus par triggers (voir Triggers_et_Fonctions.sql, section 13)
+-- Les tableaux de bord lisent ces tables : coût proportionnel au nombre de jours, pas de ventes.
+
+-- Lignes vendues par jour / heure / caissier / catégorie
+CREATE TABLE AgregatVenteCategorie(
+   Jour DATE NOT NULL,
+   Heure SMALLINT NOT NULL CHECK (Heure BETWEEN 0 AND 23),
+   Id_Utilisateur INT NOT NULL,
+   Id_Categorie INT NOT NULL,
+   NbLignes INT NOT NULL DEFAULT 0,
+   QteVendue INT NOT NULL DEFAULT 0,
+   MontantBrut NUMERIC(14,2) NOT NULL DEFAULT 0,  -- Σ QteVendue × PrixUnitaireVendu
+   MontantNet NUMERIC(14,2) NOT NULL DEFAULT 0,   -- Idem, remises déduites
+   PRIMARY KEY(Jour, Heure, Id_Utilisateur, Id_Categorie)
+);
+
+-- Tickets encaissés (Recu) par jour / heure / caissier
+-- Un ticket couvre plusieurs catégories : il n'est compté qu'ici, pas dans AgregatVenteCategorie.
+CREATE TABLE AgregatVenteCaisse(
+   Jour DATE NOT NULL,
+   Heure SMALLINT NOT NULL CHECK (Heure BETWEEN 0 AND 23),
+   Id_Utilisateur INT NOT NULL,
+   NbTickets INT NOT NULL DEFAULT 0,
+   MontantEncaisse NUMERIC(14,2) NOT NULL DEFAULT 0,
+   PRIMARY KEY(Jour, Heure, Id_Utilisateur)
+);
+
+CREATE INDEX idx_agregat_caisse_utilisateur ON AgregatVenteCaisse(Id_Utilisateur, Jour);
+
+-- Suivi des rafraîchissements des vues matérialisées (Database.refresh_materialized_views)
+-- Les ventes ajoutées sont détectées par filigrane sur Id_Vente (lacunes relues, voir
+-- fn_lacunes_filigrane) ; les autres modifications (annulation, prix d'achat moyen...)
+-- positionnent A_Rafraichir par trigger.
+CREATE TABLE EtatVueMaterialisee(
+   NomVue VARCHAR(63),
+   Dernier_Rafraichissement TIMESTAMP,
+   Duree_Ms INT,
+   Derniere_Vente_Vue INT NOT NULL DEFAULT 0,    -- Plus grand Id_Vente pris en compte
+   Lacunes_Vente INT[] NOT NULL DEFAULT '{}',    -- Id_Vente sous le filigrane pas encore visibles
+   A_Rafraichir BOOLEAN NOT NULL DEFAULT TRUE,
+   Jours_Rafraichis DATE[],                      -- Jours de vente touchés depuis le passage précédent
+   Derniere_Erreur TEXT,
+   PRIMARY KEY(NomVue)
 );
 
+-- Journal de stock quotidien : une ligne par produit et par jour
+-- Alimenté en continu par trigger (variations du jour) et complété chaque nuit par la clôture
+-- (fn_cloturer_stock_journalier) : stock à date, série et valorisation sans relire MouvementStock
+CREATE TABLE StockJournalier(
+   Id_Produit VARCHAR(20) NOT NULL,
+   Jour DATE NOT NULL,
+   StockOuverture INT NOT NULL,
+   Entrees INT NOT NULL DEFAULT 0,
+   Sorties INT NOT NULL DEFAULT 0,
+   StockCloture INT NOT NULL,
+   PMP NUMERIC(10,2) NOT NULL DEFAULT 0,         -- Prix d'achat moyen en fin de journée
+   PRIMARY KEY(Id_Produit, Jour),
+   FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit) ON DELETE CASCADE
+);
+
+-- Jours clôturés (toutes les lignes de StockJournalier présentes pour ce jour)
+CREATE TABLE ClotureStock(
+   Jour DATE NOT NULL,
+   Date_Cloture TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   NbProduits INT NOT NULL,
+   PRIMARY KEY(Jour)
+);
+
+-- Statistiques de demande par produit (fn_calculer_statistiques_demande, db/demand.py)
+-- Fenêtre glissante de 90 jours : vitesse de vente, écart-type journalier, délai fournisseur observé
+-- (DateAchat -> premier mouvement ENTREE de la réception), fréquence des ruptures.
+-- StockSecurite / PointCommande / QuantiteEconomique : calculés ensuite pour tous les produits à la
+-- fois (NumPy) ; NULL = à recalculer.
+CREATE TABLE StatistiqueDemande(
+   Id_Produit VARCHAR(20) NOT NULL,
+   JoursObserves SMALLINT NOT NULL,              -- Taille de la fenêtre (plus courte pour un produit récent)
+   Ventes30j INT NOT NULL DEFAULT 0,
+   VitesseJour NUMERIC(12,4) NOT NULL DEFAULT 0, -- Ventes moyennes par jour
+   EcartTypeJour NUMERIC(12,4) NOT NULL DEFAULT 0,
+   DelaiMoyenJours NUMERIC(8,2),                 -- NULL : aucune réception observée
+   EcartTypeDelai NUMERIC(8,2),
+   NbReceptions INT NOT NULL DEFAULT 0,
+   DernierAchat TIMESTAMP,
+   Id_Fournisseur_Habituel INT,                  -- Fournisseur de la dernière commande
+   Alertes90j INT NOT NULL DEFAULT 0,
+   JoursRupture90j INT NOT NULL DEFAULT 0,       -- Jours clôturés avec un stock nul (StockJournalier)
+   StockSecurite INT,
+   PointCommande INT,
+   QuantiteEconomique INT,
+   Date_Calcul TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   PRIMARY KEY(Id_Produit),
+   FOREIGN KEY(Id_Produit) REFERENCES Produit(Id_Produit) ON DELETE CASCADE,
+   FOREIGN KEY(Id_Fournisseur_Habituel) REFERENCES Fournisseur(Id_Fournisseur) ON DELETE SET NULL
+);
+
+-- Filigranes du calcul incrémental : seuls les produits vendus, reçus ou en alerte depuis le
+-- passage précédent sont recalculés (recalcul complet une fois par jour, la fenêtre glissant)
+CREATE TABLE EtatStatistiqueDemande(
+   Id BOOLEAN NOT NULL DEFAULT TRUE CHECK (Id),  -- Ligne unique
+   Derniere_Vente INT NOT NULL DEFAULT 0,        -- Plus grand Id_Vente pris en compte
+   Dernier_Mouvement INT NOT NULL DEFAULT 0,     -- Plus grand Id_Mouvement pris en compte
+   Derniere_Alerte INT NOT NULL DEFAULT 0,       -- Plus grand Id_Alerte pris en compte
+   Lacunes_Vente INT[] NOT NULL DEFAULT '{}',    -- Identifiants sous chaque filigrane pas encore
+   Lacunes_Mouvement INT[] NOT NULL DEFAULT '{}',-- visibles (transaction en cours), relus au
+   Lacunes_Alerte INT[] NOT NULL DEFAULT '{}',   -- passage suivant (fn_lacunes_filigrane)
+   Jour_Calcul_Complet DATE,
+   Dernier_Calcul TIMESTAMP,
+   PRIMARY KEY(Id)
+);
+
+INSERT INTO EtatStatistiqueDemande DEFAULT VALUES;
+
 -- Table de liaison Produit-Fournisseur
 CREATE TABLE fournir(
    Id_Produit VARCHAR(20),
@@ -173,20 +305,29 @@ CREATE INDEX idx_depense_date ON Depense(DateDepense);
 
 -- Table AlerteStock (Surveillance Auto)
 CREATE TABLE AlerteStock (
-    Id_Alerte SERIAL PRIMARY KEY,
+    Id_Alerte SERIAL,
     Id_Produit VARCHAR(20) NOT NULL REFERENCES Produit(Id_Produit) ON DELETE CASCADE,
     Stock_Au_Moment_Alerte INT NOT NULL,
     Seuil_Alerte_Vise INT NOT NULL,
     Priorite VARCHAR(20) DEFAULT 'MEDIUM' CHECK (Priorite IN ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')),
     Statut VARCHAR(20) DEFAULT 'NON_LUE' CHECK (Statut IN ('NON_LUE', 'VU', 'EN_COURS', 'COMMANDE_PASSEE', 'ARCHIVEE')),
     Commentaire TEXT,
-    Date_Creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    Date_Creation TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     Date_Traitement TIMESTAMP,
-    Id_Achat_Genere INTEGER REFERENCES Achat(Id_Achat)
-);
+    Id_Achat_Genere INTEGER REFERENCES Achat(Id_Achat),
+    PRIMARY KEY (Id_Alerte, Date_Creation)
+) PARTITION BY RANGE (Date_Creation);
 
 CREATE INDEX idx_alerte_statut_priorite ON AlerteStock(Statut, Priorite);
 
+-- Produits ayant une alerte ouverte (NON_LUE, VU, EN_COURS), tenue à jour par trigger sur AlerteStock.
+-- Anti-doublon de la surveillance du stock : INSERT ... ON CONFLICT DO NOTHING sur la clé primaire.
+-- (AlerteStock est partitionnée par Date_Creation : un index unique partiel sur Id_Produit y est impossible.)
+CREATE TABLE AlerteActive (
+    Id_Produit VARCHAR(20) NOT NULL REFERENCES Produit(Id_Produit) ON DELETE CASCADE,
+    PRIMARY KEY (Id_Produit)
+);
+
 
 
 -- SÉQUENCES
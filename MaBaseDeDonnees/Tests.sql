@@ -122,12 +122,12 @@ INSERT INTO fournir (Id_Produit, Id_Fournisseur, Quantite) VALUES
 
 -- 6. ACHATS (10 achats avec différents statuts)
 INSERT INTO Achat (DateAchat, Statut, Id_Utilisateur, Id_Fournisseur) VALUES
--- Achats REÇUS (pour tester le PMP et mouvements stock)
-(CURRENT_TIMESTAMP - INTERVAL '15 days', 'RECU', 5, 1),
-(CURRENT_TIMESTAMP - INTERVAL '12 days', 'RECU', 5, 2),
-(CURRENT_TIMESTAMP - INTERVAL '8 days', 'RECU', 5, 4),
-(CURRENT_TIMESTAMP - INTERVAL '5 days', 'RECU', 5, 6),
-(CURRENT_TIMESTAMP - INTERVAL '2 days', 'RECU', 5, 8),
+-- Achats à RECEVOIR (passés en RECU plus bas pour tester le PMP et mouvements stock)
+(CURRENT_TIMESTAMP - INTERVAL '15 days', 'EN_ATTENTE', 5, 1),
+(CURRENT_TIMESTAMP - INTERVAL '12 days', 'EN_ATTENTE', 5, 2),
+(CURRENT_TIMESTAMP - INTERVAL '8 days', 'EN_ATTENTE', 5, 4),
+(CURRENT_TIMESTAMP - INTERVAL '5 days', 'EN_ATTENTE', 5, 6),
+(CURRENT_TIMESTAMP - INTERVAL '2 days', 'EN_ATTENTE', 5, 8),
 -- Achats EN_ATTENTE (pour tester la vue alertes)
 (CURRENT_TIMESTAMP - INTERVAL '4 days', 'EN_ATTENTE', 5, 1),
 (CURRENT_TIMESTAMP - INTERVAL '1 day', 'EN_ATTENTE', 5, 4),
@@ -153,8 +153,40 @@ INSERT INTO LigneAchat (Id_Achat, Id_Produit, Quantite, PrixAchatNegocie) VALUES
 (7, 'PROD015', 25, 3200), (7, 'PROD019', 50, 800);
 
 -- Maintenant on met à jour les statuts pour déclencher les triggers PMP
+-- (une seule instruction : réception groupée de 5 achats)
+CREATE TEMP TABLE stock_avant_reception AS
+SELECT Id_Produit, StockActuel, COALESCE(QuantiteTotaleAchetee, 0) AS QuantiteTotaleAchetee FROM Produit;
+
 UPDATE Achat SET Statut = 'RECU' WHERE Id_Achat IN (1, 2, 3, 4, 5);
 
+-- Vérification : un mouvement ENTREE par ligne, stock incrémenté une seule fois
+DO $$
+DECLARE
+    v_mouvements INT;
+    v_ecarts INT;
+BEGIN
+    SELECT COUNT(*) INTO v_mouvements
+    FROM MouvementStock WHERE Type = 'ENTREE' AND Id_Achat IN (1, 2, 3, 4, 5);
+    IF v_mouvements <> 15 THEN
+        RAISE EXCEPTION 'Réception groupée : % mouvements ENTREE au lieu de 15', v_mouvements;
+    END IF;
+
+    SELECT COUNT(*) INTO v_ecarts
+    FROM LigneAchat la
+    JOIN Produit p ON p.Id_Produit = la.Id_Produit
+    JOIN stock_avant_reception s ON s.Id_Produit = la.Id_Produit
+    WHERE la.Id_Achat IN (1, 2, 3, 4, 5)
+      AND (p.StockActuel <> s.StockActuel + la.Quantite
+           OR p.QuantiteTotaleAchetee <> s.QuantiteTotaleAchetee + la.Quantite
+           OR p.DernierPrixAchat <> la.PrixAchatNegocie);
+    IF v_ecarts > 0 THEN
+        RAISE EXCEPTION 'Réception groupée : % produits avec un stock ou un PMP incorrect', v_ecarts;
+    END IF;
+END;
+$$;
+
+DROP TABLE stock_avant_reception;
+
 -- 8. VENTES (20 ventes sur plusieurs jours)
 INSERT INTO Vente (DateVente, Id_Utilisateur) VALUES
 -- Ventes d'il y a 7 jours
@@ -184,7 +216,10 @@ INSERT INTO Vente (DateVente, Id_Utilisateur) VALUES
 (CURRENT_TIMESTAMP - INTERVAL '5 minutes', 6);
 
 -- 9. LIGNES DE VENTE (avec et sans remises)
-INSERT INTO LigneVente (Id_Vente, Id_Produit, QteVendue, Remise) VALUES
+-- DateVente (clé de partitionnement) reprise de la vente
+INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise)
+SELECT l.Id_Vente, v.DateVente, l.Id_Produit, l.QteVendue, l.Remise
+FROM (VALUES
 -- Vente 1
 (1, 'PROD001', 3, 0), (1, 'PROD006', 2, 0), (1, 'PROD011', 1, 0),
 -- Vente 2
@@ -225,10 +260,12 @@ INSERT INTO LigneVente (Id_Vente, Id_Produit, QteVendue, Remise) VALUES
 (19, 'PROD006', 4, 0), (19, 'PROD014', 2, 0), (19, 'PROD032', 1, 0),
 -- Vente 20 (aujourd'hui - grosse vente)
 (20, 'PROD001', 8, 5), (20, 'PROD004', 12, 10), (20, 'PROD006', 6, 0), 
-(20, 'PROD011', 4, 0), (20, 'PROD021', 5, 0), (20, 'PROD036', 5, 0);
+(20, 'PROD011', 4, 0), (20, 'PROD021', 5, 0), (20, 'PROD036', 5, 0)
+) AS l(Id_Vente, Id_Produit, QteVendue, Remise)
+JOIN Vente v ON v.Id_Vente = l.Id_Vente;
 
 -- 10. REÇUS (pour les ventes)
-INSERT INTO Recu (DateEmission, ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente) 
+INSERT INTO Recu (DateEmission, ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente, DateVente) 
 SELECT 
     v.DateVente,
     CASE (v.Id_Vente % 4)
@@ -239,14 +276,15 @@ SELECT
     END,
     ROUND(SUM(lv.QteVendue * lv.PrixUnitaireVendu * (1 - COALESCE(lv.Remise, 0)/100.0)), 2),
     v.Id_Utilisateur,
-    v.Id_Vente
+    v.Id_Vente,
+    v.DateVente
 FROM Vente v
 JOIN LigneVente lv ON v.Id_Vente = lv.Id_Vente
 GROUP BY v.Id_Vente, v.DateVente, v.Id_Utilisateur;
 
 -- Rafraîchir les vues matérialisées
-REFRESH MATERIALIZED VIEW mv_stats_annuelles;
-REFRESH MATERIALIZED VIEW mv_stats_historiques;
+REFRESH MATERIALIZED VIEW CONCURRENTLY mv_stats_annuelles;
+REFRESH MATERIALIZED VIEW CONCURRENTLY mv_stats_historiques;
 
 -- VÉRIFICATIONS RAPIDES
 SELECT 'RÉSUMÉ DES DONNÉES INSÉRÉES' AS Info;
@@ -258,4 +296,300 @@ SELECT COUNT(*) AS Nb_Achats FROM Achat;
 SELECT COUNT(*) AS Nb_Ventes FROM Vente;
 SELECT COUNT(*) AS Nb_Lignes_Vente FROM LigneVente;
 SELECT COUNT(*) AS Nb_Reçus FROM Recu;
-SELECT COUNT(*) AS Nb_Mouvements_Stock FROM MouvementStock;
\ No newline at end of file
+SELECT COUNT(*) AS Nb_Mouvements_Stock FROM MouvementStock;
+-- VÉRIFICATION DU JOURNAL DE STOCK (StockJournalier)
+-- Chaque produit a sa ligne du jour, alignée sur le stock actuel ; le stock de la veille
+-- se déduit du journal sans relire MouvementStock.
+DO $$
+DECLARE
+    v_ecarts INT;
+BEGIN
+    SELECT COUNT(*) INTO v_ecarts
+    FROM Produit p
+    LEFT JOIN StockJournalier s ON s.Id_Produit = p.Id_Produit AND s.Jour = CURRENT_DATE
+    WHERE s.Id_Produit IS NULL
+       OR s.StockCloture <> p.StockActuel
+       OR s.StockOuverture + s.Entrees - s.Sorties <> s.StockCloture
+       OR fn_stock_a_date(p.Id_Produit, CURRENT_DATE) <> p.StockActuel
+       OR fn_stock_a_date(p.Id_Produit, CURRENT_DATE - 1) <> p.StockActuel - s.Entrees + s.Sorties;
+    IF v_ecarts > 0 THEN
+        RAISE EXCEPTION 'Journal de stock : % produits incohérents', v_ecarts;
+    END IF;
+END;
+$$;
+
+-- VÉRIFICATION DES STATISTIQUES DE DEMANDE (StatistiqueDemande)
+-- Calcul complet puis incrémental : une ligne par produit, ventes 30j conformes à LigneVente,
+-- un second passage sans nouvelle donnée ne recalcule rien, une vente en lacune est relue.
+DO $$
+DECLARE
+    v_nb INT;
+    v_ecarts INT;
+BEGIN
+    PERFORM fn_calculer_statistiques_demande(TRUE);
+
+    SELECT COUNT(*) INTO v_ecarts
+    FROM Produit p
+    LEFT JOIN StatistiqueDemande s ON s.Id_Produit = p.Id_Produit
+    WHERE s.Id_Produit IS NULL
+       OR s.VitesseJour < 0 OR s.EcartTypeJour < 0
+       OR s.Ventes30j <> (SELECT COALESCE(SUM(lv.QteVendue), 0) FROM LigneVente lv
+                          WHERE lv.Id_Produit = p.Id_Produit AND lv.DateVente >= CURRENT_DATE - 30);
+    IF v_ecarts > 0 THEN
+        RAISE EXCEPTION 'Statistiques de demande : % produits incohérents', v_ecarts;
+    END IF;
+
+    v_nb := fn_calculer_statistiques_demande();
+    IF v_nb <> 0 THEN
+        RAISE EXCEPTION 'Statistiques de demande : % produits recalculés sans nouvelle donnée', v_nb;
+    END IF;
+
+    -- Vente validée après le passage (lacune sous le filigrane) : relue au passage suivant
+    BEGIN
+        UPDATE EtatStatistiqueDemande
+        SET Lacunes_Vente = ARRAY(SELECT MAX(Id_Vente) FROM LigneVente);
+        v_nb := fn_calculer_statistiques_demande();
+        IF v_nb = 0 THEN
+            RAISE EXCEPTION 'Statistiques de demande : vente en lacune ignorée';
+        END IF;
+
+        RAISE EXCEPTION 'annulation_test';
+    EXCEPTION WHEN raise_exception THEN
+        IF SQLERRM <> 'annulation_test' THEN
+            RAISE;
+        END IF;
+    END;
+END;
+$$;
+
+-- VÉRIFICATION DE LA SURVEILLANCE DU STOCK (AlerteActive)
+-- AlerteActive liste exactement les produits ayant une alerte ouverte ; passer deux fois sous le seuil
+-- ne crée qu'une alerte, repasser au-dessus l'archive. Modifications de test annulées (sous-transaction).
+DO $$
+DECLARE
+    v_ecarts INT;
+    v_produit VARCHAR(20);
+    v_nb INT;
+BEGIN
+    SELECT COUNT(*) INTO v_ecarts
+    FROM Produit p
+    WHERE EXISTS (SELECT 1 FROM AlerteStock a
+                  WHERE a.Id_Produit = p.Id_Produit AND a.Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE'))
+       <> EXISTS (SELECT 1 FROM AlerteActive aa WHERE aa.Id_Produit = p.Id_Produit);
+    IF v_ecarts > 0 THEN
+        RAISE EXCEPTION 'AlerteActive : % produits désynchronisés', v_ecarts;
+    END IF;
+
+    SELECT Id_Produit INTO v_produit FROM Produit
+    WHERE StockAlerte > 0 AND StockActuel > StockAlerte
+      AND Id_Produit NOT IN (SELECT Id_Produit FROM AlerteActive)
+    ORDER BY Id_Produit
+    LIMIT 1;
+    IF v_produit IS NULL THEN
+        RETURN;
+    END IF;
+
+    BEGIN
+        UPDATE Produit SET StockActuel = StockAlerte WHERE Id_Produit = v_produit;
+        UPDATE Produit SET StockActuel = StockActuel - 1 WHERE Id_Produit = v_produit;
+        SELECT COUNT(*) INTO v_nb FROM AlerteStock WHERE Id_Produit = v_produit AND Statut = 'NON_LUE';
+        IF v_nb <> 1 THEN
+            RAISE EXCEPTION 'Surveillance du stock : % alertes ouvertes au lieu de 1', v_nb;
+        END IF;
+
+        UPDATE Produit SET StockActuel = StockAlerte + 10 WHERE Id_Produit = v_produit;
+        IF EXISTS (SELECT 1 FROM AlerteActive WHERE Id_Produit = v_produit)
+           OR EXISTS (SELECT 1 FROM AlerteStock WHERE Id_Produit = v_produit AND Statut = 'NON_LUE') THEN
+            RAISE EXCEPTION 'Surveillance du stock : alerte non archivée au réapprovisionnement';
+        END IF;
+
+        RAISE EXCEPTION 'annulation_test';
+    EXCEPTION WHEN raise_exception THEN
+        IF SQLERRM <> 'annulation_test' THEN
+            RAISE;
+        END IF;
+    END;
+END;
+$$;
+
+-- VÉRIFICATION DES AGRÉGATS DE VENTES (AgregatVenteCategorie / AgregatVenteCaisse)
+-- Après modification d'une ligne (quantité, remise), du caissier d'une vente encaissée et du
+-- montant d'un reçu, les agrégats doivent égaler le recalcul depuis l'historique
+-- (MontantNet à l'arrondi près). Modifications de test annulées (sous-transaction).
+DO $$
+DECLARE
+    v_vente RECORD;
+    v_ecarts INT;
+BEGIN
+    BEGIN
+        UPDATE LigneVente
+        SET QteVendue = QteVendue + 1, Remise = 10
+        WHERE (Id_Vente, Id_Produit) = (SELECT Id_Vente, Id_Produit FROM LigneVente
+                                        ORDER BY Id_Vente, Id_Produit LIMIT 1);
+
+        SELECT v.Id_Vente, v.Id_Utilisateur INTO v_vente
+        FROM Vente v
+        WHERE EXISTS (SELECT 1 FROM Recu r WHERE r.Id_Vente = v.Id_Vente)
+          AND EXISTS (SELECT 1 FROM LigneVente l WHERE l.Id_Vente = v.Id_Vente)
+        ORDER BY v.Id_Vente DESC
+        LIMIT 1;
+        UPDATE Vente
+        SET Id_Utilisateur = (SELECT MIN(Id_Utilisateur) FROM Utilisateur
+                              WHERE Id_Utilisateur <> v_vente.Id_Utilisateur)
+        WHERE Id_Vente = v_vente.Id_Vente;
+        UPDATE Recu SET MontantTotal = MontantTotal + 100 WHERE Id_Vente = v_vente.Id_Vente;
+
+        WITH attendu AS (
+            SELECT v.DateVente::date AS Jour, EXTRACT(HOUR FROM v.DateVente)::smallint AS Heure,
+                   v.Id_Utilisateur, p.Id_Categorie,
+                   COUNT(*) AS NbLignes, SUM(l.QteVendue) AS QteVendue,
+                   SUM(l.QteVendue * l.PrixUnitaireVendu) AS MontantBrut,
+                   SUM(l.QteVendue * l.PrixUnitaireVendu * (1 - COALESCE(l.Remise, 0) / 100.0)) AS MontantNet
+            FROM LigneVente l
+            JOIN Vente v ON v.Id_Vente = l.Id_Vente AND v.DateVente = l.DateVente
+            JOIN Produit p ON p.Id_Produit = l.Id_Produit
+            GROUP BY 1, 2, 3, 4
+        )
+        SELECT COUNT(*) INTO v_ecarts
+        FROM attendu e
+        FULL JOIN AgregatVenteCategorie a USING (Jour, Heure, Id_Utilisateur, Id_Categorie)
+        WHERE COALESCE(a.NbLignes, 0) <> COALESCE(e.NbLignes, 0)
+           OR COALESCE(a.QteVendue, 0) <> COALESCE(e.QteVendue, 0)
+           OR COALESCE(a.MontantBrut, 0) <> COALESCE(e.MontantBrut, 0)
+           OR ABS(COALESCE(a.MontantNet, 0) - COALESCE(e.MontantNet, 0)) > 0.01 * GREATEST(e.NbLignes, 1);
+        IF v_ecarts > 0 THEN
+            RAISE EXCEPTION 'AgregatVenteCategorie : % cases différentes du recalcul', v_ecarts;
+        END IF;
+
+        WITH attendu AS (
+            SELECT v.DateVente::date AS Jour, EXTRACT(HOUR FROM v.DateVente)::smallint AS Heure,
+                   v.Id_Utilisateur, COUNT(*) AS NbTickets, SUM(r.MontantTotal) AS MontantEncaisse
+            FROM Recu r
+            JOIN Vente v ON v.Id_Vente = r.Id_Vente
+            GROUP BY 1, 2, 3
+        )
+        SELECT COUNT(*) INTO v_ecarts
+        FROM attendu e
+        FULL JOIN AgregatVenteCaisse a USING (Jour, Heure, Id_Utilisateur)
+        WHERE COALESCE(a.NbTickets, 0) <> COALESCE(e.NbTickets, 0)
+           OR COALESCE(a.MontantEncaisse, 0) <> COALESCE(e.MontantEncaisse, 0);
+        IF v_ecarts > 0 THEN
+            RAISE EXCEPTION 'AgregatVenteCaisse : % cases différentes du recalcul', v_ecarts;
+        END IF;
+
+        RAISE EXCEPTION 'annulation_test';
+    EXCEPTION WHEN raise_exception THEN
+        IF SQLERRM <> 'annulation_test' THEN
+            RAISE;
+        END IF;
+    END;
+END;
+$$;
+
+-- VÉRIFICATION DES NOTIFICATIONS (trg_notifier_alerte sur AlerteStock partitionnée)
+-- La charge utile doit porter le nom logique 'alertestock', pas celui de la partition.
+-- pg_notify est remplacé le temps du test par une version qui enregistre la charge utile
+-- (schéma placé avant pg_catalog dans le search_path) ; le tout est annulé (sous-transaction).
+DO $$
+DECLARE
+    v_produit VARCHAR(20);
+    v_charge JSON;
+BEGIN
+    SELECT Id_Produit INTO v_produit FROM Produit ORDER BY Id_Produit LIMIT 1;
+
+    BEGIN
+        CREATE SCHEMA verif_notif;
+        CREATE TABLE verif_notif.capture (canal TEXT, charge TEXT);
+        CREATE FUNCTION verif_notif.pg_notify(TEXT, TEXT) RETURNS VOID
+            AS 'INSERT INTO verif_notif.capture VALUES ($1, $2)' LANGUAGE sql;
+        PERFORM set_config('search_path', 'verif_notif, pg_catalog, ' || current_setting('search_path'), TRUE);
+
+        INSERT INTO AlerteStock (Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Statut)
+        VALUES (v_produit, 0, 1, 'ARCHIVEE');
+
+        SELECT charge::json INTO v_charge FROM verif_notif.capture
+        WHERE canal = 'magasin_changements' AND charge::json ->> 'op' = 'INSERT';
+        IF v_charge IS NULL OR v_charge ->> 'table' <> 'alertestock' OR v_charge ->> 'id' IS NULL THEN
+            RAISE EXCEPTION 'Notification AlerteStock incorrecte : %', v_charge;
+        END IF;
+
+        RAISE EXCEPTION 'annulation_test';
+    EXCEPTION WHEN raise_exception THEN
+        IF SQLERRM <> 'annulation_test' THEN
+            RAISE;
+        END IF;
+    END;
+END;
+$$;
+
+-- VÉRIFICATION DES LACUNES DE FILIGRANE (fn_lacunes_filigrane)
+-- Les identifiants absents au-delà de l'ancien filigrane sont gardés, une lacune devenue visible
+-- ou trop ancienne (au-delà de la marge) est abandonnée.
+DO $$
+DECLARE
+    v_max INT;
+    v_lacunes INT[];
+BEGIN
+    SELECT COALESCE(MAX(Id_Vente), 0) INTO v_max FROM Vente;
+
+    v_lacunes := fn_lacunes_filigrane('vente', 'id_vente', v_max, ARRAY[v_max, v_max - 5000], v_max + 2);
+    IF v_lacunes IS DISTINCT FROM ARRAY[v_max + 1, v_max + 2] THEN
+        RAISE EXCEPTION 'Lacunes de filigrane incorrectes : %', v_lacunes;
+    END IF;
+END;
+$$;
+
+-- VÉRIFICATION DU PARTITIONNEMENT : élagage (EXPLAIN)
+-- Les requêtes « N derniers jours » ne doivent lire que les partitions des mois concernés.
+DO $$
+DECLARE
+    v_cas RECORD;
+    v_plan JSON;
+    v_lues TEXT[];
+    v_min TEXT;
+BEGIN
+    FOR v_cas IN
+        SELECT * FROM (VALUES
+            ('lignevente', 30, 'SELECT SUM(QteVendue) FROM LigneVente WHERE DateVente >= CURRENT_DATE - INTERVAL ''30 days'''),
+            ('mouvementstock', 30, 'SELECT COUNT(*) FROM MouvementStock WHERE DateMouvement >= CURRENT_DATE - INTERVAL ''30 days'''),
+            ('alertestock', 90, 'SELECT COUNT(*) FROM AlerteStock WHERE Date_Creation > CURRENT_DATE - INTERVAL ''90 days''')
+        ) AS t(nom_table, jours, requete)
+    LOOP
+        EXECUTE 'EXPLAIN (FORMAT JSON) ' || v_cas.requete INTO v_plan;
+
+        SELECT array_agg(m[1]) INTO v_lues
+        FROM regexp_matches(v_plan::text, '"Relation Name": "(' || v_cas.nom_table || '_\d{4}_\d{2})"', 'g') AS m;
+
+        v_min := v_cas.nom_table || '_' || to_char(CURRENT_DATE - v_cas.jours, 'YYYY_MM');
+        IF v_lues IS NULL OR EXISTS (SELECT 1 FROM unnest(v_lues) p WHERE p < v_min) THEN
+            RAISE EXCEPTION 'Élagage KO pour % : partitions lues %', v_cas.nom_table, v_lues;
+        END IF;
+        RAISE NOTICE 'Élagage OK pour % : %', v_cas.nom_table, v_lues;
+    END LOOP;
+END;
+$$;
+
+-- Contrôle d'un reçu (trg_valider_recu) : la date de la vente portée par Recu
+-- limite la lecture de LigneVente à une seule partition.
+DO $$
+DECLARE
+    v_recu RECORD;
+    v_plan JSON;
+    v_lues TEXT[];
+BEGIN
+    SELECT Id_Vente, DateVente INTO v_recu FROM Recu ORDER BY Id_Recu DESC LIMIT 1;
+
+    EXECUTE format(
+        'EXPLAIN (FORMAT JSON) SELECT SUM(QteVendue) FROM LigneVente WHERE Id_Vente = %s AND DateVente = %L',
+        v_recu.Id_Vente, v_recu.DateVente
+    ) INTO v_plan;
+
+    SELECT array_agg(m[1]) INTO v_lues
+    FROM regexp_matches(v_plan::text, '"Relation Name": "(lignevente_\d{4}_\d{2})"', 'g') AS m;
+
+    IF v_lues IS DISTINCT FROM ARRAY['lignevente_' || to_char(v_recu.DateVente, 'YYYY_MM')] THEN
+        RAISE EXCEPTION 'Élagage KO pour le reçu de la vente % : partitions lues %', v_recu.Id_Vente, v_lues;
+    END IF;
+    RAISE NOTICE 'Élagage OK pour le reçu : %', v_lues;
+END;
+$$;
@@ -17,6 +17,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_pre_remplir_prix ON LigneVente;
 CREATE TRIGGER trg_pre_remplir_prix
 BEFORE INSERT ON LigneVente
 FOR EACH ROW
@@ -53,6 +54,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_verifier_remise ON LigneVente;
 CREATE TRIGGER trg_verifier_remise
 BEFORE INSERT OR UPDATE OF Remise ON LigneVente
 FOR EACH ROW
@@ -60,66 +62,85 @@ EXECUTE FUNCTION fn_verifier_remise();
 
 
 -- 2. TRIGGER : Mise à Jour du Stock et Alerte Stock (APRÈS insertion vente)
+-- Version ensembliste : un seul passage par instruction INSERT, quel que soit le nombre de lignes
+-- (table de transition lignes_inserees), au lieu d'un SELECT FOR UPDATE + UPDATE + INSERT par ligne.
 
 CREATE OR REPLACE FUNCTION fn_maj_stock_vente()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_stock_actuel INT;
-    v_nouveau_stock INT;
-    v_stock_alerte INT;
-    v_id_utilisateur INT;
+    rec RECORD;
 BEGIN
-    -- Récupérer le stock actuel, l'alerte et l'utilisateur
-    SELECT StockActuel, StockAlerte INTO v_stock_actuel, v_stock_alerte
-    FROM Produit 
-    WHERE Id_Produit = NEW.Id_Produit
+    -- Verrouiller les produits concernés dans un ordre stable (évite les interblocages entre caisses)
+    PERFORM 1
+    FROM Produit p
+    WHERE p.Id_Produit IN (SELECT Id_Produit FROM lignes_inserees)
+    ORDER BY p.Id_Produit
     FOR UPDATE;
-	
-    SELECT Id_Utilisateur INTO v_id_utilisateur
-    FROM Vente 
-    WHERE Id_Vente = NEW.Id_Vente;
-    
-    -- Vérifier le stock disponible
-    IF v_stock_actuel < NEW.QteVendue THEN
+
+    -- Vérifier le stock disponible (quantités cumulées par produit, même message qu'auparavant)
+    SELECT p.Id_Produit, p.StockActuel, d.QteDemandee INTO rec
+    FROM Produit p
+    JOIN (
+        SELECT Id_Produit, SUM(QteVendue) AS QteDemandee
+        FROM lignes_inserees
+        GROUP BY Id_Produit
+    ) d ON d.Id_Produit = p.Id_Produit
+    WHERE p.StockActuel < d.QteDemandee
+    ORDER BY p.Id_Produit
+    LIMIT 1;
+
+    IF FOUND THEN
         RAISE EXCEPTION 'Stock insuffisant pour le produit ID: % (Stock: %, Demandé: %)', 
-                        NEW.Id_Produit, v_stock_actuel, NEW.QteVendue;
+                        rec.Id_Produit, rec.StockActuel, rec.QteDemandee;
     END IF;
 
-    -- Calculer le nouveau stock
-    v_nouveau_stock := v_stock_actuel - NEW.QteVendue;
-
-    -- Mettre à jour le stock du produit
-    UPDATE Produit 
-    SET StockActuel = v_nouveau_stock
-    WHERE Id_Produit = NEW.Id_Produit;
+    -- Mettre à jour le stock de tous les produits en une instruction
+    UPDATE Produit p
+    SET StockActuel = p.StockActuel - d.QteDemandee
+    FROM (
+        SELECT Id_Produit, SUM(QteVendue) AS QteDemandee
+        FROM lignes_inserees
+        GROUP BY Id_Produit
+    ) d
+    WHERE p.Id_Produit = d.Id_Produit;
 
     -- ALERTE STOCK : Vérifier si le stock devient critique
-    IF v_nouveau_stock <= v_stock_alerte THEN
+    FOR rec IN (
+        SELECT p.Id_Produit, p.StockActuel, p.StockAlerte
+        FROM Produit p
+        WHERE p.Id_Produit IN (SELECT Id_Produit FROM lignes_inserees)
+        AND p.StockActuel <= p.StockAlerte
+    )
+    LOOP
         RAISE NOTICE 'ALERTE : Stock critique pour le produit % (Stock: %, Seuil alerte: %)', 
-                     NEW.Id_Produit, v_nouveau_stock, v_stock_alerte;
-    END IF;
+                     rec.Id_Produit, rec.StockActuel, rec.StockAlerte;
+    END LOOP;
 
-    -- Créer un mouvement de stock
+    -- Créer les mouvements de stock
     INSERT INTO MouvementStock (
         DateMouvement, Type, Quantite, Id_Utilisateur, 
         Id_Produit, Id_Vente, Commentaire
-    ) VALUES (
+    )
+    SELECT
         CURRENT_TIMESTAMP, 
         'SORTIE', 
-        NEW.QteVendue,
-        v_id_utilisateur,
-        NEW.Id_Produit,
-        NEW.Id_Vente,
-        'Vente enregistrée - Produit: ' || NEW.Id_Produit
-    );
+        l.QteVendue,
+        v.Id_Utilisateur,
+        l.Id_Produit,
+        l.Id_Vente,
+        'Vente enregistrée - Produit: ' || l.Id_Produit
+    FROM lignes_inserees l
+    JOIN Vente v ON v.Id_Vente = l.Id_Vente AND v.DateVente = l.DateVente;
 
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_stock_vente ON LigneVente;
 CREATE TRIGGER trg_stock_vente
 AFTER INSERT ON LigneVente
-FOR EACH ROW
+REFERENCING NEW TABLE AS lignes_inserees
+FOR EACH STATEMENT
 EXECUTE FUNCTION fn_maj_stock_vente();
 
 
@@ -136,6 +157,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_verrou_prix ON LigneVente;
 CREATE TRIGGER trg_verrou_prix
 BEFORE UPDATE ON LigneVente
 FOR EACH ROW 
@@ -152,7 +174,8 @@ BEGIN
     -- Récupérer l'utilisateur de la vente
     SELECT Id_Utilisateur INTO v_id_utilisateur
     FROM Vente
-    WHERE Id_Vente = OLD.Id_Vente;
+    WHERE Id_Vente = OLD.Id_Vente
+    AND DateVente = OLD.DateVente;
 
     -- Rendre les produits au stock
     UPDATE Produit 
@@ -176,6 +199,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_annulation_vente ON LigneVente;
 CREATE TRIGGER trg_annulation_vente
 AFTER DELETE ON LigneVente
 FOR EACH ROW 
@@ -184,77 +208,90 @@ EXECUTE FUNCTION fn_retour_stock_annulation();
 
 -- 5. TRIGGER : Mise à Jour du Stock et PMP lors de Réception d'Achat
 
+-- Niveau instruction : une réception groupée (UPDATE ... WHERE Id_Achat = ANY(...)) met à jour
+-- chaque produit une seule fois et insère tous les mouvements en une requête.
+-- Mouvements attribués à l'utilisateur qui réceptionne (paramètre de transaction app.id_utilisateur),
+-- à défaut à l'auteur de la commande.
+
 CREATE OR REPLACE FUNCTION fn_maj_stock_et_pmp_achat()
 RETURNS TRIGGER AS $$
-DECLARE
-    rec RECORD;
-    v_ancien_pmp NUMERIC(10,2);
-    v_ancienne_qte INT;
 BEGIN
-    -- Seulement si le statut passe à 'RECU'
-    IF NEW.Statut = 'RECU' AND OLD.Statut != 'RECU' THEN
-        -- Parcourir toutes les lignes d'achat pour cet achat
-        FOR rec IN (
-            SELECT la.Id_Produit, la.Quantite, la.PrixAchatNegocie
-            FROM LigneAchat la
-            WHERE la.Id_Achat = NEW.Id_Achat
-        )
-        LOOP
-            -- Récupérer les anciennes valeurs
-            SELECT PrixAchatMoyen, QuantiteTotaleAchetee 
-            INTO v_ancien_pmp, v_ancienne_qte
-            FROM Produit
-            WHERE Id_Produit = rec.Id_Produit;
-
-            -- FORMULE PMP (Prix Moyen Pondéré) :
-            -- Nouveau PMP = (Ancien PMP × Ancienne Qté Totale + Prix Achat × Qté Achetée) 
-            --               / Nouvelle Qté Totale
-            UPDATE Produit
-            SET 
-                -- 1. Mettre à jour le stock physique
-                StockActuel = StockActuel + rec.Quantite,
-                
-                -- 2. Mettre à jour le dernier prix d'achat
-                DernierPrixAchat = rec.PrixAchatNegocie,
-                
-                -- 3. Incrémenter la quantité totale achetée (historique)
-                QuantiteTotaleAchetee = v_ancienne_qte + rec.Quantite,
-                
-                -- 4. Calculer le nouveau PMP
-                PrixAchatMoyen = 
-                    CASE 
-                        -- Si c'est le premier achat
-                        WHEN v_ancienne_qte = 0 THEN rec.PrixAchatNegocie
-                        -- Sinon, appliquer la formule PMP
-                        ELSE (
-                            (v_ancien_pmp * v_ancienne_qte) + 
-                            (rec.PrixAchatNegocie * rec.Quantite)
-                        ) / (v_ancienne_qte + rec.Quantite)
-                    END
-            WHERE Id_Produit = rec.Id_Produit;
-
-            -- Créer un mouvement de stock
-            INSERT INTO MouvementStock (
-                DateMouvement, Type, Quantite, Id_Utilisateur,
-                Id_Produit, Id_Achat, Commentaire
-            ) VALUES (
-                CURRENT_TIMESTAMP,
-                'ENTREE',
-                rec.Quantite,
-                NEW.Id_Utilisateur,
-                rec.Id_Produit,
-                NEW.Id_Achat,
-                'Achat reçu - Prix unitaire: ' || rec.PrixAchatNegocie
-            );
-        END LOOP;
-    END IF;
-    RETURN NEW;
+    WITH recus AS (
+        -- Seulement les achats dont le statut passe à 'RECU'
+        SELECT n.Id_Achat,
+               COALESCE(NULLIF(current_setting('app.id_utilisateur', true), '')::int,
+                        n.Id_Utilisateur) AS Id_Utilisateur
+        FROM achats_modifies n
+        JOIN achats_avant o ON o.Id_Achat = n.Id_Achat
+        WHERE n.Statut = 'RECU' AND o.Statut != 'RECU'
+    ),
+    lignes AS (
+        SELECT la.Id_Achat, la.Id_Produit, la.Quantite, la.PrixAchatNegocie, r.Id_Utilisateur
+        FROM recus r
+        JOIN LigneAchat la ON la.Id_Achat = r.Id_Achat
+    ),
+    par_produit AS (
+        -- Un produit présent dans plusieurs achats reçus ensemble : cumul, dernier prix = achat le plus récent
+        SELECT Id_Produit,
+               SUM(Quantite) AS Quantite,
+               SUM(Quantite * PrixAchatNegocie) AS Montant,
+               (array_agg(PrixAchatNegocie ORDER BY Id_Achat DESC))[1] AS DernierPrix
+        FROM lignes
+        GROUP BY Id_Produit
+    ),
+    maj_produits AS (
+        -- FORMULE PMP (Prix Moyen Pondéré) :
+        -- Nouveau PMP = (Ancien PMP × Ancienne Qté Totale + Σ Prix Achat × Qté Achetée)
+        --               / Nouvelle Qté Totale
+        UPDATE Produit p
+        SET 
+            -- 1. Mettre à jour le stock physique
+            StockActuel = p.StockActuel + pp.Quantite,
+            
+            -- 2. Mettre à jour le dernier prix d'achat
+            DernierPrixAchat = pp.DernierPrix,
+            
+            -- 3. Incrémenter la quantité totale achetée (historique)
+            QuantiteTotaleAchetee = COALESCE(p.QuantiteTotaleAchetee, 0) + pp.Quantite,
+            
+            -- 4. Calculer le nouveau PMP
+            PrixAchatMoyen = 
+                CASE 
+                    -- Si c'est le premier achat
+                    WHEN COALESCE(p.QuantiteTotaleAchetee, 0) = 0 THEN pp.Montant / pp.Quantite
+                    -- Sinon, appliquer la formule PMP
+                    ELSE (
+                        (p.PrixAchatMoyen * p.QuantiteTotaleAchetee) + pp.Montant
+                    ) / (p.QuantiteTotaleAchetee + pp.Quantite)
+                END
+        FROM par_produit pp
+        WHERE p.Id_Produit = pp.Id_Produit
+    )
+    -- Créer les mouvements de stock (un par ligne d'achat)
+    INSERT INTO MouvementStock (
+        DateMouvement, Type, Quantite, Id_Utilisateur,
+        Id_Produit, Id_Achat, Commentaire
+    )
+    SELECT
+        CURRENT_TIMESTAMP,
+        'ENTREE',
+        Quantite,
+        Id_Utilisateur,
+        Id_Produit,
+        Id_Achat,
+        'Achat reçu - Prix unitaire: ' || PrixAchatNegocie
+    FROM lignes;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Les tables de transition interdisent UPDATE OF Statut : le filtre sur le statut est dans la fonction
+DROP TRIGGER IF EXISTS trg_stock_et_pmp_achat ON Achat;
 CREATE TRIGGER trg_stock_et_pmp_achat
-AFTER UPDATE OF Statut ON Achat
-FOR EACH ROW
+AFTER UPDATE ON Achat
+REFERENCING OLD TABLE AS achats_avant NEW TABLE AS achats_modifies
+FOR EACH STATEMENT
 EXECUTE FUNCTION fn_maj_stock_et_pmp_achat();
 
 
@@ -265,12 +302,18 @@ RETURNS TRIGGER AS $$
 DECLARE
     total_vente NUMERIC(10,2);
 BEGIN
+    -- Vente existante (remplace la clé étrangère : Vente est partitionnée sur DateVente).
+    -- La date de la vente limite la recherche à sa partition.
+    IF NOT EXISTS (SELECT 1 FROM Vente WHERE Id_Vente = NEW.Id_Vente AND DateVente = NEW.DateVente) THEN
+        RAISE EXCEPTION 'Vente % du % inexistante pour ce reçu', NEW.Id_Vente, NEW.DateVente;
+    END IF;
+
     -- Calculer le total de la vente
     SELECT COALESCE(SUM(
         lv.QteVendue * lv.PrixUnitaireVendu * (1 - COALESCE(lv.Remise, 0) / 100.0)
     ), 0) INTO total_vente
     FROM LigneVente lv
-    WHERE lv.Id_Vente = NEW.Id_Vente;
+    WHERE lv.Id_Vente = NEW.Id_Vente AND lv.DateVente = NEW.DateVente;
 
     -- Vérifier la correspondance (tolérance de 0.01 pour arrondis)
     IF ABS(NEW.MontantTotal - total_vente) > 0.01 THEN
@@ -282,6 +325,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_valider_recu ON Recu;
 CREATE TRIGGER trg_valider_recu
 BEFORE INSERT ON Recu
 FOR EACH ROW
@@ -307,6 +351,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_check_role_achat ON Achat;
 CREATE TRIGGER trg_check_role_achat
 BEFORE INSERT ON Achat
 FOR EACH ROW 
@@ -326,6 +371,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_set_date_ajout ON Produit;
 CREATE TRIGGER trg_set_date_ajout
 BEFORE INSERT ON Produit
 FOR EACH ROW
@@ -343,6 +389,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trg_verrou_achat ON Achat;
 CREATE TRIGGER trg_verrou_achat
 BEFORE UPDATE OR DELETE ON Achat
 FOR EACH ROW
@@ -350,6 +397,13 @@ WHEN (OLD.Statut = 'RECU')
 EXECUTE FUNCTION fn_verrou_achat_recu();
 
 -- 10. TRIGGER : Surveillance intelligente du stock (AlerteStock)
+-- Niveau instruction (tables de transition) : un passage par UPDATE de Produit, quel que soit le
+-- nombre de lignes vendues ou reçues, au lieu d'un NOT EXISTS sur AlerteStock par produit modifié.
+-- Seuls les produits dont le stock a changé sont examinés :
+-- - sous le seuil : alerte créée si le produit n'est pas déjà dans AlerteActive (INSERT ... ON CONFLICT
+--   DO NOTHING sur sa clé primaire) ; rien n'est lu dans AlerteStock
+-- - repassés au-dessus du seuil : alertes en attente archivées (auto-guérison)
+-- Une mise à jour qui laisse le produit au-dessus du seuil ne fait aucune requête.
 
 -- Nettoyage préventif
 DROP TRIGGER IF EXISTS trg_surveillance_stock ON Produit;
@@ -358,61 +412,928 @@ DROP FUNCTION IF EXISTS fn_surveillance_stock_intelligente();
 CREATE OR REPLACE FUNCTION fn_surveillance_stock_intelligente()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_priorite VARCHAR(20);
+    v_sous_seuil VARCHAR(20)[];
+    v_gueris VARCHAR(20)[];
 BEGIN
+    SELECT array_agg(n.Id_Produit) FILTER (WHERE n.StockActuel <= n.StockAlerte),
+           array_agg(n.Id_Produit) FILTER (WHERE n.StockActuel > n.StockAlerte
+                                             AND o.StockActuel <= o.StockAlerte)
+    INTO v_sous_seuil, v_gueris
+    FROM produits_modifies n
+    JOIN produits_avant o ON o.Id_Produit = n.Id_Produit
+    WHERE n.StockActuel <> o.StockActuel;
+
     -- CAS 1 : LE STOCK PASSE SOUS LE SEUIL (Alerte)
-    IF NEW.StockActuel <= NEW.StockAlerte THEN
-        
-        -- Anti-Spam : On ne crée une alerte que si aucune n'est déjà active
-        IF NOT EXISTS (
-            SELECT 1 FROM AlerteStock 
-            WHERE Id_Produit = NEW.Id_Produit 
-            AND Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE')
-        ) THEN
-            -- Calcul de priorité
-            IF NEW.StockActuel = 0 THEN 
-                v_priorite := 'CRITICAL';
-            ELSIF NEW.StockActuel <= (NEW.StockAlerte / 2) THEN 
-                v_priorite := 'HIGH';
-            ELSE 
-                v_priorite := 'MEDIUM';
-            END IF;
-
-            INSERT INTO AlerteStock (
-                Id_Produit, 
-                Stock_Au_Moment_Alerte, 
-                Seuil_Alerte_Vise, 
-                Priorite, 
-                Commentaire
-            ) VALUES (
-                NEW.Id_Produit, 
-                NEW.StockActuel, 
-                NEW.StockAlerte, 
-                v_priorite,
-                'Alerte automatique : Stock critique détecté.'
-            );
-        END IF;
+    -- Anti-Spam : une seule alerte active par produit (AlerteActive)
+    IF v_sous_seuil IS NOT NULL THEN
+        WITH nouveaux AS (
+            INSERT INTO AlerteActive (Id_Produit)
+            SELECT unnest(v_sous_seuil)
+            ON CONFLICT (Id_Produit) DO NOTHING
+            RETURNING Id_Produit
+        )
+        INSERT INTO AlerteStock (Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Priorite, Commentaire)
+        SELECT n.Id_Produit,
+               n.StockActuel,
+               n.StockAlerte,
+               CASE
+                   WHEN n.StockActuel = 0 THEN 'CRITICAL'
+                   WHEN n.StockActuel <= (n.StockAlerte / 2) THEN 'HIGH'
+                   ELSE 'MEDIUM'
+               END,
+               'Alerte automatique : Stock critique détecté.'
+        FROM produits_modifies n
+        JOIN nouveaux nv ON nv.Id_Produit = n.Id_Produit;
+    END IF;
 
     -- CAS 2 : LE STOCK REPASSE AU-DESSUS DU SEUIL (Auto-guérison)
-    ELSIF NEW.StockActuel > NEW.StockAlerte 
-        AND OLD.StockActuel <= OLD.StockAlerte THEN
-        
-        -- On archive automatiquement les alertes qui étaient en attente
+    -- On archive automatiquement les alertes qui étaient en attente
+    IF v_gueris IS NOT NULL THEN
         UPDATE AlerteStock
         SET Statut = 'ARCHIVEE',
             Date_Traitement = CURRENT_TIMESTAMP,
             Commentaire = COALESCE(Commentaire, '') || ' [Fermeture automatique : Stock réapprovisionné]'
-        WHERE Id_Produit = NEW.Id_Produit 
-        AND Statut IN ('NON_LUE', 'VU');
-        
+        WHERE Id_Produit = ANY(v_gueris)
+          AND Statut IN ('NON_LUE', 'VU');
     END IF;
 
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Les tables de transition interdisent UPDATE OF StockActuel : le filtre est dans la fonction
 CREATE TRIGGER trg_surveillance_stock
-AFTER UPDATE OF StockActuel ON Produit
-FOR EACH ROW
+AFTER UPDATE ON Produit
+REFERENCING OLD TABLE AS produits_avant NEW TABLE AS produits_modifies
+FOR EACH STATEMENT
 EXECUTE FUNCTION fn_surveillance_stock_intelligente();
 
+-- Suivi de AlerteActive : un produit y figure tant qu'il a au moins une alerte ouverte,
+-- quel que soit le chemin (surveillance, alerte manuelle, traitement, commande, réception)
+CREATE OR REPLACE FUNCTION fn_suivre_alertes_actives()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO AlerteActive (Id_Produit)
+        SELECT DISTINCT Id_Produit FROM alertes_apres
+        WHERE Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE')
+        ON CONFLICT (Id_Produit) DO NOTHING;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM AlerteActive aa
+        WHERE aa.Id_Produit IN (SELECT Id_Produit FROM alertes_avant)
+          AND NOT EXISTS (
+              SELECT 1 FROM AlerteStock a
+              WHERE a.Id_Produit = aa.Id_Produit
+                AND a.Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE')
+          );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_alertes_actives_ajout ON AlerteStock;
+CREATE TRIGGER trg_alertes_actives_ajout
+AFTER INSERT ON AlerteStock
+REFERENCING NEW TABLE AS alertes_apres
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_suivre_alertes_actives();
+
+DROP TRIGGER IF EXISTS trg_alertes_actives_maj ON AlerteStock;
+CREATE TRIGGER trg_alertes_actives_maj
+AFTER UPDATE ON AlerteStock
+REFERENCING OLD TABLE AS alertes_avant NEW TABLE AS alertes_apres
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_suivre_alertes_actives();
+
+DROP TRIGGER IF EXISTS trg_alertes_actives_suppr ON AlerteStock;
+CREATE TRIGGER trg_alertes_actives_suppr
+AFTER DELETE ON AlerteStock
+REFERENCING OLD TABLE AS alertes_avant
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_suivre_alertes_actives();
+
+-- Reconstruction complète (installation, chargement en masse sans triggers)
+CREATE OR REPLACE FUNCTION fn_reconstruire_alertes_actives()
+RETURNS INT AS $$
+DECLARE
+    v_nb INT;
+BEGIN
+    LOCK TABLE AlerteActive IN EXCLUSIVE MODE;
+    DELETE FROM AlerteActive;
+    INSERT INTO AlerteActive (Id_Produit)
+    SELECT DISTINCT Id_Produit FROM AlerteStock
+    WHERE Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE');
+    GET DIAGNOSTICS v_nb = ROW_COUNT;
+    RETURN v_nb;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT fn_reconstruire_alertes_actives();
+
+
+-- 11. FONCTION : Encaissement d'une vente complète en un seul appel
+-- p_lignes : tableau JSON [{"id": "PROD001", "qte": 2, "remise": 0, "prix_unitaire": 1200, "taux_tva": 18}, ...]
+-- Vente, lignes (INSERT multi-lignes) et reçu sont créés dans la même instruction côté serveur.
+-- Retourne l'Id_Vente créé ; les erreurs des triggers (stock insuffisant, remise, montant) remontent telles quelles.
+
+CREATE OR REPLACE FUNCTION fn_enregistrer_vente(
+    p_id_utilisateur INT,
+    p_mode_paiement VARCHAR(20),
+    p_lignes JSONB
+)
+RETURNS INT AS $$
+DECLARE
+    v_id_vente INT;
+    v_date_vente TIMESTAMP;
+    v_total NUMERIC(12,2);
+BEGIN
+    INSERT INTO Vente (Id_Utilisateur)
+    VALUES (p_id_utilisateur)
+    RETURNING Id_Vente, DateVente INTO v_id_vente, v_date_vente;
+
+    INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise, PrixUnitaireVendu, TauxTVA)
+    SELECT v_id_vente, v_date_vente, l.id, l.qte, COALESCE(l.remise, 0), l.prix_unitaire, COALESCE(l.taux_tva, 18.00)
+    FROM jsonb_to_recordset(p_lignes) AS l(
+        id VARCHAR(20), qte INT, remise NUMERIC(5,2), prix_unitaire NUMERIC(10,2), taux_tva NUMERIC(5,2)
+    );
+
+    -- Total calculé sur les prix du panier (contrôlé ensuite par trg_valider_recu)
+    SELECT COALESCE(SUM(l.qte * l.prix_unitaire * (1 - COALESCE(l.remise, 0) / 100.0)), 0) INTO v_total
+    FROM jsonb_to_recordset(p_lignes) AS l(qte INT, remise NUMERIC(5,2), prix_unitaire NUMERIC(10,2));
+
+    INSERT INTO Recu (ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente, DateVente)
+    VALUES (p_mode_paiement, v_total, p_id_utilisateur, v_id_vente, v_date_vente);
+
+    RETURN v_id_vente;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 12. TRIGGER : Notification des changements aux postes clients (LISTEN/NOTIFY)
+-- Charge utile compacte sur le canal 'magasin_changements' :
+--   {"table": "produit", "op": "UPDATE", "id": "PROD001", "cols": ["stockactuel"]}
+-- TG_ARGV[0] = nom logique (en minuscules) de la table, TG_ARGV[1] = colonne identifiant.
+-- Le nom est passé en argument : sur une table partitionnée (AlerteStock), le trigger
+-- s'exécute sur la partition et TG_TABLE_NAME vaut 'alertestock_AAAA_MM'.
+-- Les UPDATE sans changement effectif ne notifient pas.
+
+CREATE OR REPLACE FUNCTION fn_notifier_changement()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ligne JSONB;
+    v_cols TEXT[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_ligne := to_jsonb(OLD);
+    ELSE
+        v_ligne := to_jsonb(NEW);
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(n.key ORDER BY n.key) INTO v_cols
+        FROM jsonb_each(v_ligne) n
+        WHERE to_jsonb(OLD) -> n.key IS DISTINCT FROM n.value;
+
+        IF v_cols IS NULL THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('magasin_changements', json_build_object(
+        'table', TG_ARGV[0],
+        'op', TG_OP,
+        'id', v_ligne ->> TG_ARGV[1],
+        'cols', v_cols
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notifier_produit ON Produit;
+CREATE TRIGGER trg_notifier_produit
+AFTER INSERT OR UPDATE OR DELETE ON Produit
+FOR EACH ROW
+EXECUTE FUNCTION fn_notifier_changement('produit', 'id_produit');
+
+DROP TRIGGER IF EXISTS trg_notifier_alerte ON AlerteStock;
+CREATE TRIGGER trg_notifier_alerte
+AFTER INSERT OR UPDATE OR DELETE ON AlerteStock
+FOR EACH ROW
+EXECUTE FUNCTION fn_notifier_changement('alertestock', 'id_alerte');
+
+DROP TRIGGER IF EXISTS trg_notifier_achat ON Achat;
+CREATE TRIGGER trg_notifier_achat
+AFTER INSERT OR UPDATE OR DELETE ON Achat
+FOR EACH ROW
+EXECUTE FUNCTION fn_notifier_changement('achat', 'id_achat');
+
+
+-- 13. TRIGGERS : Agrégats de ventes incrémentaux (AgregatVenteCategorie / AgregatVenteCaisse)
+-- Chaque INSERT ou DELETE de lignes de vente / reçus ajoute (ou retranche) sa contribution
+-- en une instruction ensembliste (tables de transition), avec jour et heure tirés de Vente.DateVente.
+-- Un UPDATE retranche les anciennes lignes et ajoute les nouvelles (quantité, remise, produit) ;
+-- de même pour une vente dont la date ou le caissier change (lignes et reçus déplacés).
+-- L'annulation d'une vente passe par trg_annulation_vente_lignes, qui supprime les lignes
+-- tant que la vente existe encore (la suppression en cascade ne verrait plus Vente).
+
+CREATE OR REPLACE FUNCTION fn_agreger_lignes_vente()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_signe INT := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+BEGIN
+    INSERT INTO AgregatVenteCategorie AS a (
+        Jour, Heure, Id_Utilisateur, Id_Categorie,
+        NbLignes, QteVendue, MontantBrut, MontantNet
+    )
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        p.Id_Categorie,
+        v_signe * COUNT(*),
+        v_signe * SUM(l.QteVendue),
+        v_signe * SUM(l.QteVendue * l.PrixUnitaireVendu),
+        v_signe * SUM(l.QteVendue * l.PrixUnitaireVendu * (1 - COALESCE(l.Remise, 0) / 100.0))
+    FROM lignes l
+    JOIN Vente v ON v.Id_Vente = l.Id_Vente AND v.DateVente = l.DateVente
+    JOIN Produit p ON p.Id_Produit = l.Id_Produit
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4  -- Ordre de verrouillage stable entre caisses
+    ON CONFLICT (Jour, Heure, Id_Utilisateur, Id_Categorie) DO UPDATE
+    SET NbLignes = a.NbLignes + EXCLUDED.NbLignes,
+        QteVendue = a.QteVendue + EXCLUDED.QteVendue,
+        MontantBrut = a.MontantBrut + EXCLUDED.MontantBrut,
+        MontantNet = a.MontantNet + EXCLUDED.MontantNet;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_lignes_ajout ON LigneVente;
+CREATE TRIGGER trg_agregat_lignes_ajout
+AFTER INSERT ON LigneVente
+REFERENCING NEW TABLE AS lignes
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_lignes_vente();
+
+DROP TRIGGER IF EXISTS trg_agregat_lignes_suppression ON LigneVente;
+CREATE TRIGGER trg_agregat_lignes_suppression
+AFTER DELETE ON LigneVente
+REFERENCING OLD TABLE AS lignes
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_lignes_vente();
+
+
+CREATE OR REPLACE FUNCTION fn_agreger_lignes_vente_modifiees()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO AgregatVenteCategorie AS a (
+        Jour, Heure, Id_Utilisateur, Id_Categorie,
+        NbLignes, QteVendue, MontantBrut, MontantNet
+    )
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        p.Id_Categorie,
+        SUM(l.signe),
+        SUM(l.signe * l.QteVendue),
+        SUM(l.signe * l.QteVendue * l.PrixUnitaireVendu),
+        SUM(l.signe * l.QteVendue * l.PrixUnitaireVendu * (1 - COALESCE(l.Remise, 0) / 100.0))
+    FROM (
+        SELECT -1 AS signe, o.Id_Vente, o.DateVente, o.Id_Produit, o.QteVendue, o.PrixUnitaireVendu, o.Remise
+        FROM anciennes o
+        UNION ALL
+        SELECT 1, n.Id_Vente, n.DateVente, n.Id_Produit, n.QteVendue, n.PrixUnitaireVendu, n.Remise
+        FROM nouvelles n
+    ) l
+    JOIN Vente v ON v.Id_Vente = l.Id_Vente AND v.DateVente = l.DateVente
+    JOIN Produit p ON p.Id_Produit = l.Id_Produit
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (Jour, Heure, Id_Utilisateur, Id_Categorie) DO UPDATE
+    SET NbLignes = a.NbLignes + EXCLUDED.NbLignes,
+        QteVendue = a.QteVendue + EXCLUDED.QteVendue,
+        MontantBrut = a.MontantBrut + EXCLUDED.MontantBrut,
+        MontantNet = a.MontantNet + EXCLUDED.MontantNet;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- (Pas de liste de colonnes : incompatible avec les tables de transition)
+DROP TRIGGER IF EXISTS trg_agregat_lignes_modification ON LigneVente;
+CREATE TRIGGER trg_agregat_lignes_modification
+AFTER UPDATE ON LigneVente
+REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_lignes_vente_modifiees();
+
+
+CREATE OR REPLACE FUNCTION fn_agreger_recus()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_signe INT := CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END;
+BEGIN
+    INSERT INTO AgregatVenteCaisse AS a (Jour, Heure, Id_Utilisateur, NbTickets, MontantEncaisse)
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        v_signe * COUNT(*),
+        v_signe * SUM(r.MontantTotal)
+    FROM recus r
+    JOIN Vente v ON v.Id_Vente = r.Id_Vente AND v.DateVente = r.DateVente
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (Jour, Heure, Id_Utilisateur) DO UPDATE
+    SET NbTickets = a.NbTickets + EXCLUDED.NbTickets,
+        MontantEncaisse = a.MontantEncaisse + EXCLUDED.MontantEncaisse;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_recus_ajout ON Recu;
+CREATE TRIGGER trg_agregat_recus_ajout
+AFTER INSERT ON Recu
+REFERENCING NEW TABLE AS recus
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_recus();
+
+DROP TRIGGER IF EXISTS trg_agregat_recus_suppression ON Recu;
+CREATE TRIGGER trg_agregat_recus_suppression
+AFTER DELETE ON Recu
+REFERENCING OLD TABLE AS recus
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_recus();
+
+
+CREATE OR REPLACE FUNCTION fn_agreger_recus_modifies()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO AgregatVenteCaisse AS a (Jour, Heure, Id_Utilisateur, NbTickets, MontantEncaisse)
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        SUM(r.signe),
+        SUM(r.signe * r.MontantTotal)
+    FROM (
+        SELECT -1 AS signe, o.Id_Vente, o.DateVente, o.MontantTotal FROM anciennes o
+        UNION ALL
+        SELECT 1, n.Id_Vente, n.DateVente, n.MontantTotal FROM nouvelles n
+    ) r
+    JOIN Vente v ON v.Id_Vente = r.Id_Vente AND v.DateVente = r.DateVente
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (Jour, Heure, Id_Utilisateur) DO UPDATE
+    SET NbTickets = a.NbTickets + EXCLUDED.NbTickets,
+        MontantEncaisse = a.MontantEncaisse + EXCLUDED.MontantEncaisse;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_recus_modification ON Recu;
+CREATE TRIGGER trg_agregat_recus_modification
+AFTER UPDATE ON Recu
+REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_recus_modifies();
+
+
+-- Vente dont la date ou le caissier change : ses lignes et reçus passent de l'ancienne
+-- case (jour, heure, caissier) à la nouvelle. Les lignes gardent la date de la vente
+-- (clé étrangère composite), elles sont donc lues avec la nouvelle date.
+-- Le reçu porte aussi la date de la vente : une vente encaissée ne change pas de date.
+CREATE OR REPLACE FUNCTION fn_agreger_ventes_modifiees()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM anciennes o
+        JOIN nouvelles n ON n.Id_Vente = o.Id_Vente
+        JOIN Recu r ON r.Id_Vente = o.Id_Vente AND r.DateVente = o.DateVente
+        WHERE n.DateVente <> o.DateVente
+    ) THEN
+        RAISE EXCEPTION 'Date d''une vente encaissée non modifiable (annuler le reçu d''abord)';
+    END IF;
+
+    INSERT INTO AgregatVenteCategorie AS a (
+        Jour, Heure, Id_Utilisateur, Id_Categorie,
+        NbLignes, QteVendue, MontantBrut, MontantNet
+    )
+    WITH modifiees AS (
+        SELECT o.DateVente AS AncienneDate, o.Id_Utilisateur AS AncienUtilisateur, n.*
+        FROM anciennes o
+        JOIN nouvelles n ON n.Id_Vente = o.Id_Vente
+        WHERE (o.DateVente, o.Id_Utilisateur) IS DISTINCT FROM (n.DateVente, n.Id_Utilisateur)
+    ),
+    cases AS (
+        SELECT -1 AS signe, Id_Vente, DateVente AS DateLignes, AncienneDate AS DateVente,
+               AncienUtilisateur AS Id_Utilisateur
+        FROM modifiees
+        UNION ALL
+        SELECT 1, Id_Vente, DateVente, DateVente, Id_Utilisateur
+        FROM modifiees
+    )
+    SELECT
+        c.DateVente::date,
+        EXTRACT(HOUR FROM c.DateVente)::smallint,
+        c.Id_Utilisateur,
+        p.Id_Categorie,
+        SUM(c.signe),
+        SUM(c.signe * l.QteVendue),
+        SUM(c.signe * l.QteVendue * l.PrixUnitaireVendu),
+        SUM(c.signe * l.QteVendue * l.PrixUnitaireVendu * (1 - COALESCE(l.Remise, 0) / 100.0))
+    FROM cases c
+    JOIN LigneVente l ON l.Id_Vente = c.Id_Vente AND l.DateVente = c.DateLignes
+    JOIN Produit p ON p.Id_Produit = l.Id_Produit
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (Jour, Heure, Id_Utilisateur, Id_Categorie) DO UPDATE
+    SET NbLignes = a.NbLignes + EXCLUDED.NbLignes,
+        QteVendue = a.QteVendue + EXCLUDED.QteVendue,
+        MontantBrut = a.MontantBrut + EXCLUDED.MontantBrut,
+        MontantNet = a.MontantNet + EXCLUDED.MontantNet;
+
+    INSERT INTO AgregatVenteCaisse AS a (Jour, Heure, Id_Utilisateur, NbTickets, MontantEncaisse)
+    WITH modifiees AS (
+        SELECT o.DateVente AS AncienneDate, o.Id_Utilisateur AS AncienUtilisateur, n.*
+        FROM anciennes o
+        JOIN nouvelles n ON n.Id_Vente = o.Id_Vente
+        WHERE (o.DateVente, o.Id_Utilisateur) IS DISTINCT FROM (n.DateVente, n.Id_Utilisateur)
+    ),
+    cases AS (
+        SELECT -1 AS signe, Id_Vente, DateVente AS DateRecu, AncienneDate AS DateVente,
+               AncienUtilisateur AS Id_Utilisateur
+        FROM modifiees
+        UNION ALL
+        SELECT 1, Id_Vente, DateVente, DateVente, Id_Utilisateur
+        FROM modifiees
+    )
+    SELECT
+        c.DateVente::date,
+        EXTRACT(HOUR FROM c.DateVente)::smallint,
+        c.Id_Utilisateur,
+        SUM(c.signe),
+        SUM(c.signe * r.MontantTotal)
+    FROM cases c
+    JOIN Recu r ON r.Id_Vente = c.Id_Vente AND r.DateVente = c.DateRecu
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (Jour, Heure, Id_Utilisateur) DO UPDATE
+    SET NbTickets = a.NbTickets + EXCLUDED.NbTickets,
+        MontantEncaisse = a.MontantEncaisse + EXCLUDED.MontantEncaisse;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_ventes_modification ON Vente;
+CREATE TRIGGER trg_agregat_ventes_modification
+AFTER UPDATE ON Vente
+REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_agreger_ventes_modifiees();
+
+
+-- Annulation d'une vente : supprimer ses lignes avant la vente elle-même
+-- (agrégats déduits et retour au stock tracé avec le bon caissier)
+CREATE OR REPLACE FUNCTION fn_annulation_vente_lignes()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Une vente encaissée ne se supprime pas (le reçu doit être annulé d'abord)
+    IF EXISTS (SELECT 1 FROM Recu WHERE Id_Vente = OLD.Id_Vente AND DateVente = OLD.DateVente) THEN
+        RAISE EXCEPTION 'La vente % a un reçu : annuler le reçu avant la vente', OLD.Id_Vente;
+    END IF;
+
+    DELETE FROM LigneVente WHERE Id_Vente = OLD.Id_Vente AND DateVente = OLD.DateVente;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_annulation_vente_lignes ON Vente;
+CREATE TRIGGER trg_annulation_vente_lignes
+BEFORE DELETE ON Vente
+FOR EACH ROW
+EXECUTE FUNCTION fn_annulation_vente_lignes();
+
+
+-- Reconstruction complète des agrégats depuis l'historique
+-- (mise en place sur une base existante, ou après correction manuelle de données)
+CREATE OR REPLACE FUNCTION fn_reconstruire_agregats_ventes()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE AgregatVenteCategorie, AgregatVenteCaisse IN EXCLUSIVE MODE;
+    DELETE FROM AgregatVenteCategorie;
+    DELETE FROM AgregatVenteCaisse;
+
+    INSERT INTO AgregatVenteCategorie (
+        Jour, Heure, Id_Utilisateur, Id_Categorie,
+        NbLignes, QteVendue, MontantBrut, MontantNet
+    )
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        p.Id_Categorie,
+        COUNT(*),
+        SUM(lv.QteVendue),
+        SUM(lv.QteVendue * lv.PrixUnitaireVendu),
+        SUM(lv.QteVendue * lv.PrixUnitaireVendu * (1 - COALESCE(lv.Remise, 0) / 100.0))
+    FROM LigneVente lv
+    JOIN Vente v ON v.Id_Vente = lv.Id_Vente AND v.DateVente = lv.DateVente
+    JOIN Produit p ON p.Id_Produit = lv.Id_Produit
+    GROUP BY 1, 2, 3, 4;
+
+    INSERT INTO AgregatVenteCaisse (Jour, Heure, Id_Utilisateur, NbTickets, MontantEncaisse)
+    SELECT
+        v.DateVente::date,
+        EXTRACT(HOUR FROM v.DateVente)::smallint,
+        v.Id_Utilisateur,
+        COUNT(*),
+        SUM(r.MontantTotal)
+    FROM Recu r
+    JOIN Vente v ON v.Id_Vente = r.Id_Vente AND v.DateVente = r.DateVente
+    GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- 14. TRIGGERS : Vues matérialisées à rafraîchir (EtatVueMaterialisee)
+-- Les nouvelles ventes sont détectées par filigrane (Id_Vente) sans écriture supplémentaire.
+-- Seules les modifications rares (annulation, correction, prix d'achat moyen / TVA du produit)
+-- marquent ici les vues concernées ; TG_ARGV = noms des vues dépendantes.
+
+-- Lacunes sous un filigrane d'identifiants SERIAL
+-- L'identifiant est attribué à l'insertion, la ligne n'est visible qu'à la validation : une vente
+-- validée après une vente d'identifiant plus grand passerait sous le filigrane sans être vue.
+-- Retourne les identifiants encore absents entre l'ancien et le nouveau filigrane, plus les
+-- lacunes précédentes toujours absentes ; l'appelant les relit au passage suivant.
+-- À plus de p_marge identifiants sous le filigrane, une lacune est une transaction annulée.
+-- Ordre d'appel : nouveau filigrane (MAX), puis lacunes, puis lecture des nouveautés
+-- (au-delà de l'ancien filigrane ou dans les anciennes lacunes).
+-- p_table / p_colonne en minuscules (identifiants cités par format %I).
+
+CREATE OR REPLACE FUNCTION fn_lacunes_filigrane(
+    p_table TEXT, p_colonne TEXT, p_ancien INT, p_lacunes INT[], p_nouveau INT, p_marge INT DEFAULT 1000
+)
+RETURNS INT[] AS $$
+DECLARE
+    v_lacunes INT[];
+BEGIN
+    EXECUTE format(
+        'SELECT COALESCE(array_agg(c.i ORDER BY c.i), ''{}'')
+         FROM (SELECT unnest($1) AS i
+               UNION
+               SELECT generate_series(GREATEST($2 + 1, $3 - $4), $3)) c
+         WHERE c.i > $3 - $4
+           AND NOT EXISTS (SELECT 1 FROM %I t WHERE t.%I = c.i)',
+        p_table, p_colonne)
+    INTO v_lacunes
+    USING p_lacunes, p_ancien, p_nouveau, p_marge;
+
+    RETURN v_lacunes;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_marquer_vues_a_rafraichir()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE EtatVueMaterialisee
+    SET A_Rafraichir = TRUE
+    WHERE NomVue = ANY(TG_ARGV)
+    AND NOT A_Rafraichir;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_vues_lignes_vente ON LigneVente;
+CREATE TRIGGER trg_vues_lignes_vente
+AFTER UPDATE OR DELETE ON LigneVente
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_marquer_vues_a_rafraichir('mv_stats_annuelles', 'mv_stats_historiques');
+
+DROP TRIGGER IF EXISTS trg_vues_date_vente ON Vente;
+CREATE TRIGGER trg_vues_date_vente
+AFTER UPDATE OF DateVente ON Vente
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_marquer_vues_a_rafraichir('mv_stats_annuelles', 'mv_stats_historiques');
+
+DROP TRIGGER IF EXISTS trg_vues_produit ON Produit;
+CREATE TRIGGER trg_vues_produit
+AFTER UPDATE OF PrixAchatMoyen, TauxTVA ON Produit
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_marquer_vues_a_rafraichir('mv_stats_annuelles');
+
+
+-- 15. JOURNAL DE STOCK QUOTIDIEN (StockJournalier)
+-- Variations du jour : trigger niveau instruction sur Produit (ventes, réceptions, mouvements
+-- manuels et annulations passent tous par Produit.StockActuel).
+-- Clôture : fn_cloturer_stock_jusqua() complète chaque jour écoulé avec une ligne par produit
+-- (stock reporté pour les produits sans mouvement), appelée par le planificateur (db/refresh.py).
+-- Stock en fin de jour J = stock actuel - variations journalisées après J.
+
+CREATE OR REPLACE FUNCTION fn_journaliser_stock()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO StockJournalier (Jour, Id_Produit, StockOuverture, Entrees, Sorties, StockCloture, PMP)
+        SELECT CURRENT_DATE, n.Id_Produit, 0, n.StockActuel, 0, n.StockActuel, COALESCE(n.PrixAchatMoyen, 0)
+        FROM produits_modifies n
+        ON CONFLICT (Id_Produit, Jour) DO NOTHING;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO StockJournalier AS s (Jour, Id_Produit, StockOuverture, Entrees, Sorties, StockCloture, PMP)
+    SELECT CURRENT_DATE, n.Id_Produit, o.StockActuel,
+           GREATEST(n.StockActuel - o.StockActuel, 0),
+           GREATEST(o.StockActuel - n.StockActuel, 0),
+           n.StockActuel, COALESCE(n.PrixAchatMoyen, 0)
+    FROM produits_modifies n
+    JOIN produits_avant o ON o.Id_Produit = n.Id_Produit
+    WHERE n.StockActuel <> o.StockActuel
+       OR n.PrixAchatMoyen IS DISTINCT FROM o.PrixAchatMoyen
+    ON CONFLICT (Id_Produit, Jour) DO UPDATE
+    SET Entrees = s.Entrees + EXCLUDED.Entrees,
+        Sorties = s.Sorties + EXCLUDED.Sorties,
+        StockCloture = EXCLUDED.StockCloture,
+        PMP = EXCLUDED.PMP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_journal_stock_ajout ON Produit;
+CREATE TRIGGER trg_journal_stock_ajout
+AFTER INSERT ON Produit
+REFERENCING NEW TABLE AS produits_modifies
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_journaliser_stock();
+
+DROP TRIGGER IF EXISTS trg_journal_stock_maj ON Produit;
+CREATE TRIGGER trg_journal_stock_maj
+AFTER UPDATE ON Produit
+REFERENCING OLD TABLE AS produits_avant NEW TABLE AS produits_modifies
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_journaliser_stock();
+
+-- Clôture d'un jour : une ligne (stock reporté) pour chaque produit sans variation ce jour-là
+CREATE OR REPLACE FUNCTION fn_cloturer_stock_journalier(p_jour DATE)
+RETURNS INT AS $$
+DECLARE
+    v_nb INT;
+BEGIN
+    INSERT INTO StockJournalier (Jour, Id_Produit, StockOuverture, Entrees, Sorties, StockCloture, PMP)
+    SELECT p_jour, p.Id_Produit, st.Stock, 0, 0, st.Stock, COALESCE(prec.PMP, p.PrixAchatMoyen, 0)
+    FROM Produit p
+    CROSS JOIN LATERAL (
+        SELECT p.StockActuel - COALESCE(SUM(s.Entrees - s.Sorties), 0) AS Stock
+        FROM StockJournalier s
+        WHERE s.Id_Produit = p.Id_Produit AND s.Jour > p_jour
+    ) st
+    LEFT JOIN LATERAL (
+        SELECT s.PMP
+        FROM StockJournalier s
+        WHERE s.Id_Produit = p.Id_Produit AND s.Jour < p_jour
+        ORDER BY s.Jour DESC
+        LIMIT 1
+    ) prec ON TRUE
+    WHERE COALESCE(p.DateAjout::date, p_jour) <= p_jour
+      AND NOT EXISTS (
+          SELECT 1 FROM StockJournalier s
+          WHERE s.Id_Produit = p.Id_Produit AND s.Jour = p_jour
+      );
+    GET DIAGNOSTICS v_nb = ROW_COUNT;
+
+    INSERT INTO ClotureStock (Jour, NbProduits)
+    SELECT p_jour, COUNT(*) FROM StockJournalier WHERE Jour = p_jour
+    ON CONFLICT (Jour) DO UPDATE
+    SET Date_Cloture = CURRENT_TIMESTAMP, NbProduits = EXCLUDED.NbProduits;
+
+    RETURN v_nb;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Clôture de tous les jours écoulés depuis la dernière clôture (rattrape les jours manqués).
+-- Première exécution : seul p_jour est clôturé, le journal démarre à cette date.
+CREATE OR REPLACE FUNCTION fn_cloturer_stock_jusqua(p_jour DATE DEFAULT CURRENT_DATE - 1)
+RETURNS INT AS $$
+DECLARE
+    v_jour DATE;
+    v_nb_jours INT := 0;
+BEGIN
+    -- Un seul poste clôture à la fois
+    PERFORM pg_advisory_xact_lock(hashtext('fn_cloturer_stock_jusqua'));
+
+    SELECT COALESCE(MAX(Jour) + 1, p_jour) INTO v_jour FROM ClotureStock;
+    WHILE v_jour <= p_jour LOOP
+        PERFORM fn_cloturer_stock_journalier(v_jour);
+        v_nb_jours := v_nb_jours + 1;
+        v_jour := v_jour + 1;
+    END LOOP;
+
+    RETURN v_nb_jours;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stock d'un produit en fin de journée (ligne du jour, sinon reconstitué depuis le stock actuel)
+CREATE OR REPLACE FUNCTION fn_stock_a_date(p_produit VARCHAR, p_jour DATE)
+RETURNS INT AS $$
+    SELECT COALESCE(
+        (SELECT StockCloture FROM StockJournalier WHERE Id_Produit = p_produit AND Jour = p_jour),
+        (SELECT p.StockActuel - COALESCE((
+             SELECT SUM(s.Entrees - s.Sorties)
+             FROM StockJournalier s
+             WHERE s.Id_Produit = p_produit AND s.Jour > p_jour
+         ), 0)
+         FROM Produit p
+         WHERE p.Id_Produit = p_produit)
+    );
+$$ LANGUAGE sql STABLE;
+
+
+-- 16. STATISTIQUES DE DEMANDE (StatistiqueDemande)
+-- Pas de trigger sur le chemin de vente : les produits à recalculer sont retrouvés par filigrane
+-- (Id_Vente, Id_Mouvement des réceptions, Id_Alerte) depuis le passage précédent, lacunes
+-- (transactions validées en retard) comprises : voir fn_lacunes_filigrane.
+-- Recalcul complet au premier passage de la journée (la fenêtre de 90 jours glisse).
+-- Le point de commande et l'EOQ sont remis à NULL : calculés ensuite par db/demand.py.
+
+CREATE OR REPLACE FUNCTION fn_calculer_statistiques_demande(p_complet BOOLEAN DEFAULT FALSE)
+RETURNS INT AS $$
+DECLARE
+    v_etat EtatStatistiqueDemande%ROWTYPE;
+    v_vente INT;
+    v_mouvement INT;
+    v_alerte INT;
+    v_lacunes_vente INT[];
+    v_lacunes_mouvement INT[];
+    v_lacunes_alerte INT[];
+    v_cibles VARCHAR[];
+    v_nb INT;
+BEGIN
+    SELECT * INTO v_etat FROM EtatStatistiqueDemande FOR UPDATE;
+
+    SELECT GREATEST(MAX(Id_Vente), v_etat.Derniere_Vente) INTO v_vente FROM LigneVente;
+    SELECT GREATEST(MAX(Id_Mouvement), v_etat.Dernier_Mouvement) INTO v_mouvement FROM MouvementStock;
+    SELECT GREATEST(MAX(Id_Alerte), v_etat.Derniere_Alerte) INTO v_alerte FROM AlerteStock;
+
+    -- Après les maxima, avant la sélection des produits
+    v_lacunes_vente := fn_lacunes_filigrane('lignevente', 'id_vente',
+                                            v_etat.Derniere_Vente, v_etat.Lacunes_Vente, v_vente);
+    v_lacunes_mouvement := fn_lacunes_filigrane('mouvementstock', 'id_mouvement',
+                                                v_etat.Dernier_Mouvement, v_etat.Lacunes_Mouvement, v_mouvement);
+    v_lacunes_alerte := fn_lacunes_filigrane('alertestock', 'id_alerte',
+                                             v_etat.Derniere_Alerte, v_etat.Lacunes_Alerte, v_alerte);
+
+    p_complet := p_complet OR v_etat.Jour_Calcul_Complet IS DISTINCT FROM CURRENT_DATE;
+
+    IF NOT p_complet THEN
+        SELECT array_agg(DISTINCT t.Id_Produit) INTO v_cibles
+        FROM (
+            SELECT Id_Produit FROM LigneVente
+            WHERE Id_Vente > v_etat.Derniere_Vente OR Id_Vente = ANY(v_etat.Lacunes_Vente)
+            UNION ALL
+            SELECT Id_Produit FROM MouvementStock
+            WHERE (Id_Mouvement > v_etat.Dernier_Mouvement OR Id_Mouvement = ANY(v_etat.Lacunes_Mouvement))
+              AND Id_Achat IS NOT NULL
+            UNION ALL
+            SELECT Id_Produit FROM AlerteStock
+            WHERE Id_Alerte > v_etat.Derniere_Alerte OR Id_Alerte = ANY(v_etat.Lacunes_Alerte)
+            UNION ALL
+            SELECT p.Id_Produit FROM Produit p
+            WHERE NOT EXISTS (SELECT 1 FROM StatistiqueDemande s WHERE s.Id_Produit = p.Id_Produit)
+        ) t;
+    END IF;
+
+    IF p_complet OR v_cibles IS NOT NULL THEN
+        WITH cibles AS (
+            SELECT p.Id_Produit,
+                   LEAST(90, GREATEST(1, CURRENT_DATE - COALESCE(p.DateAjout::date, CURRENT_DATE - 89) + 1))::int AS Jours
+            FROM Produit p
+            WHERE p_complet OR p.Id_Produit = ANY(v_cibles)
+        ),
+        ventes_jour AS (
+            SELECT lv.Id_Produit, lv.DateVente::date AS Jour, SUM(lv.QteVendue) AS Qte
+            FROM LigneVente lv
+            WHERE lv.DateVente >= CURRENT_DATE - 89
+              AND (p_complet OR lv.Id_Produit = ANY(v_cibles))
+            GROUP BY 1, 2
+        ),
+        ventes AS (
+            SELECT Id_Produit,
+                   SUM(Qte) AS S1,
+                   SUM(Qte * Qte) AS S2,
+                   SUM(Qte) FILTER (WHERE Jour >= CURRENT_DATE - 30) AS Ventes30j
+            FROM ventes_jour
+            GROUP BY 1
+        ),
+        receptions AS (
+            -- Délai d'une commande : de DateAchat au premier mouvement ENTREE de sa réception
+            SELECT m.Id_Produit,
+                   GREATEST(EXTRACT(EPOCH FROM MIN(m.DateMouvement) - a.DateAchat) / 86400.0, 0) AS Delai
+            FROM MouvementStock m
+            JOIN Achat a ON a.Id_Achat = m.Id_Achat
+            WHERE m.Type = 'ENTREE' AND m.Id_Achat IS NOT NULL
+              AND m.DateMouvement >= CURRENT_DATE - 365
+              AND (p_complet OR m.Id_Produit = ANY(v_cibles))
+            GROUP BY m.Id_Produit, a.Id_Achat, a.DateAchat
+        ),
+        delais AS (
+            SELECT Id_Produit, AVG(Delai) AS Moyenne, COALESCE(STDDEV_SAMP(Delai), 0) AS EcartType, COUNT(*) AS Nb
+            FROM receptions
+            GROUP BY 1
+        ),
+        derniers_achats AS (
+            SELECT DISTINCT ON (la.Id_Produit) la.Id_Produit, a.DateAchat, a.Id_Fournisseur
+            FROM LigneAchat la
+            JOIN Achat a ON a.Id_Achat = la.Id_Achat
+            WHERE p_complet OR la.Id_Produit = ANY(v_cibles)
+            ORDER BY la.Id_Produit, a.DateAchat DESC
+        ),
+        alertes AS (
+            SELECT Id_Produit, COUNT(*) AS Nb
+            FROM AlerteStock
+            WHERE Date_Creation > CURRENT_DATE - 90
+              AND (p_complet OR Id_Produit = ANY(v_cibles))
+            GROUP BY 1
+        ),
+        ruptures AS (
+            SELECT Id_Produit, COUNT(*) AS Nb
+            FROM StockJournalier
+            WHERE Jour > CURRENT_DATE - 90 AND StockCloture <= 0
+              AND (p_complet OR Id_Produit = ANY(v_cibles))
+            GROUP BY 1
+        )
+        INSERT INTO StatistiqueDemande AS s (
+            Id_Produit, JoursObserves, Ventes30j, VitesseJour, EcartTypeJour,
+            DelaiMoyenJours, EcartTypeDelai, NbReceptions, DernierAchat, Id_Fournisseur_Habituel,
+            Alertes90j, JoursRupture90j, StockSecurite, PointCommande, QuantiteEconomique, Date_Calcul
+        )
+        SELECT
+            c.Id_Produit,
+            c.Jours,
+            COALESCE(v.Ventes30j, 0),
+            COALESCE(v.S1, 0)::numeric / c.Jours,
+            -- Écart-type sur tous les jours de la fenêtre, jours sans vente compris
+            CASE WHEN c.Jours > 1
+                 THEN SQRT(GREATEST((COALESCE(v.S2, 0) - COALESCE(v.S1, 0)::numeric ^ 2 / c.Jours) / (c.Jours - 1), 0))
+                 ELSE 0 END,
+            d.Moyenne,
+            d.EcartType,
+            COALESCE(d.Nb, 0),
+            da.DateAchat,
+            da.Id_Fournisseur,
+            COALESCE(al.Nb, 0),
+            COALESCE(r.Nb, 0),
+            NULL, NULL, NULL,
+            CURRENT_TIMESTAMP
+        FROM cibles c
+        LEFT JOIN ventes v ON v.Id_Produit = c.Id_Produit
+        LEFT JOIN delais d ON d.Id_Produit = c.Id_Produit
+        LEFT JOIN derniers_achats da ON da.Id_Produit = c.Id_Produit
+        LEFT JOIN alertes al ON al.Id_Produit = c.Id_Produit
+        LEFT JOIN ruptures r ON r.Id_Produit = c.Id_Produit
+        ON CONFLICT (Id_Produit) DO UPDATE
+        SET JoursObserves = EXCLUDED.JoursObserves,
+            Ventes30j = EXCLUDED.Ventes30j,
+            VitesseJour = EXCLUDED.VitesseJour,
+            EcartTypeJour = EXCLUDED.EcartTypeJour,
+            DelaiMoyenJours = EXCLUDED.DelaiMoyenJours,
+            EcartTypeDelai = EXCLUDED.EcartTypeDelai,
+            NbReceptions = EXCLUDED.NbReceptions,
+            DernierAchat = EXCLUDED.DernierAchat,
+            Id_Fournisseur_Habituel = EXCLUDED.Id_Fournisseur_Habituel,
+            Alertes90j = EXCLUDED.Alertes90j,
+            JoursRupture90j = EXCLUDED.JoursRupture90j,
+            StockSecurite = NULL,
+            PointCommande = NULL,
+            QuantiteEconomique = NULL,
+            Date_Calcul = EXCLUDED.Date_Calcul;
+
+        GET DIAGNOSTICS v_nb = ROW_COUNT;
+    ELSE
+        v_nb := 0;
+    END IF;
+
+    UPDATE EtatStatistiqueDemande
+    SET Derniere_Vente = v_vente,
+        Dernier_Mouvement = v_mouvement,
+        Derniere_Alerte = v_alerte,
+        Lacunes_Vente = v_lacunes_vente,
+        Lacunes_Mouvement = v_lacunes_mouvement,
+        Lacunes_Alerte = v_lacunes_alerte,
+        Jour_Calcul_Complet = CASE WHEN p_complet THEN CURRENT_DATE ELSE Jour_Calcul_Complet END,
+        Dernier_Calcul = CURRENT_TIMESTAMP;
+
+    RETURN v_nb;
+END;
+$$ LANGUAGE plpgsql;
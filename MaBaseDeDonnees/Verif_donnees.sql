@@ -293,7 +293,34 @@ SELECT
     'Produits avec stock négatif',
     COUNT(*)
 FROM Produit
-WHERE StockActuel < 0;
+WHERE StockActuel < 0
+
+UNION ALL
+
+-- Test 6: Reçus orphelins (pas de clé étrangère vers Vente partitionnée ; mois archivés compris)
+SELECT 
+    'Reçus sans vente en ligne',
+    COUNT(*)
+FROM Recu r
+WHERE NOT EXISTS (SELECT 1 FROM Vente v WHERE v.Id_Vente = r.Id_Vente AND v.DateVente = r.DateVente)
+
+UNION ALL
+
+-- Test 7: Mouvements de vente orphelins (idem)
+SELECT 
+    'Mouvements liés à une vente absente',
+    COUNT(*)
+FROM MouvementStock m
+WHERE m.Id_Vente IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM Vente v WHERE v.Id_Vente = m.Id_Vente)
+
+UNION ALL
+
+-- Test 8: Lignes rangées dans une partition par défaut (mois sans partition propre)
+SELECT 
+    'Lignes en partition par défaut',
+    (SELECT COUNT(*) FROM vente_defaut) + (SELECT COUNT(*) FROM lignevente_defaut)
+    + (SELECT COUNT(*) FROM mouvementstock_defaut) + (SELECT COUNT(*) FROM alertestock_defaut);
 
 -- ========================================
 -- RÉSUMÉ FINAL
@@ -394,6 +394,7 @@ GROUP BY EXTRACT(YEAR FROM v.DateVente)
 ORDER BY Annee DESC;
 
 -- Vue matérialisée 2: Stats historiques journalières
+DROP MATERIALIZED VIEW IF EXISTS mv_stats_historiques;
 CREATE MATERIALIZED VIEW mv_stats_historiques AS
 SELECT 
     DATE(v.DateVente) AS Date_Vente,
@@ -407,6 +408,10 @@ JOIN LigneVente lv ON v.Id_Vente = lv.Id_Vente
 GROUP BY DATE(v.DateVente), EXTRACT(YEAR FROM v.DateVente), EXTRACT(MONTH FROM v.DateVente), EXTRACT(DAY FROM v.DateVente)
 ORDER BY Date_Vente DESC;
 
--- Pour rafraîchir les vues matérialisées :
--- REFRESH MATERIALIZED VIEW mv_stats_annuelles;
--- REFRESH MATERIALIZED VIEW mv_stats_historiques;
\ No newline at end of file
+-- Rafraîchissement : planifié côté application (db/refresh.py), en CONCURRENTLY
+-- grâce aux index uniques de Index.sql. Manuellement :
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_stats_annuelles;
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_stats_historiques;
+INSERT INTO EtatVueMaterialisee (NomVue)
+VALUES ('mv_stats_annuelles'), ('mv_stats_historiques')
+ON CONFLICT (NomVue) DO NOTHING;
\ No newline at end of file
@@ -5,6 +5,8 @@
 -- Executez ceci dans votre terminal : psql -U votre_user -d votre_db -f init_db.sql
 
 \i Tables.sql
+\i Partitions.sql
+\i Recherche.sql
 \i Triggers_et_Fonctions.sql
 \i Vues.sql
 \i Vues_TVA.sql
@@ -0,0 +1,97 @@
+"""
+Benchmark : débit d'encaissement (ventes/s) pour des paniers de 1, 10 et 50 lignes.
+Compare l'ancien chemin (une requête par ligne) à fn_enregistrer_vente (un seul appel).
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée.
+
+    python3 benchmarks/bench_checkout.py [nb_ventes_par_taille]
+"""
+
+import sys
+import os
+import time
+import json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+
+TAILLES_PANIER = (1, 10, 50)
+
+
+def vente_ligne_par_ligne(cur, user_id, lignes):
+    """Reproduction de l'ancien models.process_sale"""
+    cur.execute("INSERT INTO Vente (Id_Utilisateur) VALUES (%s) RETURNING Id_Vente, DateVente", (user_id,))
+    vente = cur.fetchone()
+    id_vente = vente['id_vente']
+    total = 0
+    for l in lignes:
+        cur.execute("""
+            INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise, PrixUnitaireVendu, TauxTVA)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (id_vente, vente['datevente'], l['id'], l['qte'], 0, l['prix_unitaire'], 18.00))
+        total += l['qte'] * l['prix_unitaire']
+    cur.execute("""
+        INSERT INTO Recu (ModePaiement, MontantTotal, Id_Utilisateur, Id_Vente)
+        VALUES ('ESPECES', %s, %s, %s)
+    """, (total, user_id, id_vente))
+
+
+def vente_un_appel(cur, user_id, lignes):
+    cur.execute(
+        "SELECT fn_enregistrer_vente(%s, 'ESPECES', %s::jsonb)",
+        (user_id, json.dumps(lignes, default=str))
+    )
+    cur.fetchone()
+
+
+def mesurer(cur, fn, user_id, lignes, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        cur.execute("SAVEPOINT bench")
+        fn(cur, user_id, lignes)
+        cur.execute("RELEASE SAVEPOINT bench")
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        cur.execute("SELECT Id_Utilisateur FROM Utilisateur WHERE Role = 'Caissier' LIMIT 1")
+        user_id = cur.fetchone()['id_utilisateur']
+
+        cur.execute("SELECT Id_Produit, PrixUnitaireActuel FROM Produit ORDER BY Id_Produit LIMIT %s",
+                    (max(TAILLES_PANIER),))
+        produits = cur.fetchall()
+        if len(produits) < max(TAILLES_PANIER):
+            print(f"Attention : seulement {len(produits)} produits, les grands paniers sont tronqués")
+
+        # Stock suffisant pour toute la durée du test (annulé à la fin)
+        cur.execute("UPDATE Produit SET StockActuel = 1000000 WHERE Id_Produit = ANY(%s)",
+                    ([p['id_produit'] for p in produits],))
+
+        print(f"{'Lignes':>6} | {'Ligne par ligne':>16} | {'Un appel':>10} | Gain")
+        for taille in TAILLES_PANIER:
+            lignes = [
+                {'id': p['id_produit'], 'qte': 1, 'remise': 0,
+                 'prix_unitaire': p['prixunitaireactuel'], 'taux_tva': 18.00}
+                for p in produits[:taille]
+            ]
+            avant = mesurer(cur, vente_ligne_par_ligne, user_id, lignes, n)
+            apres = mesurer(cur, vente_un_appel, user_id, lignes, n)
+            print(f"{len(lignes):>6} | {avant:>12.1f} v/s | {apres:>6.1f} v/s | x{apres / avant:.1f}")
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
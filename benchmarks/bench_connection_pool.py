@@ -0,0 +1,80 @@
+"""
+Benchmark : latence par appel avec et sans pool de connexions.
+Nécessite une base PostgreSQL locale initialisée (voir README).
+
+    python3 benchmarks/bench_connection_pool.py [nb_appels]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import connection
+from db.database import Database
+
+QUERY = """
+    SELECT p.Id_Produit, p.Nom, p.PrixUnitaireActuel, p.StockActuel, c.Libelle
+    FROM Produit p
+    JOIN Categorie c ON p.Id_Categorie = c.Id_Categorie
+    WHERE p.Nom ILIKE %s OR p.Description ILIKE %s
+    ORDER BY p.Nom
+"""
+
+
+def search_sans_pool(keyword):
+    """Ancien comportement : connexion TCP + authentification à chaque appel"""
+    conn = psycopg2.connect(**connection.DB_CONFIG)
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(QUERY, (f"%{keyword}%", f"%{keyword}%"))
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def mesurer(fn, n):
+    durees = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn("a")
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    return {
+        'moyenne': statistics.mean(durees),
+        'p50': durees[len(durees) // 2],
+        'p95': durees[int(len(durees) * 0.95) - 1],
+    }
+
+
+def afficher(label, res):
+    print(f"{label:<28} moy={res['moyenne']:7.3f} ms   p50={res['p50']:7.3f} ms   p95={res['p95']:7.3f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    # Échauffement (cache du planificateur, première connexion du pool)
+    search_sans_pool("a")
+    Database.search_products("a")
+
+    print(f"search_products x {n}")
+    avant = mesurer(search_sans_pool, n)
+    apres = mesurer(Database.search_products, n)
+    afficher("Sans pool (connect/close)", avant)
+    afficher("Avec pool", apres)
+    print(f"Gain moyen : x{avant['moyenne'] / apres['moyenne']:.1f}")
+    print(f"État du pool : {connection.get_pool().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark : temps de démarrage, du lancement du processus au premier affichage
+Chaque mesure est un nouveau processus Python (imports à froid côté interpréteur,
+cache disque du système déjà chaud) qui :
+- crée l'application comme main.py (AppController) et note le premier paint de la connexion ;
+- simule une connexion réussie (show_main_window, sans base) et note le premier paint
+  de la fenêtre du rôle, et le temps écoulé depuis la connexion.
+Indique aussi les modules lourds déjà chargés à ce moment (matplotlib, reportlab, numpy).
+Plateforme Qt "offscreen" par défaut (QT_QPA_PLATFORM pour changer).
+
+    python3 benchmarks/bench_demarrage.py [nb_mesures] [rôle ...]
+    rôles : Caissier, Gestionnaire, Acheteur, Administrateur, Autre (MainWindow générique)
+"""
+
+import sys
+import os
+import json
+import time
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+ROLES = ["Caissier", "Gestionnaire", "Acheteur", "Administrateur", "Autre"]
+MODULES_LOURDS = ["matplotlib", "reportlab", "numpy"]
+
+
+def enfant(role, debut_ns):
+    """Processus mesuré : imprime une ligne JSON avec les temps en ms depuis debut_ns"""
+    def ecoule():
+        return (time.time_ns() - debut_ns) / 1e6
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QObject, QEvent, QTimer
+
+    class PremierPaint(QObject):
+        def __init__(self, fenetre, rappel):
+            super().__init__(fenetre)
+            self.rappel = rappel
+            fenetre.installEventFilter(self)
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and self.rappel is not None:
+                rappel, self.rappel = self.rappel, None
+                QTimer.singleShot(0, rappel)
+            return False
+
+    app = QApplication(sys.argv)
+    import main
+    resultat = {}
+
+    def fin():
+        resultat["role_ms"] = ecoule()
+        resultat["apres_connexion_ms"] = resultat["role_ms"] - resultat["login_ms"]
+        resultat["modules"] = [m for m in MODULES_LOURDS if m in sys.modules]
+        print(json.dumps(resultat), flush=True)
+        app.quit()
+
+    def connexion():
+        resultat["login_ms"] = ecoule()
+        controller.show_main_window({'role': role, 'nom': "Bench", 'id_utilisateur': 1})
+        PremierPaint(controller.main_window, fin)
+
+    controller = main.AppController(app)
+    PremierPaint(controller.login_window, connexion)
+    QTimer.singleShot(60000, app.quit)
+    app.exec()
+
+    # Processus de rendu des reçus lancés par l'écran de vente (ils gardent la sortie ouverte)
+    from utils.receipt_renderer import ReceiptRenderer
+    if ReceiptRenderer._instance is not None:
+        ReceiptRenderer._instance.arreter()
+    os._exit(0)     # sans attendre les chargements en cours (pas de base)
+
+
+def centile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(p * len(valeurs)))]
+
+
+def mesurer(role):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    debut = time.time_ns()
+    sortie = subprocess.run([sys.executable, os.path.abspath(__file__), "--enfant", role, str(debut)],
+                            cwd=parent_dir, env=env, capture_output=True, text=True, timeout=120)
+    for ligne in reversed(sortie.stdout.splitlines()):
+        if ligne.startswith("{"):
+            return json.loads(ligne)
+    raise RuntimeError(f"Mesure {role} sans résultat :\n{sortie.stderr[-2000:]}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--enfant":
+        enfant(sys.argv[2], int(sys.argv[3]))
+        return
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    roles = sys.argv[2:] or ROLES
+
+    print(f"{n} démarrages par rôle (ms depuis le lancement du processus)\n")
+    print(f"{'Rôle':<16} | {'connexion p50':>13} | {'p95':>7} | {'rôle p50':>9} | {'p95':>7} | "
+          f"{'après connexion':>15} | modules lourds")
+    for role in roles:
+        mesures = [mesurer(role) for _ in range(n)]
+        login = [m["login_ms"] for m in mesures]
+        fenetre = [m["role_ms"] for m in mesures]
+        apres = [m["apres_connexion_ms"] for m in mesures]
+        modules = ", ".join(mesures[-1]["modules"]) or "-"
+        print(f"{role:<16} | {centile(login, 0.5):>13.0f} | {centile(login, 0.95):>7.0f} | "
+              f"{centile(fenetre, 0.5):>9.0f} | {centile(fenetre, 0.95):>7.0f} | "
+              f"{centile(apres, 0.5):>15.0f} | {modules}")
+
+
+if __name__ == "__main__":
+    main()
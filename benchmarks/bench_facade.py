@@ -0,0 +1,412 @@
+"""
+Benchmark : toutes les méthodes du facade Database, à plusieurs échelles
+Pour chaque échelle, (re)génère la base synthétique (benchmarks/generer_donnees.py, même graine),
+puis mesure :
+- chaque méthode de lecture publique (get_* / search_*), découverte par introspection ;
+  les arguments sont choisis dans la base générée d'après le nom du paramètre (ARGUMENTS)
+- les chemins d'écriture (vente, mouvement, commandes groupées, réception) et la maintenance
+  (statistiques de demande, vues matérialisées, journal de stock, partitions)
+Durées moyenne / p50 / p95, allers-retours et lignes par appel (db/instrumentation.py).
+Rapport JSON + Markdown dans benchmarks/rapports/, comparable d'une exécution à l'autre (--comparer).
+
+⚠ Avec --echelles, la base configurée est vidée puis régénérée : base de test uniquement.
+Sans --echelles, la base actuelle est mesurée en lecture seule (écritures avec --ecritures).
+
+    python3 benchmarks/bench_facade.py [--mesures 20]
+    python3 benchmarks/bench_facade.py --echelles 1k,10k,100k --graine 42
+    python3 benchmarks/bench_facade.py --echelles 1M --comparer benchmarks/rapports/facade_20260101_120000.json
+"""
+
+import sys
+import os
+import json
+import time
+import inspect
+import argparse
+import statistics
+from datetime import date, datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db import instrumentation
+from db.database import Database
+
+from generer_donnees import ECHELLES, generer
+
+DOSSIER_RAPPORTS = os.path.join(current_dir, "rapports")
+NB_MESURES_MAINTENANCE = 3   # Rafraîchissements complets : longs aux grandes échelles
+NB_PRODUITS_ALERTE = 300     # File d'alertes d'une matinée (recommandations en bloc)
+SEUIL_ECART = 0.2            # Écarts signalés avec --comparer (p50, ±20 %)
+
+# Valeur de chaque paramètre, d'après son nom, dans le contexte tiré de la base (contexte())
+ARGUMENTS = {
+    'pid': 'produit', 'product_id': 'produit', 'id_produit': 'produit',
+    'product_ids': 'produits_alerte',
+    'keyword': 'mot',
+    'user_id': 'caissier',
+    'sale_id': 'vente',
+    'id_achat': 'achat',
+    'day': 'hier',
+    'date_from': 'debut_mois', 'date_to': 'hier',
+}
+
+# Appels supplémentaires (paramètres optionnels qui changent le plan de requête)
+VARIANTES = {
+    'get_cashier_sales_history': lambda c: {'filter_type': 'month'},
+    'get_cashier_stats': lambda c: {'period': 'month'},
+    'get_stock_movements': lambda c: {'filters': {'product_id': c['produit']}},
+    'get_stock_series': lambda c: {'product_id': c['produit']},
+    'get_supplier_orders': lambda c: {'period_days': 90},
+    'get_sales_by_period': lambda c: {'start_date': c['debut_mois'], 'end_date': c['hier']},
+}
+
+NON_MESUREES = {'get_connection': "connexion", 'login': "mot de passe requis"}
+
+
+class DerniereMesure(instrumentation.Observateur):
+    """Garde la dernière mesure de chaque méthode (allers-retours, lignes)"""
+
+    def __init__(self):
+        self.mesures = {}
+
+    def methode(self, mesure):
+        self.mesures[mesure.methode] = mesure
+
+
+def mesurer(fn, n, observateur=None, nom=None):
+    fn()  # chauffe du cache
+    durees = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    resultat = {
+        'moy_ms': round(statistics.mean(durees), 2),
+        'p50_ms': round(durees[len(durees) // 2], 2),
+        'p95_ms': round(durees[max(int(len(durees) * 0.95) - 1, 0)], 2),
+    }
+    derniere = observateur.mesures.get(f"Database.{nom}") if observateur and nom else None
+    if derniere is not None:
+        resultat['allers_retours'] = derniere.allers_retours
+        resultat['lignes'] = derniere.lignes
+    return resultat
+
+
+def contexte():
+    """Arguments tirés de la base : produit le plus vendu, caissier le plus actif, dernier ticket..."""
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        cur.execute("""
+            SELECT p.Id_Produit, p.Nom, p.PrixUnitaireActuel, p.TauxTVA
+            FROM Produit p
+            LEFT JOIN LATERAL (
+                SELECT SUM(lv.QteVendue) AS qte FROM LigneVente lv
+                WHERE lv.Id_Produit = p.Id_Produit AND lv.DateVente >= CURRENT_DATE - 30
+            ) v ON TRUE
+            ORDER BY v.qte DESC NULLS LAST, p.Id_Produit
+            LIMIT 1
+        """)
+        produit = cur.fetchone()
+        cur.execute("""
+            SELECT Id_Utilisateur FROM Utilisateur WHERE Role = 'Caissier'
+            ORDER BY (SELECT COALESCE(SUM(NbTickets), 0) FROM AgregatVenteCaisse a
+                      WHERE a.Id_Utilisateur = Utilisateur.Id_Utilisateur) DESC, Id_Utilisateur
+            LIMIT 1
+        """)
+        caissier = cur.fetchone()
+        cur.execute("""
+            SELECT Id_Utilisateur FROM Utilisateur WHERE Role IN ('Responsable_Achats', 'Administrateur')
+            ORDER BY Role DESC, Id_Utilisateur LIMIT 1
+        """)
+        acheteur = cur.fetchone()
+        cur.execute("SELECT MAX(Id_Vente) AS id FROM Vente")
+        vente = cur.fetchone()['id']
+        cur.execute("SELECT MAX(Id_Achat) AS id FROM Achat")
+        achat = cur.fetchone()['id']
+        cur.execute("""
+            SELECT DISTINCT Id_Produit FROM AlerteStock
+            WHERE Statut IN ('NON_LUE', 'VU', 'EN_COURS') LIMIT %s
+        """, (NB_PRODUITS_ALERTE,))
+        produits_alerte = [r['id_produit'] for r in cur.fetchall()]
+        if not produits_alerte:
+            cur.execute("SELECT Id_Produit FROM Produit ORDER BY StockActuel LIMIT %s", (NB_PRODUITS_ALERTE,))
+            produits_alerte = [r['id_produit'] for r in cur.fetchall()]
+        # Écritures : produits bien approvisionnés (ventes), catalogue des fournisseurs (commandes)
+        cur.execute("""
+            SELECT Id_Produit, PrixUnitaireActuel, TauxTVA FROM Produit
+            ORDER BY StockActuel DESC, Id_Produit LIMIT 3
+        """)
+        panier = cur.fetchall()
+        cur.execute("""
+            SELECT f.Id_Fournisseur, array_agg(f.Id_Produit ORDER BY f.Id_Produit) AS produits
+            FROM (
+                SELECT Id_Fournisseur, Id_Produit,
+                       ROW_NUMBER() OVER (PARTITION BY Id_Fournisseur ORDER BY Id_Produit) AS rang
+                FROM fournir
+            ) f
+            WHERE f.rang <= 10
+            GROUP BY f.Id_Fournisseur
+            ORDER BY f.Id_Fournisseur
+            LIMIT 20
+        """)
+        catalogue = cur.fetchall()
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+    if not produit or not caissier:
+        sys.exit("Base vide : générer les données d'abord (benchmarks/generer_donnees.py)")
+    hier = date.today() - timedelta(days=1)
+    return {
+        'produit': produit['id_produit'],
+        'mot': produit['nom'].split()[0].lower(),
+        'caissier': caissier['id_utilisateur'],
+        'acheteur': acheteur['id_utilisateur'] if acheteur else None,
+        'vente': vente,
+        'achat': achat,
+        'produits_alerte': produits_alerte,
+        'hier': hier,
+        'debut_mois': hier - timedelta(days=30),
+        'panier': panier,
+        'catalogue': catalogue,
+        'commandes_creees': [],
+    }
+
+
+def volumes():
+    conn = connection.get_connection()
+    if not conn:
+        return {}
+    cur = connection.get_cursor(conn)
+    try:
+        tables = ('Produit', 'Vente', 'LigneVente', 'MouvementStock', 'Achat', 'AlerteStock', 'StockJournalier')
+        cur.execute("SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {t}) AS {t.lower()}" for t in tables))
+        return dict(cur.fetchone())
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+def methodes_publiques():
+    return {nom: attribut.__func__ for nom, attribut in sorted(vars(Database).items())
+            if isinstance(attribut, staticmethod) and not nom.startswith('_')}
+
+
+def appels_lecture(ctx):
+    """(libellé, nom, fonction sans argument) pour chaque lecture, et les méthodes ignorées avec leur raison"""
+    appels, ignorees = [], {}
+    for nom, fn in methodes_publiques().items():
+        if not nom.startswith(('get_', 'search_')) or nom in NON_MESUREES:
+            continue
+        kwargs, manquants = {}, []
+        for param in inspect.signature(fn).parameters.values():
+            if param.default is not inspect.Parameter.empty:
+                continue
+            cle = ARGUMENTS.get(param.name)
+            if cle is None or ctx.get(cle) is None:
+                manquants.append(param.name)
+            else:
+                kwargs[param.name] = ctx[cle]
+        if manquants:
+            ignorees[nom] = f"argument sans valeur : {', '.join(manquants)}"
+            continue
+        methode = getattr(Database, nom)
+        appels.append((nom, nom, lambda m=methode, k=kwargs: m(**k)))
+        if nom in VARIANTES:
+            extra = VARIANTES[nom](ctx)
+            libelle = f"{nom}({', '.join(f'{k}={v!r}' for k, v in extra.items())})"
+            appels.append((libelle, nom, lambda m=methode, k={**kwargs, **extra}: m(**k)))
+    return appels, ignorees
+
+
+def appels_ecriture(ctx):
+    """Chemins d'écriture de l'application (modifient la base)"""
+    panier = [{'id': p['id_produit'], 'quantité': 1, 'remise': 0,
+               'prix_unitaire': p['prixunitaireactuel'], 'taux_tva': p['tauxtva']} for p in ctx['panier']]
+    commandes = [{'supplier_id': c['id_fournisseur'],
+                  'lines': [{'product_id': pid, 'qty': 12, 'price': 100} for pid in c['produits']]}
+                 for c in ctx['catalogue']]
+
+    def commander():
+        ids = Database.create_purchase_orders_bulk(ctx['acheteur'], commandes)
+        if ids:
+            ctx['commandes_creees'].append(ids)
+
+    def receptionner():
+        if ctx['commandes_creees']:
+            Database.confirm_purchase_receipts(ctx['commandes_creees'].pop(), ctx['acheteur'])
+
+    return [
+        (f"process_sale ({len(panier)} lignes)", 'process_sale',
+         lambda: Database.process_sale(panier, ctx['caissier'])),
+        ("create_stock_movement", 'create_stock_movement',
+         lambda: Database.create_stock_movement(ctx['produit'], 'ENTREE', 1, ctx['acheteur'], "Benchmark")),
+        (f"create_purchase_orders_bulk ({len(commandes)} commandes)", 'create_purchase_orders_bulk', commander),
+        (f"confirm_purchase_receipts ({len(commandes)} commandes)", 'confirm_purchase_receipts', receptionner),
+    ]
+
+
+def appels_maintenance():
+    return [
+        ("close_stock_days", 'close_stock_days', Database.close_stock_days),
+        ("ensure_partitions", 'ensure_partitions', Database.ensure_partitions),
+        ("refresh_demand_statistics(force=True)", 'refresh_demand_statistics',
+         lambda: Database.refresh_demand_statistics(force=True)),
+        ("refresh_materialized_views(force=True)", 'refresh_materialized_views',
+         lambda: Database.refresh_materialized_views(force=True)),
+    ]
+
+
+def mesurer_echelle(n, ecritures, observateur):
+    ctx = contexte()
+    resultats = {'volumes': volumes(), 'lecture': {}, 'ecriture': {}, 'maintenance': {}}
+    lectures, ignorees = appels_lecture(ctx)
+    sections = [('lecture', lectures, n)]
+    if ecritures:
+        sections += [('ecriture', appels_ecriture(ctx), n), ('maintenance', appels_maintenance(), NB_MESURES_MAINTENANCE)]
+
+    mesurees = set()
+    for section, appels, nb in sections:
+        for libelle, nom, fn in appels:
+            resultats[section][libelle] = r = mesurer(fn, nb, observateur, nom)
+            mesurees.add(nom)
+            print(f"  {libelle:<58} | {r['moy_ms']:>9.1f}ms | {r['p50_ms']:>9.1f}ms | {r['p95_ms']:>9.1f}ms"
+                  f" | {r.get('allers_retours', '-'):>3} AR")
+
+    for nom in methodes_publiques():
+        if nom not in mesurees and nom not in ignorees:
+            ignorees[nom] = NON_MESUREES.get(nom) or ("écriture" if not ecritures else "non couverte")
+    resultats['ignorees'] = ignorees
+    return resultats
+
+
+# ---------- Rapport ----------
+
+def _cellule(r):
+    if not r:
+        return "—"
+    ar = f" ({r['allers_retours']} AR)" if 'allers_retours' in r else ""
+    return f"{r['p50_ms']:.1f} / {r['p95_ms']:.1f}{ar}"
+
+
+def ecarts(rapport, precedent):
+    """(section, libellé, échelle, p50 avant, p50 après, ratio) au-delà de SEUIL_ECART"""
+    avant = {e['echelle']: e for e in precedent['echelles']}
+    lignes = []
+    for e in rapport['echelles']:
+        ancien = avant.get(e['echelle'])
+        if not ancien:
+            continue
+        for section in ('lecture', 'ecriture', 'maintenance'):
+            for libelle, r in e[section].items():
+                a = ancien.get(section, {}).get(libelle)
+                if a and a['p50_ms'] > 0:
+                    ratio = r['p50_ms'] / a['p50_ms']
+                    if abs(ratio - 1) >= SEUIL_ECART:
+                        lignes.append((section, libelle, e['echelle'], a['p50_ms'], r['p50_ms'], ratio))
+    return sorted(lignes, key=lambda l: l[5], reverse=True)
+
+
+def markdown(rapport, comparaison=None, nom_precedent=None):
+    echelles = rapport['echelles']
+    entete = "| | " + " | ".join(e['echelle'] for e in echelles) + " |"
+    separateur = "|---|" + "---:|" * len(echelles)
+    lignes = [f"# Benchmark du facade Database — {rapport['date'][:16].replace('T', ' ')}", "",
+              f"Graine {rapport['graine']}, {rapport['mesures']} mesures par appel "
+              f"({NB_MESURES_MAINTENANCE} pour la maintenance). Cellules : p50 / p95 en ms (allers-retours par appel).",
+              "", "## Volumes", "", entete, separateur]
+    tables = sorted({t for e in echelles for t in e['volumes']})
+    for t in tables:
+        lignes.append(f"| {t} | " + " | ".join(f"{e['volumes'].get(t, 0):,}" for e in echelles) + " |")
+    lignes.append("| génération (s) | " + " | ".join(
+        str(e['generation']['total_s']) if e.get('generation') else "—" for e in echelles) + " |")
+
+    for section, titre in (('lecture', "Lecture"), ('ecriture', "Écriture"), ('maintenance', "Maintenance")):
+        libelles = sorted({l for e in echelles for l in e[section]})
+        if not libelles:
+            continue
+        lignes += ["", f"## {titre}", "", entete.replace("| |", "| Méthode |", 1), separateur]
+        for libelle in libelles:
+            lignes.append(f"| `{libelle}` | " + " | ".join(_cellule(e[section].get(libelle)) for e in echelles) + " |")
+
+    ignorees = echelles[-1]['ignorees'] if echelles else {}
+    if ignorees:
+        lignes += ["", "## Non mesurées", ""] + [f"- `{nom}` : {raison}" for nom, raison in sorted(ignorees.items())]
+
+    if comparaison is not None:
+        lignes += ["", f"## Écarts avec {nom_precedent} (p50, ±{SEUIL_ECART:.0%})", ""]
+        if comparaison:
+            lignes += ["| Méthode | Échelle | avant (ms) | après (ms) | ratio |", "|---|---|---:|---:|---:|"]
+            lignes += [f"| `{l}` | {e} | {a:.1f} | {b:.1f} | ×{r:.2f} |" for _, l, e, a, b, r in comparaison]
+        else:
+            lignes.append("Aucun écart significatif.")
+    return "\n".join(lignes) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des méthodes du facade Database")
+    parser.add_argument('--echelles', help=f"échelles à générer puis mesurer, parmi {', '.join(ECHELLES)} "
+                                           "(défaut : base actuelle, sans régénérer)")
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--jours', type=int, default=365)
+    parser.add_argument('--mesures', type=int, default=20, help="mesures par appel")
+    parser.add_argument('--ecritures', action='store_true',
+                        help="mesure aussi écriture et maintenance sur la base actuelle (toujours fait avec --echelles)")
+    parser.add_argument('--comparer', help="rapport JSON précédent")
+    parser.add_argument('--sortie', default=DOSSIER_RAPPORTS)
+    args = parser.parse_args()
+
+    echelles = args.echelles.split(',') if args.echelles else [None]
+    inconnues = [e for e in echelles if e is not None and e not in ECHELLES]
+    if inconnues:
+        sys.exit(f"Échelles inconnues : {', '.join(inconnues)}")
+
+    observateur = instrumentation.installer(DerniereMesure())
+    instrumentation.INSTRUMENTATION_CONFIG["actif"] = True
+    rapport = {'date': datetime.now().isoformat(timespec='seconds'), 'graine': args.graine,
+               'mesures': args.mesures, 'echelles': []}
+    try:
+        for echelle in echelles:
+            generation = None
+            if echelle is not None:
+                print(f"Échelle {echelle} : génération ({ECHELLES[echelle]:,} ventes, graine {args.graine})")
+                generation = generer(ECHELLES[echelle], args.graine, args.jours, reinitialiser=True, verbeux=False)
+                if generation is None:
+                    sys.exit(f"Échec de la génération ({echelle})")
+                print(f"  {generation['ventes']:,} ventes en {generation['total_s']}s")
+            print(f"{'Appel':<60} | {'moy.':>11} | {'p50':>11} | {'p95':>11} |")
+            resultats = mesurer_echelle(args.mesures, args.ecritures or echelle is not None, observateur)
+            rapport['echelles'].append({'echelle': echelle or 'actuelle', 'generation': generation, **resultats})
+    finally:
+        instrumentation.retirer(observateur)
+        connection.close_pool()
+
+    comparaison = nom_precedent = None
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as f:
+            comparaison = ecarts(rapport, json.load(f))
+        nom_precedent = os.path.basename(args.comparer)
+        for section, libelle, echelle, avant, apres, ratio in comparaison:
+            print(f"  {echelle:>8} {libelle:<58} {avant:>9.1f}ms -> {apres:>9.1f}ms  ×{ratio:.2f}")
+
+    os.makedirs(args.sortie, exist_ok=True)
+    base = os.path.join(args.sortie, f"facade_{datetime.now():%Y%m%d_%H%M%S}")
+    with open(base + ".json", 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2, default=str)
+    with open(base + ".md", 'w', encoding='utf-8') as f:
+        f.write(markdown(rapport, comparaison, nom_precedent))
+    print(f"Rapport : {base}.json / {base}.md")
+
+
+if __name__ == "__main__":
+    main()
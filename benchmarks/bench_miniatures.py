@@ -0,0 +1,105 @@
+"""
+Benchmark : miniatures des images produits (ThumbnailCache)
+Sur des photos générées (JPEG 1600x1200), temps passé dans le thread de l'interface par carte :
+- direct : QPixmap(chemin).scaled(..., SmoothTransformation), ancien comportement de ProductCard
+- froid : obtenir() avec caches vides (décodage + mise à l'échelle en arrière-plan)
+- disque : mémoire vide, miniatures relues depuis le cache disque
+- mémoire : miniatures déjà en mémoire
+et, pour les chargements en arrière-plan, le temps jusqu'à ce que toutes soient prêtes.
+Images et cache disque dans un dossier temporaire supprimé à la fin.
+
+    python3 benchmarks/bench_miniatures.py [nb_images]
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QImage, QPixmap, QPainter, QColor
+
+from views.thumbnails import ThumbnailCache
+
+TAILLE = QSize(180, 140)
+MODE = Qt.KeepAspectRatioByExpanding
+
+
+def generer_images(dossier, n):
+    chemins = []
+    for i in range(n):
+        image = QImage(1600, 1200, QImage.Format_RGB32)
+        image.fill(QColor.fromHsv(i * 37 % 360, 200, 230))
+        painter = QPainter(image)
+        painter.drawText(image.rect(), Qt.AlignCenter, f"Produit {i}")
+        painter.end()
+        chemin = os.path.join(dossier, f"produit_{i:04d}.jpg")
+        image.save(chemin, "JPEG", 85)
+        chemins.append(chemin)
+    return chemins
+
+
+def asynchrone(app, cache, chemins):
+    """(ms par appel à obtenir dans le thread de l'interface, ms jusqu'à ce que tout soit prêt)"""
+    t0 = time.perf_counter()
+    for chemin in chemins:
+        cache.obtenir(chemin, TAILLE, MODE)
+    appel = (time.perf_counter() - t0) * 1000 / len(chemins)
+    cache.attendre()
+    app.processEvents()
+    total = (time.perf_counter() - t0) * 1000
+    manquantes = sum(cache.obtenir(c, TAILLE, MODE) is None for c in chemins)
+    if manquantes:
+        print(f"{manquantes} miniatures manquantes")
+    return appel, total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    dossier = tempfile.mkdtemp(prefix="bench_miniatures_")
+    try:
+        images = os.path.join(dossier, "images")
+        os.makedirs(images)
+        chemins = generer_images(images, n)
+        cache_disque = os.path.join(dossier, "miniatures")
+        resultats = []
+
+        t0 = time.perf_counter()
+        for chemin in chemins:
+            QPixmap(chemin).scaled(TAILLE, MODE, Qt.SmoothTransformation)
+        direct = (time.perf_counter() - t0) * 1000
+        resultats.append(("direct", direct / n, direct))
+
+        cache = ThumbnailCache(dossier=cache_disque)
+        appel, total = asynchrone(app, cache, chemins)
+        resultats.append(("froid", appel, total))
+
+        cache = ThumbnailCache(dossier=cache_disque)
+        appel, total = asynchrone(app, cache, chemins)
+        resultats.append(("disque", appel, total))
+
+        t0 = time.perf_counter()
+        for chemin in chemins:
+            cache.obtenir(chemin, TAILLE, MODE)
+        memoire = (time.perf_counter() - t0) * 1000
+        resultats.append(("mémoire", memoire / n, memoire))
+
+        print(f"{n} images 1600x1200 -> {TAILLE.width()}x{TAILLE.height()}\n")
+        print(f"{'Mode':<10} | {'interface/carte':>16} | {'toutes prêtes':>14}")
+        for mode, par_carte, total in resultats:
+            print(f"{mode:<10} | {par_carte:>13.3f} ms | {total:>11.1f} ms")
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark : création de commandes fournisseurs de 10, 100 et 1000 lignes (avec une alerte par ligne).
+Compare l'ancien chemin (un INSERT LigneAchat et un UPDATE AlerteStock par ligne) à
+l'insertion groupée de Database.create_purchase_orders_bulk (execute_values + UPDATE ensembliste).
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée.
+
+    python3 benchmarks/bench_purchase_orders.py [nb_commandes_par_taille]
+"""
+
+import sys
+import os
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db.database import Database
+
+TAILLES_COMMANDE = (10, 100, 1000)
+
+
+def commande_ligne_par_ligne(cur, user_id, supplier_id, lines, alert_ids):
+    """Reproduction de l'ancien create_purchase_order"""
+    cur.execute("""
+        INSERT INTO Achat (Id_Utilisateur, Id_Fournisseur, Statut, DateAchat)
+        VALUES (%s, %s, 'EN_ATTENTE', CURRENT_TIMESTAMP)
+        RETURNING Id_Achat
+    """, (user_id, supplier_id))
+    purchase_id = cur.fetchone()['id_achat']
+    for line in lines:
+        cur.execute("""
+            INSERT INTO LigneAchat (Id_Achat, Id_Produit, Quantite, PrixAchatNegocie)
+            VALUES (%s, %s, %s, %s)
+        """, (purchase_id, line['product_id'], line['qty'], line['price']))
+    for alert_id in alert_ids:
+        cur.execute("""
+            UPDATE AlerteStock
+            SET Statut = 'COMMANDE_PASSEE',
+                Id_Achat_Genere = %s,
+                Date_Traitement = CURRENT_TIMESTAMP,
+                Commentaire = COALESCE(Commentaire, '') || ' [Auto: Commande #' || %s || ' créée]'
+            WHERE Id_Alerte = %s AND Statut IN ('NON_LUE', 'VU', 'EN_COURS')
+        """, (purchase_id, purchase_id, alert_id))
+
+
+def commande_groupee(cur, user_id, supplier_id, lines, alert_ids):
+    Database._create_purchase_orders(cur, user_id, [
+        {'supplier_id': supplier_id, 'lines': lines, 'alert_ids': alert_ids}
+    ])
+
+
+def preparer_donnees(cur):
+    """Au moins 1000 produits (complétés par des produits de test) et une alerte ouverte par produit"""
+    cur.execute("SET LOCAL session_replication_role = replica")
+    cur.execute("SELECT COUNT(*) AS n FROM Produit")
+    manquants = max(TAILLES_COMMANDE) - cur.fetchone()['n']
+    if manquants > 0:
+        cur.execute("""
+            INSERT INTO Produit (Id_Produit, Nom, Id_Categorie, PrixUnitaireActuel)
+            SELECT 'BENCH' || g, 'Produit bench ' || g, (SELECT MIN(Id_Categorie) FROM Categorie), 1000
+            FROM generate_series(1, %s) AS g
+        """, (manquants,))
+    cur.execute("""
+        INSERT INTO AlerteStock (Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Statut)
+        SELECT Id_Produit, 0, 10, 'NON_LUE' FROM Produit
+        RETURNING Id_Alerte, Id_Produit
+    """)
+    alertes = {r['id_produit']: r['id_alerte'] for r in cur.fetchall()}
+    cur.execute("SET LOCAL session_replication_role = origin")
+    return alertes
+
+
+def mesurer(cur, fn, user_id, supplier_id, lines, alert_ids, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        cur.execute("SAVEPOINT bench")
+        fn(cur, user_id, supplier_id, lines, alert_ids)
+        cur.execute("ROLLBACK TO SAVEPOINT bench")  # alertes de nouveau ouvertes
+    return (time.perf_counter() - t0) / n * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        cur.execute("""
+            SELECT Id_Utilisateur FROM Utilisateur
+            WHERE Role IN ('Responsable_Achats', 'Administrateur') LIMIT 1
+        """)
+        user_id = cur.fetchone()['id_utilisateur']
+        cur.execute("SELECT MIN(Id_Fournisseur) AS id FROM Fournisseur")
+        supplier_id = cur.fetchone()['id']
+
+        alertes = preparer_donnees(cur)
+        cur.execute("SELECT Id_Produit FROM Produit ORDER BY Id_Produit LIMIT %s", (max(TAILLES_COMMANDE),))
+        produits = [r['id_produit'] for r in cur.fetchall()]
+
+        print(f"{'Lignes':>6} | {'Ligne par ligne':>16} | {'Groupé':>10} | Gain")
+        for taille in TAILLES_COMMANDE:
+            lines = [{'product_id': p, 'qty': 10, 'price': 500} for p in produits[:taille]]
+            alert_ids = [alertes[p] for p in produits[:taille]]
+            avant = mesurer(cur, commande_ligne_par_ligne, user_id, supplier_id, lines, alert_ids, n)
+            apres = mesurer(cur, commande_groupee, user_id, supplier_id, lines, alert_ids, n)
+            print(f"{taille:>6} | {avant:>13.1f}ms | {apres:>8.1f}ms | x{avant / apres:.1f}")
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark : latence de Database.get_purchasing_dashboard_summary
+Compare l'ancienne version (11 requêtes successives) à la requête unique multi-CTE.
+
+Jeu de données généré dans une transaction annulée à la fin (la base n'est pas modifiée) :
+1M LigneVente, 100k AlerteStock, 20k Achat (~3 lignes chacun).
+Les triggers sont désactivés pendant la génération (session_replication_role = replica,
+nécessite un rôle superutilisateur).
+
+    python3 benchmarks/bench_purchasing_dashboard.py [nb_mesures]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db.database import Database
+
+NB_LIGNES_VENTE = 1_000_000
+LIGNES_PAR_VENTE = 5
+NB_ALERTES = 100_000
+NB_ACHATS = 20_000
+
+
+def ancienne_synthese(cur):
+    """Reproduction de l'ancienne implémentation (une requête par indicateur)"""
+    summary = {
+        'urgences': {'critical': 0, 'ruptures': 0, 'retards': 0},
+        'kpis': {'actives': 0, 'avg_time': 0.0, 'reactivity': 0.0, 'commandes_cours': 0, 'valeur_commandes_cours': 0},
+        'finance': {'budget': 10000000, 'depenses': 0, 'cout_urgences': 0},
+        'risques': [],
+        'trends': []
+    }
+    cur.execute("SELECT COUNT(*) as count FROM AlerteStock WHERE Statut IN ('NON_LUE', 'VU', 'EN_COURS') AND Priorite = 'CRITICAL'")
+    summary['urgences']['critical'] = cur.fetchone()['count']
+    cur.execute("SELECT COUNT(*) as count FROM Produit WHERE StockActuel = 0")
+    summary['urgences']['ruptures'] = cur.fetchone()['count']
+    cur.execute("SELECT COUNT(*) as count FROM Achat WHERE Statut = 'EN_ATTENTE' AND DateAchat < CURRENT_DATE - INTERVAL '7 days'")
+    summary['urgences']['retards'] = cur.fetchone()['count']
+    cur.execute("SELECT COUNT(*) as count FROM AlerteStock WHERE Statut IN ('NON_LUE', 'VU', 'EN_COURS')")
+    summary['kpis']['actives'] = cur.fetchone()['count']
+    cur.execute("""
+        SELECT COALESCE(EXTRACT(EPOCH FROM AVG(Date_Traitement - Date_Creation))/3600, 0) as avg_time
+        FROM AlerteStock
+        WHERE Date_Traitement >= CURRENT_DATE - INTERVAL '24 hours'
+    """)
+    summary['kpis']['avg_time'] = round(cur.fetchone()['avg_time'], 1)
+    cur.execute("""
+        SELECT
+            (COUNT(CASE WHEN (Date_Traitement - Date_Creation) < INTERVAL '24 hours' THEN 1 END)::float /
+            NULLIF(COUNT(*), 0) * 100) as reactivity
+        FROM AlerteStock
+        WHERE Statut IN ('ARCHIVEE', 'COMMANDE_PASSEE')
+        AND Priorite = 'CRITICAL'
+        AND Date_Traitement >= CURRENT_DATE - INTERVAL '30 days'
+    """)
+    row = cur.fetchone()
+    summary['kpis']['reactivity'] = round(row['reactivity'], 1) if row and row['reactivity'] else 0.0
+    cur.execute("""
+        SELECT COUNT(*) as count, COALESCE(SUM(la.Quantite * la.PrixAchatNegocie), 0) as val
+        FROM Achat a
+        JOIN LigneAchat la ON a.Id_Achat = la.Id_Achat
+        WHERE a.Statut = 'EN_ATTENTE'
+    """)
+    res_cmd = cur.fetchone()
+    summary['kpis']['commandes_cours'] = res_cmd['count']
+    summary['kpis']['valeur_commandes_cours'] = res_cmd['val']
+    cur.execute("""
+        SELECT COALESCE(SUM(la.Quantite * la.PrixAchatNegocie), 0) as total
+        FROM Achat a
+        JOIN LigneAchat la ON a.Id_Achat = la.Id_Achat
+        WHERE DATE_TRUNC('month', a.DateAchat) = DATE_TRUNC('month', CURRENT_DATE)
+    """)
+    summary['finance']['depenses'] = cur.fetchone()['total']
+    cur.execute("""
+        SELECT COALESCE(SUM(la.Quantite * la.PrixAchatNegocie), 0) as total
+        FROM Achat a
+        JOIN LigneAchat la ON a.Id_Achat = la.Id_Achat
+        JOIN AlerteStock al ON al.Id_Achat_Genere = a.Id_Achat
+        WHERE al.Priorite = 'CRITICAL'
+        AND DATE_TRUNC('month', a.DateAchat) = DATE_TRUNC('month', CURRENT_DATE)
+    """)
+    summary['finance']['cout_urgences'] = cur.fetchone()['total']
+    cur.execute("""
+        SELECT Nom, StockActuel, StockAlerte
+        FROM Produit
+        WHERE StockActuel <= (StockAlerte * 1.1) AND StockActuel > StockAlerte
+        ORDER BY StockActuel ASC
+        LIMIT 5
+    """)
+    summary['risques'] = cur.fetchall()
+    cur.execute("""
+        WITH Days AS (
+            SELECT generate_series(CURRENT_DATE - INTERVAL '6 days', CURRENT_DATE, '1 day')::date as jour
+        )
+        SELECT d.jour, COUNT(a.Id_Alerte) as count
+        FROM Days d
+        LEFT JOIN AlerteStock a ON DATE(a.Date_Creation) = d.jour
+        GROUP BY d.jour
+        ORDER BY d.jour
+    """)
+    summary['trends'] = cur.fetchall()
+    return summary
+
+
+def generer_donnees(cur):
+    cur.execute("SET LOCAL session_replication_role = replica")
+    cur.execute("SELECT fn_assurer_partitions(0, 13)")  # Ventes sur 1 an glissant
+    cur.execute("SELECT array_agg(Id_Produit ORDER BY Id_Produit) AS ids FROM Produit")
+    produits = cur.fetchone()['ids']
+    if not produits or len(produits) < LIGNES_PAR_VENTE:
+        sys.exit(f"Il faut au moins {LIGNES_PAR_VENTE} produits dans la base")
+    cur.execute("SELECT MIN(Id_Utilisateur) AS u FROM Utilisateur")
+    user_id = cur.fetchone()['u']
+    cur.execute("SELECT MIN(Id_Fournisseur) AS f FROM Fournisseur")
+    fournisseur = cur.fetchone()['f']
+    if fournisseur is None:
+        sys.exit("Il faut au moins un fournisseur dans la base")
+
+    nb_ventes = NB_LIGNES_VENTE // LIGNES_PAR_VENTE
+    t0 = time.perf_counter()
+
+    # Ventes sur 1 an, 5 produits distincts consécutifs par vente
+    cur.execute("""
+        CREATE TEMP TABLE bench_ventes ON COMMIT DROP AS
+        WITH v AS (
+            INSERT INTO Vente (DateVente, Id_Utilisateur)
+            SELECT NOW() - random() * INTERVAL '365 days', %s
+            FROM generate_series(1, %s)
+            RETURNING Id_Vente, DateVente
+        )
+        SELECT Id_Vente, DateVente, row_number() OVER () AS n FROM v
+    """, (user_id, nb_ventes))
+    cur.execute("""
+        INSERT INTO LigneVente (Id_Vente, DateVente, Id_Produit, QteVendue, Remise, PrixUnitaireVendu, TauxTVA)
+        SELECT bv.Id_Vente, bv.DateVente,
+               (%(p)s::varchar[])[1 + ((bv.n * 7 + k) %% array_length(%(p)s::varchar[], 1))],
+               1 + (random() * 4)::int, 0, 100 + (random() * 5000)::int, 18.00
+        FROM bench_ventes bv, generate_series(0, %(k)s - 1) AS k
+    """, {'p': produits, 'k': LIGNES_PAR_VENTE})
+
+    # Achats sur 6 mois, ~3 lignes chacun
+    cur.execute("""
+        CREATE TEMP TABLE bench_achats ON COMMIT DROP AS
+        WITH a AS (
+            INSERT INTO Achat (DateAchat, Statut, Id_Utilisateur, Id_Fournisseur)
+            SELECT NOW() - random() * INTERVAL '180 days',
+                   (ARRAY['EN_ATTENTE', 'RECU', 'RECU', 'ANNULE'])[1 + (random() * 3)::int], %s, %s
+            FROM generate_series(1, %s)
+            RETURNING Id_Achat
+        )
+        SELECT Id_Achat, row_number() OVER () AS n FROM a
+    """, (user_id, fournisseur, NB_ACHATS))
+    cur.execute("""
+        INSERT INTO LigneAchat (Id_Achat, Id_Produit, Quantite, PrixAchatNegocie)
+        SELECT ba.Id_Achat,
+               (%(p)s::varchar[])[1 + ((ba.n * 3 + k) %% array_length(%(p)s::varchar[], 1))],
+               1 + (random() * 100)::int, 50 + (random() * 3000)::int
+        FROM bench_achats ba, generate_series(0, LEAST(2, array_length(%(p)s::varchar[], 1) - 1)) AS k
+    """, {'p': produits})
+
+    # Alertes sur 6 mois, 10 % liées à une commande
+    cur.execute("""
+        WITH achats AS (SELECT array_agg(Id_Achat) AS ids FROM bench_achats)
+        INSERT INTO AlerteStock (Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Priorite, Statut,
+                                 Date_Creation, Date_Traitement, Id_Achat_Genere)
+        SELECT (%(p)s::varchar[])[1 + (random() * (array_length(%(p)s::varchar[], 1) - 1))::int],
+               (random() * 10)::int, 10,
+               (ARRAY['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'])[1 + (random() * 3)::int],
+               s.statut, s.creation,
+               CASE WHEN s.statut IN ('ARCHIVEE', 'COMMANDE_PASSEE')
+                    THEN s.creation + random() * INTERVAL '72 hours' END,
+               CASE WHEN random() < 0.1
+                    THEN achats.ids[1 + (g %% array_length(achats.ids, 1))] END
+        FROM achats, generate_series(1, %(nb)s) AS g,
+             LATERAL (SELECT (ARRAY['NON_LUE', 'VU', 'EN_COURS', 'COMMANDE_PASSEE', 'ARCHIVEE'])[1 + (random() * 4)::int] AS statut,
+                             NOW() - random() * INTERVAL '180 days' AS creation,
+                             g) AS s
+    """, {'p': produits, 'nb': NB_ALERTES})
+
+    cur.execute("ANALYZE Vente, LigneVente, Achat, LigneAchat, AlerteStock, Produit")
+    print(f"Jeu de données généré en {time.perf_counter() - t0:.1f}s "
+          f"({NB_LIGNES_VENTE} LigneVente, {NB_ALERTES} AlerteStock, {NB_ACHATS} Achat)")
+
+
+def mesurer(cur, fn, n):
+    fn(cur)  # chauffe du cache
+    durees = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(cur)
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    return statistics.mean(durees), durees[len(durees) // 2], durees[int(len(durees) * 0.95) - 1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        generer_donnees(cur)
+
+        # Mêmes résultats (à l'ordre près des ex-aequo dans les risques)
+        avant, apres = ancienne_synthese(cur), Database._purchasing_summary(cur)
+        for cle in ('urgences', 'kpis', 'finance'):
+            if avant[cle] != apres[cle]:
+                print(f"Écart sur '{cle}': {avant[cle]} != {apres[cle]}")
+        if [dict(t) for t in avant['trends']] != apres['trends']:
+            print("Écart sur 'trends'")
+
+        print(f"{'Version':<22} | {'moy.':>9} | {'p50':>9} | {'p95':>9}")
+        for nom, fn in (("11 requêtes", ancienne_synthese), ("requête unique", Database._purchasing_summary)):
+            moy, p50, p95 = mesurer(cur, fn, n)
+            print(f"{nom:<22} | {moy:>7.1f}ms | {p50:>7.1f}ms | {p95:>7.1f}ms")
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
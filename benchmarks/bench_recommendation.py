@@ -0,0 +1,121 @@
+"""
+Benchmark : recommandation de commande pour un produit en alerte
+Compare l'ancien chemin de l'écran de traitement des alertes (get_alert_purchasing_context puis
+get_order_recommendation : jusqu'à 7 requêtes par alerte) à la lecture unique dans StatistiqueDemande,
+pour une alerte et pour toute la file (get_recommendations_bulk),
+et mesure le calcul des statistiques de demande (SQL + point de commande / EOQ vectorisés).
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée.
+
+    python3 benchmarks/bench_recommendation.py [nb_mesures]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db import demand
+from db.database import Database
+
+NB_PRODUITS = 300  # File d'alertes d'une matinée
+
+
+def ancien_chemin(cur, product_id):
+    """Reproduction des anciens get_alert_purchasing_context + get_order_recommendation"""
+    cur.execute("""
+        SELECT COALESCE(SUM(lv.QteVendue), 0) as sales_30d FROM LigneVente lv
+        WHERE lv.Id_Produit = %s AND lv.DateVente > CURRENT_DATE - INTERVAL '30 days'
+    """, (product_id,))
+    cur.execute("""
+        SELECT MAX(a.DateAchat) as last_order FROM Achat a
+        JOIN LigneAchat la ON a.Id_Achat = la.Id_Achat WHERE la.Id_Produit = %s
+    """, (product_id,))
+    cur.execute("""
+        SELECT COUNT(*) as alert_count FROM AlerteStock
+        WHERE Id_Produit = %s AND Date_Creation > CURRENT_DATE - INTERVAL '90 days'
+    """, (product_id,))
+    cur.execute("""
+        SELECT Nom, StockActuel, StockAlerte, DernierPrixAchat, PrixAchatMoyen
+        FROM Produit WHERE Id_Produit = %s
+    """, (product_id,))
+    cur.execute("""
+        SELECT f.Id_Fournisseur, f.Nom FROM fournir l
+        JOIN Fournisseur f ON l.Id_Fournisseur = f.Id_Fournisseur
+        WHERE l.Id_Produit = %s LIMIT 1
+    """, (product_id,))
+    if not cur.fetchone():
+        cur.execute("""
+            SELECT f.Id_Fournisseur, f.Nom FROM Achat a
+            JOIN LigneAchat la ON a.Id_Achat = la.Id_Achat
+            JOIN Fournisseur f ON a.Id_Fournisseur = f.Id_Fournisseur
+            WHERE la.Id_Produit = %s ORDER BY a.DateAchat DESC LIMIT 1
+        """, (product_id,))
+        cur.fetchone()
+
+
+def calculer_statistiques(cur):
+    """Corps de Database.refresh_demand_statistics (sans commit)"""
+    cur.execute("SELECT fn_calculer_statistiques_demande(TRUE)")
+    cur.execute("""
+        SELECT s.Id_Produit, s.VitesseJour, s.EcartTypeJour, s.DelaiMoyenJours, s.EcartTypeDelai,
+               COALESCE(NULLIF(p.DernierPrixAchat, 0), NULLIF(p.PrixAchatMoyen, 0)) as cout
+        FROM StatistiqueDemande s JOIN Produit p ON p.Id_Produit = s.Id_Produit
+    """)
+    stats = cur.fetchall()
+    t0 = time.perf_counter()
+    demand.calculer_reappro(*[[r[c] for r in stats] for c in
+                              ('vitessejour', 'ecarttypejour', 'delaimoyenjours', 'ecarttypedelai', 'cout')])
+    return len(stats), (time.perf_counter() - t0) * 1000
+
+
+def mesurer(fn, n):
+    fn()  # chauffe du cache
+    durees = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    return statistics.mean(durees), durees[len(durees) // 2], durees[int(len(durees) * 0.95) - 1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        t0 = time.perf_counter()
+        nb, ms_numpy = calculer_statistiques(cur)
+        print(f"Statistiques de demande : {nb} produits en {(time.perf_counter() - t0) * 1000:.0f}ms "
+              f"(dont {ms_numpy:.1f}ms pour point de commande / EOQ)")
+
+        cur.execute("SELECT Id_Produit FROM Produit ORDER BY Id_Produit LIMIT %s", (NB_PRODUITS,))
+        produits = [r['id_produit'] for r in cur.fetchall()]
+
+        versions = (
+            ("1 alerte, ancien", lambda: ancien_chemin(cur, produits[0])),
+            ("1 alerte, lecture unique", lambda: Database._order_recommendations(cur, produits[:1])),
+            (f"{len(produits)} alertes, ancien", lambda: [ancien_chemin(cur, p) for p in produits]),
+            (f"{len(produits)} alertes, en bloc", lambda: Database._order_recommendations(cur, produits)),
+        )
+        print(f"{'Version':<28} | {'moy.':>9} | {'p50':>9} | {'p95':>9}")
+        for nom, fn in versions:
+            moy, p50, p95 = mesurer(fn, n)
+            print(f"{nom:<28} | {moy:>7.1f}ms | {p50:>7.1f}ms | {p95:>7.1f}ms")
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark : génération des reçus PDF et ESC/POS (reçus/s) et attente à la caisse
+Compare sur des ventes fictives (aucun accès à la base) :
+- séquentiel : ReceiptGenerator.generate_receipt dans le thread appelant (ancien comportement de la caisse)
+- lot : tous les reçus dans un seul PDF (gabarit d'en-tête partagé par les pages)
+- pool : ReceiptRenderer, un fichier par reçu, N processus
+- pool + lots : ReceiptRenderer.soumettre_lot par paquets
+- escpos : ticket thermique (EscPosReceiptGenerator), rendu seul puis envoyé à une
+  imprimante simulée (socket TCP locale qui lit et jette les octets)
+et le temps rendu à la caisse par soumettre() (p50, p95).
+Les PDF sont écrits dans un dossier temporaire supprimé à la fin.
+
+    python3 benchmarks/bench_recus.py [nb_recus] [processus] [taille_lot]
+"""
+
+import sys
+import os
+import time
+import random
+import shutil
+import socket
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import wait
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from utils.receipt_generator import ReceiptGenerator
+from utils.escpos_receipt import EscPosReceiptGenerator
+from utils.receipt_renderer import ReceiptRenderer
+
+
+def recus_fictifs(n, graine=42):
+    """n reçus de 1 à 15 articles"""
+    rng = random.Random(graine)
+    recus = []
+    for i in range(n):
+        articles = []
+        for j in range(rng.randint(1, 15)):
+            prix = rng.choice([250, 500, 1200, 3500, 15000])
+            qte = rng.randint(1, 4)
+            remise = rng.choice([0, 0, 0, 5, 10])
+            articles.append({'nom_produit': f"Produit {j:03d}", 'quantite': qte, 'prix_unitaire': prix,
+                             'remise': remise, 'total_ligne': prix * qte * (1 - remise / 100)})
+        total_ttc = sum(a['total_ligne'] for a in articles)
+        subtotal = sum(a['prix_unitaire'] * a['quantite'] for a in articles)
+        totaux = {'subtotal_ttc': subtotal, 'total_remises': subtotal - total_ttc,
+                  'total_ht': total_ttc / 1.18, 'montant_tva': total_ttc - total_ttc / 1.18,
+                  'total_ttc': total_ttc}
+        vente = {'id_vente': i + 1, 'date_vente': datetime.now(), 'caissier': "Bench", 'articles': articles}
+        recus.append((vente, totaux, "ESPECES"))
+    return recus
+
+
+def imprimante_simulee():
+    """Socket TCP locale qui accepte les tickets et jette les octets ; retourne son port"""
+    serveur = socket.create_server(("127.0.0.1", 0))
+
+    def servir():
+        while True:
+            client, _ = serveur.accept()
+            with client:
+                while client.recv(65536):
+                    pass
+
+    threading.Thread(target=servir, daemon=True).start()
+    return serveur.getsockname()[1]
+
+
+def centile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(p * len(valeurs)))]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 2
+    taille_lot = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    recus = recus_fictifs(n)
+    dossier = tempfile.mkdtemp(prefix="bench_recus_")
+    dossier_initial = os.getcwd()
+    # RECEIPTS_DIR est relatif : les processus de rendu héritent du répertoire courant
+    os.chdir(dossier)
+    renderer = ReceiptRenderer(processus)
+    try:
+        resultats = []
+
+        ReceiptGenerator.generate_receipt(*recus[0])  # chauffe
+        t0 = time.perf_counter()
+        attentes = []
+        for recu in recus:
+            t = time.perf_counter()
+            ReceiptGenerator.generate_receipt(*recu)
+            attentes.append(time.perf_counter() - t)
+        resultats.append(("séquentiel", n / (time.perf_counter() - t0), attentes))
+
+        t0 = time.perf_counter()
+        for i in range(0, n, taille_lot):
+            ReceiptGenerator.generate_receipts_batch(recus[i:i + taille_lot])
+        resultats.append((f"lot de {taille_lot}", n / (time.perf_counter() - t0), None))
+
+        wait(renderer.prechauffer())
+        t0 = time.perf_counter()
+        attentes, futures = [], []
+        for recu in recus:
+            t = time.perf_counter()
+            futures.append(renderer.soumettre(*recu))
+            attentes.append(time.perf_counter() - t)
+        wait(futures)
+        resultats.append((f"pool ({processus} proc.)", n / (time.perf_counter() - t0), attentes))
+
+        t0 = time.perf_counter()
+        wait([renderer.soumettre_lot(recus[i:i + taille_lot]) for i in range(0, n, taille_lot)])
+        resultats.append((f"pool + lots de {taille_lot}", n / (time.perf_counter() - t0), None))
+
+        EscPosReceiptGenerator.generate_receipt(*recus[0])  # chauffe (en-tête pré-encodé)
+        t0 = time.perf_counter()
+        attentes = []
+        for recu in recus:
+            t = time.perf_counter()
+            EscPosReceiptGenerator.generate_receipt(*recu)
+            attentes.append(time.perf_counter() - t)
+        resultats.append(("escpos (rendu)", n / (time.perf_counter() - t0), attentes))
+
+        thermique = ReceiptRenderer(sortie="escpos", imprimante=f"tcp://127.0.0.1:{imprimante_simulee()}")
+        try:
+            t0 = time.perf_counter()
+            attentes, tickets = [], []
+            for recu in recus:
+                t = time.perf_counter()
+                tickets.append(thermique.soumettre(*recu))
+                attentes.append(time.perf_counter() - t)
+            wait(tickets)
+            resultats.append(("escpos + tcp locale", n / (time.perf_counter() - t0), attentes))
+            futures += tickets
+        finally:
+            thermique.arreter()
+
+        erreurs = [f.exception() for f in futures if f.exception() is not None]
+        if erreurs:
+            print(f"{len(erreurs)} erreurs de rendu, ex. : {erreurs[0]}")
+
+        print(f"{n} reçus\n")
+        print(f"{'Mode':<24} | {'reçus/s':>9} | {'caisse p50':>11} | {'caisse p95':>11}")
+        for mode, debit, attentes in resultats:
+            if attentes:
+                p50 = f"{centile(attentes, 0.50) * 1e6:.0f} µs"
+                p95 = f"{centile(attentes, 0.95) * 1e6:.0f} µs"
+            else:
+                p50 = p95 = "-"
+            print(f"{mode:<24} | {debit:>9.1f} | {p50:>11} | {p95:>11}")
+    finally:
+        renderer.arreter()
+        os.chdir(dossier_initial)
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
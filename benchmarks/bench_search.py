@@ -0,0 +1,112 @@
+"""
+Benchmark : latence de Database.search_products sur un catalogue de 100k produits
+Compare l'ancienne requête (ILIKE '%mot%' sur Nom et Description, parcours séquentiel)
+à la recherche indexée (trigrammes + plein texte, cf. Recherche.sql) avec et sans limite.
+
+Catalogue généré dans une transaction annulée à la fin (la base n'est pas modifiée).
+Les triggers sont désactivés pendant la génération (session_replication_role = replica,
+nécessite un rôle superutilisateur).
+
+    python3 benchmarks/bench_search.py [nb_mesures]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db.database import Database
+
+NB_PRODUITS = 100_000
+LIMITE = 20
+
+# Saisies typiques : code scanné, début de nom, mot accentué ou non, pluriel, mot rare
+RECHERCHES = ["BENCH4242", "crè", "creme", "Pâtés", "savon liquide", "chocolat noir", "zzz"]
+
+MOTS = ['Crème', 'Pâté', 'Café', 'Thé vert', 'Chocolat noir', 'Savon liquide', 'Riz parfumé',
+        "Huile d'olive", 'Farine', 'Sucre', 'Lait entier', 'Yaourt', 'Biscuit', "Jus d'orange"]
+
+
+def ancienne_recherche(cur, keyword):
+    """Reproduction de l'ancien search_products"""
+    cur.execute("""
+        SELECT
+            p.Id_Produit as id_produit,
+            p.Nom as nom_produit,
+            p.Description as description,
+            p.PrixUnitaireActuel as prix_unitaire,
+            p.StockActuel as quantite_stock,
+            p.StockAlerte as seuil_min_personnalise,
+            c.Libelle as nom_categorie
+        FROM Produit p
+        JOIN Categorie c ON p.Id_Categorie = c.Id_Categorie
+        WHERE p.Nom ILIKE %s OR p.Description ILIKE %s
+        ORDER BY p.Nom
+    """, (f"%{keyword}%", f"%{keyword}%"))
+    return cur.fetchall()
+
+
+def generer_catalogue(cur):
+    t0 = time.perf_counter()
+    cur.execute("SET LOCAL session_replication_role = replica")
+    cur.execute("SELECT MIN(Id_Categorie) AS id FROM Categorie")
+    categorie = cur.fetchone()['id']
+    cur.execute("""
+        INSERT INTO Produit (Id_Produit, Nom, Description, Id_Categorie, PrixUnitaireActuel, StockActuel)
+        SELECT 'BENCH' || g,
+               (%(mots)s::text[])[1 + g %% array_length(%(mots)s::text[], 1)] || ' ' || g,
+               'Lot ' || g || ' - ' || (%(mots)s::text[])[1 + (g / 7) %% array_length(%(mots)s::text[], 1)]
+                      || ', qualité supérieure',
+               %(cat)s, 100 + g %% 5000, g %% 200
+        FROM generate_series(1, %(nb)s) AS g
+    """, {'mots': MOTS, 'cat': categorie, 'nb': NB_PRODUITS})
+    cur.execute("ANALYZE Produit")
+    print(f"Catalogue généré en {time.perf_counter() - t0:.1f}s ({NB_PRODUITS} produits)")
+
+
+def mesurer(cur, fn, n):
+    fn(cur)  # chauffe du cache
+    durees = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(cur)
+        durees.append((time.perf_counter() - t0) * 1000)
+    durees.sort()
+    return statistics.mean(durees), durees[len(durees) // 2], durees[int(len(durees) * 0.95) - 1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        generer_catalogue(cur)
+
+        versions = (
+            ("ILIKE (ancienne)", ancienne_recherche),
+            ("indexée", lambda c, kw: Database._search_products(c, kw)),
+            (f"indexée, limit {LIMITE}", lambda c, kw: Database._search_products(c, kw, LIMITE)),
+        )
+        print(f"{'Recherche':<16} | {'Version':<22} | {'résultats':>9} | {'moy.':>9} | {'p50':>9} | {'p95':>9}")
+        for kw in RECHERCHES:
+            for nom, fn in versions:
+                nb = len(fn(cur, kw))
+                moy, p50, p95 = mesurer(cur, lambda c: fn(c, kw), n)
+                print(f"{kw:<16} | {nom:<22} | {nb:>9} | {moy:>7.1f}ms | {p50:>7.1f}ms | {p95:>7.1f}ms")
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
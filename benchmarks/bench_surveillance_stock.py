@@ -0,0 +1,133 @@
+"""
+Benchmark : débit d'encaissement (ventes/s, paniers de 10 lignes) selon la surveillance du stock
+Compare, pour des produits au-dessus du seuil puis sous le seuil avec une alerte déjà ouverte :
+- sans surveillance (trigger désactivé)
+- l'ancien trigger ligne par ligne (NOT EXISTS sur AlerteStock pour chaque produit modifié)
+- le trigger niveau instruction actuel (filtre sur le franchissement du seuil, anti-doublon AlerteActive)
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée
+(Produit reste verrouillé pendant la mesure : ALTER TABLE ... DISABLE TRIGGER).
+
+    python3 benchmarks/bench_surveillance_stock.py [nb_ventes]
+"""
+
+import sys
+import os
+import time
+import json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+
+TAILLE_PANIER = 10
+
+ANCIEN_TRIGGER = """
+    CREATE FUNCTION fn_surveillance_stock_ligne()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_priorite VARCHAR(20);
+    BEGIN
+        IF NEW.StockActuel <= NEW.StockAlerte THEN
+            IF NOT EXISTS (
+                SELECT 1 FROM AlerteStock
+                WHERE Id_Produit = NEW.Id_Produit
+                AND Statut NOT IN ('ARCHIVEE', 'COMMANDE_PASSEE')
+            ) THEN
+                IF NEW.StockActuel = 0 THEN v_priorite := 'CRITICAL';
+                ELSIF NEW.StockActuel <= (NEW.StockAlerte / 2) THEN v_priorite := 'HIGH';
+                ELSE v_priorite := 'MEDIUM';
+                END IF;
+                INSERT INTO AlerteStock (Id_Produit, Stock_Au_Moment_Alerte, Seuil_Alerte_Vise, Priorite, Commentaire)
+                VALUES (NEW.Id_Produit, NEW.StockActuel, NEW.StockAlerte, v_priorite,
+                        'Alerte automatique : Stock critique détecté.');
+            END IF;
+        ELSIF NEW.StockActuel > NEW.StockAlerte AND OLD.StockActuel <= OLD.StockAlerte THEN
+            UPDATE AlerteStock
+            SET Statut = 'ARCHIVEE', Date_Traitement = CURRENT_TIMESTAMP,
+                Commentaire = COALESCE(Commentaire, '') || ' [Fermeture automatique : Stock réapprovisionné]'
+            WHERE Id_Produit = NEW.Id_Produit AND Statut IN ('NON_LUE', 'VU');
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER trg_surveillance_stock_ligne
+    AFTER UPDATE OF StockActuel ON Produit
+    FOR EACH ROW
+    EXECUTE FUNCTION fn_surveillance_stock_ligne();
+"""
+
+# (libellé, triggers actifs)
+VERSIONS = (
+    ("sans surveillance", ()),
+    ("ligne par ligne", ("trg_surveillance_stock_ligne",)),
+    ("ensembliste", ("trg_surveillance_stock",)),
+)
+TRIGGERS = ("trg_surveillance_stock", "trg_surveillance_stock_ligne")
+
+
+def activer(cur, actifs):
+    for trigger in TRIGGERS:
+        etat = "ENABLE" if trigger in actifs else "DISABLE"
+        cur.execute(f"ALTER TABLE Produit {etat} TRIGGER {trigger}")
+
+
+def mesurer(cur, user_id, lignes, n):
+    donnees = json.dumps(lignes, default=str)
+    cur.execute("SELECT fn_enregistrer_vente(%s, 'ESPECES', %s::jsonb)", (user_id, donnees))  # chauffe
+    t0 = time.perf_counter()
+    for _ in range(n):
+        cur.execute("SAVEPOINT bench")
+        cur.execute("SELECT fn_enregistrer_vente(%s, 'ESPECES', %s::jsonb)", (user_id, donnees))
+        cur.fetchone()
+        cur.execute("RELEASE SAVEPOINT bench")
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    conn = connection.get_connection()
+    if not conn:
+        sys.exit("Base injoignable")
+    cur = connection.get_cursor(conn)
+    try:
+        cur.execute("SELECT Id_Utilisateur FROM Utilisateur WHERE Role = 'Caissier' LIMIT 1")
+        user_id = cur.fetchone()['id_utilisateur']
+        cur.execute("SELECT Id_Produit, PrixUnitaireActuel, TauxTVA FROM Produit ORDER BY Id_Produit LIMIT %s",
+                    (TAILLE_PANIER,))
+        produits = cur.fetchall()
+        ids = [p['id_produit'] for p in produits]
+        lignes = [{'id': p['id_produit'], 'qte': 1, 'remise': 0,
+                   'prix_unitaire': p['prixunitaireactuel'], 'taux_tva': p['tauxtva']} for p in produits]
+
+        cur.execute(ANCIEN_TRIGGER)
+
+        scenarios = (
+            # Cas courant : le stock reste au-dessus du seuil
+            ("au-dessus du seuil", "UPDATE Produit SET StockActuel = 1000000, StockAlerte = 10 "
+                                   "WHERE Id_Produit = ANY(%s)"),
+            # Rupture en cours : chaque vente repasse par l'anti-doublon
+            ("sous le seuil, alerte ouverte", "UPDATE Produit SET StockActuel = 1000000, StockAlerte = 2000000 "
+                                              "WHERE Id_Produit = ANY(%s)"),
+        )
+        print(f"{'Scénario':<30} | " + " | ".join(f"{nom:>18}" for nom, _ in VERSIONS))
+        for scenario, preparation in scenarios:
+            resultats = []
+            for _, actifs in VERSIONS:
+                activer(cur, ())
+                cur.execute(preparation, (ids,))
+                activer(cur, actifs)
+                resultats.append(mesurer(cur, user_id, lignes, n))
+            print(f"{scenario:<30} | " + " | ".join(f"{r:>14.1f} v/s" for r in resultats))
+    finally:
+        conn.rollback()
+        cur.close()
+        connection.close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
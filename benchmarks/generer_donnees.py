@@ -0,0 +1,730 @@
+"""
+Générateur de données synthétiques pour tout le schéma, reproductible
+Remplit chaque table de Tables.sql à l'échelle voulue (1k à 10M ventes) à partir d'une simulation
+du magasin jour par jour (NumPy, graine fixe) :
+- popularité des produits en loi de puissance (Zipf / Pareto : quelques produits font l'essentiel des ventes)
+- affluence par heure (pics de midi et de fin de journée), par jour de semaine, saisonnière et fêtes de fin d'année
+- ventes plafonnées par le stock simulé : un produit épuisé n'est plus vendu (ventes perdues)
+- alertes de stock (mêmes règles que trg_surveillance_stock), commandes passées par les responsables
+  achats le matin, délai de livraison propre à chaque fournisseur, PMP recalculé à chaque réception
+Même graine, même nombre de ventes, même période : mêmes données.
+
+Deux modes de chargement :
+- copy (défaut) : COPY direct, triggers désactivés (session_replication_role = replica) ; stock, PMP,
+  mouvements, journal de stock et alertes viennent de la simulation, les agrégats de ventes sont
+  reconstruits ensuite (fn_reconstruire_agregats_ventes). Toutes les dates sont historiques.
+- triggers : insertions jour par jour par les chemins de l'application, triggers actifs (stock,
+  mouvements, PMP, alertes, agrégats, contrôle des reçus). Lent : réservé aux petites échelles (≤ 100k).
+  Les lignes créées par les triggers (mouvements, journal de stock, alertes) portent la date de génération.
+
+⚠ --vider efface toutes les données de la base configurée (db/connection.py) : base de test uniquement.
+
+    python3 benchmarks/generer_donnees.py --echelle 100k --vider
+    python3 benchmarks/generer_donnees.py --ventes 250000 --jours 730 --graine 7 --vider
+    python3 benchmarks/generer_donnees.py --echelle 10k --mode triggers --vider
+"""
+
+import sys
+import os
+import io
+import csv
+import time
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from db import connection
+from db.database import Database
+
+
+ECHELLES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+CATEGORIES = ['Boissons', 'Épicerie sèche', 'Produits laitiers', 'Viandes et poissons', 'Fruits et légumes',
+              'Boulangerie et pâtisserie', 'Hygiène et beauté', 'Électronique et piles', 'Articles ménagers',
+              'Snacks et confiseries']
+CATEGORIE_EXONEREE = 5  # Fruits et légumes : TVA 0 %
+
+PROFIL = {
+    # Tickets par heure d'ouverture (8h-21h), en poids relatifs
+    "heures": {8: 4, 9: 6, 10: 7, 11: 9, 12: 12, 13: 10, 14: 6, 15: 5, 16: 6, 17: 9, 18: 12, 19: 10, 20: 6},
+    "jours_semaine": (0.90, 0.85, 0.90, 0.95, 1.15, 1.40, 0.85),  # lundi -> dimanche
+    "saisonnalite": 0.15,           # amplitude annuelle (creux en début d'année)
+    "pic_fetes": 1.35,              # deuxième quinzaine de décembre
+    "zipf": 1.1,                    # exposant de popularité des produits
+    "panier_p": 0.35,               # articles par ticket : loi géométrique (moyenne ~2,9)
+    "panier_max": 12,
+    "quantite_p": 0.6,              # quantité par ligne : loi géométrique (moyenne ~1,7)
+    "quantite_max": 10,
+    "part_remise": 0.04,            # lignes avec remise
+    "remises": (5, 10, 15, 20),
+    "modes_paiement": {'ESPECES': 0.60, 'CARTE': 0.25, 'VIREMENT': 0.10, 'CHEQUE': 0.05},
+    "delai_fournisseur": (2, 10),   # délai moyen de livraison d'un fournisseur (jours, uniforme)
+    "forme_delai": 4.0,             # délais d'une commande : loi gamma autour de la moyenne du fournisseur
+    "couverture_jours": 21,         # jours de ventes couverts par une commande
+    "reactivite_achats": 0.7,       # probabilité qu'une alerte ouverte soit commandée chaque matin
+}
+
+SALAIRES = {'Administrateur': 250000, 'Gestionnaire': 150000, 'Responsable_Achats': 140000, 'Caissier': 80000}
+
+COLONNES = {
+    'Categorie': ('Id_Categorie', 'Libelle'),
+    'Utilisateur': ('Id_Utilisateur', 'Nom', 'Role', 'MotDePasse', 'email'),
+    'Fournisseur': ('Id_Fournisseur', 'Nom', 'Contact', 'Adresse'),
+    'Produit': ('Id_Produit', 'Nom', 'Description', 'Id_Categorie', 'PrixUnitaireActuel', 'PrixAchatMoyen',
+                'DernierPrixAchat', 'QuantiteTotaleAchetee', 'DateAjout', 'StockActuel', 'StockAlerte', 'TauxTVA'),
+    'fournir': ('Id_Produit', 'Id_Fournisseur', 'Quantite'),
+    'Achat': ('Id_Achat', 'DateAchat', 'Statut', 'Id_Utilisateur', 'Id_Fournisseur'),
+    'LigneAchat': ('Id_Achat', 'Id_Produit', 'Quantite', 'PrixAchatNegocie'),
+    'Vente': ('Id_Vente', 'DateVente', 'Id_Utilisateur'),
+    'LigneVente': ('Id_Vente', 'DateVente', 'Id_Produit', 'QteVendue', 'Remise', 'PrixUnitaireVendu', 'TauxTVA'),
+    'Recu': ('Id_Recu', 'DateEmission', 'ModePaiement', 'MontantTotal', 'Id_Utilisateur', 'Id_Vente'),
+    'MouvementStock': ('Id_Mouvement', 'DateMouvement', 'Type', 'Quantite', 'Id_Utilisateur', 'Id_Produit',
+                       'Id_Vente', 'Id_Achat', 'Commentaire'),
+    'StockJournalier': ('Id_Produit', 'Jour', 'StockOuverture', 'Entrees', 'Sorties', 'StockCloture', 'PMP'),
+    'AlerteStock': ('Id_Alerte', 'Id_Produit', 'Stock_Au_Moment_Alerte', 'Seuil_Alerte_Vise', 'Priorite', 'Statut',
+                    'Commentaire', 'Date_Creation', 'Date_Traitement', 'Id_Achat_Genere'),
+    'Depense': ('Id_Depense', 'Libelle', 'Categorie', 'Montant', 'DateDepense', 'Id_Utilisateur'),
+}
+
+# Tables vidées par --vider (données de référence comprises)
+TABLES_DONNEES = ('Categorie', 'Utilisateur', 'Fournisseur', 'Produit', 'fournir', 'Achat', 'LigneAchat',
+                  'Vente', 'LigneVente', 'Recu', 'MouvementStock', 'AlerteStock', 'AlerteActive', 'Depense',
+                  'AgregatVenteCategorie', 'AgregatVenteCaisse', 'StockJournalier', 'ClotureStock',
+                  'StatistiqueDemande')
+
+# Séquences SERIAL recalées après chargement (identifiants explicites)
+SEQUENCES = (('Categorie', 'Id_Categorie'), ('Utilisateur', 'Id_Utilisateur'), ('Fournisseur', 'Id_Fournisseur'),
+             ('Achat', 'Id_Achat'), ('Vente', 'Id_Vente'), ('Recu', 'Id_Recu'), ('MouvementStock', 'Id_Mouvement'),
+             ('AlerteStock', 'Id_Alerte'), ('Depense', 'Id_Depense'))
+
+MSG_ALERTE = 'Alerte automatique : Stock critique détecté.'
+MSG_GUERISON = ' [Fermeture automatique : Stock réapprovisionné]'
+
+
+def dimensions(nb_ventes):
+    """Taille du référentiel pour un volume de ventes donné"""
+    produits = int(np.clip(nb_ventes // 100, 100, 20_000))
+    return {
+        'produits': produits,
+        'fournisseurs': int(np.clip(produits // 40, 5, 500)),
+        'caissiers': int(np.clip(nb_ventes // 50_000, 3, 60)),
+        'acheteurs': int(np.clip(nb_ventes // 1_000_000, 1, 5)),
+    }
+
+
+def _dt(valeur):
+    """np.datetime64 -> datetime (paramètre psycopg2)"""
+    return None if valeur is None else valeur.astype('datetime64[us]').astype(datetime)
+
+
+def _texte(valeur):
+    """np.datetime64 -> texte (COPY)"""
+    return None if valeur is None else str(valeur)
+
+
+class Simulation:
+    """
+    Simulation du magasin, un jour à la fois (journees() est un générateur).
+    Le référentiel (utilisateurs, fournisseurs, produits) est tiré à la construction ;
+    commandes et alertes restent en mémoire (leur statut change après coup), les ventes sont
+    rendues jour par jour pour être écrites au fil de l'eau.
+    """
+
+    def __init__(self, nb_ventes, graine=42, jours=365, fin=None, profil=None):
+        self.p = profil or PROFIL
+        self.rng = np.random.default_rng(graine)
+        self.nb_ventes = nb_ventes
+        self.jours = jours
+        self.fin = fin or date.today()
+        self.debut = self.fin - timedelta(days=jours)
+        self.dims = dimensions(nb_ventes)
+
+        self._referentiel()
+
+        P = self.nb_produits
+        self.stock = np.zeros(P, dtype=np.int64)
+        self.pmp = np.zeros(P)
+        self.qte_achetee = np.zeros(P, dtype=np.int64)
+        self.dernier_prix = np.zeros(P)
+        self.en_commande = np.zeros(P, dtype=bool)
+        self.alerte_active = np.full(P, -1, dtype=np.int64)  # Alerte NON_LUE / VU du produit
+
+        self.achats = []          # [id, date, statut, acheteur, fournisseur]
+        self.contenu_achat = {}   # id -> (produits, quantités, prix)
+        self.arrivees = {}        # jour -> [id_achat]
+        self.receptions = {}      # id_achat -> horodatage de réception
+        self.alertes = []         # [id, produit, stock, seuil, priorité, statut, commentaire, création, traitement, achat]
+        self.alertes_achat = {}   # id_achat -> [index d'alerte]
+        self.prochaine_vente = 1
+        self.ventes_perdues = 0
+
+    # ---------- Référentiel ----------
+
+    def _referentiel(self):
+        rng, p, d = self.rng, self.p, self.dims
+
+        roles = (['Administrateur'] + ['Gestionnaire'] * 2 + ['Responsable_Achats'] * d['acheteurs']
+                 + ['Caissier'] * d['caissiers'])
+        self.utilisateurs = []
+        compteurs = {}
+        for i, role in enumerate(roles, start=1):
+            compteurs[role] = compteurs.get(role, 0) + 1
+            nom = f"{role.replace('_', ' ')} {compteurs[role]:02d}"
+            email = f"{role.lower()}{compteurs[role]:02d}@synthetique.tg"
+            self.utilisateurs.append((i, nom, role, 'synthetique', email))
+        self.id_admin = 1
+        self.acheteurs = np.array([u[0] for u in self.utilisateurs if u[2] == 'Responsable_Achats'])
+        self.caissiers = np.array([u[0] for u in self.utilisateurs if u[2] == 'Caissier'])
+
+        F = d['fournisseurs']
+        self.fournisseurs = [(i, f"Fournisseur {i:04d}", f"+228 9{i:07d}", f"Zone industrielle, lot {i}, Lomé")
+                             for i in range(1, F + 1)]
+        self.delai_fournisseur = rng.uniform(*p['delai_fournisseur'], F)
+
+        P = self.nb_produits = d['produits']
+        self.ids = [f"SYN{i:06d}" for i in range(1, P + 1)]
+        self.categorie = rng.integers(1, len(CATEGORIES) + 1, P)
+        poids = 1.0 / (rng.permutation(P) + 1) ** p['zipf']
+        self.popularite = poids / poids.sum()
+        prix = np.exp(rng.normal(np.log(1500), 0.8, P))
+        self.prix = np.clip(np.round(prix / 25) * 25, 100, 100_000)
+        self.cout = np.maximum(5, np.round(self.prix * rng.uniform(0.55, 0.8, P) / 5) * 5)
+        self.tva = np.where(self.categorie == CATEGORIE_EXONEREE, 0.0, 18.0)
+        self.fournisseur = rng.integers(0, F, P)
+        self.second_fournisseur = np.where(rng.random(P) < 0.25, rng.integers(0, F, P), -1)
+        self.lot = rng.choice([1, 6, 12, 24], P, p=[0.4, 0.25, 0.25, 0.1])
+
+        # Demande moyenne attendue par jour -> seuil d'alerte (délai du fournisseur + 2 jours)
+        articles = (1 / p['panier_p']) * (1 / p['quantite_p'])
+        self.demande = self.nb_ventes / self.jours * articles * self.popularite
+        delai = self.delai_fournisseur[self.fournisseur]
+        self.seuil = np.maximum(3, np.ceil(self.demande * (delai + 2))).astype(np.int64)
+
+    def produits(self):
+        """Lignes Produit (stock, PMP et quantités achetées : état courant de la simulation)"""
+        ajout = _texte(np.datetime64(self.debut - timedelta(days=1), 's'))
+        for i in range(self.nb_produits):
+            yield (self.ids[i], f"{CATEGORIES[self.categorie[i] - 1]} {i + 1:06d}", "Produit synthétique",
+                   int(self.categorie[i]), float(self.prix[i]), round(float(self.pmp[i]), 2),
+                   float(self.dernier_prix[i]), int(self.qte_achetee[i]), ajout, int(self.stock[i]),
+                   int(self.seuil[i]), float(self.tva[i]))
+
+    def fournir(self):
+        for i in range(self.nb_produits):
+            yield (self.ids[i], int(self.fournisseur[i]) + 1, int(self.lot[i]))
+            second = self.second_fournisseur[i]
+            if second >= 0 and second != self.fournisseur[i]:
+                yield (self.ids[i], int(second) + 1, int(self.lot[i]))
+
+    def depenses(self):
+        """Salaires, loyer, électricité et internet, le 1er de chaque mois de la période"""
+        rng = self.rng
+        mois = date(self.debut.year, self.debut.month, 1)
+        id_depense = 1
+        while mois < self.fin:
+            jour = max(mois, self.debut)
+            quand = _texte(np.datetime64(jour, 's') + np.timedelta64(9 * 3600, 's'))
+            libelle = mois.strftime('%m/%Y')
+            lignes = [(f"Salaire {libelle} - {u[1]}", 'SALAIRE', SALAIRES[u[2]]) for u in self.utilisateurs]
+            lignes += [(f"Loyer {libelle}", 'LOYER', 350000),
+                       (f"Électricité {libelle}", 'ELECTRICITE', round(float(rng.normal(85000, 15000)), 2)),
+                       (f"Internet {libelle}", 'INTERNET', 30000)]
+            for texte, categorie, montant in lignes:
+                yield (id_depense, texte, categorie, montant, quand, self.id_admin)
+                id_depense += 1
+            mois = date(mois.year + mois.month // 12, mois.month % 12 + 1, 1)
+
+    # ---------- Achats et alertes ----------
+
+    def _commander(self, jour, horodatage, produits, initial=False):
+        """Une commande par fournisseur habituel pour les produits donnés ; retourne les Id_Achat créés"""
+        rng, p = self.rng, self.p
+        crees = []
+        fournisseurs = self.fournisseur[produits]
+        for f in np.unique(fournisseurs):
+            lot = produits[fournisseurs == f]
+            qte = np.maximum(self.seuil[lot], np.ceil(self.demande[lot] * p['couverture_jours']))
+            if initial:
+                qte = qte + self.seuil[lot]
+            qte = (np.ceil(qte / self.lot[lot]) * self.lot[lot]).astype(np.int64)
+            prix = np.maximum(1, np.round(self.cout[lot] * rng.uniform(0.95, 1.05, len(lot))))
+            delai = max(1, int(round(rng.gamma(p['forme_delai'], self.delai_fournisseur[f] / p['forme_delai']))))
+            quand = horodatage - np.timedelta64(delai, 'D') if initial else horodatage
+
+            id_achat = len(self.achats) + 1
+            self.achats.append([id_achat, quand, 'EN_ATTENTE', int(rng.choice(self.acheteurs)), int(f) + 1])
+            self.contenu_achat[id_achat] = (lot, qte, prix)
+            self.arrivees.setdefault(jour if initial else jour + delai, []).append(id_achat)
+            self.en_commande[lot] = True
+            crees.append(id_achat)
+        return crees
+
+    def _recevoir(self, jour, minuit, entrees):
+        """Réceptions du jour (7h-10h) : stock, PMP (formule de fn_maj_stock_et_pmp_achat), alertes"""
+        recus = []
+        for id_achat in self.arrivees.pop(jour, []):
+            lot, qte, prix = self.contenu_achat[id_achat]
+            quand = minuit + np.timedelta64(int(self.rng.integers(7 * 3600, 10 * 3600)), 's')
+
+            deja = self.qte_achetee[lot]
+            self.pmp[lot] = np.round(np.where(deja == 0, prix,
+                                              (self.pmp[lot] * deja + qte * prix) / (deja + qte)), 2)
+            self.qte_achetee[lot] += qte
+            self.dernier_prix[lot] = prix
+            self.stock[lot] += qte
+            entrees[lot] += qte
+            self.en_commande[lot] = False
+            self.achats[id_achat - 1][2] = 'RECU'
+            self.receptions[id_achat] = quand
+
+            # Alertes qui ont généré la commande (confirm_purchase_receipts)
+            for a in self.alertes_achat.pop(id_achat, []):
+                self.alertes[a][5] = 'ARCHIVEE'
+                self.alertes[a][8] = quand
+            # Auto-guérison (trg_surveillance_stock) : alertes non traitées des produits repassés au-dessus du seuil
+            for i in lot[self.stock[lot] > self.seuil[lot]]:
+                a = self.alerte_active[i]
+                if a >= 0:
+                    self.alertes[a][5] = 'ARCHIVEE'
+                    self.alertes[a][6] += MSG_GUERISON
+                    self.alertes[a][8] = quand
+                    self.alerte_active[i] = -1
+            recus.append((id_achat, quand))
+        return recus
+
+    def _traiter_alertes(self, jour, minuit):
+        """Le matin, les responsables achats commandent une partie des alertes ouvertes"""
+        ouvertes = np.flatnonzero((self.alerte_active >= 0) & ~self.en_commande)
+        if not len(ouvertes):
+            return [], []
+        tirage = self.rng.random(len(ouvertes))
+        traitees = ouvertes[tirage < self.p['reactivite_achats']]
+        for i in ouvertes[tirage >= 0.85]:  # Consultées sans suite
+            self.alertes[self.alerte_active[i]][5] = 'VU'
+        if not len(traitees):
+            return [], []
+
+        quand = minuit + np.timedelta64(int(self.rng.integers(9 * 3600, 11 * 3600)), 's')
+        achats = self._commander(jour, quand, traitees)
+        liees = []
+        for id_achat in achats:
+            for i in self.contenu_achat[id_achat][0]:
+                a = self.alerte_active[i]
+                alerte = self.alertes[a]
+                alerte[5] = 'COMMANDE_PASSEE'
+                alerte[6] += f' | Commande générée #{id_achat}'
+                alerte[8] = quand
+                alerte[9] = id_achat
+                self.alertes_achat.setdefault(id_achat, []).append(a)
+                self.alerte_active[i] = -1
+                liees.append((self.ids[i], id_achat))
+        return achats, liees
+
+    def _creer_alertes(self, minuit, derniere_vente):
+        """
+        Produits vendus aujourd'hui, passés sous le seuil, sans alerte ouverte : même règle
+        et même priorité que trg_surveillance_stock (horodatage : dernière vente du jour)
+        """
+        for i in np.flatnonzero((derniere_vente >= 0) & (self.stock <= self.seuil) & (self.alerte_active < 0)):
+            stock, seuil = int(self.stock[i]), int(self.seuil[i])
+            priorite = 'CRITICAL' if stock == 0 else 'HIGH' if stock <= seuil // 2 else 'MEDIUM'
+            self.alerte_active[i] = len(self.alertes)
+            self.alertes.append([len(self.alertes) + 1, i, stock, seuil, priorite, 'NON_LUE', MSG_ALERTE,
+                                 minuit + np.timedelta64(int(derniere_vente[i]), 's'), None, None])
+
+    # ---------- Ventes ----------
+
+    def _facteurs_jours(self):
+        p = self.p
+        facteurs = np.empty(self.jours)
+        for j in range(self.jours):
+            jour = self.debut + timedelta(days=j)
+            f = p['jours_semaine'][jour.weekday()]
+            f *= 1 + p['saisonnalite'] * np.sin(2 * np.pi * (jour.timetuple().tm_yday - 100) / 365)
+            if jour.month == 12 and jour.day >= 15:
+                f *= p['pic_fetes']
+            facteurs[j] = f
+        return facteurs
+
+    def _vendre(self, minuit, attendu, heures, poids_heures):
+        rng, p, P = self.rng, self.p, self.nb_produits
+        n = rng.poisson(attendu)
+        secondes = np.sort(rng.choice(heures, n, p=poids_heures) * 3600 + rng.integers(0, 3600, n))
+        caissier = rng.choice(self.caissiers, n)
+        taille = np.minimum(rng.geometric(p['panier_p'], n), p['panier_max'])
+
+        ticket = np.repeat(np.arange(n), taille)
+        produit = rng.choice(P, size=len(ticket), p=self.popularite)
+        # Un produit au plus une fois par ticket (clé de LigneVente)
+        _, premiers = np.unique(ticket * P + produit, return_index=True)
+        premiers.sort()
+        ticket, produit = ticket[premiers], produit[premiers]
+        qte = np.minimum(rng.geometric(p['quantite_p'], len(ticket)), p['quantite_max'])
+
+        # Plafonnement par le stock : dans l'ordre des tickets, un produit épuisé n'est plus vendu
+        ordre = np.lexsort((ticket, produit))
+        q, pr = qte[ordre], produit[ordre]
+        cumul = np.cumsum(q)
+        debut_groupe = np.r_[True, pr[1:] != pr[:-1]]
+        cumul -= np.maximum.accumulate(np.where(debut_groupe, cumul - q, 0))
+        garde = np.empty(len(ordre), dtype=bool)
+        garde[ordre] = cumul <= self.stock[pr]
+        self.ventes_perdues += int((~garde).sum())
+        ticket, produit, qte = ticket[garde], produit[garde], qte[garde]
+
+        # Tickets vides (tout était en rupture) : le client repart sans acheter
+        vendus = np.unique(ticket)
+        rang = np.searchsorted(vendus, ticket)
+        ids = self.prochaine_vente + np.arange(len(vendus))
+        self.prochaine_vente += len(vendus)
+
+        remise = np.where(rng.random(len(ticket)) < p['part_remise'], rng.choice(p['remises'], len(ticket)), 0)
+        prix = self.prix[produit]
+        montant = np.round(np.bincount(rang, weights=qte * prix * (100 - remise) / 100, minlength=len(vendus)), 2)
+        modes = list(p['modes_paiement'])
+        mode = rng.choice(len(modes), len(vendus), p=list(p['modes_paiement'].values()))
+
+        sorties = np.bincount(produit, weights=qte, minlength=P).astype(np.int64)
+        self.stock -= sorties
+        derniere_vente = np.full(P, -1, dtype=np.int64)
+        np.maximum.at(derniere_vente, produit, secondes[ticket])
+
+        horaires = minuit + secondes[vendus].astype('timedelta64[s]')
+        return {
+            'ventes': {'id': ids, 'date': horaires, 'caissier': caissier[vendus],
+                       'mode': np.array(modes)[mode], 'montant': montant},
+            'lignes': {'id_vente': ids[rang], 'date': horaires[rang], 'produit': produit, 'qte': qte,
+                       'remise': remise, 'prix': prix, 'tva': self.tva[produit]},
+        }, sorties, derniere_vente
+
+    # ---------- Déroulement ----------
+
+    def journees(self):
+        """
+        Un dictionnaire par jour simulé, dans l'ordre : commandes créées, réceptions, ventes,
+        journal de stock de fin de journée. Les commandes initiales (stock d'ouverture) arrivent le premier jour.
+        """
+        p = self.p
+        heures = np.array(sorted(p['heures']))
+        poids_heures = np.array([p['heures'][h] for h in heures], dtype=float)
+        poids_heures /= poids_heures.sum()
+        facteurs = self._facteurs_jours()
+        attendu = self.nb_ventes * facteurs / facteurs.sum()
+
+        initiales = self._commander(0, np.datetime64(self.debut, 's') + np.timedelta64(10 * 3600, 's'),
+                                    np.arange(self.nb_produits), initial=True)
+
+        for j in range(self.jours):
+            jour = self.debut + timedelta(days=j)
+            minuit = np.datetime64(jour, 's')
+            ouverture = self.stock.copy()
+            entrees = np.zeros(self.nb_produits, dtype=np.int64)
+
+            recus = self._recevoir(j, minuit, entrees)
+            achats, liees = self._traiter_alertes(j, minuit)
+            if j == 0:
+                achats = initiales + achats
+            ventes, sorties, derniere_vente = self._vendre(minuit, attendu[j], heures, poids_heures)
+            self._creer_alertes(minuit, derniere_vente)
+
+            yield {
+                'jour': jour,
+                'achats': achats,
+                'alertes_commandees': liees,
+                'receptions': recus,
+                **ventes,
+                'stock': {'ouverture': ouverture, 'entrees': entrees, 'sorties': sorties,
+                          'cloture': self.stock.copy(), 'pmp': self.pmp.copy()},
+            }
+
+
+class ChargementCopy:
+    """
+    COPY direct, triggers désactivés (clés étrangères comprises) pour la transaction.
+    Ventes, lignes, reçus, mouvements et journal de stock sont écrits au fil de la simulation
+    par tampons CSV ; référentiel, commandes et alertes à la fin (état final).
+    """
+
+    TAILLE_TAMPON = 8 * 1024 * 1024
+
+    def __init__(self, conn, cur):
+        self.conn = conn
+        self.cur = cur
+        self.tampons = {}
+        self.prochain_mouvement = 1
+
+    def debut(self, sim):
+        self.cur.execute("SET LOCAL session_replication_role = replica")
+
+    def ecrire(self, table, lignes):
+        tampon = self.tampons.get(table)
+        if tampon is None:
+            tampon = self.tampons[table] = io.StringIO()
+        csv.writer(tampon).writerows(lignes)
+        if tampon.tell() > self.TAILLE_TAMPON:
+            self._vider(table)
+
+    def _vider(self, table):
+        tampon = self.tampons.pop(table, None)
+        if tampon is None or not tampon.tell():
+            return
+        tampon.seek(0)
+        self.cur.copy_expert(f"COPY {table} ({', '.join(COLONNES[table])}) FROM STDIN WITH (FORMAT csv)", tampon)
+
+    def _mouvements(self, lignes):
+        """Numérote les mouvements dans l'ordre d'écriture"""
+        for ligne in lignes:
+            yield (self.prochain_mouvement,) + ligne
+            self.prochain_mouvement += 1
+
+    def journee(self, sim, j):
+        ids = sim.ids
+        v, l = j['ventes'], j['lignes']
+        dates_v = np.datetime_as_string(v['date'], unit='s').tolist()
+        dates_l = np.datetime_as_string(l['date'], unit='s').tolist()
+        produits = [ids[i] for i in l['produit'].tolist()]
+        caissiers = v['caissier'].tolist()
+        caissier_ligne = dict(zip(v['id'].tolist(), caissiers))
+
+        self.ecrire('Vente', zip(v['id'].tolist(), dates_v, caissiers))
+        self.ecrire('LigneVente', zip(l['id_vente'].tolist(), dates_l, produits, l['qte'].tolist(),
+                                      l['remise'].tolist(), l['prix'].tolist(), l['tva'].tolist()))
+        self.ecrire('Recu', zip(v['id'].tolist(), dates_v, v['mode'].tolist(), v['montant'].tolist(),
+                                caissiers, v['id'].tolist()))
+
+        entrees = []
+        for id_achat, quand in j['receptions']:
+            lot, qte, prix = sim.contenu_achat[id_achat]
+            acheteur = sim.achats[id_achat - 1][3]
+            for i, q, px in zip(lot.tolist(), qte.tolist(), prix.tolist()):
+                entrees.append((_texte(quand), 'ENTREE', q, acheteur, ids[i], None, id_achat,
+                                f'Achat reçu - Prix unitaire: {px:.2f}'))
+        self.ecrire('MouvementStock', self._mouvements(entrees))
+        self.ecrire('MouvementStock', self._mouvements(
+            (d, 'SORTIE', q, caissier_ligne[idv], pid, idv, None, f'Vente enregistrée - Produit: {pid}')
+            for d, q, pid, idv in zip(dates_l, l['qte'].tolist(), produits, l['id_vente'].tolist())))
+
+        s = j['stock']
+        jour = j['jour'].isoformat()
+        self.ecrire('StockJournalier', zip(ids, [jour] * len(ids), s['ouverture'].tolist(), s['entrees'].tolist(),
+                                           s['sorties'].tolist(), s['cloture'].tolist(), s['pmp'].tolist()))
+
+    def fin(self, sim):
+        self.ecrire('Categorie', enumerate(CATEGORIES, start=1))
+        self.ecrire('Utilisateur', sim.utilisateurs)
+        self.ecrire('Fournisseur', sim.fournisseurs)
+        self.ecrire('Produit', sim.produits())
+        self.ecrire('fournir', sim.fournir())
+        self.ecrire('Achat', ((a[0], _texte(a[1]), a[2], a[3], a[4]) for a in sim.achats))
+        self.ecrire('LigneAchat', ((id_achat, sim.ids[i], q, px)
+                                   for id_achat, (lot, qte, prix) in sim.contenu_achat.items()
+                                   for i, q, px in zip(lot.tolist(), qte.tolist(), prix.tolist())))
+        self.ecrire('AlerteStock', ((a[0], sim.ids[a[1]], a[2], a[3], a[4], a[5], a[6],
+                                     _texte(a[7]), _texte(a[8]), a[9]) for a in sim.alertes))
+        self.ecrire('Depense', sim.depenses())
+        for table in list(self.tampons):
+            self._vider(table)
+
+        # Données dérivées non écrites par la simulation
+        self.cur.execute("SELECT fn_reconstruire_agregats_ventes()")
+        self.cur.execute("SELECT fn_reconstruire_alertes_actives()")
+        self.cur.execute("""
+            INSERT INTO ClotureStock (Jour, NbProduits)
+            SELECT Jour, COUNT(*) FROM StockJournalier GROUP BY Jour
+        """)
+
+
+class ChargementTriggers:
+    """
+    Insertions jour par jour, triggers actifs, une transaction par jour :
+    commandes, réceptions (UPDATE ... RECU), ventes (Vente, LigneVente, Recu).
+    Les alertes sont créées par trg_surveillance_stock, pas par la simulation.
+    """
+
+    PAGE = 5000
+
+    def __init__(self, conn, cur):
+        self.conn = conn
+        self.cur = cur
+
+    def _inserer(self, table, lignes, colonnes=None):
+        colonnes = colonnes or COLONNES[table]
+        execute_values(self.cur, f"INSERT INTO {table} ({', '.join(colonnes)}) VALUES %s",
+                       list(lignes), page_size=self.PAGE)
+
+    def debut(self, sim):
+        self._inserer('Categorie', enumerate(CATEGORIES, start=1))
+        self._inserer('Utilisateur', sim.utilisateurs)
+        self._inserer('Fournisseur', sim.fournisseurs)
+        # Stock à zéro : le stock d'ouverture arrive par les commandes initiales
+        self._inserer('Produit', (r[:4] + (r[4], 0, r[10], r[11]) for r in sim.produits()),
+                      ('Id_Produit', 'Nom', 'Description', 'Id_Categorie', 'PrixUnitaireActuel',
+                       'StockActuel', 'StockAlerte', 'TauxTVA'))
+        self._inserer('fournir', sim.fournir())
+        self.conn.commit()
+
+    def journee(self, sim, j):
+        cur, ids = self.cur, sim.ids
+
+        if j['achats']:
+            self._inserer('Achat', ((a, _dt(sim.achats[a - 1][1]), 'EN_ATTENTE', sim.achats[a - 1][3],
+                                     sim.achats[a - 1][4]) for a in j['achats']))
+            self._inserer('LigneAchat', ((a, ids[i], q, px) for a in j['achats']
+                                         for i, q, px in zip(*(x.tolist() for x in sim.contenu_achat[a]))))
+        if j['receptions']:
+            cur.execute("UPDATE Achat SET Statut = 'RECU' WHERE Id_Achat = ANY(%s)",
+                        ([a for a, _ in j['receptions']],))
+            cur.execute("""
+                UPDATE AlerteStock SET Statut = 'ARCHIVEE', Date_Traitement = CURRENT_TIMESTAMP
+                WHERE Id_Achat_Genere = ANY(%s)
+            """, ([a for a, _ in j['receptions']],))
+        if j['alertes_commandees']:
+            execute_values(cur, """
+                UPDATE AlerteStock a
+                SET Statut = 'COMMANDE_PASSEE', Date_Traitement = CURRENT_TIMESTAMP,
+                    Id_Achat_Genere = l.id_achat,
+                    Commentaire = COALESCE(a.Commentaire, '') || ' | Commande générée #' || l.id_achat
+                FROM (VALUES %s) AS l(id_produit, id_achat)
+                WHERE a.Id_Produit = l.id_produit AND a.Statut IN ('NON_LUE', 'VU', 'EN_COURS')
+            """, j['alertes_commandees'], page_size=self.PAGE)
+
+        v, l = j['ventes'], j['lignes']
+        if len(v['id']):
+            dates_v = v['date'].astype('datetime64[us]').tolist()
+            self._inserer('Vente', zip(v['id'].tolist(), dates_v, v['caissier'].tolist()))
+            # Une instruction : le trigger de stock contrôle les quantités cumulées du jour
+            execute_values(cur, f"INSERT INTO LigneVente ({', '.join(COLONNES['LigneVente'])}) VALUES %s",
+                           list(zip(l['id_vente'].tolist(), l['date'].astype('datetime64[us]').tolist(),
+                                    [ids[i] for i in l['produit'].tolist()], l['qte'].tolist(),
+                                    l['remise'].tolist(), l['prix'].tolist(), l['tva'].tolist())),
+                           page_size=len(l['id_vente']))
+            self._inserer('Recu', zip(v['id'].tolist(), dates_v, v['mode'].tolist(), v['montant'].tolist(),
+                                      v['caissier'].tolist(), v['id'].tolist()))
+        self.conn.commit()
+
+    def fin(self, sim):
+        self._inserer('Depense', sim.depenses())
+
+
+def vider(cur):
+    """Efface toutes les données et remet à zéro les états de rafraîchissement"""
+    cur.execute(f"TRUNCATE {', '.join(TABLES_DONNEES)} RESTART IDENTITY CASCADE")
+    cur.execute("""
+        UPDATE EtatStatistiqueDemande
+        SET Derniere_Vente = 0, Dernier_Mouvement = 0, Derniere_Alerte = 0,
+            Jour_Calcul_Complet = NULL, Dernier_Calcul = NULL
+    """)
+
+
+def generer(nb_ventes, graine=42, jours=365, mode='copy', fin=None, reinitialiser=False, verbeux=True):
+    """
+    Génère la base synthétique. Retourne un résumé (volumes, durées), None si la base est
+    injoignable, déjà remplie sans reinitialiser, ou en cas d'erreur (rien n'est conservé en mode copy).
+    """
+    fin = fin or date.today()
+    if fin > date.today():
+        print("La période simulée doit se terminer au plus tard aujourd'hui")
+        return None
+
+    conn = connection.get_connection()
+    if not conn:
+        print("Base injoignable")
+        return None
+    cur = connection.get_cursor(conn)
+    t0 = time.perf_counter()
+    try:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM Produit) OR EXISTS (SELECT 1 FROM Vente) AS rempli")
+        if cur.fetchone()['rempli']:
+            if not reinitialiser:
+                print("La base contient déjà des données : relancer avec --vider pour les remplacer")
+                return None
+            vider(cur)
+
+        sim = Simulation(nb_ventes, graine, jours, fin)
+        aujourd_hui = date.today()
+        mois_passes = (aujourd_hui.year - sim.debut.year) * 12 + aujourd_hui.month - sim.debut.month
+        cur.execute("SELECT fn_assurer_partitions(3, %s)", (mois_passes,))
+        conn.commit()
+
+        chargement = (ChargementCopy if mode == 'copy' else ChargementTriggers)(conn, cur)
+        chargement.debut(sim)
+        nb_lignes = 0
+        for j in sim.journees():
+            chargement.journee(sim, j)
+            nb_lignes += len(j['lignes']['id_vente'])
+            if verbeux and j['jour'].day == 1:
+                print(f"  {j['jour']:%m/%Y} : {sim.prochaine_vente - 1:,} ventes "
+                      f"({time.perf_counter() - t0:.0f}s)")
+        chargement.fin(sim)
+
+        for table, colonne in SEQUENCES:
+            cur.execute(f"""
+                SELECT setval(pg_get_serial_sequence('{table.lower()}', '{colonne.lower()}'),
+                              COALESCE((SELECT MAX({colonne}) FROM {table}), 0) + 1, false)
+            """)
+        cur.execute("UPDATE EtatVueMaterialisee SET A_Rafraichir = TRUE, Derniere_Vente_Vue = 0, Jours_Rafraichis = NULL")
+        conn.commit()
+        duree_chargement = time.perf_counter() - t0
+
+        # Journal de stock (mode triggers), statistiques de demande, vues matérialisées
+        Database.close_stock_days()
+        Database.refresh_demand_statistics(force=True)
+        Database.refresh_materialized_views(force=True)
+        cur.execute("ANALYZE")
+        conn.commit()
+    except Exception as e:
+        print(f"Erreur generer: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cur.close()
+        connection.close_connection(conn)
+
+    return {
+        'ventes': sim.prochaine_vente - 1,
+        'lignes_vente': nb_lignes,
+        'ventes_perdues': sim.ventes_perdues,
+        'produits': sim.nb_produits,
+        'fournisseurs': len(sim.fournisseurs),
+        'utilisateurs': len(sim.utilisateurs),
+        'achats': len(sim.achats),
+        'alertes': len(sim.alertes) if mode == 'copy' else None,
+        'debut': sim.debut.isoformat(),
+        'fin': sim.fin.isoformat(),
+        'mode': mode,
+        'graine': graine,
+        'chargement_s': round(duree_chargement, 1),
+        'total_s': round(time.perf_counter() - t0, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une base synthétique reproductible")
+    volume = parser.add_mutually_exclusive_group()
+    volume.add_argument('--echelle', choices=list(ECHELLES), default='10k', help="nombre de ventes prédéfini")
+    volume.add_argument('--ventes', type=int, help="nombre de ventes visé")
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--jours', type=int, default=365, help="durée de la période simulée")
+    parser.add_argument('--fin', type=date.fromisoformat, help="dernier jour exclu (AAAA-MM-JJ, défaut : aujourd'hui)")
+    parser.add_argument('--mode', choices=('copy', 'triggers'), default='copy')
+    parser.add_argument('--vider', action='store_true', help="efface les données existantes")
+    args = parser.parse_args()
+
+    nb_ventes = args.ventes or ECHELLES[args.echelle]
+    print(f"Génération : ~{nb_ventes:,} ventes sur {args.jours} jours, graine {args.graine}, mode {args.mode}")
+    resume = generer(nb_ventes, args.graine, args.jours, args.mode, args.fin, args.vider)
+    if resume is None:
+        sys.exit(1)
+    for cle, valeur in resume.items():
+        print(f"  {cle:<16} {valeur if not isinstance(valeur, int) else f'{valeur:,}'}")
+
+
+if __name__ == "__main__":
+    main()
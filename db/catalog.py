@@ -0,0 +1,310 @@
+"""
+Cache client du catalogue produits (Produit + Categorie)
+Chargé une fois puis servi depuis la mémoire :
+- index exacts par Id_Produit, et par code / nom en majuscules (liste des homonymes)
+  -> résolution d'un scan en O(1)
+- index trié des noms pour la recherche par préfixe
+- index de trigrammes (nom + description) pour la recherche approchée '%mot%'
+Invalidation : TTL (rechargement complet) + rafraîchissement ciblé des produits modifiés
+Une fois chargé, un catalogue périmé continue d'être servi pendant son rechargement en arrière-plan ;
+les modifications locales faites pendant ce rechargement sont rejouées sur le nouvel instantané
+"""
+
+import bisect
+import threading
+import time
+
+from db import connection
+
+
+COLONNES_PRODUIT = """
+    p.Id_Produit as id_produit,
+    p.Nom as nom_produit,
+    p.Description as description,
+    p.PrixUnitaireActuel as prix_unitaire,
+    p.StockActuel as quantite_stock,
+    p.StockAlerte as seuil_min_personnalise,
+    p.TauxTVA as tauxtva,
+    p.ImagePath as image_path,
+    c.Libelle as nom_categorie
+"""
+
+
+def _trigrammes(texte):
+    """Trigrammes d'une chaîne déjà normalisée (majuscules)"""
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+
+def _cle_id(produit):
+    return produit['id_produit']
+
+
+class ProductCatalog:
+    """
+    Catalogue produits en mémoire, partagé par tout le processus.
+    Les dictionnaires renvoyés ont les mêmes clés que Database.search_products.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._charge_le = None
+        self._rechargement = None   # thread de rechargement en arrière-plan
+        self._by_id = {}        # ID (exact : Id_Produit est sensible à la casse) -> produit
+        self._by_code = {}      # ID (majuscules) -> [produits], pour lookup
+        self._by_name = {}      # NOM (majuscules) -> [produits] (noms égaux à la casse près)
+        self._noms_tries = []   # [(NOM, ID)] trié, pour bisect
+        self._trigrammes = {}   # trigramme -> {ID}
+        self._textes = {}       # ID -> "NOM DESCRIPTION" (vérification des candidats)
+        self._generation = 0    # incrémentée à chaque modification locale
+        self._modifs = {}       # ID -> (génération, produit ou None si retiré), à rejouer
+
+    @classmethod
+    def instance(cls):
+        """Catalogue unique du processus"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    # ---------- Chargement / invalidation ----------
+
+    def est_charge(self):
+        return self._charge_le is not None
+
+    def est_perime(self):
+        return self._charge_le is None or time.monotonic() - self._charge_le > self.ttl
+
+    def charger(self):
+        """Recharge tout le catalogue depuis la base. Retourne False si la base est injoignable."""
+        generation = self._generation   # avant la lecture : les modifications suivantes seront rejouées
+        conn = connection.get_connection()
+        if not conn:
+            return False
+        cur = connection.get_cursor(conn)
+        try:
+            cur.execute(f"""
+                SELECT {COLONNES_PRODUIT}
+                FROM Produit p
+                JOIN Categorie c ON p.Id_Categorie = c.Id_Categorie
+                ORDER BY p.Nom
+            """)
+            produits = cur.fetchall()
+        except Exception as e:
+            print(f"Erreur ProductCatalog.charger: {e}")
+            return False
+        finally:
+            cur.close()
+            conn.close()
+
+        self._reconstruire(produits, generation)
+        return True
+
+    def _reconstruire(self, produits, generation=0):
+        """
+        Remplace tous les index par ceux de produits, instantané lu quand le catalogue en était
+        à generation : les modifications locales postérieures (vente validée pendant la lecture,
+        déjà comptée ou non dans l'instantané) sont rejouées par-dessus.
+        """
+        by_id, by_code, by_name, textes, trigrammes = {}, {}, {}, {}, {}
+        for p in produits:
+            pid = p['id_produit']
+            by_id[pid] = p
+            by_code.setdefault(pid.upper(), []).append(p)
+            by_name.setdefault(p['nom_produit'].upper(), []).append(p)
+            texte = f"{p['nom_produit']} {p.get('description') or ''}".upper()
+            textes[pid] = texte
+            for t in _trigrammes(texte):
+                trigrammes.setdefault(t, set()).add(pid)
+        for homonymes in (*by_code.values(), *by_name.values()):
+            homonymes.sort(key=_cle_id)
+        noms_tries = sorted((p['nom_produit'].upper(), pid) for pid, p in by_id.items())
+
+        # Bascule atomique des index
+        with self._lock:
+            self._by_id, self._by_code, self._by_name = by_id, by_code, by_name
+            self._textes, self._trigrammes = textes, trigrammes
+            self._noms_tries = noms_tries
+            self._charge_le = time.monotonic()
+
+            self._modifs = {pid: m for pid, m in self._modifs.items() if m[0] > generation}
+            for pid, (_, produit) in self._modifs.items():
+                if produit is None:
+                    self._retirer(pid)
+                else:
+                    self._indexer(produit)
+
+    def _assurer_frais(self):
+        if not self.est_charge():
+            self.charger()
+        elif self.est_perime():
+            self._recharger_en_arriere_plan()
+
+    def _recharger_en_arriere_plan(self):
+        with self._instance_lock:
+            if self._rechargement is not None and self._rechargement.is_alive():
+                return
+            self._rechargement = threading.Thread(target=self.charger, name="ProductCatalog", daemon=True)
+            self._rechargement.start()
+
+    def invalider(self):
+        """Force un rechargement complet au prochain accès"""
+        self._charge_le = None
+
+    def rafraichir_produits(self, ids_produits):
+        """Recharge uniquement les produits donnés (prix/stock modifiés, ex. après une vente)"""
+        ids = list(ids_produits)
+        if not ids or not self.est_charge():
+            return
+        conn = connection.get_connection()
+        if not conn:
+            return
+        cur = connection.get_cursor(conn)
+        try:
+            cur.execute(f"""
+                SELECT {COLONNES_PRODUIT}
+                FROM Produit p
+                JOIN Categorie c ON p.Id_Categorie = c.Id_Categorie
+                WHERE p.Id_Produit = ANY(%s)
+            """, (ids,))
+            produits = cur.fetchall()
+        except Exception as e:
+            print(f"Erreur ProductCatalog.rafraichir_produits: {e}")
+            return
+        finally:
+            cur.close()
+            conn.close()
+
+        trouves = set()
+        for p in produits:
+            self.mettre_a_jour(p)
+            trouves.add(p['id_produit'])
+        for pid in ids:
+            if pid not in trouves:
+                self.retirer(pid)
+
+    def mettre_a_jour(self, produit):
+        """Insère ou remplace un produit dans tous les index"""
+        with self._lock:
+            self._noter(produit['id_produit'], produit)
+            self._indexer(produit)
+
+    def retirer(self, id_produit):
+        with self._lock:
+            self._noter(id_produit, None)
+            self._retirer(id_produit)
+
+    def _noter(self, pid, produit):
+        self._generation += 1
+        self._modifs[pid] = (self._generation, produit)
+
+    def _indexer(self, produit):
+        # Appelé sous self._lock (comme _retirer)
+        pid = produit['id_produit']
+        ancien = self._by_id.get(pid)
+        if ancien is not None:
+            self._retirer_index(pid, ancien)
+        self._by_id[pid] = produit
+        nom = produit['nom_produit'].upper()
+        for index, cle in ((self._by_code, pid.upper()), (self._by_name, nom)):
+            homonymes = index.setdefault(cle, [])
+            homonymes.append(produit)
+            homonymes.sort(key=_cle_id)
+        bisect.insort(self._noms_tries, (nom, pid))
+        texte = f"{produit['nom_produit']} {produit.get('description') or ''}".upper()
+        self._textes[pid] = texte
+        for t in _trigrammes(texte):
+            self._trigrammes.setdefault(t, set()).add(pid)
+
+    def _retirer(self, pid):
+        ancien = self._by_id.pop(pid, None)
+        if ancien is not None:
+            self._retirer_index(pid, ancien)
+
+    def _retirer_index(self, pid, ancien):
+        nom = ancien['nom_produit'].upper()
+        for index, cle in ((self._by_code, pid.upper()), (self._by_name, nom)):
+            homonymes = [p for p in index.get(cle, []) if p is not ancien]
+            if homonymes:
+                index[cle] = homonymes
+            else:
+                index.pop(cle, None)
+        i = bisect.bisect_left(self._noms_tries, (nom, pid))
+        if i < len(self._noms_tries) and self._noms_tries[i] == (nom, pid):
+            del self._noms_tries[i]
+        for t in _trigrammes(self._textes.pop(pid, "")):
+            ids = self._trigrammes.get(t)
+            if ids:
+                ids.discard(pid)
+
+    # ---------- Recherche ----------
+
+    def lookup(self, texte):
+        """
+        Correspondance exacte sur le code produit ou le nom (insensible à la casse), sinon None
+        Code saisi à l'identique en priorité ; sinon, codes ou noms égaux à la casse près :
+        celui du plus petit code produit
+        """
+        self._assurer_frais()
+        texte = texte.strip()
+        produit = self._by_id.get(texte)
+        if produit is not None:
+            return produit
+        cle = texte.upper()
+        homonymes = self._by_code.get(cle) or self._by_name.get(cle)
+        return homonymes[0] if homonymes else None
+
+    def get(self, id_produit):
+        """Produit de code id_produit (exact, Id_Produit est sensible à la casse)"""
+        self._assurer_frais()
+        return self._by_id.get(id_produit)
+
+    def tous(self):
+        """Tous les produits, triés par nom"""
+        self._assurer_frais()
+        with self._lock:
+            return [self._by_id[pid] for _, pid in self._noms_tries]
+
+    def search(self, texte, limit=None):
+        """
+        Équivalent mémoire de Database.search_products (nom ou description contient le texte),
+        triée par nom, avec les correspondances par préfixe du nom en tête.
+        """
+        self._assurer_frais()
+        cle = texte.strip().upper()
+        if not cle:
+            return []
+
+        with self._lock:
+            # 1. Préfixe du nom (bisect sur la liste triée)
+            prefixes = []
+            i = bisect.bisect_left(self._noms_tries, (cle,))
+            while i < len(self._noms_tries) and self._noms_tries[i][0].startswith(cle):
+                prefixes.append(self._noms_tries[i][1])
+                i += 1
+
+            # 2. Sous-chaîne : intersection des listes de trigrammes puis vérification
+            if len(cle) >= 3:
+                candidats = None
+                for t in _trigrammes(cle):
+                    ids = self._trigrammes.get(t, set())
+                    candidats = set(ids) if candidats is None else candidats & ids
+                    if not candidats:
+                        break
+                candidats = candidats or set()
+            else:
+                candidats = self._textes.keys()
+            contient = [pid for pid in candidats if cle in self._textes[pid]]
+
+            deja = set(prefixes)
+            autres = sorted(
+                (pid for pid in contient if pid not in deja),
+                key=lambda pid: self._by_id[pid]['nom_produit'].upper()
+            )
+            resultat = [self._by_id[pid] for pid in prefixes + autres]
+
+        return resultat[:limit] if limit else resultat
@@ -1,6 +1,14 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
+from db import instrumentation
+
 
 DB_CONFIG = {
     "host": "localhost",
@@ -10,20 +18,294 @@ DB_CONFIG = {
     "password": "MONmot754]"
 }
 
+# Paramètres du pool de connexions (partagé par tout le processus)
+POOL_CONFIG = {
+    "minconn": 1,             # connexions gardées ouvertes en permanence
+    "maxconn": 10,            # plafond de connexions simultanées
+    "max_idle": 300,          # secondes avant fermeture d'une connexion inutilisée (au-delà de minconn)
+    "ping_after": 30,         # secondes d'inactivité au-delà desquelles on vérifie la connexion par un SELECT 1
+    "checkout_timeout": 10,   # secondes d'attente max quand le pool est saturé
+}
+
+
+class PoolError(Exception):
+    """Levée quand aucune connexion n'a pu être obtenue du pool"""
+
+
+class ConnectionPool:
+    """
+    Pool de connexions psycopg2 thread-safe.
+    - Les connexions libres sont réutilisées en LIFO (la plus chaude d'abord)
+    - Vérification de santé au checkout (connexion fermée / transaction cassée / ping si inactive)
+    - Fermeture des connexions inactives au-delà de minconn (reaping)
+    """
+
+    def __init__(self, minconn=1, maxconn=10, max_idle=300, ping_after=30, checkout_timeout=10, **dsn):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Configuration du pool invalide (minconn/maxconn)")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.checkout_timeout = checkout_timeout
+        self._dsn = dsn
+
+        self._idle = []         # [(connexion brute, timestamp de dernière utilisation)]
+        self._total = 0         # connexions ouvertes (libres + empruntées)
+        self._cond = threading.Condition()
+        self._closed = False
+
+    # ---------- Cycle de vie des connexions brutes ----------
+
+    def _connect(self):
+        return psycopg2.connect(**self._dsn)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, raw, idle_for):
+        if raw.closed:
+            return False
+        if raw.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if idle_for >= self.ping_after:
+            try:
+                with raw.cursor() as cur:
+                    cur.execute("SELECT 1")
+                raw.rollback()
+            except Exception:
+                return False
+        return True
+
+    def _reap_locked(self):
+        """Ferme les connexions inactives depuis trop longtemps (appelé sous verrou)"""
+        if self.max_idle is None:
+            return
+        now = time.monotonic()
+        keep = []
+        # Les plus anciennes sont en tête de liste
+        for raw, last_used in self._idle:
+            if self._total > self.minconn and now - last_used > self.max_idle:
+                self._discard(raw)
+                self._total -= 1
+            else:
+                keep.append((raw, last_used))
+        self._idle = keep
+
+    # ---------- API ----------
+
+    def getconn(self):
+        """Emprunte une connexion saine (bloque jusqu'à checkout_timeout si le pool est plein)"""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Le pool de connexions est fermé")
+                self._reap_locked()
+                raw = None
+                while raw is None:
+                    if self._idle:
+                        raw, last_used = self._idle.pop()
+                        break
+                    if self._total < self.maxconn:
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise PoolError(f"Pool saturé ({self.maxconn} connexions en cours d'utilisation)")
+
+            if raw is None:
+                # Nouvelle connexion, créée hors verrou
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(raw, time.monotonic() - last_used):
+                return raw
+
+            # Connexion morte : on la remplace et on recommence
+            self._discard(raw)
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+
+    def putconn(self, raw):
+        """
+        Rend une connexion au pool : toute transaction non validée est annulée et les verrous
+        consultatifs de session libérés (un appelant interrompu par une erreur ne les laisse
+        pas à l'emprunteur suivant)
+        """
+        healthy = not raw.closed
+        if healthy:
+            try:
+                if raw.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    raw.rollback()
+                autocommit, raw.autocommit = raw.autocommit, True
+                try:
+                    with raw.cursor() as cur:
+                        cur.execute("SELECT pg_advisory_unlock_all()")
+                finally:
+                    raw.autocommit = autocommit
+            except Exception:
+                healthy = False
+
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._discard(raw)
+                self._total -= 1
+            self._reap_locked()
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for raw, _ in self._idle:
+                self._discard(raw)
+            self._total -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'total': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+                'maxconn': self.maxconn,
+            }
+
+
+class PooledConnection:
+    """
+    Connexion empruntée au pool. Se comporte comme une connexion psycopg2,
+    mais close() la rend au pool au lieu de fermer la socket.
+    `with conn:` garde la sémantique psycopg2 (validation si le bloc réussit, annulation sinon,
+    connexion toujours empruntée) ; pour emprunter et rendre : `with pooled() as conn:`
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise psycopg2.InterfaceError("connexion déjà rendue au pool")
+        return getattr(raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def closed(self):
+        return self._raw is None or self._raw.closed
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.putconn(raw)
+
+    def __enter__(self):
+        self._raw.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._raw.__exit__(exc_type, exc, tb)
+
+    def __del__(self):
+        # Filet de sécurité : une connexion oubliée retourne quand même au pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class InstrumentedCursor(RealDictCursor):
+    """
+    Curseur dictionnaire mesuré : durée, lignes et erreur de chaque execute transmises à
+    db/instrumentation.py (execute_values passe aussi par execute : un appel par page)
+    """
+
+    def execute(self, query, vars=None):
+        if not instrumentation.actif():
+            return super().execute(query, vars)
+        debut = time.perf_counter()
+        erreur = None
+        try:
+            return super().execute(query, vars)
+        except Exception as e:
+            erreur = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            instrumentation.enregistrer_requete(self, query, (time.perf_counter() - debut) * 1000,
+                                                max(self.rowcount, 0), erreur)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Renvoie le pool du processus (créé à la première demande)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**POOL_CONFIG, **DB_CONFIG)
+    return _pool
+
+
+def close_pool():
+    """Ferme toutes les connexions du pool (appelé automatiquement en fin de processus)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+atexit.register(close_pool)
+
+
 def get_connection():
-    """Renvoie une connexion à la base de données"""
+    """Renvoie une connexion à la base de données (empruntée au pool)"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        pool = get_pool()
+        debut = time.perf_counter()
+        raw = pool.getconn()
+        instrumentation.enregistrer_attente_pool((time.perf_counter() - debut) * 1000)
+        return PooledConnection(pool, raw)
     except Exception as e:
         print("Erreur de connexion à la base :", e)
         return None
 
+@contextmanager
+def pooled():
+    """
+    Context manager : emprunte une connexion et la rend au pool à la sortie.
+    Produit None si la base est injoignable (même contrat que get_connection).
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        close_connection(conn)
+
 def get_cursor(conn):
-    """Renvoie un curseur avec dictionnaire"""
-    return conn.cursor(cursor_factory=RealDictCursor)
+    """Renvoie un curseur avec dictionnaire (instrumenté, cf. InstrumentedCursor)"""
+    return conn.cursor(cursor_factory=InstrumentedCursor)
 
 def close_connection(conn):
-    """Ferme la connexion proprement"""
+    """Rend la connexion au pool (ou la ferme si elle n'en provient pas)"""
     if conn:
         conn.close()
@@ -0,0 +1,74 @@
+"""
+Réapprovisionnement : stock de sécurité, point de commande et quantité économique (EOQ)
+Calcul vectorisé (NumPy) pour tous les produits à la fois, à partir des statistiques de
+demande maintenues en base (StatistiqueDemande, fn_calculer_statistiques_demande) :
+- stock de sécurité = z × √(L·σd² + d²·σL²)   (demande et délai fournisseur incertains)
+- point de commande = d·L + stock de sécurité
+- EOQ (Wilson)      = √(2·D·S / H)   D demande annuelle, S coût de passation, H coût de possession
+d : ventes moyennes par jour, σd : écart-type journalier, L / σL : délai fournisseur observé (jours)
+NumPy n'est importé qu'au premier calcul (db.database est chargé dès l'écran de connexion).
+"""
+
+import math
+
+
+PARAMETRES_REAPPRO = {
+    "z_service": 1.65,          # Niveau de service visé ~95 %
+    "cout_commande": 5000.0,    # FCFA par commande passée (S)
+    "taux_possession": 0.25,    # Coût annuel de possession, en fraction du prix d'achat (H = taux × prix)
+    "delai_defaut_jours": 3,    # Délai fournisseur tant qu'aucune réception n'a été observée
+    "jours_par_an": 365,
+}
+
+
+def _tableau(valeurs):
+    """Liste (Decimal / None) -> tableau float, None -> NaN"""
+    import numpy as np
+    return np.array([np.nan if v is None else float(v) for v in valeurs], dtype=float)
+
+
+def calculer_reappro(vitesse, ecart_type, delai, ecart_delai, cout_unitaire, parametres=None):
+    """
+    Stock de sécurité, point de commande et EOQ pour n produits (listes ou tableaux de même taille)
+    Délai inconnu (None/NaN) -> délai par défaut ; coût unitaire nul -> EOQ nulle.
+    Retourne trois tableaux d'entiers (arrondis au supérieur).
+    """
+    import numpy as np
+    p = parametres or PARAMETRES_REAPPRO
+    d = np.nan_to_num(_tableau(vitesse))
+    sd = np.nan_to_num(_tableau(ecart_type))
+    delais = _tableau(delai)
+    L = np.where(np.isnan(delais), p["delai_defaut_jours"], delais)
+    sL = np.nan_to_num(_tableau(ecart_delai))
+    cout = np.nan_to_num(_tableau(cout_unitaire))
+
+    stock_securite = p["z_service"] * np.sqrt(L * sd ** 2 + d ** 2 * sL ** 2)
+    point_commande = d * L + stock_securite
+
+    possession = p["taux_possession"] * cout
+    demande_annuelle = d * p["jours_par_an"]
+    eoq = np.sqrt(np.divide(2 * demande_annuelle * p["cout_commande"], possession,
+                            out=np.zeros_like(possession), where=possession > 0))
+
+    return (np.ceil(stock_securite).astype(int),
+            np.ceil(point_commande).astype(int),
+            np.ceil(eoq).astype(int))
+
+
+def quantite_suggeree(stock_actuel, point_commande, quantite_economique, seuil_alerte):
+    """
+    Quantité à commander pour un produit : EOQ, augmentée du manque sous le point de commande
+    (commander au point de commande aurait donné la même position de stock).
+    Sans historique de ventes : ancienne règle (seuil d'alerte × 3, 10 par défaut).
+    """
+    if quantite_economique:
+        return quantite_economique + max(0, (point_commande or 0) - stock_actuel)
+    seuil = seuil_alerte or 0
+    return seuil * 3 if seuil > 0 else 10
+
+
+def delai_jours(delai_moyen, nb_receptions):
+    """Délai de livraison à annoncer (jours entiers), défaut sans réception observée"""
+    if nb_receptions and delai_moyen is not None:
+        return max(1, math.ceil(delai_moyen))
+    return PARAMETRES_REAPPRO["delai_defaut_jours"]
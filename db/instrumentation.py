@@ -0,0 +1,411 @@
+"""
+Instrumentation des accès à la base
+- InstrumentedCursor (db/connection.py) mesure chaque requête : durée, lignes, erreur
+- instrumenter_facade enveloppe les méthodes publiques de Database : durée totale, allers-retours,
+  lignes et attente du pool de connexions cumulés par appel
+- Les mesures sont transmises aux observateurs installés (installer / retirer) :
+  StatistiquesRequetes (histogrammes p50/p95/p99 en mémoire) et JournalRequetesLentes
+  (JSONL au-delà d'un seuil, plan EXPLAIN (ANALYZE, BUFFERS) optionnel) sont installés par défaut
+"""
+
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+INSTRUMENTATION_CONFIG = {
+    "actif": True,
+    "taille_echantillon": 1024,     # Dernières durées gardées par méthode / requête (percentiles)
+    "seuil_lent_ms": 200,           # Requêtes et méthodes au-delà : journal des requêtes lentes
+    "journal_lent": os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "logs", "requetes_lentes.jsonl"),
+    "taille_max_journal": 5 * 1024 * 1024,  # Octets avant rotation (.1)
+    "explain": False,               # Capture du plan des requêtes SELECT les plus lentes
+                                    # (ANALYZE seulement pour les lectures pures, voir _lecture_pure)
+    "seuil_explain_ms": 1000,
+}
+
+
+# ---------- Mesures ----------
+
+class MesureMethode:
+    """Cumul des requêtes exécutées pendant un appel de méthode du facade"""
+
+    __slots__ = ('methode', 'debut', 'duree_ms', 'allers_retours', 'lignes', 'attente_pool_ms', 'erreurs')
+
+    def __init__(self, methode):
+        self.methode = methode
+        self.debut = time.perf_counter()
+        self.duree_ms = 0.0
+        self.allers_retours = 0
+        self.lignes = 0
+        self.attente_pool_ms = 0.0
+        self.erreurs = 0
+
+    def absorber(self, autre):
+        """Un appel imbriqué compte aussi dans l'appel englobant"""
+        self.allers_retours += autre.allers_retours
+        self.lignes += autre.lignes
+        self.attente_pool_ms += autre.attente_pool_ms
+        self.erreurs += autre.erreurs
+
+
+class MesureRequete:
+    __slots__ = ('methode', 'requete', 'duree_ms', 'lignes', 'erreur', 'plan')
+
+    def __init__(self, methode, requete, duree_ms, lignes, erreur=None, plan=None):
+        self.methode = methode
+        self.requete = requete
+        self.duree_ms = duree_ms
+        self.lignes = lignes
+        self.erreur = erreur
+        self.plan = plan
+
+
+_mesure_courante = contextvars.ContextVar('mesure_methode', default=None)
+
+
+def methode_courante():
+    mesure = _mesure_courante.get()
+    return mesure.methode if mesure is not None else None
+
+
+# ---------- Empreinte des requêtes ----------
+
+_RE_CHAINE = re.compile(r"'(?:[^']|'')*'")
+_RE_NOMBRE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_RE_LISTE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_RE_ESPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def _empreinte_texte(sql):
+    sql = _RE_CHAINE.sub("?", sql)
+    sql = _RE_NOMBRE.sub("?", sql)
+    sql = _RE_LISTE.sub("(...)", sql)   # VALUES (...), (...) de execute_values
+    return _RE_ESPACES.sub(" ", sql).strip()[:300]
+
+
+def empreinte(requete):
+    """Texte normalisé d'une requête (littéraux remplacés) : regroupe les exécutions d'une même requête"""
+    if isinstance(requete, bytes):
+        requete = requete.decode('utf-8', 'replace')
+        # Valeurs incorporées (execute_values) : texte unique, pas de cache
+        return _empreinte_texte.__wrapped__(requete)
+    return _empreinte_texte(str(requete))
+
+
+# ---------- Observateurs ----------
+
+class Observateur:
+    """Reçoit les mesures (appelé dans le thread qui a exécuté la requête)"""
+
+    def requete(self, mesure):
+        pass
+
+    def methode(self, mesure):
+        pass
+
+
+_observateurs = []
+_observateurs_lock = threading.Lock()
+
+
+def installer(observateur):
+    with _observateurs_lock:
+        if observateur not in _observateurs:
+            _observateurs.append(observateur)
+    return observateur
+
+
+def retirer(observateur):
+    with _observateurs_lock:
+        if observateur in _observateurs:
+            _observateurs.remove(observateur)
+
+
+def _notifier(nom, mesure):
+    for observateur in list(_observateurs):
+        try:
+            getattr(observateur, nom)(mesure)
+        except Exception as e:
+            print(f"Erreur observateur {type(observateur).__name__}: {e}")
+
+
+class Histogramme:
+    """Compteurs cumulés + dernières durées (percentiles calculés à la lecture)"""
+
+    __slots__ = ('n', 'total_ms', 'max_ms', 'lignes', 'allers_retours', 'attente_pool_ms', 'erreurs', 'durees')
+
+    def __init__(self, taille):
+        self.n = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lignes = 0
+        self.allers_retours = 0
+        self.attente_pool_ms = 0.0
+        self.erreurs = 0
+        self.durees = deque(maxlen=taille)
+
+    def ajouter(self, duree_ms, lignes=0, allers_retours=1, attente_pool_ms=0.0, erreurs=0):
+        self.n += 1
+        self.total_ms += duree_ms
+        self.max_ms = max(self.max_ms, duree_ms)
+        self.lignes += lignes
+        self.allers_retours += allers_retours
+        self.attente_pool_ms += attente_pool_ms
+        self.erreurs += erreurs
+        self.durees.append(duree_ms)
+
+    def resume(self):
+        durees = sorted(self.durees)
+
+        def centile(p):
+            return durees[min(len(durees) - 1, int(len(durees) * p))] if durees else 0.0
+
+        return {
+            'appels': self.n,
+            'moyenne_ms': self.total_ms / self.n if self.n else 0.0,
+            'p50_ms': centile(0.50),
+            'p95_ms': centile(0.95),
+            'p99_ms': centile(0.99),
+            'max_ms': self.max_ms,
+            'total_ms': self.total_ms,
+            'lignes': self.lignes / self.n if self.n else 0.0,
+            'allers_retours': self.allers_retours / self.n if self.n else 0.0,
+            'attente_pool_ms': self.attente_pool_ms / self.n if self.n else 0.0,
+            'erreurs': self.erreurs,
+        }
+
+
+class StatistiquesRequetes(Observateur):
+    """Histogrammes en mémoire par méthode du facade et par requête (empreinte)"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, taille_echantillon=None):
+        self.taille = taille_echantillon or INSTRUMENTATION_CONFIG["taille_echantillon"]
+        self._lock = threading.Lock()
+        self.reinitialiser()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    def reinitialiser(self):
+        with self._lock:
+            self._methodes = {}
+            self._requetes = {}
+            self._depuis = datetime.now()
+
+    def requete(self, mesure):
+        cle = (mesure.requete, mesure.methode)
+        with self._lock:
+            h = self._requetes.get(cle)
+            if h is None:
+                h = self._requetes[cle] = Histogramme(self.taille)
+            h.ajouter(mesure.duree_ms, mesure.lignes, erreurs=1 if mesure.erreur else 0)
+
+    def methode(self, mesure):
+        with self._lock:
+            h = self._methodes.get(mesure.methode)
+            if h is None:
+                h = self._methodes[mesure.methode] = Histogramme(self.taille)
+            h.ajouter(mesure.duree_ms, mesure.lignes, mesure.allers_retours,
+                      mesure.attente_pool_ms, mesure.erreurs)
+
+    def instantane(self):
+        """{'depuis', 'methodes': [...], 'requetes': [...]} triés par temps total décroissant"""
+        with self._lock:
+            methodes = [dict(h.resume(), methode=nom) for nom, h in self._methodes.items()]
+            requetes = [dict(h.resume(), requete=req, methode=meth or '')
+                        for (req, meth), h in self._requetes.items()]
+            depuis = self._depuis
+        methodes.sort(key=lambda r: r['total_ms'], reverse=True)
+        requetes.sort(key=lambda r: r['total_ms'], reverse=True)
+        return {'depuis': depuis, 'methodes': methodes, 'requetes': requetes}
+
+
+class JournalRequetesLentes(Observateur):
+    """Requêtes et méthodes au-delà du seuil : fichier JSONL + dernières entrées en mémoire"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, chemin=None, memoire=200):
+        self.chemin = chemin or INSTRUMENTATION_CONFIG["journal_lent"]
+        self.recentes = deque(maxlen=memoire)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    def requete(self, mesure):
+        if mesure.duree_ms < INSTRUMENTATION_CONFIG["seuil_lent_ms"]:
+            return
+        self._ecrire({
+            'type': 'requete',
+            'methode': mesure.methode,
+            'requete': mesure.requete,
+            'duree_ms': round(mesure.duree_ms, 2),
+            'lignes': mesure.lignes,
+            'erreur': mesure.erreur,
+            'plan': mesure.plan,
+        })
+
+    def methode(self, mesure):
+        if mesure.duree_ms < INSTRUMENTATION_CONFIG["seuil_lent_ms"]:
+            return
+        self._ecrire({
+            'type': 'methode',
+            'methode': mesure.methode,
+            'duree_ms': round(mesure.duree_ms, 2),
+            'allers_retours': mesure.allers_retours,
+            'lignes': mesure.lignes,
+            'attente_pool_ms': round(mesure.attente_pool_ms, 2),
+        })
+
+    def _ecrire(self, entree):
+        entree = {'date': datetime.now().isoformat(timespec='milliseconds'), **entree}
+        with self._lock:
+            self.recentes.append(entree)
+            try:
+                os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+                if os.path.exists(self.chemin) and os.path.getsize(self.chemin) > INSTRUMENTATION_CONFIG["taille_max_journal"]:
+                    os.replace(self.chemin, self.chemin + ".1")
+                with open(self.chemin, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entree, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                print(f"Erreur JournalRequetesLentes: {e}")
+
+
+installer(StatistiquesRequetes.instance())
+installer(JournalRequetesLentes.instance())
+
+
+# ---------- Points d'entrée (db/connection.py, db/database.py) ----------
+
+def actif():
+    return INSTRUMENTATION_CONFIG["actif"] and bool(_observateurs)
+
+
+def enregistrer_requete(curseur, requete, duree_ms, lignes, erreur=None):
+    """Appelé par InstrumentedCursor après chaque execute"""
+    mesure_methode = _mesure_courante.get()
+    if mesure_methode is not None:
+        mesure_methode.allers_retours += 1
+        mesure_methode.lignes += lignes
+        if erreur:
+            mesure_methode.erreurs += 1
+    plan = None
+    if (INSTRUMENTATION_CONFIG["explain"] and erreur is None
+            and duree_ms >= INSTRUMENTATION_CONFIG["seuil_explain_ms"]):
+        plan = _capturer_plan(curseur, requete)
+    _notifier('requete', MesureRequete(methode_courante(), empreinte(requete), duree_ms, lignes, erreur, plan))
+
+
+def enregistrer_attente_pool(attente_ms):
+    """Appelé par connection.get_connection : temps passé à attendre une connexion libre"""
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.attente_pool_ms += attente_ms
+
+
+# Appels sans effet de bord : au-delà (fonctions de l'application, nextval, pg_*...), une requête
+# n'est pas réexécutée par EXPLAIN ANALYZE (vente enregistrée deux fois, verrou de session pris...)
+_RE_APPEL = re.compile(r"\b([a-z_][a-z0-9_]*)\s*\(", re.IGNORECASE)
+_APPELS_LECTURE = {
+    # Mots-clés suivis d'une parenthèse
+    'select', 'from', 'join', 'on', 'where', 'and', 'or', 'not', 'in', 'exists', 'any', 'all',
+    'as', 'values', 'over', 'filter', 'within', 'using', 'by', 'having', 'then', 'else', 'when',
+    'case', 'union', 'except', 'intersect', 'lateral', 'array', 'row', 'cast', 'interval',
+    # Fonctions d'agrégat, de fenêtre et scalaires
+    'count', 'sum', 'avg', 'min', 'max', 'stddev', 'stddev_samp', 'variance', 'array_agg',
+    'string_agg', 'json_agg', 'jsonb_agg', 'json_object_agg', 'bool_or', 'bool_and',
+    'percentile_cont', 'percentile_disc', 'row_number', 'rank', 'dense_rank', 'lag', 'lead',
+    'coalesce', 'nullif', 'greatest', 'least', 'round', 'abs', 'ceil', 'floor', 'power',
+    'date', 'date_trunc', 'date_part', 'extract', 'to_char', 'to_date', 'make_interval', 'age',
+    'upper', 'lower', 'trim', 'length', 'substring', 'replace', 'concat', 'position', 'left',
+    'unnest', 'generate_series', 'array_length', 'cardinality',
+    'json_build_object', 'jsonb_build_object', 'to_tsquery', 'plainto_tsquery', 'to_tsvector',
+    'ts_rank', 'similarity',
+}
+
+
+def _lecture_pure(texte):
+    """SELECT sans appel de fonction hors de la liste des fonctions sans effet de bord"""
+    texte = _RE_CHAINE.sub("''", texte).lstrip()
+    if not texte.upper().startswith("SELECT"):
+        return False
+    return all(nom.lower() in _APPELS_LECTURE for nom in _RE_APPEL.findall(texte))
+
+
+def _capturer_plan(curseur, requete):
+    """
+    Plan d'une requête lente (SELECT uniquement), capturé dans un point de sauvegarde annulé :
+    la transaction de l'appelant n'est ni modifiée ni interrompue par un échec.
+    Plan réel (ANALYZE, requête réexécutée) pour une lecture pure, plan estimé sinon.
+    """
+    texte = requete.decode('utf-8', 'replace') if isinstance(requete, bytes) else str(requete)
+    if not texte.lstrip().upper().startswith("SELECT"):
+        return None
+    if curseur.query is None:
+        return None
+    options = b"ANALYZE, BUFFERS, FORMAT TEXT" if _lecture_pure(texte) else b"FORMAT TEXT"
+    conn = curseur.connection
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SAVEPOINT instrumentation_explain")
+            try:
+                cur.execute(b"EXPLAIN (" + options + b") " + curseur.query)
+                return "\n".join(r[0] for r in cur.fetchall())
+            finally:
+                cur.execute("ROLLBACK TO SAVEPOINT instrumentation_explain")
+                cur.execute("RELEASE SAVEPOINT instrumentation_explain")
+    except Exception as e:
+        return f"(plan indisponible : {e})"
+
+
+def instrumenter_facade(cls):
+    """
+    Décorateur de classe : chaque méthode statique publique est mesurée (hors get_connection).
+    Les appels imbriqués sont mesurés séparément et comptent aussi dans l'appel englobant.
+    """
+    for nom, attribut in list(vars(cls).items()):
+        if not isinstance(attribut, staticmethod) or nom.startswith('_') or nom == 'get_connection':
+            continue
+        setattr(cls, nom, staticmethod(_mesurer(attribut.__func__, f"{cls.__name__}.{nom}")))
+    return cls
+
+
+def _mesurer(fn, nom):
+    @functools.wraps(fn)
+    def enveloppe(*args, **kwargs):
+        if not actif():
+            return fn(*args, **kwargs)
+        parent = _mesure_courante.get()
+        mesure = MesureMethode(nom)
+        jeton = _mesure_courante.set(mesure)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _mesure_courante.reset(jeton)
+            mesure.duree_ms = (time.perf_counter() - mesure.debut) * 1000
+            if parent is not None:
+                parent.absorber(mesure)
+            _notifier('methode', mesure)
+    return enveloppe
@@ -0,0 +1,120 @@
+"""
+Écoute des changements poussés par la base (LISTEN/NOTIFY)
+Les triggers trg_notifier_* publient sur le canal 'magasin_changements' une charge utile
+{"table", "op", "id", "cols"} à chaque modification de Produit, AlerteStock ou Achat.
+Un thread dédié (connexion hors pool, en autocommit) regroupe les notifications reçues
+sur une courte fenêtre puis transmet un lot dédoublonné aux abonnés.
+"""
+
+import json
+import select
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+
+from db.connection import DB_CONFIG
+
+
+CANAL = "magasin_changements"
+
+
+class ChangeBatch:
+    """
+    Lot de changements regroupés par table : {table: {id: {'op', 'cols'}}}
+    Pour un même id, la dernière opération l'emporte et les colonnes modifiées sont cumulées.
+    """
+
+    def __init__(self):
+        self.tables = {}
+
+    def ajouter(self, charge):
+        table = charge.get('table')
+        ident = charge.get('id')
+        if not table or ident is None:
+            return
+        entrees = self.tables.setdefault(table, {})
+        precedent = entrees.get(ident)
+        # None = ligne entière (INSERT / DELETE)
+        cols = set(charge['cols']) if charge.get('cols') is not None else None
+        if precedent is not None:
+            cols = None if cols is None or precedent['cols'] is None else cols | precedent['cols']
+        entrees[ident] = {'op': charge.get('op'), 'cols': cols}
+
+    def ids(self, table, ops=None):
+        """Identifiants modifiés d'une table, éventuellement filtrés par opération"""
+        return [ident for ident, info in self.tables.get(table, {}).items()
+                if ops is None or info['op'] in ops]
+
+    def __bool__(self):
+        return bool(self.tables)
+
+
+class ChangeListener(threading.Thread):
+    """
+    Thread d'écoute du canal de notifications.
+    callback(batch) est appelé dans ce thread pour chaque lot non vide.
+    Reconnexion automatique (avec attente croissante) si la connexion tombe.
+    """
+
+    def __init__(self, callback, fenetre=0.2, canal=CANAL):
+        super().__init__(name="ChangeListener", daemon=True)
+        self.callback = callback
+        self.fenetre = fenetre          # secondes de regroupement après la première notification
+        self.canal = canal
+        self._arret = threading.Event()
+        self._conn = None
+
+    def stop(self):
+        self._arret.set()
+
+    def _connecter(self):
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.canal}")
+        return conn
+
+    def _lire(self, batch):
+        self._conn.poll()
+        while self._conn.notifies:
+            notif = self._conn.notifies.pop(0)
+            try:
+                batch.ajouter(json.loads(notif.payload))
+            except ValueError:
+                print(f"Notification ignorée (charge utile invalide) : {notif.payload}")
+
+    def run(self):
+        attente = 1
+        while not self._arret.is_set():
+            try:
+                self._conn = self._connecter()
+                attente = 1
+                self._boucle()
+            except Exception as e:
+                print(f"Erreur ChangeListener: {e}")
+                self._arret.wait(attente)
+                attente = min(attente * 2, 30)
+            finally:
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            # Timeout court pour réagir à stop()
+            if select.select([self._conn], [], [], 1.0) == ([], [], []):
+                continue
+            batch = ChangeBatch()
+            self._lire(batch)
+            # Fenêtre de regroupement : une vente de 50 lignes = un seul lot
+            if self.fenetre and select.select([self._conn], [], [], self.fenetre) != ([], [], []):
+                self._lire(batch)
+            if batch:
+                try:
+                    self.callback(batch)
+                except Exception as e:
+                    print(f"Erreur traitement des notifications: {e}")
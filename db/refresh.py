@@ -0,0 +1,71 @@
+"""
+Planificateur de maintenance de la base
+Un thread de fond, à intervalle régulier :
+- crée à l'avance les partitions mensuelles des tables d'historique (Database.ensure_partitions)
+- clôture le journal de stock des jours écoulés (Database.close_stock_days)
+- met à jour les statistiques de demande et points de commande (Database.refresh_demand_statistics)
+- appelle Database.refresh_materialized_views ; seules les vues dont les sources ont changé
+  sont recalculées (voir EtatVueMaterialisee)
+"""
+
+import threading
+
+from db.database import Database
+
+
+REFRESH_CONFIG = {
+    "intervalle": 300,      # secondes entre deux passages
+    "premier_delai": 15,    # secondes avant le premier passage (laisse l'application démarrer)
+    "mois_avance": 3,       # partitions mensuelles créées à l'avance
+}
+
+
+class MaterializedViewRefresher(threading.Thread):
+    """
+    Thread de rafraîchissement périodique.
+    Plusieurs postes peuvent le faire tourner : le verrou consultatif côté base
+    garantit qu'une seule instance rafraîchit une vue donnée à la fois.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, intervalle=None, premier_delai=None):
+        super().__init__(name="MaterializedViewRefresher", daemon=True)
+        self.intervalle = intervalle if intervalle is not None else REFRESH_CONFIG["intervalle"]
+        self.premier_delai = premier_delai if premier_delai is not None else REFRESH_CONFIG["premier_delai"]
+        self._arret = threading.Event()
+        self._reveil = threading.Event()
+
+    @classmethod
+    def demarrer(cls):
+        """Planificateur unique du processus ; démarré au premier appel"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance.start()
+        return cls._instance
+
+    def stop(self):
+        self._arret.set()
+        self._reveil.set()
+
+    def rafraichir_maintenant(self):
+        """Avance le prochain passage (ex. après un import de données)"""
+        self._reveil.set()
+
+    def run(self):
+        attente = self.premier_delai
+        while not self._arret.is_set():
+            self._reveil.wait(attente)
+            self._reveil.clear()
+            if self._arret.is_set():
+                break
+            try:
+                Database.ensure_partitions(REFRESH_CONFIG["mois_avance"])
+                Database.close_stock_days()
+                Database.refresh_demand_statistics()
+                Database.refresh_materialized_views()
+            except Exception as e:
+                print(f"Erreur MaterializedViewRefresher: {e}")
+            attente = self.intervalle
@@ -2,7 +2,7 @@
 import sys
 import os
 from PySide6.QtWidgets import QApplication
-from views.main_window import MainWindow
+from PySide6.QtCore import QTimer
 from views.login_view import LoginView
 
 # Ensure we can find the styles and modules
@@ -80,6 +80,7 @@ class AppController:
             
         else:
             # Fallback -> MainWindow générique
+            from views.main_window import MainWindow
             self.main_window = MainWindow(
                 user_role=user['role'], 
                 user_name=user['nom'], 
@@ -101,9 +102,15 @@ class AppController:
 
 def main():
     app = QApplication(sys.argv)
-    
+
+    # Fenêtre de connexion d'abord : les vues par rôle sont importées après l'authentification
     controller = AppController(app)
 
+    # Rafraîchissement périodique des vues matérialisées (thread de fond),
+    # démarré une fois la boucle d'événements lancée
+    from db.refresh import MaterializedViewRefresher
+    QTimer.singleShot(0, MaterializedViewRefresher.demarrer)
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
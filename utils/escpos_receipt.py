@@ -0,0 +1,129 @@
+"""
+Générateur de tickets ESC/POS pour imprimantes thermiques 80 mm
+Mêmes entrées que ReceiptGenerator (vente_data, totaux de CalculateurVente.calculer_totaux_panier),
+sortie : flux d'octets brut envoyé tel quel à l'imprimante (fichier, périphérique ou socket TCP).
+L'en-tête magasin et les commandes fixes sont encodés une fois par processus.
+"""
+
+import socket
+from datetime import datetime
+from typing import Dict
+
+from utils import store_info
+
+
+# Commandes ESC/POS
+INIT = b"\x1b@"
+PAGE_CODE = b"\x1bt\x13"          # table de caractères 19 : CP858 (accents + €)
+GAUCHE = b"\x1ba\x00"
+CENTRE = b"\x1ba\x01"
+GRAS = b"\x1bE\x01"
+NON_GRAS = b"\x1bE\x00"
+DOUBLE = b"\x1d!\x11"             # double largeur et hauteur
+NORMAL = b"\x1d!\x00"
+COUPE = b"\x1dVB\x03"             # avance de 3 lignes puis coupe partielle
+
+
+class EscPosReceiptGenerator:
+    """Génère des tickets de caisse ESC/POS (police A, 48 caractères par ligne)"""
+
+    LARGEUR = 48
+    ENCODAGE = "cp858"
+
+    # Colonnes : article, qté, P.U. TTC, total TTC (séparées par un espace)
+    COLONNES = (20, 4, 10, 11)
+
+    _entete = None
+    _pied = None
+
+    @classmethod
+    def generate_receipt(cls, vente_data: Dict, totaux: Dict, mode_paiement: str = "ESPECES") -> bytes:
+        """
+        Génère le ticket ESC/POS d'une vente
+
+        Args:
+            vente_data: Dict contenant id_vente, date_vente, caissier, articles (list)
+            totaux: Dict avec subtotal_ttc, total_remises, total_ht, montant_tva, total_ttc
+            mode_paiement: Mode de paiement utilisé
+
+        Returns:
+            Flux d'octets à envoyer à l'imprimante
+        """
+        if cls._entete is None:
+            cls._precalculer()
+
+        n_nom, n_qte, n_pu, n_total = cls.COLONNES
+        date_str = (vente_data.get('date_vente') or datetime.now()).strftime("%d/%m/%Y %H:%M")
+
+        lignes = [
+            f"Date: {date_str}",
+            f"Caissier: {vente_data.get('caissier', 'N/A')}",
+            f"Mode: {mode_paiement}",
+            "-" * cls.LARGEUR,
+        ]
+        for article in vente_data.get('articles', []):
+            lignes.append(f"{article['nom_produit'][:n_nom]:<{n_nom}} {article['quantite']:>{n_qte}} "
+                          f"{article['prix_unitaire']:>{n_pu},.0f} {article['total_ligne']:>{n_total},.0f}")
+            if article['remise'] > 0:
+                lignes.append(f"  Remise -{article['remise']:.1f}%")
+        lignes.append("-" * cls.LARGEUR)
+        lignes.append(cls._montant("Sous-total TTC:", totaux['subtotal_ttc']))
+        if totaux['total_remises'] > 0:
+            lignes.append(cls._montant("Remises:", -totaux['total_remises']))
+        lignes.append(cls._montant("Total HT:", totaux['total_ht']))
+        lignes.append(cls._montant("TVA collectée:", totaux['montant_tva']))
+
+        corps = "\n".join(lignes).encode(cls.ENCODAGE, "replace")
+        total = cls._montant("TOTAL TTC:", totaux['total_ttc']).encode(cls.ENCODAGE, "replace")
+        genere = f"Document généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}".encode(cls.ENCODAGE, "replace")
+
+        return b"".join((
+            cls._entete,
+            GRAS, f"REÇU N° {vente_data['id_vente']}".encode(cls.ENCODAGE, "replace"), NON_GRAS, b"\n",
+            corps, b"\n\n",
+            GRAS, total, NON_GRAS, b"\n\n",
+            cls._pied, genere, b"\n",
+            COUPE,
+        ))
+
+    @classmethod
+    def envoyer(cls, donnees: bytes, destination: str, timeout: float = 5.0) -> str:
+        """
+        Envoie un ticket à l'imprimante
+
+        Args:
+            donnees: Flux ESC/POS
+            destination: Chemin de fichier/périphérique (ex. /dev/usb/lp0) ou tcp://hôte:port
+            timeout: Délai de connexion et d'envoi en secondes (TCP)
+
+        Returns:
+            La destination
+        """
+        if destination.startswith("tcp://"):
+            hote, _, port = destination[len("tcp://"):].rpartition(":")
+            with socket.create_connection((hote, int(port)), timeout=timeout) as s:
+                s.sendall(donnees)
+        else:
+            with open(destination, "ab") as f:
+                f.write(donnees)
+        return destination
+
+    @classmethod
+    def _montant(cls, libelle: str, montant: float) -> str:
+        valeur = f"{montant:,.0f} FCFA"
+        return f"{libelle:<{cls.LARGEUR - len(valeur)}}{valeur}"
+
+    @classmethod
+    def _precalculer(cls):
+        """Encode une fois l'en-tête magasin et le pied de page fixe"""
+        encoder = lambda texte: texte.encode(cls.ENCODAGE, "replace")
+        cls._entete = b"".join((
+            INIT, PAGE_CODE, CENTRE,
+            DOUBLE, encoder(store_info.STORE_NAME), NORMAL, b"\n",
+            encoder(store_info.STORE_ADDRESS), b"\n",
+            encoder(store_info.STORE_PHONE), b"\n",
+            encoder(store_info.STORE_EMAIL), b"\n",
+            encoder("=" * cls.LARGEUR), b"\n",
+            GAUCHE,
+        ))
+        cls._pied = b"".join((CENTRE, encoder("Merci de votre visite !"), b"\n"))
@@ -1,17 +1,43 @@
 """
 Générateur de reçus PDF pour les ventes
 Utilise reportlab pour créer des reçus formatés professionnellement
+
+L'en-tête du magasin est dessiné une seule fois par fichier dans un gabarit
+(form XObject reportlab) que chaque page réutilise ; le pied de page suit les totaux.
+Le style du tableau des articles est construit une fois par processus.
+Rendu en tâche de fond : utils/receipt_renderer.py
 """
 
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.platypus import Table, TableStyle
 
+from utils import store_info
+
+
+# Colonnes du tableau des articles
+LARGEURS_ARTICLES = [8*cm, 1.5*cm, 2.5*cm, 2*cm, 2.5*cm]
+
+STYLE_ARTICLES = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
 
 class ReceiptGenerator:
     """Génère des reçus PDF pour les ventes"""
@@ -19,11 +45,16 @@ class ReceiptGenerator:
     # Chemins
     RECEIPTS_DIR = "receipts"
     
-    # Configuration magasin (à personnaliser)
-    STORE_NAME = "SUPERMARCHÉ"
-    STORE_ADDRESS = "Rue du Commerce, Lomé"
-    STORE_PHONE = "Tel: +228 XX XX XX XX"
-    STORE_EMAIL = "contact@supermarche.tg"
+    # Configuration magasin (utils/store_info.py)
+    STORE_NAME = store_info.STORE_NAME
+    STORE_ADDRESS = store_info.STORE_ADDRESS
+    STORE_PHONE = store_info.STORE_PHONE
+    STORE_EMAIL = store_info.STORE_EMAIL
+    
+    # Nom du gabarit (en-tête) dans le PDF
+    GABARIT = "gabarit_recu"
+    # Ligne séparatrice sous l'en-tête (depuis le bas)
+    Y_SEPARATEUR = A4[1] - 4.3*cm
     
     @classmethod
     def generate_receipt(cls, vente_data: Dict, totaux: Dict, mode_paiement: str = "ESPECES") -> str:
@@ -38,24 +69,58 @@ class ReceiptGenerator:
         Returns:
             Chemin complet du fichier PDF généré
         """
-        # Créer le dossier receipts si nécessaire
-        if not os.path.exists(cls.RECEIPTS_DIR):
-            os.makedirs(cls.RECEIPTS_DIR)
+        filepath = cls._chemin(f"receipt_{vente_data['id_vente']}")
         
-        # Nom du fichier
-        id_vente = vente_data['id_vente']
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"receipt_{id_vente}_{timestamp}.pdf"
-        filepath = os.path.join(cls.RECEIPTS_DIR, filename)
+        c = canvas.Canvas(filepath, pagesize=A4)
+        cls._definir_gabarit(c)
+        cls._dessiner_recu(c, vente_data, totaux, mode_paiement)
+        c.save()
+        
+        return filepath
+    
+    @classmethod
+    def generate_receipts_batch(cls, recus: List[Tuple[Dict, Dict, str]],
+                                filepath: Optional[str] = None) -> str:
+        """
+        Génère plusieurs reçus dans un seul PDF (une page par vente)
+        Le gabarit d'en-tête est écrit une fois dans le fichier et partagé par toutes les pages.
+        
+        Args:
+            recus: Liste de (vente_data, totaux, mode_paiement)
+            filepath: Fichier de sortie (par défaut receipts/receipts_lot_<premier>_<dernier>_<horodatage>.pdf)
+            
+        Returns:
+            Chemin complet du fichier PDF généré
+        """
+        if not recus:
+            raise ValueError("Aucun reçu à générer")
+        if filepath is None:
+            premier, dernier = recus[0][0]['id_vente'], recus[-1][0]['id_vente']
+            filepath = cls._chemin(f"receipts_lot_{premier}_{dernier}")
         
-        # Créer le PDF
         c = canvas.Canvas(filepath, pagesize=A4)
-        width, height = A4
+        cls._definir_gabarit(c)
+        for vente_data, totaux, mode_paiement in recus:
+            cls._dessiner_recu(c, vente_data, totaux, mode_paiement)
+        c.save()
         
-        # Position Y (de haut en bas)
-        y = height - 2*cm
+        return filepath
+    
+    @classmethod
+    def _chemin(cls, prefixe: str) -> str:
+        """Chemin d'un nouveau fichier dans RECEIPTS_DIR (créé si nécessaire)"""
+        os.makedirs(cls.RECEIPTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(cls.RECEIPTS_DIR, f"{prefixe}_{timestamp}.pdf")
+    
+    @classmethod
+    def _definir_gabarit(cls, c: canvas.Canvas):
+        """Dessine l'en-tête magasin dans un form XObject du canvas"""
+        width, height = A4
+        c.beginForm(cls.GABARIT)
         
         # === EN-TÊTE ===
+        y = height - 2*cm
         c.setFont("Helvetica-Bold", 18)
         c.drawCentredString(width/2, y, cls.STORE_NAME)
         y -= 0.5*cm
@@ -66,19 +131,28 @@ class ReceiptGenerator:
         c.drawCentredString(width/2, y, cls.STORE_PHONE)
         y -= 0.4*cm
         c.drawCentredString(width/2, y, cls.STORE_EMAIL)
-        y -= 1*cm
         
         # === LIGNE SÉPARATRICE ===
-        c.line(2*cm, y, width-2*cm, y)
-        y -= 0.8*cm
+        c.line(2*cm, cls.Y_SEPARATEUR, width-2*cm, cls.Y_SEPARATEUR)
+        
+        c.endForm()
+    
+    @classmethod
+    def _dessiner_recu(cls, c: canvas.Canvas, vente_data: Dict, totaux: Dict, mode_paiement: str):
+        """Dessine une page de reçu (le gabarit doit être défini sur le canvas)"""
+        width, height = A4
+        c.doForm(cls.GABARIT)
+        
+        # Position Y (de haut en bas), sous l'en-tête
+        y = cls.Y_SEPARATEUR - 0.8*cm
         
         # === INFOS VENTE ===
         c.setFont("Helvetica-Bold", 12)
-        c.drawString(2*cm, y, f"REÇU N° {id_vente}")
+        c.drawString(2*cm, y, f"REÇU N° {vente_data['id_vente']}")
         y -= 0.6*cm
         
         c.setFont("Helvetica", 10)
-        date_str = vente_data.get('date_vente', datetime.now()).strftime("%d/%m/%Y %H:%M")
+        date_str = (vente_data.get('date_vente') or datetime.now()).strftime("%d/%m/%Y %H:%M")
         c.drawString(2*cm, y, f"Date: {date_str}")
         y -= 0.5*cm
         c.drawString(2*cm, y, f"Caissier: {vente_data.get('caissier', 'N/A')}")
@@ -87,7 +161,6 @@ class ReceiptGenerator:
         y -= 1*cm
         
         # === TABLE ARTICLES ===
-        # Données du tableau
         table_data = [['Article', 'Qté', 'P.U. TTC', 'Remise', 'Total TTC']]
         
         for article in vente_data.get('articles', []):
@@ -98,24 +171,9 @@ class ReceiptGenerator:
             total = f"{article['total_ligne']:,.0f}"
             table_data.append([nom, qte, pu_ttc, remise, total])
         
-        # Créer le tableau
-        table = Table(table_data, colWidths=[8*cm, 1.5*cm, 2.5*cm, 2*cm, 2.5*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        
-        # Dessiner le tableau
+        table = Table(table_data, colWidths=LARGEURS_ARTICLES)
+        table.setStyle(STYLE_ARTICLES)
+        
         table_width, table_height = table.wrap(width, height)
         table.drawOn(c, 2*cm, y - table_height)
         y -= (table_height + 1*cm)
@@ -156,14 +214,11 @@ class ReceiptGenerator:
         c.setFillColor(colors.black)
         y -= 1.5*cm
         
-        # === PIED DE PAGE ===
+        # === PIED DE PAGE (à la suite des totaux, quelle que soit la longueur du reçu) ===
         c.setFont("Helvetica-Oblique", 9)
         c.drawCentredString(width/2, y, "Merci de votre visite !")
         y -= 0.4*cm
         c.setFont("Helvetica", 8)
         c.drawCentredString(width/2, y, f"Document généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}")
         
-        # Sauvegarder
-        c.save()
-        
-        return filepath
+        c.showPage()
@@ -0,0 +1,160 @@
+"""
+Rendu des reçus en tâche de fond
+Un pool de processus génère les PDF (ReceiptGenerator) : la caisse soumet le reçu
+juste après l'enregistrement de la vente et passe au client suivant sans attendre.
+Les processus sont lancés en mode "spawn" (pas de fork d'un processus Qt multi-thread)
+et chargent reportlab une fois pour toutes.
+Sortie choisie par caisse : PDF A4 ou ticket ESC/POS pour imprimante thermique
+(utils/escpos_receipt.py, rendu dans le thread appelant, envoi en arrière-plan).
+"""
+
+import os
+import sys
+import socket
+import subprocess
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+RENDU_CONFIG = {
+    "processus": 2,                 # processus de rendu PDF
+    "sortie": "pdf",                # "pdf" (A4, ouvert dans le visualiseur) ou "escpos" (imprimante thermique)
+    "imprimante": "/dev/usb/lp0",   # sortie ESC/POS : fichier, périphérique ou tcp://hôte:port
+    "postes": {},                   # réglages propres à une caisse : {nom d'hôte: {"sortie": ..., "imprimante": ...}}
+}
+
+
+def reglages_poste(poste=None):
+    """Sortie et imprimante de la caisse (par défaut le poste courant)"""
+    reglages = {cle: RENDU_CONFIG[cle] for cle in ("sortie", "imprimante")}
+    reglages.update(RENDU_CONFIG["postes"].get(poste or socket.gethostname(), {}))
+    return reglages
+
+
+def _initialiser():
+    """Chargement de reportlab et du gabarit dans le processus de rendu"""
+    import utils.receipt_generator  # noqa: F401
+
+
+def _pret():
+    return os.getpid()
+
+
+def _rendre(vente_data, totaux, mode_paiement):
+    from utils.receipt_generator import ReceiptGenerator
+    return os.path.abspath(ReceiptGenerator.generate_receipt(vente_data, totaux, mode_paiement))
+
+
+def _rendre_lot(recus, filepath):
+    from utils.receipt_generator import ReceiptGenerator
+    return os.path.abspath(ReceiptGenerator.generate_receipts_batch(recus, filepath))
+
+
+def ouvrir_pdf(pdf_path):
+    """Ouvre le PDF avec le visualiseur système par défaut"""
+    if sys.platform.startswith('linux'):
+        subprocess.Popen(['xdg-open', pdf_path])
+    elif sys.platform == 'win32':
+        os.startfile(pdf_path)
+
+
+class ReceiptRenderer:
+    """
+    File de rendu des reçus (unique par processus)
+    soumettre() retourne immédiatement un concurrent.futures.Future dont le résultat
+    est le chemin du PDF (ou la destination du ticket ESC/POS) ;
+    avec ouvrir=True le PDF est ouvert dès qu'il est prêt.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, processus=None, sortie=None, imprimante=None):
+        reglages = reglages_poste()
+        self.processus = processus or RENDU_CONFIG["processus"]
+        self.sortie = sortie or reglages["sortie"]
+        self.imprimante = imprimante or reglages["imprimante"]
+        if self.sortie not in ("pdf", "escpos"):
+            raise ValueError(f"Sortie de reçu inconnue : {self.sortie}")
+        self._pool = ProcessPoolExecutor(max_workers=self.processus,
+                                         mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_initialiser)
+        # Un seul thread d'envoi : les tickets sortent dans l'ordre des ventes
+        self._impression = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ImpressionRecus")
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    def prechauffer(self):
+        """Démarre les processus de rendu (import de reportlab) avant le premier reçu PDF"""
+        if self.sortie != "pdf":
+            return []
+        return [self._pool.submit(_pret) for _ in range(self.processus)]
+
+    def soumettre(self, vente_data, totaux, mode_paiement="ESPECES", ouvrir=False):
+        """
+        Met un reçu en file de rendu
+
+        Args:
+            vente_data: Dict contenant id_vente, date_vente, caissier, articles (list)
+            totaux: Dict avec subtotal_ttc, total_remises, total_ht, montant_tva, total_ttc
+            mode_paiement: Mode de paiement utilisé
+            ouvrir: Ouvrir le PDF dès qu'il est généré (sortie PDF)
+
+        Returns:
+            Future du chemin du PDF ou de la destination du ticket
+        """
+        if self.sortie == "escpos":
+            from utils.escpos_receipt import EscPosReceiptGenerator
+            donnees = EscPosReceiptGenerator.generate_receipt(vente_data, totaux, mode_paiement)
+            future = self._impression.submit(EscPosReceiptGenerator.envoyer, donnees, self.imprimante)
+            future.add_done_callback(self._journaliser)
+            return future
+        future = self._pool.submit(_rendre, vente_data, totaux, mode_paiement)
+        future.add_done_callback(self._terminer if ouvrir else self._journaliser)
+        return future
+
+    def soumettre_lot(self, recus, filepath=None, ouvrir=False):
+        """
+        Met en file le rendu de plusieurs reçus dans un seul PDF (une page par vente),
+        quelle que soit la sortie de la caisse
+
+        Args:
+            recus: Liste de (vente_data, totaux, mode_paiement)
+            filepath: Fichier de sortie (optionnel)
+            ouvrir: Ouvrir le PDF dès qu'il est généré
+
+        Returns:
+            Future du chemin du PDF
+        """
+        future = self._pool.submit(_rendre_lot, list(recus), filepath)
+        future.add_done_callback(self._terminer if ouvrir else self._journaliser)
+        return future
+
+    def arreter(self, attendre=True):
+        """Arrête les processus (attend les reçus en cours)"""
+        self._impression.shutdown(wait=attendre, cancel_futures=not attendre)
+        self._pool.shutdown(wait=attendre, cancel_futures=not attendre)
+
+    @staticmethod
+    def _journaliser(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Erreur génération reçu: {future.exception()}")
+
+    @staticmethod
+    def _terminer(future):
+        # Appelé dans le thread de gestion du pool : pas d'accès à l'interface ici
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"Erreur génération reçu: {future.exception()}")
+            return
+        try:
+            ouvrir_pdf(future.result())
+        except Exception as e:
+            print(f"Erreur ouverture reçu: {e}")
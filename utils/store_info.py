@@ -0,0 +1,10 @@
+"""
+Identité du magasin imprimée en tête des reçus (PDF et ESC/POS)
+Module sans dépendance : importable par le rendu ESC/POS sans charger reportlab.
+"""
+
+# Configuration magasin (à personnaliser)
+STORE_NAME = "SUPERMARCHÉ"
+STORE_ADDRESS = "Rue du Commerce, Lomé"
+STORE_PHONE = "Tel: +228 XX XX XX XX"
+STORE_EMAIL = "contact@supermarche.tg"
@@ -5,16 +5,12 @@ L'admin observe, compare, tranche - il n'opère pas
 """
 
 from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-                               QStackedWidget, QLabel, QFrame)
+                               QLabel, QFrame)
 from PySide6.QtCore import Qt, QTimer
 from datetime import datetime
 
-# Import des écrans
-from views.admin.strategic_dashboard import StrategicDashboard
-from views.admin.commercial_performance import CommercialPerformance
-from views.admin.stock_governance import StockGovernance
-from views.admin.system_settings import SystemSettings
-from views.admin.audit_trail import AuditTrail
+# Écrans importés et construits à la première navigation
+from views.lazy_screens import PileEcrans
 
 
 class AdminView(QWidget):
@@ -28,6 +24,7 @@ class AdminView(QWidget):
     INDEX_STOCK = 2
     INDEX_SETTINGS = 3
     INDEX_AUDIT = 4
+    INDEX_REQUETES = 5
     
     def __init__(self, user_id: int = 1, user_name: str = "Admin"):
         super().__init__()
@@ -61,7 +58,7 @@ class AdminView(QWidget):
         self._creer_top_bar(layout_droit)
         
         # Stacked Widget
-        self.stacked_widget = QStackedWidget()
+        self.stacked_widget = PileEcrans()
         layout_droit.addWidget(self.stacked_widget)
         
         layout.addWidget(self.container_droit)
@@ -104,6 +101,10 @@ class AdminView(QWidget):
         self.btn_audit.clicked.connect(self.afficher_audit)
         lay.addWidget(self.btn_audit)
         
+        self.btn_requetes = self._make_btn("⏱️ Requêtes", False)
+        self.btn_requetes.clicked.connect(self.afficher_requetes)
+        lay.addWidget(self.btn_requetes)
+        
         lay.addStretch()
         
         # User info
@@ -171,27 +172,24 @@ class AdminView(QWidget):
         self.lbl_time.setText(datetime.now().strftime("%d/%m/%Y %H:%M"))
     
     def _init_screens(self):
-        self.screen_dashboard = StrategicDashboard()
-        self.screen_performance = CommercialPerformance()
-        self.screen_stock = StockGovernance()
-        self.screen_settings = SystemSettings()
-        self.screen_audit = AuditTrail()
-        
-        self.stacked_widget.addWidget(self.screen_dashboard)
-        self.stacked_widget.addWidget(self.screen_performance)
-        self.stacked_widget.addWidget(self.screen_stock)
-        self.stacked_widget.addWidget(self.screen_settings)
-        self.stacked_widget.addWidget(self.screen_audit)
+        self.stacked_widget.enregistrer("views.admin.strategic_dashboard", "StrategicDashboard")
+        self.stacked_widget.enregistrer("views.admin.commercial_performance", "CommercialPerformance")
+        self.stacked_widget.enregistrer("views.admin.stock_governance", "StockGovernance")
+        self.stacked_widget.enregistrer("views.admin.system_settings", "SystemSettings")
+        self.stacked_widget.enregistrer("views.admin.audit_trail", "AuditTrail")
+        self.stacked_widget.enregistrer("views.admin.query_monitor", "QueryMonitor")
     
     def _update_nav(self, btn, idx, title):
-        for b in [self.btn_dash, self.btn_perf, self.btn_stock, self.btn_settings, self.btn_audit]:
+        for b in [self.btn_dash, self.btn_perf, self.btn_stock, self.btn_settings, self.btn_audit,
+                  self.btn_requetes]:
             b.setChecked(b == btn)
+        deja_construit = self.stacked_widget.est_construit(idx)
         self.stacked_widget.setCurrentIndex(idx)
         self.lbl_page_title.setText(title)
         
-        # Refresh
-        widget = self.stacked_widget.widget(idx)
-        if hasattr(widget, 'rafraichir'):
+        # Refresh (un écran tout juste construit a déjà chargé ses données)
+        widget = self.stacked_widget.ecran(idx)
+        if deja_construit and hasattr(widget, 'rafraichir'):
             widget.rafraichir()
     
     def afficher_dashboard(self):
@@ -209,6 +207,9 @@ class AdminView(QWidget):
     def afficher_audit(self):
         self._update_nav(self.btn_audit, self.INDEX_AUDIT, "AUDIT & TRAÇABILITÉ")
     
+    def afficher_requetes(self):
+        self._update_nav(self.btn_requetes, self.INDEX_REQUETES, "SUIVI DES REQUÊTES")
+    
     def _logout(self):
         if hasattr(self, 'controller'):
             self.controller.logout()
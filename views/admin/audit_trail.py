@@ -7,6 +7,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTableWidget,
                                QTableWidgetItem, QHeaderView)
 from PySide6.QtCore import Qt
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class AuditTrail(QWidget):
@@ -16,6 +17,7 @@ class AuditTrail(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
     
@@ -59,7 +61,9 @@ class AuditTrail(QWidget):
         layout.addWidget(self.table)
     
     def rafraichir(self):
-        logs = Database.get_audit_log(limit=100)
+        self._async.charger('logs', Database.get_audit_log, limit=100, ok=self._afficher)
+    
+    def _afficher(self, logs):
         self.table.setRowCount(len(logs))
         
         for row, log in enumerate(logs):
@@ -7,6 +7,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
                                QTableWidget, QTableWidgetItem, QHeaderView)
 from PySide6.QtCore import Qt
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class CommercialPerformance(QWidget):
@@ -16,6 +17,7 @@ class CommercialPerformance(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
     
@@ -83,16 +85,17 @@ class CommercialPerformance(QWidget):
         return table
     
     def rafraichir(self):
-        # Products
-        products = Database.get_sales_by_product(limit=10)
+        self._async.charger('produits', Database.get_sales_by_product, limit=10, ok=self._afficher_produits)
+        self._async.charger('caissiers', Database.get_sales_by_cashier, ok=self._afficher_caissiers)
+    
+    def _afficher_produits(self, products):
         self.table_products.setRowCount(len(products))
         for row, p in enumerate(products):
             self.table_products.setItem(row, 0, QTableWidgetItem(p['produit']))
             self.table_products.setItem(row, 1, QTableWidgetItem(str(p['qty_vendue'])))
             self.table_products.setItem(row, 2, QTableWidgetItem(f"{p['ca']:,.0f} FCFA".replace(',', ' ')))
-        
-        # Cashiers
-        cashiers = Database.get_sales_by_cashier()
+    
+    def _afficher_caissiers(self, cashiers):
         self.table_cashiers.setRowCount(len(cashiers))
         for row, c in enumerate(cashiers):
             self.table_cashiers.setItem(row, 0, QTableWidgetItem(c['caissier']))
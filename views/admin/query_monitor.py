@@ -0,0 +1,242 @@
+"""
+Suivi des requêtes
+Temps par méthode du facade et par requête, requêtes lentes (db/instrumentation.py)
+Mesures du processus courant, rafraîchies en direct tant que l'écran est visible
+"""
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QPushButton, QTabWidget,
+                               QCheckBox, QSpinBox, QTextEdit, QSplitter)
+from PySide6.QtCore import Qt, QTimer
+
+from db import instrumentation
+from db.instrumentation import INSTRUMENTATION_CONFIG, StatistiquesRequetes, JournalRequetesLentes
+
+
+STYLE_TABLE = """
+    QTableWidget {
+        background-color: #161B22; gridline-color: #30363D;
+        border: 1px solid #30363D; color: #C9D1D9; font-size: 10pt;
+        border-radius: 8px;
+    }
+    QHeaderView::section {
+        background-color: #21262D; color: #8B949E;
+        padding: 8px; border: none; font-weight: bold;
+    }
+    QTableWidget::item:selected { background-color: #1F6FEB; color: white; }
+"""
+
+COLONNES_STATS = [
+    ("Appels", 'appels', "{:,}"),
+    ("Moy. (ms)", 'moyenne_ms', "{:.1f}"),
+    ("p50", 'p50_ms', "{:.1f}"),
+    ("p95", 'p95_ms', "{:.1f}"),
+    ("p99", 'p99_ms', "{:.1f}"),
+    ("Max", 'max_ms', "{:.1f}"),
+    ("Total (s)", 'total_ms', None),
+    ("Lignes/appel", 'lignes', "{:.1f}"),
+    ("Erreurs", 'erreurs', "{:,}"),
+]
+
+
+class _Item(QTableWidgetItem):
+    """Cellule triée sur sa valeur numérique"""
+
+    def __init__(self, texte, valeur=None):
+        super().__init__(texte)
+        self.valeur = valeur
+        if valeur is not None:
+            self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, autre):
+        if self.valeur is not None and getattr(autre, 'valeur', None) is not None:
+            return self.valeur < autre.valeur
+        return super().__lt__(autre)
+
+
+class QueryMonitor(QWidget):
+    """
+    Suivi des requêtes
+    Où part le temps passé en base, sans outil externe
+    """
+
+    INTERVALLE_MS = 2000
+
+    def __init__(self):
+        super().__init__()
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.INTERVALLE_MS)
+        self._timer.timeout.connect(self.rafraichir)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(40, 30, 40, 30)
+        layout.setSpacing(15)
+
+        # Barre de réglages
+        barre = QHBoxLayout()
+        self.lbl_depuis = QLabel()
+        self.lbl_depuis.setStyleSheet("color: #8B949E; font-size: 10pt;")
+        barre.addWidget(self.lbl_depuis)
+        barre.addStretch()
+
+        barre.addWidget(QLabel("Seuil requête lente :"))
+        self.sb_seuil = QSpinBox()
+        self.sb_seuil.setRange(1, 60000)
+        self.sb_seuil.setSuffix(" ms")
+        self.sb_seuil.setValue(INSTRUMENTATION_CONFIG["seuil_lent_ms"])
+        self.sb_seuil.valueChanged.connect(lambda v: INSTRUMENTATION_CONFIG.__setitem__("seuil_lent_ms", v))
+        barre.addWidget(self.sb_seuil)
+
+        self.chk_explain = QCheckBox("Capturer EXPLAIN (ANALYZE, BUFFERS)")
+        self.chk_explain.setToolTip(f"Requêtes SELECT au-delà de {INSTRUMENTATION_CONFIG['seuil_explain_ms']} ms "
+                                    "(rejouées dans un point de sauvegarde annulé)")
+        self.chk_explain.setChecked(INSTRUMENTATION_CONFIG["explain"])
+        self.chk_explain.toggled.connect(lambda v: INSTRUMENTATION_CONFIG.__setitem__("explain", v))
+        barre.addWidget(self.chk_explain)
+
+        btn_reset = QPushButton("🗑️ Réinitialiser")
+        btn_reset.setStyleSheet("""
+            QPushButton { color: #C9D1D9; background: #21262D; border: 1px solid #30363D;
+                          padding: 6px 12px; border-radius: 6px; }
+            QPushButton:hover { background-color: #30363D; }
+        """)
+        btn_reset.clicked.connect(self._reinitialiser)
+        barre.addWidget(btn_reset)
+        layout.addLayout(barre)
+
+        self.tabs = QTabWidget()
+        self.tabs.setStyleSheet("""
+            QTabWidget::pane { border: none; }
+            QTabBar::tab { background: #161B22; color: #8B949E; padding: 10px 18px; border: none; }
+            QTabBar::tab:selected { color: #58A6FF; border-bottom: 2px solid #58A6FF; }
+        """)
+
+        self.table_methodes = self._creer_table(
+            ["Méthode"] + [c[0] for c in COLONNES_STATS] + ["Allers-retours/appel", "Attente pool (ms)"])
+        self.tabs.addTab(self.table_methodes, "MÉTHODES")
+
+        self.table_requetes = self._creer_table(["Requête", "Méthode"] + [c[0] for c in COLONNES_STATS])
+        self.tabs.addTab(self.table_requetes, "REQUÊTES")
+
+        # Requêtes lentes : liste + détail (texte, plan)
+        split = QSplitter(Qt.Vertical)
+        self.table_lentes = self._creer_table(["Date", "Type", "Méthode", "Durée (ms)", "Lignes", "Requête"])
+        self.table_lentes.itemSelectionChanged.connect(self._afficher_lente)
+        split.addWidget(self.table_lentes)
+        self.txt_detail = QTextEdit()
+        self.txt_detail.setReadOnly(True)
+        self.txt_detail.setStyleSheet("background-color: #0D1117; color: #C9D1D9; font-family: monospace;"
+                                      "border: 1px solid #30363D; border-radius: 8px;")
+        split.addWidget(self.txt_detail)
+        self.tabs.addTab(split, "REQUÊTES LENTES")
+
+        layout.addWidget(self.tabs)
+
+        lbl_journal = QLabel(f"Journal : {INSTRUMENTATION_CONFIG['journal_lent']}")
+        lbl_journal.setStyleSheet("color: #6E7681; font-size: 9pt;")
+        lbl_journal.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(lbl_journal)
+
+    def _creer_table(self, entetes):
+        table = QTableWidget()
+        table.setColumnCount(len(entetes))
+        table.setHorizontalHeaderLabels(entetes)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.verticalHeader().setVisible(False)
+        table.setStyleSheet(STYLE_TABLE)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        table.setSelectionMode(QTableWidget.SingleSelection)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSortingEnabled(True)
+        return table
+
+    # ---------- Rafraîchissement en direct ----------
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.rafraichir()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def rafraichir(self):
+        stats = StatistiquesRequetes.instance().instantane()
+        self.lbl_depuis.setText(f"Mesures depuis le {stats['depuis'].strftime('%d/%m/%Y %H:%M:%S')}"
+                                + ("" if instrumentation.actif() else " — instrumentation désactivée"))
+
+        self._remplir(self.table_methodes, stats['methodes'], lambda r: [
+            _Item(r['methode'])
+        ] + self._cellules(r) + [
+            _Item(f"{r['allers_retours']:.1f}", r['allers_retours']),
+            _Item(f"{r['attente_pool_ms']:.1f}", r['attente_pool_ms']),
+        ])
+        self._remplir(self.table_requetes, stats['requetes'], lambda r: [
+            self._item_requete(r['requete']),
+            _Item(r['methode']),
+        ] + self._cellules(r))
+
+        lentes = list(JournalRequetesLentes.instance().recentes)[::-1]
+        self._remplir(self.table_lentes, lentes, lambda e: [
+            _Item(e['date'][11:23]),
+            _Item(e['type']),
+            _Item(e.get('methode') or ''),
+            _Item(f"{e['duree_ms']:.1f}", e['duree_ms']),
+            _Item(str(e.get('lignes', '')), e.get('lignes')),
+            self._item_requete(e.get('requete') or ''),
+        ], donnees=True)
+
+    def _cellules(self, r):
+        cellules = []
+        for _, cle, fmt in COLONNES_STATS:
+            valeur = r[cle]
+            texte = f"{valeur / 1000:.2f}" if fmt is None else fmt.format(valeur)
+            cellules.append(_Item(texte, valeur))
+        return cellules
+
+    def _item_requete(self, texte):
+        item = _Item(texte if len(texte) <= 120 else texte[:117] + "...")
+        item.setToolTip(texte)
+        return item
+
+    def _remplir(self, table, lignes, cellules, donnees=False):
+        """Réécrit la table en gardant le tri choisi et la ligne sélectionnée"""
+        ligne_sel = table.currentRow()
+        table.setSortingEnabled(False)
+        table.setRowCount(len(lignes))
+        for row, ligne in enumerate(lignes):
+            for col, item in enumerate(cellules(ligne)):
+                if donnees and col == 0:
+                    item.setData(Qt.UserRole, ligne)
+                table.setItem(row, col, item)
+        table.setSortingEnabled(True)
+        if 0 <= ligne_sel < len(lignes):
+            table.blockSignals(True)
+            table.selectRow(ligne_sel)
+            table.blockSignals(False)
+
+    def _afficher_lente(self):
+        row = self.table_lentes.currentRow()
+        item = self.table_lentes.item(row, 0) if row >= 0 else None
+        entree = item.data(Qt.UserRole) if item else None
+        if not entree:
+            self.txt_detail.clear()
+            return
+        texte = entree.get('requete') or entree.get('methode') or ''
+        if entree.get('erreur'):
+            texte += f"\n\n-- Erreur : {entree['erreur']}"
+        if entree.get('plan'):
+            texte += f"\n\n-- Plan :\n{entree['plan']}"
+        if entree['type'] == 'methode':
+            texte += (f"\n\n{entree['allers_retours']} allers-retours, {entree['lignes']} lignes, "
+                      f"attente pool {entree['attente_pool_ms']} ms")
+        self.txt_detail.setPlainText(texte)
+
+    def _reinitialiser(self):
+        StatistiquesRequetes.instance().reinitialiser()
+        JournalRequetesLentes.instance().recentes.clear()
+        self.rafraichir()
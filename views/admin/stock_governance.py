@@ -8,6 +8,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor, QBrush
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class StockGovernance(QWidget):
@@ -17,6 +18,7 @@ class StockGovernance(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
     
@@ -97,7 +99,9 @@ class StockGovernance(QWidget):
         return table
     
     def rafraichir(self):
-        analysis = Database.get_stock_analysis()
+        self._async.charger('analyse', Database.get_stock_analysis, ok=self._afficher)
+    
+    def _afficher(self, analysis):
         if not analysis: return
         
         # KPI
@@ -6,6 +6,7 @@ L'admin comprend l'état global en <10s
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QGridLayout)
 from PySide6.QtCore import Qt
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class StrategicDashboard(QWidget):
@@ -15,6 +16,7 @@ class StrategicDashboard(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
     
@@ -124,9 +126,10 @@ class StrategicDashboard(QWidget):
         return card
     
     def rafraichir(self):
-        """Récupère les KPIs depuis la DB"""
-        kpis = Database.get_admin_dashboard_kpis()
-        
+        """Récupère les KPIs depuis la DB (en arrière-plan)"""
+        self._async.charger('kpis', Database.get_admin_dashboard_kpis, ok=self._afficher)
+    
+    def _afficher(self, kpis):
         if not kpis:
             return
         
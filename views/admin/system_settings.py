@@ -8,6 +8,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
                                QMessageBox, QInputDialog)
 from PySide6.QtCore import Qt
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class SystemSettings(QWidget):
@@ -17,6 +18,7 @@ class SystemSettings(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
     
@@ -90,7 +92,9 @@ class SystemSettings(QWidget):
         return table
     
     def rafraichir(self):
-        users = Database.get_system_users()
+        self._async.charger('utilisateurs', Database.get_system_users, ok=self._afficher)
+    
+    def _afficher(self, users):
         self.table_users.setRowCount(len(users))
         
         for row, u in enumerate(users):
@@ -0,0 +1,204 @@
+"""
+Exécution asynchrone des appels à la base pour ne jamais bloquer la boucle Qt
+- AsyncDatabase.executer(fn, *args) lance l'appel dans un QThreadPool dédié et renvoie un QueryFuture
+- Le résultat revient dans le thread de l'interface par signal (connexion en file d'attente)
+- ChargeurAsync : une requête en vol par clé et par écran (la précédente est annulée),
+  avec un indicateur de chargement tant qu'une requête est en cours
+"""
+
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QEvent, Signal, Qt
+from PySide6.QtWidgets import QLabel
+
+from db.connection import POOL_CONFIG
+
+
+class QueryFuture(QObject):
+    """
+    Résultat à venir d'un appel asynchrone.
+    fini(future) est émis dans le thread de l'interface, sauf si la requête a été annulée.
+    """
+
+    fini = Signal(object)
+    _resultat_pret = Signal()   # émis par le thread de travail
+
+    def __init__(self, fn, args, kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.resultat = None
+        self.erreur = None
+        self.cle = None
+        self.ok = None          # callbacks renseignés par ChargeurAsync
+        self.echec = None
+        self._annule = threading.Event()
+        self._termine = False
+        self._tache = None
+        self._resultat_pret.connect(self._livrer)
+
+    def annuler(self):
+        """Le résultat sera ignoré ; la tâche est retirée de la file si elle n'a pas démarré"""
+        self._annule.set()
+        if self._tache is not None and AsyncDatabase.pool().tryTake(self._tache):
+            AsyncDatabase._terminer(self)
+
+    def est_annule(self):
+        return self._annule.is_set()
+
+    def est_termine(self):
+        return self._termine
+
+    def _livrer(self):
+        # Thread de l'interface
+        self._termine = True
+        AsyncDatabase._terminer(self)
+        if not self.est_annule():
+            self.fini.emit(self)
+
+
+class _Tache(QRunnable):
+    def __init__(self, future):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.future = future
+
+    def run(self):
+        future = self.future
+        if future.est_annule():
+            future._resultat_pret.emit()
+            return
+        try:
+            future.resultat = future.fn(*future.args, **future.kwargs)
+        except Exception as e:
+            future.erreur = e
+        future._resultat_pret.emit()
+
+
+class AsyncDatabase:
+    """Exécuteur partagé des appels au facade Database (ou toute fonction bloquante)"""
+
+    _pool = None
+    _actifs = set()     # futures en vol (garde les objets Python en vie)
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
+            cls._pool = QThreadPool()
+            # Laisse des connexions libres pour les appels synchrones restants
+            cls._pool.setMaxThreadCount(max(2, POOL_CONFIG['maxconn'] - 2))
+        return cls._pool
+
+    @classmethod
+    def executer(cls, fn, *args, **kwargs):
+        """Lance fn(*args, **kwargs) hors du thread de l'interface"""
+        future = QueryFuture(fn, args, kwargs)
+        future._tache = _Tache(future)
+        cls._actifs.add(future)
+        cls.pool().start(future._tache)
+        return future
+
+    @classmethod
+    def _terminer(cls, future):
+        future._tache = None
+        cls._actifs.discard(future)
+
+
+class IndicateurChargement(QLabel):
+    """Pastille « Chargement… » affichée en haut à droite de l'écran"""
+
+    DELAI_MS = 150   # pas de clignotement pour les requêtes rapides
+
+    def __init__(self, ecran):
+        super().__init__("⏳ Chargement…", ecran)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(30, 30, 30, 200); color: #E0E0E0;
+                border-radius: 10px; padding: 4px 12px; font-size: 9pt; font-weight: bold;
+            }
+        """)
+        self.adjustSize()
+        self.hide()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._afficher)
+        ecran.installEventFilter(self)
+
+    def demarrer(self):
+        if not self.isVisible() and not self._timer.isActive():
+            self._timer.start(self.DELAI_MS)
+
+    def arreter(self):
+        self._timer.stop()
+        self.hide()
+
+    def _afficher(self):
+        self._placer()
+        self.show()
+        self.raise_()
+
+    def _placer(self):
+        ecran = self.parentWidget()
+        self.move(ecran.width() - self.width() - 12, 8)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize and self.isVisible():
+            self._placer()
+        return False
+
+
+class ChargeurAsync(QObject):
+    """
+    Requêtes asynchrones d'un écran.
+    charger(cle, fn, *args, ok=callback) annule la requête précédente de même clé
+    (ex. changer deux fois de période) ; ok(resultat) est appelé dans le thread de l'interface.
+    Détruit avec l'écran : les résultats arrivant après sont ignorés.
+    """
+
+    def __init__(self, ecran):
+        super().__init__(ecran)
+        self._en_cours = {}
+        self._indicateur = IndicateurChargement(ecran)
+
+    def charger(self, cle, fn, *args, ok=None, echec=None, **kwargs):
+        self.annuler(cle)
+        future = AsyncDatabase.executer(fn, *args, **kwargs)
+        future.cle, future.ok, future.echec = cle, ok, echec
+        future.fini.connect(self._sur_fini)
+        self._en_cours[cle] = future
+        self._indicateur.demarrer()
+        return future
+
+    def annuler(self, cle=None):
+        """Annule la requête de la clé donnée (ou toutes)"""
+        cles = list(self._en_cours) if cle is None else [cle]
+        for c in cles:
+            future = self._en_cours.pop(c, None)
+            if future is not None:
+                future.annuler()
+        self._maj_indicateur()
+
+    def en_cours(self, cle=None):
+        return bool(self._en_cours) if cle is None else cle in self._en_cours
+
+    def _sur_fini(self, future):
+        if self._en_cours.get(future.cle) is not future:
+            return  # remplacée entre-temps
+        del self._en_cours[future.cle]
+        self._maj_indicateur()
+        if future.erreur is not None:
+            if future.echec:
+                future.echec(future.erreur)
+            else:
+                print(f"Erreur requête asynchrone {getattr(future.fn, '__name__', future.fn)}: {future.erreur}")
+            return
+        if future.ok:
+            future.ok(future.resultat)
+
+    def _maj_indicateur(self):
+        if self._en_cours:
+            self._indicateur.demarrer()
+        else:
+            self._indicateur.arreter()
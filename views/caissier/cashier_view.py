@@ -2,19 +2,17 @@
 Vue principale du module Caissier
 Architecture avec sidebar et écrans multiples
 L'écran de vente (Nouvelle Vente) est le point central et par défaut
+Historique et statistiques sont construits à la première navigation (PileEcrans)
 """
 
 from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-                               QStackedWidget, QLabel, QFrame)
+                               QLabel, QFrame)
 from PySide6.QtCore import Qt, QSize, QTimer
 from PySide6.QtGui import QFont
 import qtawesome as qta
 from datetime import datetime
 
-# Importer les écrans
-from views.caissier.sale_screen import EcranVente
-from views.caissier.history_screen import EcranHistorique
-from views.caissier.stats_screen import EcranStatistiques
+from views.lazy_screens import PileEcrans
 
 
 class CashierView(QWidget):
@@ -61,8 +59,8 @@ class CashierView(QWidget):
         # Top bar
         self._creer_topbar(layout_droit)
         
-        # Stacked widget pour les écrans
-        self.stacked_widget = QStackedWidget()
+        # Pile des écrans (construits à la première navigation)
+        self.stacked_widget = PileEcrans()
         layout_droit.addWidget(self.stacked_widget)
         
         # Initialiser les écrans
@@ -207,17 +205,17 @@ class CashierView(QWidget):
     def _initialiser_ecrans(self):
         """Initialise et ajoute tous les écrans au stacked widget"""
         # Écran 0: Nouvelle vente (défaut)
-        self.ecran_vente = EcranVente(self.id_utilisateur, self.nom_utilisateur)
-        self.ecran_vente.vente_validee.connect(self._on_vente_validee)
-        self.stacked_widget.addWidget(self.ecran_vente)
+        self.stacked_widget.enregistrer(
+            "views.caissier.sale_screen", "EcranVente", self.id_utilisateur, self.nom_utilisateur,
+            apres=lambda ecran: ecran.vente_validee.connect(self._on_vente_validee))
         
         # Écran 1: Historique
-        self.ecran_historique = EcranHistorique(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_historique)
+        self.stacked_widget.enregistrer("views.caissier.history_screen", "EcranHistorique",
+                                        self.id_utilisateur)
         
         # Écran 2: Statistiques
-        self.ecran_stats = EcranStatistiques(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_stats)
+        self.stacked_widget.enregistrer("views.caissier.stats_screen", "EcranStatistiques",
+                                        self.id_utilisateur)
         
         # Écran 3: Paramètres (placeholder)
         placeholder = QLabel("Paramètres\n(En développement)")
@@ -229,6 +227,7 @@ class CashierView(QWidget):
     
     def changer_ecran(self, index: int):
         """Change l'écran affiché"""
+        deja_construit = self.stacked_widget.est_construit(index)
         self.stacked_widget.setCurrentIndex(index)
         
         # Mettre à jour le titre
@@ -242,11 +241,13 @@ class CashierView(QWidget):
         self.btn_stats.setChecked(index == self.INDEX_STATS)
         self.btn_params.setChecked(index == self.INDEX_PARAMETRES)
         
-        # Rafraîchir les données si nécessaire
+        # Rafraîchir les données si nécessaire (un écran qui vient d'être construit charge déjà les siennes)
+        if not deja_construit:
+            return
         if index == self.INDEX_HISTORIQUE:
-            self.ecran_historique.charger_historique()
+            self.stacked_widget.ecran(index).charger_historique()
         elif index == self.INDEX_STATS:
-            self.ecran_stats.rafraichir()
+            self.stacked_widget.ecran(index).rafraichir()
     
     def afficher_ecran_vente(self):
         """Retourne à l'écran de vente (point de sécurité mentale)"""
@@ -13,6 +13,8 @@ from PySide6.QtGui import QFont
 import qtawesome as qta
 
 from db.database import Database
+from views.async_db import ChargeurAsync
+from utils.receipt_renderer import ReceiptRenderer
 
 
 class EcranHistorique(QWidget):
@@ -26,6 +28,7 @@ class EcranHistorique(QWidget):
         
         self.id_utilisateur = id_utilisateur
         self.filtre_actuel = 'today'  # 'today', 'yesterday', 'month'
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_historique()
@@ -230,12 +233,13 @@ class EcranHistorique(QWidget):
         self.charger_historique()
     
     def charger_historique(self):
-        """Charge l'historique des ventes selon le filtre"""
+        """Charge l'historique des ventes selon le filtre (un changement de filtre annule le précédent)"""
+        self._async.charger('historique', Database.get_cashier_sales_history,
+                            self.id_utilisateur, self.filtre_actuel, ok=self._afficher_historique)
+    
+    def _afficher_historique(self, ventes):
         self.table_historique.setRowCount(0)
         
-        # Récupérer les ventes du caissier
-        ventes = Database.get_cashier_sales_history(self.id_utilisateur, self.filtre_actuel)
-        
         for vente in ventes:
             row = self.table_historique.rowCount()
             self.table_historique.insertRow(row)
@@ -286,8 +290,10 @@ class EcranHistorique(QWidget):
         id_vente = int(self.table_historique.item(row, 0).text())
         
         # Récupérer les détails
-        details = Database.get_sale_details(id_vente)
-        
+        self._async.charger('details', Database.get_sale_details, id_vente,
+                            ok=lambda details: self._afficher_details_vente(id_vente, details))
+    
+    def _afficher_details_vente(self, id_vente, details):
         if not details:
             QMessageBox.warning(self, "Erreur", "Impossible de charger les détails de la vente.")
             return
@@ -330,14 +336,14 @@ class EcranHistorique(QWidget):
         id_vente = int(self.table_historique.item(row, 0).text())
         
         # Récupérer les détails complets (incluant TauxTVA ajouté récemment)
-        details = Database.get_sale_details(id_vente)
+        self._async.charger('details', Database.get_sale_details, id_vente, ok=self._imprimer_recu)
+    
+    def _imprimer_recu(self, details):
         if not details:
             QMessageBox.warning(self, "Erreur", "Impossible de récupérer les détails de la vente.")
             return
             
         try:
-            from utils.receipt_generator import ReceiptGenerator
-            
             # Reconstruction des totaux
             subtotal_ttc = 0.0
             total_remises = 0.0
@@ -388,18 +394,13 @@ class EcranHistorique(QWidget):
                 'articles': articles_formatted
             }
             
-            # Générer
+            # Générer (processus de rendu ou imprimante thermique), PDF ouvert une fois prêt
             mode_paiement = details.get('mode_paiement', 'ESPECES')
-            pdf_path = ReceiptGenerator.generate_receipt(vente_data, totaux, mode_paiement)
-            
-            # Ouvrir
-            import subprocess
-            import sys
-            import os
-            if sys.platform.startswith('linux'):
-                subprocess.Popen(['xdg-open', pdf_path])
-            elif sys.platform == 'win32':
-                os.startfile(pdf_path)
+            rendu = ReceiptRenderer.instance().soumettre(vente_data, totaux, mode_paiement, ouvrir=True)
+            self._async.charger('recu', rendu.result, echec=self._erreur_impression)
                 
         except Exception as e:
-            QMessageBox.critical(self, "Erreur Impression", f"Erreur lors de la génération du reçu:\n{str(e)}")
+            self._erreur_impression(e)
+    
+    def _erreur_impression(self, e):
+        QMessageBox.critical(self, "Erreur Impression", f"Erreur lors de la génération du reçu:\n{str(e)}")
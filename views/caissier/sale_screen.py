@@ -7,12 +7,19 @@ Mode rapide prioritaire avec mode catalogue optionnel
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, 
                                QTableWidget, QTableWidgetItem, QLabel, QPushButton,
                                QHeaderView, QAbstractItemView, QFrame, QMessageBox,
-                               QDialog, QInputDialog, QGridLayout, QScrollArea, QDialogButtonBox)
-from PySide6.QtCore import Qt, Signal, QTimer, QEvent
-from PySide6.QtGui import QFont, QShortcut, QKeySequence
+                               QDialog, QInputDialog, QDialogButtonBox, QListView, QTabBar,
+                               QStyledItemDelegate, QStyle)
+from PySide6.QtCore import (Qt, Signal, QTimer, QEvent, QAbstractListModel, QModelIndex,
+                            QSize, QRect, QPoint)
+from PySide6.QtGui import QFont, QShortcut, QKeySequence, QPixmap, QColor, QPen, QPainter
 import qtawesome as qta
+import os
 
 from db.database import Database
+from db.catalog import ProductCatalog
+from views.async_db import ChargeurAsync
+from views.thumbnails import ThumbnailCache
+from utils.receipt_renderer import ReceiptRenderer
 from views.caissier.cashier_service import (
     PanierService, CalculateurVente, ValidationVente, FormateurDevise
 )
@@ -34,10 +41,20 @@ class EcranVente(QWidget):
         self.nom_utilisateur = nom_utilisateur
         self.panier_service = PanierService()
         self.calculateur = CalculateurVente()
+        self._async = ChargeurAsync(self)
+        self._n_saisie = 0
         
         self.setup_ui()
         self.setup_raccourcis()
         
+        # Préchargement du catalogue sans bloquer l'ouverture de la caisse
+        catalogue = ProductCatalog.instance()
+        if not catalogue.est_charge():
+            self._async.charger('catalogue', catalogue.charger)
+        
+        # Processus de rendu des reçus prêts avant la première vente
+        ReceiptRenderer.instance().prechauffer()
+        
         # Focus immédiat sur la barre de recherche
         QTimer.singleShot(100, lambda: self.barre_recherche.setFocus())
     
@@ -371,16 +388,29 @@ class EcranVente(QWidget):
         if not texte:
             return
         
-        # Rechercher le produit
-        produits = Database.search_products(texte)
+        catalogue = ProductCatalog.instance()
+        if not catalogue.est_charge():
+            # Catalogue pas encore en mémoire : recherche en base sans bloquer la caisse.
+            # Une clé par saisie, pour qu'aucun scan rapide n'en annule un autre.
+            self._n_saisie += 1
+            self.barre_recherche.clear()
+            self._async.charger(('saisie', self._n_saisie), Database.search_products, texte, 20,
+                                ok=lambda produits: self._ajouter_resultat(texte, produits))
+            return
         
+        # Match exact (code ou nom) depuis le catalogue en mémoire, sinon premier résultat
+        produit_cible = catalogue.lookup(texte)
+        self._ajouter_resultat(texte, [produit_cible] if produit_cible else catalogue.search(texte))
+    
+    def _ajouter_resultat(self, texte, produits):
+        """Ajoute au panier la correspondance exacte, sinon le premier résultat"""
         if not produits:
             QMessageBox.warning(self, "Produit introuvable", 
                               f"Aucun produit trouvé pour '{texte}'")
+            self.barre_recherche.setText(texte)
             self.barre_recherche.selectAll()
             return
         
-        # Match exact ou premier résultat
         produit_cible = produits[0]
         for p in produits:
             if p['id_produit'].upper() == texte.upper() or p['nom_produit'].upper() == texte.upper():
@@ -530,6 +560,25 @@ class EcranVente(QWidget):
     
     # ========== VALIDATION VENTE ==========
     
+    def _maj_catalogue(self, articles, succes, stocks):
+        """
+        Stock des produits vendus à jour dans le catalogue en mémoire, sans requête dans le
+        thread de l'interface : stock validé renvoyé par la vente, sinon relecture des
+        produits du panier en arrière-plan (stock modifié entre-temps, ex. stock insuffisant)
+        """
+        catalogue = ProductCatalog.instance()
+        if not catalogue.est_charge():
+            return      # chargement en cours, déjà à jour
+        if not succes:
+            self._async.charger('catalogue_panier', catalogue.rafraichir_produits, list(articles))
+            return
+        for id_produit, stock in stocks.items():
+            produit = catalogue.get(id_produit)
+            if produit is not None:
+                produit = dict(produit)
+                produit['quantite_stock'] = stock
+                catalogue.mettre_a_jour(produit)
+    
     def annuler_vente(self):
         """Annule la vente en cours et vide le panier"""
         if self.panier_service.est_vide():
@@ -583,12 +632,14 @@ class EcranVente(QWidget):
             })
         
         # Enregistrer la vente avec le mode de paiement choisi
-        succes, resultat = Database.process_sale(cart_items, self.id_utilisateur, mode_paiement)
+        stocks = {}
+        succes, resultat = Database.process_sale(cart_items, self.id_utilisateur, mode_paiement, stocks)
+        
+        self._maj_catalogue(articles, succes, stocks)
         
         if succes:
-            # === GÉNÉRATION REÇU ===
+            # === GÉNÉRATION REÇU (en tâche de fond) ===
             try:
-                from utils.receipt_generator import ReceiptGenerator
                 from datetime import datetime
                 
                 vente_data = {
@@ -611,16 +662,9 @@ class EcranVente(QWidget):
                     ]
                 }
                 
-                # Générer PDF avec le mode choisi
-                pdf_path = ReceiptGenerator.generate_receipt(vente_data, totaux, mode_paiement)
-                
-                # Ouvrir le PDF automatiquement (viewer système par défaut)
-                import subprocess
-                import sys
-                if sys.platform.startswith('linux'):
-                    subprocess.Popen(['xdg-open', pdf_path])
-                elif sys.platform == 'win32':
-                    os.startfile(pdf_path)
+                # PDF généré par un processus de rendu puis ouvert (viewer système par défaut) ;
+                # la caisse n'attend pas
+                ReceiptRenderer.instance().soumettre(vente_data, totaux, mode_paiement, ouvrir=True)
                 
             except Exception as e:
                 print(f"Erreur génération reçu: {e}")
@@ -637,138 +681,316 @@ class EcranVente(QWidget):
                                f"Échec de l'enregistrement de la vente:\n{resultat}")
 
 
+# === MODE CATALOGUE ===
+class CatalogueModel(QAbstractListModel):
+    """
+    Produits du catalogue en mémoire (ProductCatalog), un élément par produit.
+    Les lignes visibles sont une liste d'indices : filtrer ne recopie aucun produit,
+    et un texte qui prolonge le précédent ne reparcourt que les lignes déjà visibles.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.produits = []
+        self.textes = []        # "NOM DESCRIPTION" en majuscules, comme ProductCatalog.search
+        self.categories = []
+        self._visibles = []
+        self._filtre = ("", None)
+
+    def charger(self, produits):
+        """Remplace le contenu (produits triés par nom) et réapplique le filtre courant"""
+        self.beginResetModel()
+        self.produits = produits
+        self.textes = [f"{p['nom_produit']} {p.get('description') or ''}".upper() for p in produits]
+        self.categories = [p.get('nom_categorie') for p in produits]
+        texte, categorie = self._filtre
+        self._visibles = self._filtrer(range(len(produits)), texte.upper(), categorie)
+        self.endResetModel()
+
+    def liste_categories(self):
+        return sorted({c for c in self.categories if c})
+
+    def filtrer(self, texte, categorie=None):
+        """Texte contenu dans le nom ou la description, et/ou catégorie (None = toutes)"""
+        texte = texte.strip()
+        ancien_texte, ancienne_categorie = self._filtre
+        if (texte, categorie) == self._filtre:
+            return
+        # Filtre plus restrictif que le précédent : seules les lignes visibles peuvent rester
+        if categorie == ancienne_categorie and ancien_texte.upper() in texte.upper():
+            candidats = self._visibles
+        else:
+            candidats = range(len(self.produits))
+        self._filtre = (texte, categorie)
+        self.beginResetModel()
+        self._visibles = self._filtrer(candidats, texte.upper(), categorie)
+        self.endResetModel()
+
+    def _filtrer(self, candidats, cle, categorie):
+        textes, categories = self.textes, self.categories
+        if categorie is None:
+            return [i for i in candidats if cle in textes[i]] if cle else list(candidats)
+        return [i for i in candidats if categories[i] == categorie and cle in textes[i]]
+
+    def produit(self, index):
+        return self.produits[self._visibles[index.row()]] if index.isValid() else None
+
+    # ---------- Interface QAbstractListModel ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visibles)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.UserRole:
+            return self.produits[self._visibles[index.row()]]
+        if role == Qt.DisplayRole:
+            return self.produits[self._visibles[index.row()]]['nom_produit']
+        return None
+
+    def flags(self, index):
+        # Produit en rupture : visible mais non sélectionnable
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self.produits[self._visibles[index.row()]].get('quantite_stock', 0) <= 0:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class CarteProduitDelegate(QStyledItemDelegate):
+    """
+    Dessine une carte produit (image, nom, prix, stock) directement sur la vue :
+    aucun widget par produit, polices, couleurs et image par défaut partagées.
+    Les images produits viennent de ThumbnailCache ; l'image par défaut est dessinée
+    tant que la miniature n'est pas prête.
+    """
+
+    TAILLE = QSize(230, 200)
+    TAILLE_IMAGE = QSize(150, 100)
+    MARGE = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        default_img_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..", "..", "assets", "default.png"
+        )
+        pixmap = QPixmap(default_img_path)
+        self._image = None if pixmap.isNull() else pixmap.scaled(
+            self.TAILLE_IMAGE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self._miniatures = ThumbnailCache.instance()
+
+        self._police_nom = QFont()
+        self._police_nom.setPointSize(10)
+        self._police_nom.setBold(True)
+        self._police_prix = QFont()
+        self._police_prix.setPointSize(12)
+        self._police_prix.setBold(True)
+        self._police_stock = QFont()
+        self._police_stock.setPointSize(9)
+        self._police_stock.setBold(True)
+        self._police_icone = QFont()
+        self._police_icone.setPointSize(40)
+
+        self._fond = QColor("white")
+        self._fond_survol = QColor("#F0F0F0")
+        self._fond_rupture = QColor("#F5F5F5")
+        self._bordure = QPen(QColor("#E0E0E0"), 2)
+        self._bordure_survol = QPen(QColor("#00C853"), 2)
+        self._nom = QColor("#2A2A40")
+        self._prix = QColor("#00C853")
+        self._stock = QColor("#757575")
+        self._stock_bas = QColor("#FF3D00")
+        self._grise = QColor("#9E9E9E")
+
+    def sizeHint(self, option, index):
+        return self.TAILLE
+
+    def paint(self, painter, option, index):
+        produit = index.data(Qt.UserRole)
+        if produit is None:
+            return
+        stock = produit.get('quantite_stock', 0)
+        rupture = stock <= 0
+        survol = not rupture and bool(option.state & (QStyle.State_MouseOver | QStyle.State_Selected))
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        carte = option.rect.adjusted(self.MARGE, self.MARGE, -self.MARGE, -self.MARGE)
+        painter.setPen(self._bordure_survol if survol else self._bordure)
+        painter.setBrush(self._fond_rupture if rupture else (self._fond_survol if survol else self._fond))
+        painter.drawRoundedRect(carte, 10, 10)
+
+        interieur = carte.adjusted(10, 10, -10, -10)
+        zone_image = QRect(interieur.left(), interieur.top(), interieur.width(), self.TAILLE_IMAGE.height())
+        image = self._miniatures.obtenir(produit.get('image_path'), self.TAILLE_IMAGE) or self._image
+        if image is not None:
+            if rupture:
+                painter.setOpacity(0.5)
+            painter.drawPixmap(zone_image.center().x() - image.width() // 2,
+                               zone_image.center().y() - image.height() // 2, image)
+            painter.setOpacity(1.0)
+        else:
+            painter.setFont(self._police_icone)
+            painter.drawText(zone_image, Qt.AlignCenter, "📦")
+
+        y = zone_image.bottom() + 5
+        painter.setFont(self._police_nom)
+        painter.setPen(self._grise if rupture else self._nom)
+        nom = painter.fontMetrics().elidedText(produit['nom_produit'], Qt.ElideRight, interieur.width())
+        hauteur = painter.fontMetrics().height()
+        painter.drawText(QRect(interieur.left(), y, interieur.width(), hauteur), Qt.AlignCenter, nom)
+        y += hauteur + 3
+
+        painter.setFont(self._police_prix)
+        painter.setPen(self._grise if rupture else self._prix)
+        hauteur = painter.fontMetrics().height()
+        painter.drawText(QRect(interieur.left(), y, interieur.width(), hauteur), Qt.AlignCenter,
+                         f"{produit['prix_unitaire']:,.0f} FCFA")
+        y += hauteur + 3
+
+        painter.setFont(self._police_stock)
+        painter.setPen(self._stock_bas if stock <= 5 else self._stock)
+        painter.drawText(QRect(interieur.left(), y, interieur.width(), painter.fontMetrics().height()),
+                         Qt.AlignCenter, f"Stock: {'RUPTURE' if rupture else stock}")
+        painter.restore()
+
+
 class DialogueCatalogue(QDialog):
-    """Dialogue du mode catalogue (grille de produits)"""
+    """
+    Dialogue du mode catalogue (grille de produits)
+    Vue liste en mode icônes sur le catalogue en mémoire : seules les cartes
+    visibles sont dessinées, quel que soit le nombre de produits.
+    Onglets par catégorie et filtre à la frappe.
+    Miniatures de la page visible et de la suivante préchargées après chaque défilement.
+    """
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Catalogue Produits")
         self.resize(800, 600)
         self.produit_selectionne = None
+        self._async = ChargeurAsync(self)
+        
+        # Préchargement des miniatures après une courte pause de défilement
+        self._timer_miniatures = QTimer(self)
+        self._timer_miniatures.setSingleShot(True)
+        self._timer_miniatures.setInterval(50)
+        self._timer_miniatures.timeout.connect(self._prechauffer_miniatures)
         
         self.setup_ui()
         self.charger_produits()
+        
+        ThumbnailCache.instance().prete.connect(self.vue.viewport().update)
     
     def setup_ui(self):
         """Construction de l'interface"""
         layout = QVBoxLayout(self)
         
-        # Zone scrollable
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        
-        # Container pour la grille
-        container = QWidget()
-        self.grid_layout = QGridLayout(container)
-        self.grid_layout.setSpacing(10)
-        
-        scroll.setWidget(container)
-        layout.addWidget(scroll)
+        # Recherche
+        self.input_filtre = QLineEdit()
+        self.input_filtre.setPlaceholderText("🔍 Filtrer (nom, description)... Entrée pour ajouter")
+        self.input_filtre.setFixedHeight(35)
+        self.input_filtre.textChanged.connect(self.appliquer_filtre)
+        self.input_filtre.returnPressed.connect(self._valider_premier)
+        layout.addWidget(self.input_filtre)
+        
+        # Onglets catégories ("Toutes" + une par catégorie)
+        self.onglets = QTabBar()
+        self.onglets.setExpanding(False)
+        self.onglets.setUsesScrollButtons(True)
+        self.onglets.addTab("Toutes")
+        self.onglets.currentChanged.connect(self.appliquer_filtre)
+        layout.addWidget(self.onglets)
+        
+        # Grille virtualisée
+        self.modele = CatalogueModel(self)
+        self.vue = QListView()
+        self.vue.setViewMode(QListView.IconMode)
+        self.vue.setResizeMode(QListView.Adjust)
+        self.vue.setMovement(QListView.Static)
+        self.vue.setUniformItemSizes(True)
+        self.vue.setLayoutMode(QListView.Batched)
+        self.vue.setBatchSize(200)
+        self.vue.setSpacing(5)
+        self.vue.setMouseTracking(True)
+        self.vue.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.vue.setItemDelegate(CarteProduitDelegate(self.vue))
+        self.vue.setModel(self.modele)
+        self.vue.clicked.connect(self._selectionner_index)
+        self.vue.activated.connect(self._selectionner_index)
+        self.vue.verticalScrollBar().valueChanged.connect(self._timer_miniatures.start)
+        self.modele.modelReset.connect(self._timer_miniatures.start)
+        layout.addWidget(self.vue)
         
         # Boutons
         buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
+        
+        self.input_filtre.setFocus()
     
     def charger_produits(self):
-        """Charge les produits dans la grille avec images et stock"""
-        import os
-        from PySide6.QtCore import Qt
-        produits = Database.get_all_products()
-        
-        col = 0
-        row = 0
-        max_cols = 3  # 3 colonnes au lieu de 4 pour plus d'espace
-        
-        # Chemin vers image par défaut
-        default_img_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "..", "..", "assets", "default.png"
-        )
-        
-        for produit in produits[:30]:  # Augmenter à 30 produits
-            # Container pour chaque produit (carte)
-            product_card = QFrame()
-            product_card.setFrameShape(QFrame.Box)
-            product_card.setFixedSize(230, 200)
-            product_card.setStyleSheet("""
-                QFrame {
-                    background-color: white;
-                    border: 2px solid #E0E0E0;
-                    border-radius: 10px;
-                }
-                QFrame:hover {
-                    border-color: #00C853;
-                    background-color: #F0F0F0;
-                }
-            """)
-            
-            card_layout = QVBoxLayout(product_card)
-            card_layout.setContentsMargins(10, 10, 10, 10)
-            card_layout.setSpacing(5)
-            
-            # Image produit
-            from PySide6.QtGui import QPixmap
-            lbl_image = QLabel()
-            pixmap = QPixmap(default_img_path)
-            if pixmap.isNull():
-                # Si l'image ne charge pas, créer un placeholder
-                lbl_image.setText("📦")
-                lbl_image.setAlignment(Qt.AlignCenter)
-                lbl_image.setStyleSheet("font-size: 48pt;")
-            else:
-                lbl_image.setPixmap(pixmap.scaled(150, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                lbl_image.setAlignment(Qt.AlignCenter)
-            lbl_image.setFixedHeight(100)
-            card_layout.addWidget(lbl_image)
-            
-            # Nom produit
-            lbl_nom = QLabel(produit['nom_produit'][:25])  # Limiter longueur
-            lbl_nom.setStyleSheet("font-size: 10pt; font-weight: bold; color: #2A2A40;")
-            lbl_nom.setAlignment(Qt.AlignCenter)
-            lbl_nom.setWordWrap(True)
-            card_layout.addWidget(lbl_nom)
-            
-            # Prix
-            lbl_prix = QLabel(f"{produit['prix_unitaire']:,.0f} FCFA")
-            lbl_prix.setStyleSheet("font-size: 12pt; font-weight: bold; color: #00C853;")
-            lbl_prix.setAlignment(Qt.AlignCenter)
-            card_layout.addWidget(lbl_prix)
-            
-            # Stock restant
-            stock = produit.get('quantite_stock', 0)
-            is_hs = stock <= 0
-            
-            stock_color = "#FF3D00" if stock <= 5 else "#757575"
-            lbl_stock = QLabel(f"Stock: {'RUPTURE' if is_hs else stock}")
-            lbl_stock.setStyleSheet(f"font-size: 9pt; font-weight: bold; color: {stock_color};")
-            lbl_stock.setAlignment(Qt.AlignCenter)
-            card_layout.addWidget(lbl_stock)
-            
-            # Rendre la carte cliquable uniquement si stock > 0
-            if not is_hs:
-                product_card.mousePressEvent = lambda event, p=produit: self.selectionner_produit(p)
-                product_card.setCursor(Qt.PointingHandCursor)
-            else:
-                # Style "désactivé"
-                product_card.setStyleSheet("""
-                    QFrame {
-                        background-color: #F5F5F5;
-                        border: 2px solid #E0E0E0;
-                        border-radius: 10px;
-                        opacity: 0.6;
-                    }
-                """)
-                lbl_image.setStyleSheet("opacity: 0.5;")
-                lbl_nom.setStyleSheet("color: #9E9E9E;")
-                lbl_prix.setStyleSheet("color: #9E9E9E;")
-            
-            self.grid_layout.addWidget(product_card, row, col)
-            
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
+        """Affiche le catalogue en mémoire (chargé en arrière-plan s'il ne l'est pas encore)"""
+        catalogue = ProductCatalog.instance()
+        if catalogue.est_charge():
+            self._afficher_produits(catalogue.tous())
+        else:
+            self._async.charger('produits', catalogue.tous, ok=self._afficher_produits)
+    
+    def _afficher_produits(self, produits):
+        self.modele.charger(produits)
+        self.onglets.blockSignals(True)
+        while self.onglets.count() > 1:
+            self.onglets.removeTab(1)
+        for categorie in self.modele.liste_categories():
+            self.onglets.addTab(categorie)
+        self.onglets.blockSignals(False)
+    
+    def appliquer_filtre(self, *_):
+        onglet = self.onglets.currentIndex()
+        categorie = self.onglets.tabText(onglet) if onglet > 0 else None
+        self.modele.filtrer(self.input_filtre.text(), categorie)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._timer_miniatures.start()
+    
+    def _prechauffer_miniatures(self):
+        """Miniatures de la page visible puis de la suivante, avant celles des pages quittées"""
+        rect = self.vue.viewport().rect()
+        pas_x = CarteProduitDelegate.TAILLE.width() // 2
+        pas_y = CarteProduitDelegate.TAILLE.height() // 2
+        rows = {self.vue.indexAt(QPoint(x, y)).row()
+                for x in range(rect.left() + 10, rect.right(), pas_x)
+                for y in range(rect.top() + 10, rect.bottom(), pas_y)}
+        rows.discard(-1)
+        if not rows:
+            return
+        premier, dernier = min(rows), max(rows)
+        fin = min(self.modele.rowCount(), dernier + 1 + (dernier - premier + 1))
+        chemins = [self.modele.produit(self.modele.index(r)).get('image_path') for r in range(premier, fin)]
+        miniatures = ThumbnailCache.instance()
+        miniatures.annuler_attente()
+        miniatures.prechauffer([c for c in chemins if c], CarteProduitDelegate.TAILLE_IMAGE)
+    
+    def _valider_premier(self):
+        """Entrée dans le filtre : produit courant, sinon premier produit disponible"""
+        index = self.vue.currentIndex()
+        if index.isValid() and self.modele.flags(index) & Qt.ItemIsEnabled:
+            self._selectionner_index(index)
+            return
+        for row in range(self.modele.rowCount()):
+            index = self.modele.index(row)
+            if self.modele.flags(index) & Qt.ItemIsEnabled:
+                self._selectionner_index(index)
+                return
+    
+    def _selectionner_index(self, index):
+        produit = self.modele.produit(index)
+        if produit and produit.get('quantite_stock', 0) > 0:
+            self.selectionner_produit(produit)
     
     def selectionner_produit(self, produit):
         """Sélectionne un produit et ferme le dialogue"""
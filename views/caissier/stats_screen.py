@@ -12,6 +12,7 @@ from PySide6.QtGui import QFont
 import qtawesome as qta
 
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class EcranStatistiques(QWidget):
@@ -25,6 +26,7 @@ class EcranStatistiques(QWidget):
         
         self.id_utilisateur = id_utilisateur
         self.filtre_actuel = 'today'  # 'today', 'week', 'month'
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_statistiques()
@@ -215,20 +217,24 @@ class EcranStatistiques(QWidget):
         self.charger_statistiques()
 
     def charger_statistiques(self):
-        """Charge et affiche les statistiques du caissier"""
-        stats = Database.get_cashier_stats(self.id_utilisateur, self.filtre_actuel)
+        """Charge et affiche les statistiques du caissier (KPIs et graphique en parallèle)"""
+        self._async.charger('stats', Database.get_cashier_stats,
+                            self.id_utilisateur, self.filtre_actuel, ok=self._afficher_statistiques)
         
+        # Affichage conditionnel du graphique horaire
+        if self.filtre_actuel == 'today':
+            self.container_graphique.show()
+            self.charger_graphique_horaire()
+        else:
+            self._async.annuler('horaire')
+            self.container_graphique.hide()
+    
+    def _afficher_statistiques(self, stats):
         if not stats:
             # En cas d'erreur ou vide, on met à 0
             self.carte_total.lbl_valeur.setText(f"0 FCFA")
             self.carte_tickets.lbl_valeur.setText("0")
             self.carte_panier_moyen.lbl_valeur.setText(f"0 FCFA")
-            # Cacher le graph si ce n'est pas "Aujourd'hui"
-            if self.filtre_actuel != 'today':
-                self.container_graphique.hide()
-            else:
-                self.container_graphique.show()
-                self.charger_graphique_horaire()
             return
         
         # Mettre à jour les KPIs
@@ -239,16 +245,13 @@ class EcranStatistiques(QWidget):
         self.carte_total.lbl_valeur.setText(f"{total_encaisse:,.0f} FCFA")
         self.carte_tickets.lbl_valeur.setText(str(nb_tickets))
         self.carte_panier_moyen.lbl_valeur.setText(f"{panier_moyen:,.0f} FCFA")
-
-        # Affichage conditionnel du graphique horaire
-        if self.filtre_actuel == 'today':
-            self.container_graphique.show()
-            self.charger_graphique_horaire()
-        else:
-            self.container_graphique.hide()
     
     def charger_graphique_horaire(self):
         """Récupère et affiche les données horaires"""
+        self._async.charger('horaire', Database.get_cashier_hourly_stats,
+                            self.id_utilisateur, ok=self._afficher_graphique_horaire)
+    
+    def _afficher_graphique_horaire(self, data):
         # Nettoyer les barres existantes
         while self.layout_barres.count():
             item = self.layout_barres.takeAt(0)
@@ -259,8 +262,6 @@ class EcranStatistiques(QWidget):
             item = self.layout_heures.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
-                
-        data = Database.get_cashier_hourly_stats(self.id_utilisateur)
         
         if not data:
             lbl_empty = QLabel("Aucune activité enregistrée pour le moment.")
@@ -5,6 +5,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
 from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
 from PySide6.QtGui import QFont
 from db.database import Database
+from views.async_db import ChargeurAsync
 import qtawesome as qta
 
 # === MODEL ===
@@ -105,6 +106,7 @@ class OrderWizard(QDialog):
 class PurchaseView(QWidget):
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         layout = QVBoxLayout(self)
         
         # Header
@@ -133,7 +135,9 @@ class PurchaseView(QWidget):
         self.refresh_data()
 
     def refresh_data(self):
-        data = Database.get_replenishment_needs()
+        self._async.charger('besoins', Database.get_replenishment_needs, ok=self._show_data)
+
+    def _show_data(self, data):
         self.model = RestockingTableModel(data)
         self.table.setModel(self.model)
 
@@ -12,6 +12,7 @@ from PySide6.QtGui import QFont, QColor
 from datetime import datetime
 
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class AlertsScreen(QWidget):
@@ -23,6 +24,7 @@ class AlertsScreen(QWidget):
     def __init__(self, id_utilisateur: int):
         super().__init__()
         self.id_utilisateur = id_utilisateur
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.charger_alertes()
     
@@ -88,7 +90,9 @@ class AlertsScreen(QWidget):
 
     def charger_alertes(self):
         # Utilise l'ancienne méthode basée sur les seuils actuels
-        alertes = Database.get_stock_alerts()
+        self._async.charger('alertes', Database.get_stock_alerts, ok=self._afficher_alertes)
+
+    def _afficher_alertes(self, alertes):
         ruptures = [a for a in alertes if a.get('stockactuel', 0) == 0]
         critiques = [a for a in alertes if a.get('stockactuel', 0) > 0]
         
@@ -2,19 +2,145 @@
 Écran Mouvements de Stock
 Formulaire de saisie + Historique
 Règle: JAMAIS de modification directe du stock
+Historique : journal paginé côté serveur (filtres + page suivante au défilement)
 """
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                               QTableWidgetItem, QLabel, QComboBox, QSpinBox,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                               QLabel, QComboBox, QSpinBox,
                                QTextEdit, QPushButton, QHeaderView, QAbstractItemView,
                                QFrame, QMessageBox, QGroupBox, QDialog,
                                QScrollArea, QDialogButtonBox, QGridLayout)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QColor, QPixmap
-from datetime import datetime
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QFont, QColor, QBrush, QPixmap
+from datetime import date, timedelta
 import os
 
 from db.database import Database
+from views.async_db import ChargeurAsync
+
+
+TAILLE_PAGE_JOURNAL = 100
+
+# Type -> (libellé, fond de ligne, couleur du type)
+STYLES_TYPE = {
+    'ENTREE': ("📥 ENTREE", QColor(35, 134, 54, 40), "#3FB950"),     # Vert GitHub
+    'SORTIE': ("📤 SORTIE", QColor(248, 81, 73, 40), "#F85149"),     # Rouge GitHub
+    'AJUSTEMENT': ("🔧 AJUSTEMENT", QColor(187, 128, 9, 40), "#D29922"),  # Jaune/Orange
+}
+
+
+class JournalMouvementsModel(QAbstractTableModel):
+    """
+    Journal des mouvements chargé page par page.
+    La vue appelle fetchMore() quand on arrive en bas : le modèle émet page_demandee
+    avec le curseur de la dernière ligne, l'écran charge la page et appelle ajouter_page().
+    """
+
+    HEADERS = ["DATE", "PRODUIT", "TYPE", "QUANTITÉ", "PAR", "MOTIF"]
+    page_demandee = Signal(object)  # curseur (datemouvement, id_mouvement) ou None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lignes = []
+        self._fin = False
+        self._en_attente = False
+
+        self._police_grasse = QFont()
+        self._police_grasse.setBold(True)
+        self._pinceau_texte = QBrush(QColor("#E6EDF3"))  # Gris clair GitHub
+        self._styles = {
+            t: (libelle, QBrush(fond), QBrush(QColor(couleur)))
+            for t, (libelle, fond, couleur) in STYLES_TYPE.items()
+        }
+
+    def reinitialiser(self):
+        """Vide le journal (nouveaux filtres) ; la première page est à redemander"""
+        self.beginResetModel()
+        self._lignes = []
+        self._fin = False
+        self._en_attente = False
+        self.endResetModel()
+
+    def curseur(self):
+        if not self._lignes:
+            return None
+        derniere = self._lignes[-1]
+        return (derniere['datemouvement'], derniere['id_mouvement'])
+
+    def ajouter_page(self, lignes):
+        if lignes is None:
+            # Erreur de base : ce n'est pas la fin du journal, la page sera redemandée
+            self.page_en_echec()
+            return
+        self._en_attente = False
+        self._fin = len(lignes) < TAILLE_PAGE_JOURNAL
+        if not lignes:
+            return
+        debut = len(self._lignes)
+        self.beginInsertRows(QModelIndex(), debut, debut + len(lignes) - 1)
+        self._lignes.extend(lignes)
+        self.endInsertRows()
+
+    def page_en_echec(self):
+        self._en_attente = False
+
+    def ligne(self, row):
+        return self._lignes[row]
+
+    # ---------- Chargement à la demande ----------
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._fin and not self._en_attente
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._en_attente = True
+        self.page_demandee.emit(self.curseur())
+
+    # ---------- Interface QAbstractTableModel ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lignes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        mvt = self._lignes[index.row()]
+        col = index.column()
+        type_mvt = mvt.get('type', '')
+        libelle, fond, couleur_type = self._styles.get(type_mvt, self._styles['AJUSTEMENT'])
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                dt = mvt.get('datemouvement')
+                return dt.strftime("%d/%m/%Y %H:%M") if dt else ''
+            if col == 1:
+                return mvt.get('nom_produit', '')
+            if col == 2:
+                return libelle
+            if col == 3:
+                return str(mvt.get('quantite', 0))
+            if col == 4:
+                return mvt.get('nom_utilisateur') or 'N/A'
+            return mvt.get('commentaire') or '-'
+        if role == Qt.BackgroundRole:
+            return fond
+        if role == Qt.ForegroundRole:
+            return couleur_type if col == 2 else self._pinceau_texte
+        if role == Qt.FontRole and col in (1, 2, 3):
+            return self._police_grasse
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter) if col == 3 else int(Qt.AlignLeft | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
 
 
 class MovementsScreen(QWidget):
@@ -28,6 +154,7 @@ class MovementsScreen(QWidget):
         
         self.id_utilisateur = id_utilisateur
         self.nom_utilisateur = nom_utilisateur
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_donnees()
@@ -246,6 +373,42 @@ class MovementsScreen(QWidget):
         
         header_layout.addStretch()
         
+        # Filtres (appliqués côté serveur)
+        style_filtre = """
+            QComboBox {
+                padding: 6px 10px;
+                background-color: #0D1117;
+                border: 1px solid #30363D;
+                border-radius: 6px;
+                font-size: 10pt;
+                color: #E6EDF3;
+            }
+            QComboBox:hover { border-color: #58A6FF; }
+        """
+        self.filtre_produit = QComboBox()
+        self.filtre_produit.addItem("Tous les produits", None)
+        self.filtre_produit.setMinimumWidth(200)
+        self.filtre_produit.setStyleSheet(style_filtre)
+        header_layout.addWidget(self.filtre_produit)
+        
+        self.filtre_type = QComboBox()
+        self.filtre_type.addItem("Tous les types", None)
+        for type_mvt, (libelle, _, _) in STYLES_TYPE.items():
+            self.filtre_type.addItem(libelle, type_mvt)
+        self.filtre_type.setStyleSheet(style_filtre)
+        header_layout.addWidget(self.filtre_type)
+        
+        self.filtre_periode = QComboBox()
+        for libelle, jours in [("Tout l'historique", None), ("Aujourd'hui", 0),
+                               ("7 derniers jours", 7), ("30 derniers jours", 30),
+                               ("90 derniers jours", 90)]:
+            self.filtre_periode.addItem(libelle, jours)
+        self.filtre_periode.setStyleSheet(style_filtre)
+        header_layout.addWidget(self.filtre_periode)
+        
+        for combo in (self.filtre_produit, self.filtre_type, self.filtre_periode):
+            combo.currentIndexChanged.connect(self.charger_historique)
+        
         # Bouton Voir Détails
         self.btn_details = QPushButton("🔍 Détails")
         self.btn_details.setCursor(Qt.PointingHandCursor)
@@ -265,12 +428,11 @@ class MovementsScreen(QWidget):
         
         parent_layout.addWidget(header_frame)
         
-        # Table
-        self.table_historique = QTableWidget()
-        self.table_historique.setColumnCount(6)
-        self.table_historique.setHorizontalHeaderLabels([
-            "DATE", "PRODUIT", "TYPE", "QUANTITÉ", "PAR", "MOTIF"
-        ])
+        # Table (les pages suivantes sont chargées en arrivant en bas)
+        self.modele_journal = JournalMouvementsModel(self)
+        self.modele_journal.page_demandee.connect(self._charger_page)
+        self.table_historique = QTableView()
+        self.table_historique.setModel(self.modele_journal)
         
         # Configuration
         header = self.table_historique.horizontalHeader()
@@ -281,16 +443,20 @@ class MovementsScreen(QWidget):
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.Stretch)
         
+        header.setResizeContentsPrecision(0)  # mesure limitée aux lignes visibles
+        
         self.table_historique.verticalHeader().setVisible(False)
+        self.table_historique.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table_historique.verticalHeader().setDefaultSectionSize(50) 
         self.table_historique.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table_historique.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table_historique.setEditTriggers(QAbstractItemView.NoEditTriggers)
         
         self.table_historique.setMinimumHeight(400) # Assurer une hauteur min
+        self.table_historique.setMaximumHeight(700) # Défilement dans la table (pagination)
         
         self.table_historique.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #161B22;
                 gridline-color: #30363D;
                 border: 1px solid #30363D;
@@ -308,8 +474,8 @@ class MovementsScreen(QWidget):
                 border-bottom: 1px solid #30363D;
                 text-transform: uppercase;
             }
-            QTableWidget::item { padding: 10px; }
-            QTableWidget::item:selected {
+            QTableView::item { padding: 10px; }
+            QTableView::item:selected {
                 background-color: rgba(31, 111, 235, 0.2);
                 color: #58A6FF;
             }
@@ -320,86 +486,57 @@ class MovementsScreen(QWidget):
     # ========== LOGIQUE ==========
     
     def charger_donnees(self):
-        """Charge les produits et l'historique"""
+        """Charge les produits et l'historique (en parallèle, hors du thread de l'interface)"""
         # Charger produits
-        produits = Database.get_all_products()
+        self._async.charger('produits', Database.get_all_products, ok=self._afficher_produits)
+        
+        # Charger historique
+        self.charger_historique()
+    
+    def _afficher_produits(self, produits):
+        selection = self.combo_produit.currentData()
         self.combo_produit.clear()
         for produit in produits:
             self.combo_produit.addItem(
                 f"{produit['nom_produit']} (Stock: {produit['quantite_stock']})",
                 produit['id_produit']
             )
-        
-        # Charger historique
-        self.charger_historique()
+        index = self.combo_produit.findData(selection)
+        if index >= 0:
+            self.combo_produit.setCurrentIndex(index)
+        
+        # Filtre produit de l'historique (sans relancer le chargement)
+        selection = self.filtre_produit.currentData()
+        self.filtre_produit.blockSignals(True)
+        self.filtre_produit.clear()
+        self.filtre_produit.addItem("Tous les produits", None)
+        for produit in produits:
+            self.filtre_produit.addItem(produit['nom_produit'], produit['id_produit'])
+        self.filtre_produit.setCurrentIndex(max(0, self.filtre_produit.findData(selection)))
+        self.filtre_produit.blockSignals(False)
+    
+    def _filtres_historique(self):
+        jours = self.filtre_periode.currentData()
+        return {
+            'product_id': self.filtre_produit.currentData(),
+            'type': self.filtre_type.currentData(),
+            'date_from': date.today() - timedelta(days=jours) if jours is not None else None,
+        }
     
     def charger_historique(self):
-        """Charge l'historique des mouvements"""
-        mouvements = Database.get_stock_movements()
-        
-        self.table_historique.setRowCount(0)
-        
-        for mvt in mouvements:
-            row = self.table_historique.rowCount()
-            self.table_historique.insertRow(row)
-            
-            # Déterminer style selon type
-            type_mvt = mvt.get('type', '')
-            bg_color = QColor("transparent")
-            text_color = QColor("#E6EDF3") # Gris clair GitHub
-            
-            if type_mvt == 'ENTREE':
-                type_text = "📥 ENTREE"
-                bg_color = QColor(35, 134, 54, 40) # Vert GitHub transparent
-                type_color = QColor("#3FB950") # Vert clair
-            elif type_mvt == 'SORTIE':
-                type_text = "📤 SORTIE"
-                bg_color = QColor(248, 81, 73, 40) # Rouge GitHub transparent
-                type_color = QColor("#F85149") # Rouge clair
-            else:
-                type_text = f"🔧 {type_mvt}"
-                bg_color = QColor(187, 128, 9, 40) # Jaune/Orange transparent
-                type_color = QColor("#D29922") # Jaune clair
-            
-            # Helper pour créer items colorés
-            def create_item(text, color=text_color, bold=False):
-                item = QTableWidgetItem(str(text))
-                item.setBackground(bg_color)
-                item.setForeground(color)
-                if bold:
-                    font = QFont()
-                    font.setBold(True)
-                    item.setFont(font)
-                item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                return item
-
-            # Date
-            date_str = mvt.get('datemouvement', '')
-            if date_str:
-                try:
-                    dt = datetime.fromisoformat(str(date_str))
-                    date_str = dt.strftime("%d/%m/%Y %H:%M")
-                except:
-                    pass
-            self.table_historique.setItem(row, 0, create_item(date_str))
-            
-            # Produit
-            self.table_historique.setItem(row, 1, create_item(mvt.get('nom_produit', ''), bold=True))
-            
-            # Type
-            self.table_historique.setItem(row, 2, create_item(type_text, type_color, bold=True))
-            
-            # Quantité
-            qte = mvt.get('quantite', 0)
-            item_qte = create_item(str(qte), bold=True)
-            item_qte.setTextAlignment(Qt.AlignCenter)
-            self.table_historique.setItem(row, 3, item_qte)
-            
-            # Utilisateur
-            self.table_historique.setItem(row, 4, create_item(mvt.get('nom_utilisateur', 'N/A')))
-            
-            # Motif
-            self.table_historique.setItem(row, 5, create_item(mvt.get('commentaire', '-')))
+        """Recharge l'historique depuis la première page (filtres courants)"""
+        self._async.annuler('historique')
+        self.modele_journal.reinitialiser()
+        self.modele_journal.fetchMore()
+    
+    def _charger_page(self, curseur):
+        """Page suivante du journal (signal page_demandee du modèle)"""
+        self._async.charger(
+            'historique', Database.get_stock_movements,
+            self._filtres_historique(), curseur, TAILLE_PAGE_JOURNAL,
+            ok=self.modele_journal.ajouter_page,
+            echec=lambda e: self.modele_journal.page_en_echec()
+        )
     
     def valider_mouvement(self):
         """Valide et enregistre le mouvement"""
@@ -456,25 +593,29 @@ class MovementsScreen(QWidget):
     
     def voir_details_mouvement(self):
         """Affiche les détails du mouvement sélectionné"""
-        row = self.table_historique.currentRow()
-        if row < 0:
+        index = self.table_historique.currentIndex()
+        if not index.isValid():
             return
             
         # Récupérer les infos de la ligne
-        date = self.table_historique.item(row, 0).text()
-        produit = self.table_historique.item(row, 1).text()
-        type_mvt = self.table_historique.item(row, 2).text()
-        qte = self.table_historique.item(row, 3).text()
-        motif = self.table_historique.item(row, 5).text()
+        mvt = self.modele_journal.ligne(index.row())
+        date_mvt = mvt['datemouvement'].strftime("%d/%m/%Y %H:%M")
+        type_mvt = STYLES_TYPE.get(mvt['type'], (mvt['type'],))[0]
+        origine = ""
+        if mvt.get('id_vente'):
+            origine = f"🧾 Vente n°{mvt['id_vente']}\n"
+        elif mvt.get('id_achat'):
+            origine = f"🚚 Achat n°{mvt['id_achat']}\n"
         
         # Afficher dans un dialogue simple
         QMessageBox.information(
             self, f"Détails du Mouvement",
-            f"📅 Date: {date}\n"
-            f"📦 Produit: {produit}\n"
+            f"📅 Date: {date_mvt}\n"
+            f"📦 Produit: {mvt['nom_produit']}\n"
             f"🔄 Type: {type_mvt}\n"
-            f"🔢 Quantité: {qte}\n\n"
-            f"📝 Motif complet:\n{motif}"
+            f"🔢 Quantité: {mvt['quantite']}\n"
+            f"{origine}\n"
+            f"📝 Motif complet:\n{mvt.get('commentaire') or '-'}"
         )
             
     def rafraichir(self):
@@ -490,6 +631,7 @@ class DialogueCatalogue(QDialog):
         self.setWindowTitle("Catalogue Produits")
         self.resize(900, 700) # Un peu plus grand
         self.produit_selectionne = None
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_produits()
@@ -519,8 +661,9 @@ class DialogueCatalogue(QDialog):
         layout.addWidget(buttons)
     
     def charger_produits(self):
-        produits = Database.get_all_products()
-        
+        self._async.charger('produits', Database.get_all_products, ok=self._afficher_produits)
+    
+    def _afficher_produits(self, produits):
         col = 0
         row = 0
         max_cols = 3
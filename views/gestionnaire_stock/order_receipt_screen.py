@@ -5,6 +5,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QColor, QFont
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 class OrderReceiptScreen(QWidget):
     """
@@ -14,7 +15,9 @@ class OrderReceiptScreen(QWidget):
     def __init__(self, user_id):
         super().__init__()
         self.user_id = user_id
+        self._async = ChargeurAsync(self)
         self.setup_ui()
+        self.rafraichir()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -37,10 +40,22 @@ class OrderReceiptScreen(QWidget):
         btn_refresh.clicked.connect(self.rafraichir)
         header.addWidget(btn_refresh)
         
+        # Réception groupée des lignes sélectionnées
+        self.btn_recevoir_selection = QPushButton("✅ Valider la sélection")
+        self.btn_recevoir_selection.setEnabled(False)
+        self.btn_recevoir_selection.setStyleSheet("""
+            QPushButton { background-color: #2962FF; color: white; border-radius: 5px; padding: 8px 14px; font-weight: bold; }
+            QPushButton:hover { background-color: #448AFF; }
+            QPushButton:disabled { background-color: #333; color: #777; }
+        """)
+        self.btn_recevoir_selection.clicked.connect(self.recevoir_selection)
+        header.addWidget(self.btn_recevoir_selection)
+        
         layout.addLayout(header)
         
         # Explication
-        lbl_info = QLabel("Validez la réception des commandes pour mettre à jour les stocks automatiquement.")
+        lbl_info = QLabel("Validez la réception des commandes pour mettre à jour les stocks automatiquement. "
+                          "Ctrl/Maj + clic pour en sélectionner plusieurs.")
         lbl_info.setStyleSheet("color: #90A4AE; font-size: 10pt; font-style: italic;")
         layout.addWidget(lbl_info)
         
@@ -50,6 +65,7 @@ class OrderReceiptScreen(QWidget):
         self.table.setHorizontalHeaderLabels(["ID Achat", "Date", "Fournisseur", "Articles", "Montant", "Action"])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
         self.table.setStyleSheet("""
@@ -69,12 +85,15 @@ class OrderReceiptScreen(QWidget):
                 font-weight: bold;
             }
         """)
+        self.table.itemSelectionChanged.connect(self._maj_bouton_selection)
         layout.addWidget(self.table)
         
     def rafraichir(self):
         """Charge les commandes en attente"""
+        self._async.charger('commandes', Database.get_pending_purchases, ok=self._afficher_commandes)
+    
+    def _afficher_commandes(self, orders):
         self.table.setRowCount(0)
-        orders = Database.get_pending_purchases()
         
         if not orders:
             self.table.setRowCount(1)
@@ -101,7 +120,9 @@ class OrderReceiptScreen(QWidget):
             nb = order.get('nbproduits', 0)
             montant = order.get('montanttotal', 0)
             
-            self.table.setItem(row, 0, QTableWidgetItem(f"Cmd #{oid}"))
+            itm_id = QTableWidgetItem(f"Cmd #{oid}")
+            itm_id.setData(Qt.UserRole, oid)
+            self.table.setItem(row, 0, itm_id)
             self.table.setItem(row, 1, QTableWidgetItem(date))
             self.table.setItem(row, 2, QTableWidgetItem(fourn))
             
@@ -144,3 +165,39 @@ class OrderReceiptScreen(QWidget):
             else:
                 QMessageBox.critical(self, "Erreur", "Une erreur est survenue lors de la validation.")
 
+    def _commandes_selectionnees(self):
+        ids = []
+        for index in self.table.selectionModel().selectedRows():
+            item = self.table.item(index.row(), 0)
+            if item is not None and item.data(Qt.UserRole) is not None:
+                ids.append(item.data(Qt.UserRole))
+        return ids
+
+    def _maj_bouton_selection(self):
+        nb = len(self._commandes_selectionnees())
+        self.btn_recevoir_selection.setEnabled(nb > 0)
+        self.btn_recevoir_selection.setText(f"✅ Valider la sélection ({nb})" if nb else "✅ Valider la sélection")
+
+    def recevoir_selection(self):
+        """Valide la réception de toutes les commandes sélectionnées en une fois"""
+        ids = self._commandes_selectionnees()
+        if not ids:
+            return
+        liste = ", ".join(f"#{i}" for i in ids)
+        reply = QMessageBox.question(self, "Confirmer Réception",
+                                     f"Confirmez-vous la réception complète de {len(ids)} commande(s) ?\n{liste}\n\n"
+                                     "Cela mettra à jour les stocks immédiatement.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply != QMessageBox.Yes:
+            return
+
+        recus = Database.confirm_purchase_receipts(ids, self.user_id)
+        if recus is None:
+            QMessageBox.critical(self, "Erreur", "Une erreur est survenue lors de la validation.")
+            return
+        message = f"{len(recus)} commande(s) réceptionnée(s) avec succès.\nStocks mis à jour."
+        ignores = sorted(set(ids) - set(recus))
+        if ignores:
+            message += "\n\nNon réceptionnées (déjà traitées ou vides) : " + ", ".join(f"#{i}" for i in ignores)
+        QMessageBox.information(self, "Succès", message)
+        self.rafraichir()
@@ -6,6 +6,17 @@ from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QFont, QColor, QPixmap, QIcon
 from datetime import datetime
 from db.database import Database
+from views.async_db import ChargeurAsync
+from views.notifier import ChangeNotifier
+
+ORDRE_PRIORITE = {'CRITICAL': 1, 'HIGH': 2, 'MEDIUM': 3}
+STATUTS_CLOS = ('ARCHIVEE', 'COMMANDE_PASSEE')
+
+
+def _cle_tri(alerte):
+    """Même ordre que Database.get_persistent_alerts (priorité puis plus récente d'abord)"""
+    return (ORDRE_PRIORITE.get(alerte['priorite'], 4), -alerte['date_creation'].timestamp())
+
 
 class SignalementsScreen(QWidget):
     """
@@ -24,8 +35,16 @@ class SignalementsScreen(QWidget):
             QScrollBar::handle:vertical { background: #424242; border-radius: 5px; }
         """)
         
+        self.alertes_actives = {}  # id_alerte -> alerte
+        self._cartes = {}          # id_alerte -> carte affichée
+        self._lbl_vide = None
+        self._async = ChargeurAsync(self)
+        
         self.setup_ui()
         self.charger_donnees()
+        
+        # Mises à jour poussées par la base (LISTEN/NOTIFY)
+        ChangeNotifier.instance().alertes_modifiees.connect(self._appliquer_changements)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -109,17 +128,33 @@ class SignalementsScreen(QWidget):
         parent_layout.addWidget(scroll)
 
     def charger_donnees(self):
+        self._async.charger('alertes', Database.get_persistent_alerts, ok=self._afficher_alertes)
+
+    def _afficher_alertes(self, alertes):
         # Nettoyage
         while self.layout_cartes.count() > 1: # On garde le stretch
             item = self.layout_cartes.takeAt(0)
             if item.widget(): item.widget().deleteLater()
-            
-        alertes = Database.get_persistent_alerts()
+        self._cartes = {}
+        self._lbl_vide = None
         
         # Filtrer et Trier
-        actives = [a for a in alertes if a['statut'] not in ['ARCHIVEE', 'COMMANDE_PASSEE']]
+        actives = [a for a in alertes if a['statut'] not in STATUTS_CLOS]
+        self.alertes_actives = {a['id_alerte']: a for a in actives}
+        
+        self._maj_kpi()
         
-        # Update KPI
+        if not actives:
+            self._afficher_vide()
+            return
+
+        for alerte in actives:
+            card = self._creer_carte_alerte(alerte)
+            self._cartes[alerte['id_alerte']] = card
+            self.layout_cartes.insertWidget(self.layout_cartes.count()-1, card)
+
+    def _maj_kpi(self):
+        actives = self.alertes_actives.values()
         n_crit = len([a for a in actives if a['priorite'] == 'CRITICAL'])
         n_high = len([a for a in actives if a['priorite'] == 'HIGH'])
         n_prev = len([a for a in actives if a['priorite'] in ['MEDIUM', 'LOW']])
@@ -127,17 +162,52 @@ class SignalementsScreen(QWidget):
         self.kpi_critical.lbl_val.setText(str(n_crit))
         self.kpi_high.lbl_val.setText(str(n_high))
         self.kpi_preventive.lbl_val.setText(str(n_prev))
-        
-        if not actives:
-            lbl_empty = QLabel("✅ Tout est calme. Aucun signalement en cours.")
-            lbl_empty.setAlignment(Qt.AlignCenter)
-            lbl_empty.setStyleSheet("font-size: 14pt; color: #4CAF50; margin-top: 50px;")
-            self.layout_cartes.insertWidget(0, lbl_empty)
-            return
 
-        for alerte in actives:
-            card = self._creer_carte_alerte(alerte)
-            self.layout_cartes.insertWidget(self.layout_cartes.count()-1, card)
+    def _afficher_vide(self):
+        self._lbl_vide = QLabel("✅ Tout est calme. Aucun signalement en cours.")
+        self._lbl_vide.setAlignment(Qt.AlignCenter)
+        self._lbl_vide.setStyleSheet("font-size: 14pt; color: #4CAF50; margin-top: 50px;")
+        self.layout_cartes.insertWidget(0, self._lbl_vide)
+
+    def _appliquer_changements(self, changements):
+        """
+        Mise à jour incrémentale (signal ChangeNotifier.alertes_modifiees) :
+        seules les cartes des alertes modifiées sont retirées / recréées, à leur rang.
+        """
+        touchees = set(changements['supprimes'])
+        for alerte in changements['lignes']:
+            touchees.add(alerte['id_alerte'])
+            if alerte['statut'] in STATUTS_CLOS:
+                self.alertes_actives.pop(alerte['id_alerte'], None)
+            else:
+                self.alertes_actives[alerte['id_alerte']] = alerte
+        for id_alerte in changements['supprimes']:
+            self.alertes_actives.pop(id_alerte, None)
+        
+        # 1. Retrait des cartes périmées
+        for id_alerte in touchees:
+            card = self._cartes.pop(id_alerte, None)
+            if card is not None:
+                self.layout_cartes.removeWidget(card)
+                card.deleteLater()
+        
+        if self._lbl_vide is not None and self.alertes_actives:
+            self.layout_cartes.removeWidget(self._lbl_vide)
+            self._lbl_vide.deleteLater()
+            self._lbl_vide = None
+        
+        # 2. Insertion des nouvelles cartes par rang croissant (les autres restent en place)
+        ordre = sorted(self.alertes_actives.values(), key=_cle_tri)
+        for rang, alerte in enumerate(ordre):
+            if alerte['id_alerte'] in touchees:
+                card = self._creer_carte_alerte(alerte)
+                self._cartes[alerte['id_alerte']] = card
+                self.layout_cartes.insertWidget(rang, card)
+        
+        if not self.alertes_actives and self._lbl_vide is None:
+            self._afficher_vide()
+        
+        self._maj_kpi()
 
     def _creer_carte_alerte(self, alerte):
         color_map = {
@@ -235,6 +305,7 @@ class DialogueSignalementPreventif(QDialog):
         self.setWindowTitle("🔮 Nouveau Signalement Préventif")
         self.setFixedSize(450, 450)
         self.setStyleSheet("background-color: #1E1E1E; color: white;")
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_produits()
@@ -286,7 +357,9 @@ class DialogueSignalementPreventif(QDialog):
         lay.addWidget(self.btn_valider)
 
     def charger_produits(self):
-        produits = Database.get_all_products()
+        self._async.charger('produits', Database.get_all_products, ok=self._afficher_produits)
+
+    def _afficher_produits(self, produits):
         for p in produits:
             self.combo_produit.addItem(p['nom_produit'], p['id_produit'])
             
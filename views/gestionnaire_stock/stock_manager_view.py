@@ -2,23 +2,17 @@
 Vue principale du module Gestionnaire Stock
 Architecture avec sidebar et écrans modulaires
 Principe: Efficacité opérationnelle, pas de fioritures
+Écrans construits à la première navigation (PileEcrans)
 """
 
 from PySide6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-                               QStackedWidget, QLabel, QFrame)
+                               QLabel, QFrame)
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QFont, QIcon
 import qtawesome as qta
 from datetime import datetime
 
-# Importer les écrans
-from views.gestionnaire_stock.stock_table_screen import StockTableScreen
-from views.gestionnaire_stock.movements_screen import MovementsScreen
-from views.gestionnaire_stock.alerts_screen import AlertsScreen
-from views.gestionnaire_stock.stock_stats_screen import StockStatsScreen
-from views.gestionnaire_stock.stock_stats_screen import StockStatsScreen
-from views.gestionnaire_stock.signalements_screen import SignalementsScreen
-from views.gestionnaire_stock.order_receipt_screen import OrderReceiptScreen
+from views.lazy_screens import PileEcrans
 
 
 class StockManagerView(QWidget):
@@ -71,8 +65,8 @@ class StockManagerView(QWidget):
         # Top bar (Style Caisse)
         self._creer_top_bar(layout_droit)
         
-        # StackedWidget pour les écrans
-        self.stacked_widget = QStackedWidget()
+        # Pile des écrans (construits à la première navigation)
+        self.stacked_widget = PileEcrans()
         self._initialiser_ecrans()
         layout_droit.addWidget(self.stacked_widget)
         
@@ -233,72 +227,63 @@ class StockManagerView(QWidget):
     def _initialiser_ecrans(self):
         """Initialise et ajoute tous les écrans"""
         # Écran 0: Tableau Stock
-        self.ecran_stock = StockTableScreen(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_stock)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.stock_table_screen", "StockTableScreen",
+                                        self.id_utilisateur)
         
         # Écran 1: Mouvements
-        self.ecran_mouvements = MovementsScreen(self.id_utilisateur, self.nom_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_mouvements)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.movements_screen", "MovementsScreen",
+                                        self.id_utilisateur, self.nom_utilisateur)
         
         # Écran 2: Alertes
-        self.ecran_alertes = AlertsScreen(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_alertes)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.alerts_screen", "AlertsScreen",
+                                        self.id_utilisateur)
         
         # Écran 3: Réception Commandes
-        self.ecran_reception = OrderReceiptScreen(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_reception)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.order_receipt_screen", "OrderReceiptScreen",
+                                        self.id_utilisateur)
         
-        # Écran 3: Signalements (Centre de Commande)
-        self.ecran_signalements = SignalementsScreen(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_signalements)
+        # Écran 4: Signalements (Centre de Commande)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.signalements_screen", "SignalementsScreen",
+                                        self.id_utilisateur)
 
-        # Écran 4: Statistiques
-        self.ecran_stats = StockStatsScreen(self.id_utilisateur)
-        self.stacked_widget.addWidget(self.ecran_stats)
+        # Écran 5: Statistiques (matplotlib importé à la première ouverture)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.stock_stats_screen", "StockStatsScreen",
+                                        self.id_utilisateur)
     
     # ========== NAVIGATION ==========
     
     def afficher_tableau_stock(self):
         """Affiche le tableau de stock"""
-        self._update_active_btn(self.btn_stock)
-        self.stacked_widget.setCurrentIndex(self.INDEX_STOCK)
-        self.lbl_titre_ecran.setText("📋 Tableau de Stock")
-        self.ecran_stock.rafraichir()
+        self._afficher(self.INDEX_STOCK, self.btn_stock, "📋 Tableau de Stock")
     
     def afficher_mouvements(self):
         """Affiche l'écran des mouvements"""
-        self._update_active_btn(self.btn_mouvements)
-        self.stacked_widget.setCurrentIndex(self.INDEX_MOUVEMENTS)
-        self.lbl_titre_ecran.setText("🔄 Mouvements & Historique")
-        self.ecran_mouvements.rafraichir()
+        self._afficher(self.INDEX_MOUVEMENTS, self.btn_mouvements, "🔄 Mouvements & Historique")
     
     def afficher_alertes(self):
         """Affiche les alertes"""
-        self._update_active_btn(self.btn_alertes)
-        self.stacked_widget.setCurrentIndex(self.INDEX_ALERTES)
-        self.lbl_titre_ecran.setText("⚠️ Alertes Stock")
-        self.ecran_alertes.rafraichir()
+        self._afficher(self.INDEX_ALERTES, self.btn_alertes, "⚠️ Alertes Stock")
         
     def afficher_reception(self):
         """Affiche la réception des commandes"""
-        self._update_active_btn(self.btn_reception)
-        self.stacked_widget.setCurrentIndex(self.INDEX_RECEPTION)
-        self.lbl_titre_ecran.setText("📦 Réception Commandes")
-        self.ecran_reception.rafraichir()
+        self._afficher(self.INDEX_RECEPTION, self.btn_reception, "📦 Réception Commandes")
     
     def afficher_signalements(self):
         """Affiche le Centre de Signalements"""
-        self._update_active_btn(self.btn_signalements)
-        self.stacked_widget.setCurrentIndex(self.INDEX_SIGNALEMENTS)
-        self.lbl_titre_ecran.setText("🚥 Centre de Signalements")
-        self.ecran_signalements.rafraichir()
+        self._afficher(self.INDEX_SIGNALEMENTS, self.btn_signalements, "🚥 Centre de Signalements")
     
     def afficher_statistiques(self):
         """Affiche les statistiques"""
-        self._update_active_btn(self.btn_stats)
-        self.stacked_widget.setCurrentIndex(self.INDEX_STATS)
-        self.lbl_titre_ecran.setText("📊 Statistiques")
-        self.ecran_stats.rafraichir()
+        self._afficher(self.INDEX_STATS, self.btn_stats, "📊 Statistiques")
+    
+    def _afficher(self, index, btn, titre):
+        """Affiche un écran ; rafraîchi s'il existait déjà (un écran neuf charge ses données)"""
+        self._update_active_btn(btn)
+        deja_construit = self.stacked_widget.est_construit(index)
+        self.stacked_widget.setCurrentIndex(index)
+        self.lbl_titre_ecran.setText(titre)
+        if deja_construit:
+            self.stacked_widget.ecran(index).rafraichir()
     
     def _update_active_btn(self, btn_actif):
         """Active un bouton et désactive les autres"""
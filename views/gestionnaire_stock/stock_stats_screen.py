@@ -12,6 +12,7 @@ from PySide6.QtGui import QFont, QColor
 from datetime import datetime, timedelta
 
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 
 class StockStatsScreen(QWidget):
@@ -27,6 +28,7 @@ class StockStatsScreen(QWidget):
         
         # Style général de l'écran (fond plus aéré)
         self.setStyleSheet("background-color: #F5F7F9;")
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.charger_statistiques()
@@ -175,7 +177,7 @@ class StockStatsScreen(QWidget):
         self.canvas_barres = FigureCanvas(self.figure_barres)
         lay_barres.addWidget(self.canvas_barres)
         
-        # 2. Graphique Évolution (Ligne)
+        # 2. Graphique Évolution (Ligne) : flux horaire aujourd'hui, niveau et valeur du stock sinon
         self.group_ligne = QGroupBox("📈 Activité Journalière Globale")
         self._styler_group(self.group_ligne)
         lay_ligne = QVBoxLayout(self.group_ligne)
@@ -211,23 +213,34 @@ class StockStatsScreen(QWidget):
         """)
 
     def charger_statistiques(self):
-        """Charge les données et met à jour l'affichage"""
+        """Charge les données et met à jour l'affichage (changer de période annule la requête en cours)"""
         periode = self.combo_periode.currentData()
         
         # 1. Stats globales
-        stats = Database.get_stock_stats(periode)
+        self._async.charger('stats', Database.get_stock_stats, periode, ok=self._afficher_stats)
+        
+        # 2. Données pour graphiques (Journalier ou Horaire)
+        if periode == 1:
+            self._async.charger('historique', Database.get_stock_history_hourly,
+                                ok=lambda historique: self._afficher_graphiques(historique, True))
+        else:
+            # Série lue dans le journal de stock quotidien (pas de parcours de MouvementStock)
+            au = datetime.now().date()
+            du = au - timedelta(days=periode - 1)
+            self._async.charger('historique', Database.get_stock_series, du, au,
+                                ok=lambda historique: self._afficher_graphiques(historique, False))
+    
+    def _afficher_stats(self, stats):
         if stats:
             self.card_entrees.lbl_valeur.setText(f"{stats.get('total_entrees', 0 or 0):,}")
             self.card_sorties.lbl_valeur.setText(f"{stats.get('total_sorties', 0 or 0):,}")
             self.card_mvts.lbl_valeur.setText(f"{stats.get('total_mouvements', 0 or 0):,}")
             self.card_actifs.lbl_valeur.setText(f"{stats.get('produits_actifs', 0 or 0):,}")
-        
-        # 2. Données pour graphiques (Journalier ou Horaire)
-        is_today = (periode == 1)
+    
+    def _afficher_graphiques(self, historique, is_today):
+        if not historique: return
         
         if is_today:
-            historique = Database.get_stock_history_hourly()
-            if not historique: return
             
             dates = [f"{int(h['heure'])}h" for h in historique]
             entrees = [h['entrees'] for h in historique]
@@ -236,9 +249,6 @@ class StockStatsScreen(QWidget):
             xlabel_rot = 0
             label_fs = 9
         else:
-            historique = Database.get_stock_history_daily(periode)
-            if not historique: return
-            
             dates = [h['jour'].strftime("%d/%m") for h in historique]
             entrees = [h['entrees'] for h in historique]
             sorties = [h['sorties'] for h in historique]
@@ -263,15 +273,32 @@ class StockStatsScreen(QWidget):
         self.figure_barres.tight_layout()
         self.canvas_barres.draw()
         
-        # --- Dessin Graphique 2 (Courbe Activité) ---
+        # --- Dessin Graphique 2 ---
         self.figure_ligne.clear()
         ax2 = self.figure_ligne.add_subplot(111)
-        ax2.plot(dates, totaux, marker='o', linestyle='-', color='#2196F3', linewidth=2, label='Flux Total')
-        ax2.fill_between(dates, totaux, color='#2196F3', alpha=0.1)
+        if is_today:
+            self.group_ligne.setTitle("📈 Activité Journalière Globale")
+            ax2.plot(dates, totaux, marker='o', linestyle='-', color='#2196F3', linewidth=2, label='Flux Total')
+            ax2.fill_between(dates, totaux, color='#2196F3', alpha=0.1)
+            ax2.legend(loc='upper left', fontsize=9)
+        else:
+            # Niveau de stock (axe gauche) et valorisation au PMP (axe droit) en fin de journée ;
+            # None (jour passé non encore clôturé) laisse un trou dans la courbe
+            self.group_ligne.setTitle("📈 Niveau et Valeur du Stock")
+            niveaux = [float('nan') if h['stock'] is None else h['stock'] for h in historique]
+            valeurs = [float('nan') if h['valeur'] is None else float(h['valeur']) for h in historique]
+            courbe_stock = ax2.plot(dates, niveaux, marker='o', linestyle='-', color='#2196F3',
+                                    linewidth=2, label='Stock (unités)')
+            ax2.fill_between(dates, niveaux, color='#2196F3', alpha=0.1)
+            ax3 = ax2.twinx()
+            courbe_valeur = ax3.plot(dates, valeurs, marker='s', linestyle='--', color='#FF9800',
+                                     linewidth=2, label='Valeur (FCFA)')
+            ax3.tick_params(axis='y', labelsize=8)
+            courbes = courbe_stock + courbe_valeur
+            ax2.legend(courbes, [c.get_label() for c in courbes], loc='upper left', fontsize=9)
         
         ax2.set_xticks(range(len(dates)))
         ax2.set_xticklabels(dates, rotation=xlabel_rot, fontsize=label_fs)
-        ax2.legend(loc='upper left', fontsize=9)
         ax2.grid(True, linestyle='--', alpha=0.3)
         self.figure_ligne.tight_layout()
         self.canvas_ligne.draw()
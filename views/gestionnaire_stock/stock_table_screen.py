@@ -2,16 +2,242 @@
 Écran Tableau de Stock
 Liste dense et claire des produits avec statuts
 Filtres: Catégorie, Stock critique, Recherche texte
+Modèle/vue : les données restent en colonnes dans StockTableModel, seules les
+cellules visibles sont demandées par la vue ; le filtrage passe par un proxy
 """
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                               QTableWidgetItem, QLineEdit, QComboBox, QCheckBox,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                               QLineEdit, QComboBox, QCheckBox,
                                QLabel, QHeaderView, QAbstractItemView, QFrame)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QColor
+from PySide6.QtCore import (Qt, QAbstractTableModel, QSortFilterProxyModel,
+                            QModelIndex, QTimer)
+from PySide6.QtGui import QFont, QColor, QBrush
 import qtawesome as qta
 
 from db.database import Database
+from views.async_db import ChargeurAsync
+from views.notifier import ChangeNotifier
+
+
+STATUTS = {
+    'RUPTURE': ("❌ RUPTURE", "#F44336"),
+    'CRITIQUE': ("⚠️ CRITIQUE", "#FF9800"),
+    'OK': ("OK", "#00C853"),
+}
+
+
+# === MODÈLE ===
+class StockTableModel(QAbstractTableModel):
+    """
+    Résultat de get_stock_overview stocké par colonnes (une liste par champ).
+    data() calcule le texte / la couleur d'une cellule à la demande :
+    aucun objet Qt n'est créé par ligne, polices et pinceaux sont partagés.
+    """
+
+    HEADERS = ["Code", "Produit", "Catégorie", "Stock", "Seuil", "Statut"]
+    COL_STOCK, COL_SEUIL, COL_STATUT = 3, 4, 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._vider()
+        self._tri = (1, Qt.AscendingOrder)  # get_stock_overview trie déjà par nom
+
+        self._police_grasse = QFont()
+        self._police_grasse.setBold(True)
+        self._pinceau_texte_statut = QBrush(QColor("white"))
+        self._pinceaux_statut = {code: QBrush(QColor(couleur)) for code, (_, couleur) in STATUTS.items()}
+
+    def _vider(self):
+        self.ids, self.noms, self.noms_min = [], [], []
+        self.categories, self.id_categories = [], []
+        self.stocks, self.seuils = [], []
+        self._index = {}    # id_produit -> ligne
+
+    def _colonnes(self):
+        return [self.ids, self.noms, self.noms_min, self.categories,
+                self.id_categories, self.stocks, self.seuils]
+
+    # ---------- Chargement ----------
+
+    def charger(self, produits):
+        """Remplace tout le contenu (résultat de get_stock_overview)"""
+        self.beginResetModel()
+        self.ids = [p['id_produit'] for p in produits]
+        self.noms = [p['nom'] for p in produits]
+        self.noms_min = [n.lower() for n in self.noms]
+        self.categories = [p.get('categorie') or 'N/A' for p in produits]
+        self.id_categories = [p['id_categorie'] for p in produits]
+        self.stocks = [p['stockactuel'] for p in produits]
+        self.seuils = [p['stockalerte'] for p in produits]
+        self._reindexer()
+        if self._tri != (1, Qt.AscendingOrder):
+            self._permuter(self._ordre(*self._tri))
+        self.endResetModel()
+
+    def mettre_a_jour(self, lignes, supprimes):
+        """
+        Mise à jour incrémentale : lignes modifiées réécrites en place (dataChanged),
+        produits nouveaux ajoutés, produits supprimés retirés
+        """
+        for pid in supprimes:
+            row = self._index.get(pid)
+            if row is None:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            for col in self._colonnes():
+                del col[row]
+            self._reindexer()
+            self.endRemoveRows()
+
+        reordonner = False
+        for p in lignes:
+            pid = p['id_produit']
+            row = self._index.get(pid)
+            if row is None:
+                row = len(self.ids)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.ids.append(pid)
+                self.noms.append(p['nom'])
+                self.noms_min.append(p['nom'].lower())
+                self.categories.append(p.get('categorie') or 'N/A')
+                self.id_categories.append(p['id_categorie'])
+                self.stocks.append(p['stockactuel'])
+                self.seuils.append(p['stockalerte'])
+                self._index[pid] = row
+                self.endInsertRows()
+                reordonner = True
+                continue
+            reordonner = reordonner or self.noms[row] != p['nom'] or self._tri[0] in (2, 3, 4, 5)
+            self.noms[row] = p['nom']
+            self.noms_min[row] = p['nom'].lower()
+            self.categories[row] = p.get('categorie') or 'N/A'
+            self.id_categories[row] = p['id_categorie']
+            self.stocks[row] = p['stockactuel']
+            self.seuils[row] = p['stockalerte']
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+        if reordonner:
+            self.sort(*self._tri)
+
+    def _reindexer(self):
+        self._index = {pid: i for i, pid in enumerate(self.ids)}
+
+    # ---------- Accès par ligne (filtre, sélection) ----------
+
+    def statut(self, row):
+        stock = self.stocks[row]
+        if stock == 0:
+            return 'RUPTURE'
+        if stock <= self.seuils[row]:
+            return 'CRITIQUE'
+        return 'OK'
+
+    # ---------- Interface QAbstractTableModel ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(self.ids[row])
+            if col == 1:
+                return self.noms[row]
+            if col == 2:
+                return self.categories[row]
+            if col == self.COL_STOCK:
+                return str(self.stocks[row])
+            if col == self.COL_SEUIL:
+                return str(self.seuils[row])
+            return STATUTS[self.statut(row)][0]
+
+        if col < self.COL_STOCK:
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        if role == Qt.FontRole and col != self.COL_SEUIL:
+            return self._police_grasse
+        if col == self.COL_STATUT:
+            if role == Qt.BackgroundRole:
+                return self._pinceaux_statut[self.statut(row)]
+            if role == Qt.ForegroundRole:
+                return self._pinceau_texte_statut
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Tri des colonnes en Python (clé par colonne), sans passer par data()"""
+        self._tri = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        anciens = self.persistentIndexList()
+        ordre = self._ordre(column, order)
+        nouvelle_ligne = [0] * len(ordre)
+        for nouvelle, ancienne in enumerate(ordre):
+            nouvelle_ligne[ancienne] = nouvelle
+        self._permuter(ordre)
+        self.changePersistentIndexList(
+            anciens, [self.index(nouvelle_ligne[i.row()], i.column()) for i in anciens]
+        )
+        self.layoutChanged.emit()
+
+    def _ordre(self, column, order):
+        cles = {
+            0: self.ids, 1: self.noms_min, 2: self.categories,
+            3: self.stocks, 4: self.seuils,
+        }.get(column)
+        if cles is None:  # Statut : ruptures, puis critiques, puis OK
+            rang = {'RUPTURE': 0, 'CRITIQUE': 1, 'OK': 2}
+            cles = [rang[self.statut(i)] for i in range(len(self.ids))]
+        return sorted(range(len(cles)), key=cles.__getitem__, reverse=order == Qt.DescendingOrder)
+
+    def _permuter(self, ordre):
+        for col in self._colonnes():
+            col[:] = [col[i] for i in ordre]
+        self._reindexer()
+
+
+class StockFilterProxyModel(QSortFilterProxyModel):
+    """Filtres recherche / catégorie / stock critique, évalués sur les colonnes du modèle"""
+
+    def __init__(self, modele, parent=None):
+        super().__init__(parent)
+        self._modele = modele
+        self._texte = ""
+        self._categorie = None
+        self._critique = False
+        self.setSourceModel(modele)
+
+    def set_filtres(self, texte, categorie, critique):
+        texte = texte.lower()
+        if (texte, categorie, critique) == (self._texte, self._categorie, self._critique):
+            return
+        self._texte, self._categorie, self._critique = texte, categorie, critique
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        m = self._modele
+        if self._texte and self._texte not in m.noms_min[source_row]:
+            return False
+        if self._categorie and m.id_categories[source_row] != self._categorie:
+            return False
+        if self._critique and m.stocks[source_row] > m.seuils[source_row]:
+            return False
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Le tri est fait par le modèle source (plus rapide), le proxy conserve son ordre
+        self._modele.sort(column, order)
 
 
 class StockTableScreen(QWidget):
@@ -24,9 +250,20 @@ class StockTableScreen(QWidget):
         super().__init__()
         
         self.id_utilisateur = id_utilisateur
-        self.stock_complet = []  # Initialize to empty list to prevent AttributeError
+        self._stock_charge = False
+        self._async = ChargeurAsync(self)
+        
+        # Recherche texte appliquée après une courte pause de frappe
+        self._timer_recherche = QTimer(self)
+        self._timer_recherche.setSingleShot(True)
+        self._timer_recherche.setInterval(250)
+        self._timer_recherche.timeout.connect(self.appliquer_filtres)
+        
         self.setup_ui()
         self.charger_donnees()
+        
+        # Mises à jour poussées par la base (LISTEN/NOTIFY)
+        ChangeNotifier.instance().produits_modifies.connect(self._appliquer_changements)
     
     def setup_ui(self):
         """Construction de l'interface"""
@@ -80,7 +317,7 @@ class StockTableScreen(QWidget):
                 background-color: #4E4E6E;
             }
         """)
-        self.input_recherche.textChanged.connect(self.appliquer_filtres) # Recherche dynamique
+        self.input_recherche.textChanged.connect(self._timer_recherche.start) # Recherche dynamique (différée)
         layout_filtres.addWidget(self.input_recherche)
         
         layout_filtres.addSpacing(20)
@@ -122,11 +359,11 @@ class StockTableScreen(QWidget):
     
     def _creer_table_stock(self, parent_layout):
         """Table principale des produits"""
-        self.table_stock = QTableWidget()
-        self.table_stock.setColumnCount(6)
-        self.table_stock.setHorizontalHeaderLabels([
-            "Code", "Produit", "Catégorie", "Stock", "Seuil", "Statut"
-        ])
+        self.modele_stock = StockTableModel(self)
+        self.proxy_stock = StockFilterProxyModel(self.modele_stock, self)
+        
+        self.table_stock = QTableView()
+        self.table_stock.setModel(self.proxy_stock)
         
         # Configuration
         header = self.table_stock.horizontalHeader()
@@ -136,8 +373,13 @@ class StockTableScreen(QWidget):
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Stock
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Seuil
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Statut
+        # ResizeToContents mesurerait toutes les lignes : on se limite aux lignes visibles
+        header.setResizeContentsPrecision(0)
+        header.setSortIndicator(1, Qt.AscendingOrder)
+        self.table_stock.setSortingEnabled(True)
         
         self.table_stock.verticalHeader().setVisible(False)
+        self.table_stock.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table_stock.verticalHeader().setDefaultSectionSize(50) # Hauteur standard confortable
         self.table_stock.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table_stock.setSelectionMode(QAbstractItemView.SingleSelection)
@@ -145,19 +387,19 @@ class StockTableScreen(QWidget):
         self.table_stock.setAlternatingRowColors(True)
         
         self.table_stock.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 font-size: 13pt; /* Taille lisible standard */
                 alternate-background-color: #F0F4F8; /* Gris très doux pour le contraste */
                 background-color: white;
                 gridline-color: #E0E0E0;
                 border: none; /* Bordure supprimée pour style épuré */
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px 10px;
                 color: #2A2A40; /* Texte gris foncé (pas noir complet) */
             }
             /* La couleur de sélection est gérée dynamiquement par _on_selection_changed */
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 color: white;
             }
             QHeaderView::section {
@@ -173,30 +415,33 @@ class StockTableScreen(QWidget):
         
         # Connexions
         self.table_stock.doubleClicked.connect(self.voir_historique_produit)
-        self.table_stock.itemSelectionChanged.connect(self._on_selection_changed)
+        self.table_stock.selectionModel().selectionChanged.connect(self._on_selection_changed)
         
         parent_layout.addWidget(self.table_stock, stretch=1)
+        
+        # Message affiché quand aucun produit ne passe les filtres
+        self.lbl_aucun_produit = QLabel("⚠️ Aucun produit trouvé avec ces critères")
+        self.lbl_aucun_produit.setAlignment(Qt.AlignCenter)
+        self.lbl_aucun_produit.setStyleSheet("color: #757575; font-size: 12pt; font-style: italic;")
+        self.lbl_aucun_produit.hide()
+        parent_layout.addWidget(self.lbl_aucun_produit)
+        
+        for signal in (self.proxy_stock.modelReset, self.proxy_stock.layoutChanged,
+                       self.proxy_stock.rowsInserted, self.proxy_stock.rowsRemoved):
+            signal.connect(self._maj_message_vide)
 
-    def _on_selection_changed(self):
+    def _maj_message_vide(self, *args):
+        self.lbl_aucun_produit.setVisible(self._stock_charge and self.proxy_stock.rowCount() == 0)
+    
+    def _on_selection_changed(self, *args):
         """Change la couleur de sélection selon le statut du produit"""
         selected_rows = self.table_stock.selectionModel().selectedRows()
         if not selected_rows:
             return
             
-        row = selected_rows[0].row()
-        # On récupère le statut (colonne 5) pour déterminer la couleur
-        # Note: On stocke la couleur "brute" dans l'item statut, ou on déduit du texte
-        item_statut = self.table_stock.item(row, 5)
-        if not item_statut:
-            return
-            
-        text_statut = item_statut.text()
-        
-        color_hex = "#00C853" # Default vert (OK)
-        if "RUPTURE" in text_statut:
-            color_hex = "#F44336" # Rouge
-        elif "CRITIQUE" in text_statut:
-            color_hex = "#FF9800" # Orange
+        row = self.proxy_stock.mapToSource(selected_rows[0]).row()
+        # Couleur du statut de la ligne (vert OK, orange critique, rouge rupture)
+        color_hex = STATUTS[self.modele_stock.statut(row)][1]
             
         # Mise à jour dynamique du style pour la sélection
         current_style = self.table_stock.styleSheet()
@@ -204,7 +449,7 @@ class StockTableScreen(QWidget):
         # On remplace ou ajoute la règle de sélection
         # C'est un peu brut mais efficace pour garantir le changement visuel immédiat
         new_style = """
-            QTableWidget {
+            QTableView {
                 font-size: 13pt;
                 alternate-background-color: #F0F4F8;
                 background-color: white;
@@ -212,11 +457,11 @@ class StockTableScreen(QWidget):
                 border: none;
                 selection-background-color: %s; /* DYNAMIQUE */
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px 10px;
                 color: #2A2A40;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 color: white;
                 background-color: %s; /* DYNAMIQUE */
             }
@@ -266,114 +511,45 @@ class StockTableScreen(QWidget):
     # ========== LOGIQUE ==========
     
     def charger_donnees(self):
-        """Charge les données depuis la base"""
+        """Charge les données depuis la base (catégories et stock en parallèle)"""
         # Charger catégories pour le filtre
-        categories = Database.get_all_categories()
+        self._async.charger('categories', Database.get_all_categories, ok=self._afficher_categories)
+        
+        # Charger stock
+        self._async.charger('stock', Database.get_stock_overview, ok=self._afficher_stock)
+    
+    def _afficher_categories(self, categories):
+        selection = self.combo_categorie.currentData()
+        self.combo_categorie.blockSignals(True)
         self.combo_categorie.clear()
         self.combo_categorie.addItem("Toutes", None)
         for cat in categories:
             self.combo_categorie.addItem(cat['libelle'], cat['id_categorie'])
-        
-        # Charger stock
-        self.stock_complet = Database.get_stock_overview()
+        self.combo_categorie.setCurrentIndex(max(0, self.combo_categorie.findData(selection)))
+        self.combo_categorie.blockSignals(False)
         self.appliquer_filtres()
     
+    def _afficher_stock(self, stock):
+        self._stock_charge = True
+        self.modele_stock.charger(stock)
+    
     def appliquer_filtres(self):
-        """Applique les filtres à la table"""
-        texte_recherche = self.input_recherche.text().lower()
-        categorie_selectionnee = self.combo_categorie.currentData()
-        critique_seulement = self.check_critique.isChecked()
-        
-        # Filtrer les données
-        donnees_filtrees = []
-        for produit in self.stock_complet:
-            # Filtre recherche
-            if texte_recherche and texte_recherche not in produit['nom'].lower():
-                continue
-            
-            # Filtre catégorie
-            if categorie_selectionnee and produit['id_categorie'] != categorie_selectionnee:
-                continue
-            
-            # Filtre critique
-            stock = produit['stockactuel']
-            seuil = produit['stockalerte']
-            if critique_seulement and stock > seuil:
-                continue
-            
-            donnees_filtrees.append(produit)
-        
-        # Remplir la table
-        self.afficher_donnees(donnees_filtrees)
+        """Applique les filtres à la table (proxy, sans reconstruire les lignes)"""
+        self._timer_recherche.stop()
+        self.proxy_stock.set_filtres(
+            self.input_recherche.text(),
+            self.combo_categorie.currentData(),
+            self.check_critique.isChecked()
+        )
+        self._maj_message_vide()
     
-    def afficher_donnees(self, donnees):
-        """Affiche les données dans la table"""
-        self.table_stock.setRowCount(0)
-        
-        if not donnees:
-            row = self.table_stock.rowCount()
-            self.table_stock.insertRow(row)
-            item = QTableWidgetItem("⚠️ Aucun produit trouvé avec ces critères")
-            item.setTextAlignment(Qt.AlignCenter)
-            font = QFont()
-            font.setItalic(True)
-            font.setPointSize(12)
-            item.setFont(font)
-            item.setForeground(QColor("#757575"))
-            self.table_stock.setItem(row, 0, item)
-            self.table_stock.setSpan(row, 0, 1, 6)
-            # Revert to default selection color style if empty to avoid weird artifacts
-            self.table_stock.setStyleSheet(self.table_stock.styleSheet().replace("selection-background-color", "selection-background-color-unused")) 
-            return
-            
-        for produit in donnees:
-            row = self.table_stock.rowCount()
-            self.table_stock.insertRow(row)
-            
-            # Code
-            self.table_stock.setItem(row, 0, QTableWidgetItem(str(produit['id_produit'])))
-            
-            # Nom
-            self.table_stock.setItem(row, 1, QTableWidgetItem(produit['nom']))
-            
-            # Catégorie
-            self.table_stock.setItem(row, 2, QTableWidgetItem(produit.get('categorie', 'N/A')))
-            
-            # Stock
-            stock = produit['stockactuel']
-            item_stock = QTableWidgetItem(str(stock))
-            item_stock.setTextAlignment(Qt.AlignCenter)
-            font_bold = QFont()
-            font_bold.setBold(True)
-            item_stock.setFont(font_bold)
-            self.table_stock.setItem(row, 3, item_stock)
-            
-            # Seuil
-            seuil = produit['stockalerte']
-            item_seuil = QTableWidgetItem(str(seuil))
-            item_seuil.setTextAlignment(Qt.AlignCenter)
-            self.table_stock.setItem(row, 4, item_seuil)
-            
-            # Statut (avec couleur)
-            if stock == 0:
-                statut_text = "❌ RUPTURE"
-                couleur = QColor("#F44336")
-                text_color = QColor("white")
-            elif stock <= seuil:
-                statut_text = "⚠️ CRITIQUE"
-                couleur = QColor("#FF9800")
-                text_color = QColor("white")
-            else:
-                statut_text = "OK"
-                couleur = QColor("#00C853")
-                text_color = QColor("white")
-            
-            item_statut = QTableWidgetItem(statut_text)
-            item_statut.setBackground(couleur)
-            item_statut.setForeground(text_color)
-            item_statut.setTextAlignment(Qt.AlignCenter)
-            item_statut.setFont(font_bold)
-            self.table_stock.setItem(row, 5, item_statut)
+    def _appliquer_changements(self, changements):
+        """
+        Mise à jour incrémentale (signal ChangeNotifier.produits_modifies) :
+        seules les lignes des produits modifiés sont signalées à la vue ; le proxy
+        réévalue les filtres de ces lignes, sans requête ni reconstruction.
+        """
+        self.modele_stock.mettre_a_jour(changements['lignes'], changements['supprimes'])
     
     def voir_historique_produit(self):
         """Affiche l'historique d'un produit (double-clic)"""
@@ -0,0 +1,61 @@
+"""
+Écrans construits à la première navigation
+PileEcrans remplace le QStackedWidget des vues par rôle : chaque écran est enregistré
+par son module et sa classe, et n'est importé puis construit (requêtes de chargement
+comprises) qu'au premier affichage. Les modules lourds (matplotlib des écrans de
+statistiques, reportlab des reçus) ne sont donc plus chargés à l'ouverture de la vue.
+"""
+
+import importlib
+
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QStackedWidget, QWidget
+
+
+class PileEcrans(QStackedWidget):
+    """
+    enregistrer(module, classe, *args, apres=None, **kwargs) réserve l'index de l'écran
+    (une page vide en attendant) ; ecran(index) ou setCurrentIndex(index) le construit.
+    apres(ecran) est appelé une fois l'écran construit (connexion de ses signaux).
+    """
+
+    ecran_construit = Signal(int, QWidget)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fabriques = {}    # index -> (module, classe, args, kwargs, apres)
+
+    def enregistrer(self, module, classe, *args, apres=None, **kwargs):
+        index = self.addWidget(QWidget())
+        self._fabriques[index] = (module, classe, args, kwargs, apres)
+        return index
+
+    def est_construit(self, index):
+        return index not in self._fabriques
+
+    def ecran(self, index):
+        """Écran de l'index donné, construit au premier appel"""
+        fabrique = self._fabriques.pop(index, None)
+        if fabrique is None:
+            return self.widget(index)
+        module, classe, args, kwargs, apres = fabrique
+        ecran = getattr(importlib.import_module(module), classe)(*args, **kwargs)
+
+        # Remplace la page vide sans changer l'écran affiché
+        courant = self.currentIndex()
+        vide = self.widget(index)
+        self.blockSignals(True)
+        self.removeWidget(vide)
+        self.insertWidget(index, ecran)
+        super().setCurrentIndex(courant)
+        self.blockSignals(False)
+        vide.deleteLater()
+
+        if apres is not None:
+            apres(ecran)
+        self.ecran_construit.emit(index, ecran)
+        return ecran
+
+    def setCurrentIndex(self, index):
+        self.ecran(index)
+        super().setCurrentIndex(index)
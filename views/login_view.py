@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtCore import Qt, Signal, QSize
 import qtawesome as qta
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 class LoginView(QWidget):
     login_success = Signal(dict) # Emits user info dict on success
@@ -11,6 +12,7 @@ class LoginView(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Connexion - Gestion Magasin")
+        self._async = ChargeurAsync(self)
         
         # Main Layout
         layout = QVBoxLayout(self)
@@ -92,9 +94,10 @@ class LoginView(QWidget):
             QMessageBox.warning(self, "Erreur", "Veuillez remplir tous les champs.")
             return
             
-        # Call Database
-        user = Database.login(email, password)
-        
+        # Call Database (hors du thread de l'interface)
+        self._async.charger('login', Database.login, email, password, ok=self._on_login_result)
+
+    def _on_login_result(self, user):
         if user:
             self.login_success.emit(user)
         else:
@@ -1,17 +1,14 @@
 
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                               QLabel, QPushButton, QStackedWidget, QFrame, 
+                               QLabel, QPushButton, QFrame, 
                                QSizePolicy, QMessageBox, QGraphicsDropShadowEffect)
 from PySide6.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QRect
 from PySide6.QtGui import QIcon, QAction, QColor
 import qtawesome as qta
 from datetime import datetime
 
-# Import Views
-from views.caissier.cashier_view import CashierView
-from views.gestionnaire_stock.stock_manager_view import StockManagerView
-from views.gestionnaire_achat.purchase_view import PurchaseView
-from views.admin.admin_view import AdminView
+# Vues importées et construites à la première navigation
+from views.lazy_screens import PileEcrans
 
 class MainWindow(QMainWindow):
     def __init__(self, user_role="Administrateur", user_name="Admin User", controller=None):
@@ -47,7 +44,7 @@ class MainWindow(QMainWindow):
         self.setup_header()
 
         # 4. Main Content (Center)
-        self.stacked_widget = QStackedWidget()
+        self.stacked_widget = PileEcrans()
         self.right_layout.addWidget(self.stacked_widget)
         
         # Initialize Views
@@ -158,19 +155,15 @@ class MainWindow(QMainWindow):
         self.status.setStyleSheet("background-color: #1E1E2E; color: #A0A0B0;")
 
     def init_views(self):
-        # Create Placeholders for now
-        self.views = []
+        # Vues enregistrées ici, construites à la première ouverture (PileEcrans)
         
         # 1. Cashier
-        self.cashier_view = CashierView()
-        self.stacked_widget.addWidget(self.cashier_view)
-        self.views.append(self.cashier_view)
+        self.stacked_widget.enregistrer("views.caissier.cashier_view", "CashierView")
         
         # 2. Stock
         # Pass user_name from MainWindow
-        self.stock_view = StockManagerView(nom_utilisateur=self.user_name)
-        self.stacked_widget.addWidget(self.stock_view)
-        self.views.append(self.stock_view)
+        self.stacked_widget.enregistrer("views.gestionnaire_stock.stock_manager_view", "StockManagerView",
+                                        nom_utilisateur=self.user_name)
         
         # 3. Purchase (NOUVEAU MODULE)
         # Note: PurchasingManagerView est un QWidget autonome avec sa propre sidebar.
@@ -182,20 +175,22 @@ class MainWindow(QMainWindow):
         # Idéalement, on refactoriserait pour extraire le contenu.
         # SOLUTION RAPIDE: On met la nouvelle vue, c'est mieux que l'ancienne buggée.
         
-        from views.responsable_achats.purchasing_manager_view import PurchasingManagerView
         # On passe un ID user dummy ou celui de l'admin
-        self.purchase_view = PurchasingManagerView(id_utilisateur=1, nom_utilisateur=self.user_name)
         # Hack pour masquer la sidebar interne si on est dans MainWindow ?
-        if hasattr(self.purchase_view, 'sidebar'):
-            self.purchase_view.sidebar.hide()
-            
-        self.stacked_widget.addWidget(self.purchase_view)
-        self.views.append(self.purchase_view)
+        self.stacked_widget.enregistrer("views.responsable_achats.purchasing_manager_view",
+                                        "PurchasingManagerView", id_utilisateur=1,
+                                        nom_utilisateur=self.user_name, apres=self._masquer_sidebar)
         
         # 4. Admin
-        self.admin_view = AdminView()
-        self.stacked_widget.addWidget(self.admin_view)
-        self.views.append(self.admin_view)
+        self.stacked_widget.enregistrer("views.admin.admin_view", "AdminView")
+
+        # Première page construite tout de suite (affichée à l'ouverture)
+        self.stacked_widget.setCurrentIndex(0)
+
+    @staticmethod
+    def _masquer_sidebar(vue):
+        if hasattr(vue, 'sidebar'):
+            vue.sidebar.hide()
 
     def switch_page(self, index):
         self.stacked_widget.setCurrentIndex(index)
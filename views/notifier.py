@@ -0,0 +1,72 @@
+"""
+Pont Qt des notifications de la base (voir db/notifications.py)
+Le thread d'écoute recharge uniquement les lignes touchées, met à jour le catalogue
+en mémoire puis émet des signaux ; Qt les délivre dans le thread de l'interface
+(connexion en file d'attente), les écrans n'ont plus qu'à patcher leurs lignes.
+"""
+
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+from db.catalog import ProductCatalog
+from db.database import Database
+from db.notifications import ChangeListener
+
+
+class ChangeNotifier(QObject):
+    """
+    Signaux émis (charge utile : dict) :
+    - produits_modifies  {'lignes': [lignes de get_stock_overview], 'supprimes': [id_produit]}
+    - alertes_modifiees  {'lignes': [lignes de get_persistent_alerts], 'supprimes': [id_alerte]}
+    - achats_modifies    {'ids': [id_achat]}
+    """
+
+    produits_modifies = Signal(object)
+    alertes_modifiees = Signal(object)
+    achats_modifies = Signal(object)
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+        self._listener = ChangeListener(self._traiter_lot)
+
+    @classmethod
+    def instance(cls):
+        """Notificateur unique du processus ; démarre l'écoute au premier appel"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+                    cls._instance._listener.start()
+        return cls._instance
+
+    def arreter(self):
+        self._listener.stop()
+
+    # Appelé dans le thread d'écoute
+    def _traiter_lot(self, batch):
+        ids_produits = batch.ids('produit')
+        if ids_produits:
+            ProductCatalog.instance().rafraichir_produits(ids_produits)
+            lignes = Database.get_stock_overview(ids_produits)
+            trouves = {l['id_produit'] for l in lignes}
+            self.produits_modifies.emit({
+                'lignes': lignes,
+                'supprimes': [i for i in ids_produits if i not in trouves],
+            })
+
+        ids_alertes = [int(i) for i in batch.ids('alertestock')]
+        if ids_alertes:
+            lignes = Database.get_persistent_alerts(ids_alertes)
+            trouves = {l['id_alerte'] for l in lignes}
+            self.alertes_modifiees.emit({
+                'lignes': lignes,
+                'supprimes': [i for i in ids_alertes if i not in trouves],
+            })
+
+        ids_achats = [int(i) for i in batch.ids('achat')]
+        if ids_achats:
+            self.achats_modifies.emit({'ids': ids_achats})
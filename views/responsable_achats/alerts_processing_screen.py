@@ -5,6 +5,8 @@ from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, QFrame
 from PySide6.QtCore import Qt, QSize, QDate, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QColor, QIcon
 from db.database import Database
+from views.notifier import ChangeNotifier
+from views.async_db import ChargeurAsync
 
 # ... (AlertsProcessingScreen content remains, we will update it in next step) ...
 
@@ -59,13 +61,14 @@ class NewSupplierDialog(QDialog):
 
 class AdvancedOrderDialog(QDialog):
     """Dialogue de commmande avancé"""
-    def __init__(self, alert, user_id, parent=None):
+    def __init__(self, alert, user_id, parent=None, reco=None):
         super().__init__(parent)
         self.alert = alert
         self.user_id = user_id
+        self._async = ChargeurAsync(self)
         
-        # 1. Obtenir recommandation
-        self.reco = Database.get_order_recommendation(alert['id_produit'])
+        # 1. Obtenir recommandation (déjà chargée par l'écran de traitement le plus souvent)
+        self.reco = reco if reco is not None else Database.get_order_recommendation(alert['id_produit'])
         
         self.setWindowTitle(f"Commander : {alert['nom_produit']}")
         self.resize(600, 700)
@@ -224,8 +227,12 @@ class AdvancedOrderDialog(QDialog):
             QMessageBox.critical(self, "Erreur", "Impossible de créer la commande.")
 
     def _load_suppliers(self, select_id=None):
+        self._async.charger('fournisseurs', Database.get_suppliers,
+                            ok=lambda suppliers: self._show_suppliers(suppliers, select_id))
+
+    def _show_suppliers(self, suppliers, select_id=None):
         self.cb_supplier.clear()
-        self.suppliers = Database.get_suppliers()
+        self.suppliers = suppliers
         for s in self.suppliers:
             self.cb_supplier.addItem(s['nom'], s['id_fournisseur'])
         
@@ -261,10 +268,19 @@ class AlertsProcessingScreen(QWidget):
         super().__init__()
         self.user_id = user_id
         self.current_alert = None
+        self.current_reco = None
+        self._items = {}  # id_alerte -> (liste, item)
+        self._recos = {}  # id_produit -> recommandation (chargées en bloc pour toute la file)
+        self._recos_a_charger = set()
+        self._async = ChargeurAsync(self)
         
         self.setup_ui()
         self.rafraichir()
         
+        # Mises à jour poussées par la base (LISTEN/NOTIFY)
+        ChangeNotifier.instance().alertes_modifiees.connect(self._appliquer_changements)
+        ChangeNotifier.instance().produits_modifies.connect(self._produits_modifies)
+        
         # État initial de l'animation
         self.is_expanded = True
         self._set_panel_width(800) # Large au début
@@ -316,9 +332,22 @@ class AlertsProcessingScreen(QWidget):
         l_layout = QVBoxLayout(self.left_panel)
         l_layout.setContentsMargins(10, 10, 10, 10)
         
+        h_entete = QHBoxLayout()
         lbl_list = QLabel("TRAITEMENT")
         lbl_list.setStyleSheet("color: #90A4AE; font-weight: bold; font-size: 10pt; margin-bottom: 5px;")
-        l_layout.addWidget(lbl_list)
+        h_entete.addWidget(lbl_list)
+        h_entete.addStretch()
+        
+        btn_tout = QPushButton("⚡ GÉNÉRER TOUTES LES COMMANDES")
+        btn_tout.setCursor(Qt.PointingHandCursor)
+        btn_tout.setToolTip("Une commande par fournisseur recommandé, pour toute la file d'attente")
+        btn_tout.setStyleSheet("""
+            QPushButton { background-color: #2979FF; color: white; border-radius: 4px; padding: 6px 10px; font-weight: bold; }
+            QPushButton:hover { background-color: #448AFF; }
+        """)
+        btn_tout.clicked.connect(self._generer_toutes_commandes)
+        h_entete.addWidget(btn_tout)
+        l_layout.addLayout(h_entete)
         
         from PySide6.QtWidgets import QTabWidget
         self.tabs = QTabWidget()
@@ -370,34 +399,130 @@ class AlertsProcessingScreen(QWidget):
         
         main_layout.addWidget(self.right_panel)
 
+    STATUTS_ACTIFS = ('NON_LUE', 'VU', 'EN_COURS')
+    STATUTS_TRAITES = ('ARCHIVEE', 'COMMANDE_PASSEE')
+    ORDRE_PRIORITE = {'CRITICAL': 1, 'HIGH': 2, 'MEDIUM': 3}
+
     def rafraichir(self):
+        # Récupérer alertes persistantes
+        self._async.charger('alertes', Database.get_persistent_alerts, ok=self._afficher_alertes)
+
+    def _afficher_alertes(self, all_alerts):
         self.alert_list.clear()
         self.history_list.clear()
+        self._items = {}
         self._clear_detail()
         
-        # Récupérer alertes persistantes
-        all_alerts = Database.get_persistent_alerts()
-        
         # 1. File d'attente (Active)
-        active_alerts = [a for a in all_alerts if a['statut'] in ['NON_LUE', 'VU', 'EN_COURS']]
+        active_alerts = [a for a in all_alerts if a['statut'] in self.STATUTS_ACTIFS]
         for alert in active_alerts:
-            item = QListWidgetItem()
-            prio_icon = "🔴" if alert['priorite'] == 'CRITICAL' else "🟠" if alert['priorite'] == 'HIGH' else "🔵"
-            item.setText(f"{prio_icon} {alert['nom_produit']}\nStock: {alert['stock_alerte']}")
-            item.setData(Qt.UserRole, alert)
-            self.alert_list.addItem(item)
+            self.alert_list.addItem(self._creer_item(alert))
             
         # 2. Historique (Traitées)
-        processed_alerts = [a for a in all_alerts if a['statut'] in ['ARCHIVEE', 'COMMANDE_PASSEE']]
+        processed_alerts = [a for a in all_alerts if a['statut'] in self.STATUTS_TRAITES]
         # Trier par date de traitement (plus récent d'abord)
-        processed_alerts.sort(key=lambda x: x['date_traitement'] or x['date_creation'], reverse=True)
+        processed_alerts.sort(key=self._cle_tri)
         
         for alert in processed_alerts:
-            item = QListWidgetItem()
+            self.history_list.addItem(self._creer_item(alert))
+        
+        # 3. Recommandations de toute la file en une requête (sélection instantanée ensuite)
+        self._recos = {}
+        self._recos_a_charger = set()
+        self._charger_recommandations(a['id_produit'] for a in active_alerts)
+
+    def _charger_recommandations(self, ids_produits):
+        """
+        Charge en bloc les recommandations manquantes du cache.
+        Les demandes successives sont cumulées : la requête en cours est remplacée par une requête
+        couvrant tous les produits encore attendus.
+        """
+        self._recos_a_charger.update(pid for pid in ids_produits if pid not in self._recos)
+        if not self._recos_a_charger:
+            return
+        demandes = list(self._recos_a_charger)
+        self._async.charger('recommandations', Database.get_recommendations_bulk, demandes,
+                            ok=lambda recos: self._recommandations_chargees(demandes, recos))
+
+    def _recommandations_chargees(self, demandes, recos):
+        self._recos.update(recos)
+        self._recos_a_charger.difference_update(demandes)
+
+    def _produits_modifies(self, changements):
+        """Stock modifié : la quantité suggérée change, recommandations de ces produits rechargées"""
+        ids = [l['id_produit'] for l in changements['lignes']] + list(changements['supprimes'])
+        ids = [pid for pid in ids if pid in self._recos]
+        for pid in ids:
+            del self._recos[pid]
+        self._charger_recommandations(pid for pid in ids if pid not in changements['supprimes'])
+
+    def _liste_pour(self, alert):
+        """Liste d'affichage d'une alerte selon son statut (None si aucune)"""
+        if alert['statut'] in self.STATUTS_ACTIFS:
+            return self.alert_list
+        if alert['statut'] in self.STATUTS_TRAITES:
+            return self.history_list
+        return None
+
+    def _cle_tri(self, alert):
+        """File d'attente : priorité puis plus récente ; historique : traitement le plus récent d'abord"""
+        if alert['statut'] in self.STATUTS_ACTIFS:
+            return (self.ORDRE_PRIORITE.get(alert['priorite'], 4), -alert['date_creation'].timestamp())
+        return -(alert['date_traitement'] or alert['date_creation']).timestamp()
+
+    def _creer_item(self, alert):
+        item = QListWidgetItem()
+        self._remplir_item(item, alert)
+        self._items[alert['id_alerte']] = (self._liste_pour(alert), item)
+        return item
+
+    def _remplir_item(self, item, alert):
+        if alert['statut'] in self.STATUTS_ACTIFS:
+            prio_icon = "🔴" if alert['priorite'] == 'CRITICAL' else "🟠" if alert['priorite'] == 'HIGH' else "🔵"
+            item.setText(f"{prio_icon} {alert['nom_produit']}\nStock: {alert['stock_alerte']}")
+        else:
             status_icon = "✅" if alert['statut'] == 'COMMANDE_PASSEE' else "⏳" if "Report" in (alert['commentaire'] or "") else "❌"
             item.setText(f"{status_icon} {alert['nom_produit']}\nTraitée le: {alert['date_traitement'].strftime('%d/%m %H:%M') if alert['date_traitement'] else '?'}")
-            item.setData(Qt.UserRole, alert)
-            self.history_list.addItem(item)
+        item.setData(Qt.UserRole, alert)
+
+    def _appliquer_changements(self, changements):
+        """
+        Mise à jour incrémentale (signal ChangeNotifier.alertes_modifiees) :
+        un élément dont la liste et le rang ne changent pas est mis à jour sur place,
+        sinon il est retiré puis réinséré à sa position dans la bonne liste.
+        """
+        for id_alerte in changements['supprimes']:
+            self._retirer_item(id_alerte)
+        
+        for alert in changements['lignes']:
+            cible = self._liste_pour(alert)
+            liste, item = self._items.get(alert['id_alerte'], (None, None))
+            
+            if item is not None and liste is cible:
+                ancienne = item.data(Qt.UserRole)
+                if self._cle_tri(ancienne) == self._cle_tri(alert):
+                    self._remplir_item(item, alert)
+                    if self.current_alert and self.current_alert['id_alerte'] == alert['id_alerte']:
+                        self.current_alert = alert
+                    continue
+            
+            self._retirer_item(alert['id_alerte'])
+            if cible is None:
+                continue
+            cle = self._cle_tri(alert)
+            rang = 0
+            while rang < cible.count() and self._cle_tri(cible.item(rang).data(Qt.UserRole)) <= cle:
+                rang += 1
+            cible.insertItem(rang, self._creer_item(alert))
+        
+        # Nouvelles alertes de la file : recommandations chargées en bloc
+        self._charger_recommandations(a['id_produit'] for a in changements['lignes']
+                                      if a['statut'] in self.STATUTS_ACTIFS)
+
+    def _retirer_item(self, id_alerte):
+        liste, item = self._items.pop(id_alerte, (None, None))
+        if item is not None:
+            liste.takeItem(liste.row(item))
 
     def _on_tab_changed(self, index):
         self._clear_detail()
@@ -427,6 +552,7 @@ class AlertsProcessingScreen(QWidget):
             self._show_bulk_actions(items)
 
     def _clear_detail(self):
+        self._async.annuler('detail')
         # Clean right panel layout
         if self.detail_layout.count():
             item = self.detail_layout.takeAt(0)
@@ -461,10 +587,9 @@ class AlertsProcessingScreen(QWidget):
             QPushButton { background-color: #2979FF; color: white; border-radius: 6px; padding: 15px; font-weight: bold; font-size: 12pt; }
             QPushButton:hover { background-color: #448AFF; }
         """)
-        # Pour l'instant, on n'implémente pas la vraie commande groupée complexe, 
-        # mais on pourrait ouvrir un dialogue spécial ou traiter séquentiellement.
-        # Ici on met un placeholder.
-        btn_group.clicked.connect(lambda: QMessageBox.information(self, "Info", "Fonctionnalité 'Commande Groupée Complète' à venir.\nVeuillez traiter individuellement pour le moment."))
+        alerts = [i.data(Qt.UserRole) for i in items]
+        btn_group.clicked.connect(lambda: self._generer_commandes(alerts))
+        btn_group.setEnabled(all(a['statut'] in self.STATUTS_ACTIFS for a in alerts))
         lay.addWidget(btn_group)
         
         self.detail_layout.addWidget(container)
@@ -472,6 +597,7 @@ class AlertsProcessingScreen(QWidget):
     def _show_alert_detail(self, alert):
         self._clear_detail()
         self.current_alert = alert
+        self.current_reco = None
         
         container = QWidget()
         lay = QVBoxLayout(container)
@@ -490,29 +616,17 @@ class AlertsProcessingScreen(QWidget):
         badges.addStretch()
         lay.addLayout(badges)
         
-        # Context Data (Factuel)
-        context = Database.get_alert_purchasing_context(alert['id_produit'])
-        if context:
-            grid = QHBoxLayout()
-            grid.setSpacing(30)
-            grid.addWidget(self._create_fact("Ventes 30j", str(context.get('sales_30d', 0))))
-            grid.addWidget(self._create_fact("Dernière Cde", str(context.get('last_supplier_order') or 'Jamais')))
-            grid.addWidget(self._create_fact("Freq. Ruptures", f"{context.get('shortage_freq_90d', 0)}x / 90j"))
-            lay.addLayout(grid)
-            
-        # RECOMMANDATION (NEW)
-        reco = Database.get_order_recommendation(alert['id_produit'])
-        if reco:
-            reco_frame = QFrame()
-            reco_frame.setStyleSheet("background-color: #1b262c; border: 1px solid #37474f; border-radius: 6px;")
-            rl = QHBoxLayout(reco_frame)
-            
-            rl.addWidget(QLabel("💡 RECOMMANDATION :"))
-            rl.addWidget(self._create_fact("Qté Suggérée", f"{reco['suggested_qty']}"))
-            rl.addWidget(self._create_fact("Fournisseur", reco['supplier_name']))
-            rl.addWidget(self._create_fact("Coût Est.", f"{reco['total_cost']:,.0f} FCFA"))
-            
-            lay.addWidget(reco_frame)
+        # Context Data (Factuel) + RECOMMANDATION : depuis le cache de la file,
+        # sinon chargés en arrière-plan (la recommandation porte aussi le contexte d'achat)
+        zone_contexte = QVBoxLayout()
+        zone_contexte.setSpacing(20)
+        lay.addLayout(zone_contexte)
+        reco = self._recos.get(alert['id_produit'])
+        if reco is not None:
+            self._show_alert_context(zone_contexte, reco)
+        else:
+            self._async.charger('detail', Database.get_order_recommendation, alert['id_produit'],
+                                ok=lambda reco: self._show_alert_context(zone_contexte, reco))
 
         # Divider
         line = QFrame()
@@ -574,6 +688,34 @@ class AlertsProcessingScreen(QWidget):
         
         self.detail_layout.addWidget(container)
 
+    def _show_alert_context(self, lay, reco):
+        self.current_reco = reco
+        if reco:
+            self._recos[reco['product_id']] = reco
+        
+        if reco:
+            grid = QHBoxLayout()
+            grid.setSpacing(30)
+            grid.addWidget(self._create_fact("Ventes 30j", str(reco['sales_30d'])))
+            grid.addWidget(self._create_fact("Dernière Cde", str(reco['last_supplier_order'] or 'Jamais')))
+            grid.addWidget(self._create_fact("Freq. Ruptures", f"{reco['shortage_freq_90d']}x / 90j"))
+            grid.addWidget(self._create_fact("Délai Fourn.", f"{reco['lead_time_days']} j"))
+            lay.addLayout(grid)
+            
+            # RECOMMANDATION (NEW)
+            reco_frame = QFrame()
+            reco_frame.setStyleSheet("background-color: #1b262c; border: 1px solid #37474f; border-radius: 6px;")
+            rl = QHBoxLayout(reco_frame)
+            
+            rl.addWidget(QLabel("💡 RECOMMANDATION :"))
+            rl.addWidget(self._create_fact("Qté Suggérée", f"{reco['suggested_qty']}"))
+            if reco['reorder_point'] is not None:
+                rl.addWidget(self._create_fact("Point Cde", f"{reco['reorder_point']}"))
+            rl.addWidget(self._create_fact("Fournisseur", reco['supplier_name']))
+            rl.addWidget(self._create_fact("Coût Est.", f"{reco['total_cost']:,.0f} FCFA"))
+            
+            lay.addWidget(reco_frame)
+
     def _create_badge(self, text, color):
         lbl = QLabel(text)
         lbl.setStyleSheet(f"background-color: {color}; color: black; font-weight: bold; padding: 5px 10px; border-radius: 4px;")
@@ -609,11 +751,80 @@ class AlertsProcessingScreen(QWidget):
 
     def _action_commander(self):
         if not self.current_alert: return
-        dlg = AdvancedOrderDialog(self.current_alert, self.user_id, self)
+        dlg = AdvancedOrderDialog(self.current_alert, self.user_id, self, reco=self.current_reco)
         if dlg.exec():
             # QMessageBox.information(self, "Succès", "Commande créée avec succès !") # Déjà fait dans le dialog
             self.rafraichir() # Recharger liste
 
+    def _generer_toutes_commandes(self):
+        alerts = [self.alert_list.item(i).data(Qt.UserRole) for i in range(self.alert_list.count())]
+        if not alerts:
+            QMessageBox.information(self, "Info", "Aucune alerte en attente.")
+            return
+        self._generer_commandes(alerts)
+
+    def _generer_commandes(self, alerts):
+        """Commandes groupées par fournisseur recommandé (recommandations manquantes chargées d'abord)"""
+        manquants = {a['id_produit'] for a in alerts} - self._recos.keys()
+        if manquants:
+            self._async.charger('generation', Database.get_recommendations_bulk, list(manquants),
+                                ok=lambda recos: self._sur_recommandations(recos, alerts))
+        else:
+            self._proposer_commandes(alerts)
+
+    def _sur_recommandations(self, recos, alerts):
+        """Recommandations manquantes reçues : mises en cache puis commandes proposées"""
+        self._recos.update(recos)
+        self._proposer_commandes(alerts)
+
+    def _proposer_commandes(self, alerts):
+        """
+        Une commande par fournisseur : une ligne par produit (quantité et prix recommandés),
+        toutes les alertes du produit rattachées. Produits sans fournisseur connu ignorés.
+        """
+        par_fournisseur = {}
+        sans_fournisseur = set()
+        for alert in alerts:
+            reco = self._recos.get(alert['id_produit'])
+            if not reco or reco['supplier_id'] is None:
+                sans_fournisseur.add(alert['nom_produit'])
+                continue
+            commande = par_fournisseur.setdefault(reco['supplier_id'], {
+                'supplier_id': reco['supplier_id'], 'supplier_name': reco['supplier_name'],
+                'lignes': {}, 'alert_ids': [],
+            })
+            commande['lignes'].setdefault(reco['product_id'], {
+                'product_id': reco['product_id'], 'qty': reco['suggested_qty'], 'price': reco['unit_price'],
+            })
+            commande['alert_ids'].append(alert['id_alerte'])
+
+        if not par_fournisseur:
+            QMessageBox.warning(self, "Commandes", "Aucun fournisseur recommandé pour ces alertes.")
+            return
+
+        orders = [{'supplier_id': c['supplier_id'], 'lines': list(c['lignes'].values()),
+                   'alert_ids': c['alert_ids']} for c in par_fournisseur.values()]
+        resume = "\n".join(
+            f"• {c['supplier_name']} : {len(c['lignes'])} produit(s), "
+            f"{sum(l['qty'] * l['price'] for l in c['lignes'].values()):,.0f} FCFA"
+            for c in par_fournisseur.values())
+        if sans_fournisseur:
+            resume += f"\n\n⚠ Ignorés (aucun fournisseur connu) : {', '.join(sorted(sans_fournisseur))}"
+        total = sum(l['qty'] * l['price'] for o in orders for l in o['lines'])
+        reponse = QMessageBox.question(
+            self, "Générer les commandes",
+            f"{len(orders)} commande(s) fournisseur, total {total:,.0f} FCFA :\n\n{resume}\n\nConfirmer ?")
+        if reponse != QMessageBox.Yes:
+            return
+
+        purchase_ids = Database.create_purchase_orders_bulk(self.user_id, orders)
+        if purchase_ids is None:
+            QMessageBox.critical(self, "Erreur", "Échec de la création des commandes (aucune commande créée).")
+            return
+        QMessageBox.information(self, "Succès", f"{len(purchase_ids)} commande(s) créée(s) : "
+                                + ", ".join(f"#{i}" for i in purchase_ids))
+        self.rafraichir()
+
     def _action_update_status(self, status, reason_prefix):
         # Dialog for reason
         # For simplicity, using input dialog or simplified logic
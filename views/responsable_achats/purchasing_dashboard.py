@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
 from PySide6.QtCore import Qt, QSize, QPointF
 from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 class Sparkline(QWidget):
     """Mini graphique de tendance"""
@@ -48,6 +49,7 @@ class PurchasingDashboard(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
         
@@ -133,7 +135,9 @@ class PurchasingDashboard(QWidget):
         main_layout.addWidget(scroll)
 
     def rafraichir(self):
-        summary = Database.get_purchasing_dashboard_summary()
+        self._async.charger('synthese', Database.get_purchasing_dashboard_summary, ok=self._afficher)
+
+    def _afficher(self, summary):
         if not summary: return
         
         # 1. UPDATE URGENCES
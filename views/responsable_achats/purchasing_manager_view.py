@@ -1,13 +1,10 @@
 import os
 from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QPushButton, 
-                               QStackedWidget, QLabel, QFrame)
+                               QLabel, QFrame)
 from PySide6.QtCore import Qt, QTimer
 from datetime import datetime
 
-from views.responsable_achats.purchasing_dashboard import PurchasingDashboard
-from views.responsable_achats.alerts_processing_screen import AlertsProcessingScreen
-from views.responsable_achats.supplier_orders_screen import SupplierOrdersScreen
-from views.responsable_achats.purchasing_stats_screen import PurchasingStatsScreen
+from views.lazy_screens import PileEcrans
 
 class PurchasingManagerView(QWidget):
     """
@@ -53,7 +50,7 @@ class PurchasingManagerView(QWidget):
         self._creer_top_bar(layout_droit)
         
         # Stacked Widget
-        self.stacked_widget = QStackedWidget()
+        self.stacked_widget = PileEcrans()
         layout_droit.addWidget(self.stacked_widget)
         
         layout.addWidget(self.container_droit)
@@ -145,25 +142,25 @@ class PurchasingManagerView(QWidget):
         timer.start(1000)
 
     def _init_screens(self):
-        self.screen_dashboard = PurchasingDashboard()
-        self.screen_process = AlertsProcessingScreen(self.id_utilisateur)
-        self.screen_orders = SupplierOrdersScreen(self.id_utilisateur)
-        self.screen_stats = PurchasingStatsScreen()
-        
-        self.stacked_widget.addWidget(self.screen_dashboard)
-        self.stacked_widget.addWidget(self.screen_process)
-        self.stacked_widget.addWidget(self.screen_orders)
-        self.stacked_widget.addWidget(self.screen_stats)
+        # Construits à la première navigation (matplotlib seulement à l'ouverture des stats)
+        self.stacked_widget.enregistrer("views.responsable_achats.purchasing_dashboard", "PurchasingDashboard")
+        self.stacked_widget.enregistrer("views.responsable_achats.alerts_processing_screen",
+                                        "AlertsProcessingScreen", self.id_utilisateur)
+        self.stacked_widget.enregistrer("views.responsable_achats.supplier_orders_screen",
+                                        "SupplierOrdersScreen", self.id_utilisateur)
+        self.stacked_widget.enregistrer("views.responsable_achats.purchasing_stats_screen",
+                                        "PurchasingStatsScreen")
         
     def _update_nav(self, btn, idx, title):
         for b in [self.btn_dash, self.btn_process, self.btn_orders, self.btn_stats]:
             b.setChecked(b == btn)
+        deja_construit = self.stacked_widget.est_construit(idx)
         self.stacked_widget.setCurrentIndex(idx)
         self.lbl_page_title.setText(title)
         
-        # Rafraîchir l'écran actif si nécessaire
-        widget = self.stacked_widget.widget(idx)
-        if hasattr(widget, 'rafraichir'):
+        # Rafraîchir l'écran actif s'il existait déjà (un écran neuf charge ses données)
+        widget = self.stacked_widget.ecran(idx)
+        if deja_construit and hasattr(widget, 'rafraichir'):
             widget.rafraichir()
 
     def afficher_dashboard(self):
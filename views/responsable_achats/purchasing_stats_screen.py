@@ -10,6 +10,7 @@ from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QColor, QFont
 
 from db.database import Database
+from views.async_db import ChargeurAsync
 
 # Configurer Matplotlib pour le style sombre
 plt.style.use('dark_background')
@@ -29,6 +30,7 @@ class PurchasingStatsScreen(QWidget):
     """
     def __init__(self):
         super().__init__()
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.rafraichir()
         
@@ -169,8 +171,10 @@ class PurchasingStatsScreen(QWidget):
         if "90" in txt: days = 90
         elif "7" in txt: days = 7
         
-        # Récupérer les données
-        stats = Database.get_purchasing_stats(days)
+        # Récupérer les données (changer deux fois de période annule la première requête)
+        self._async.charger('stats', Database.get_purchasing_stats, days, ok=self._afficher)
+
+    def _afficher(self, stats):
         if not stats: return
 
         # --- REFRESH KPIs ---
@@ -5,6 +5,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor, QBrush, QFont
 from db.database import Database
+from views.async_db import ChargeurAsync
 from views.responsable_achats.alerts_processing_screen import NewSupplierDialog
 from PySide6.QtWidgets import (QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, 
                                QDateEdit, QGroupBox, QMessageBox, QLineEdit, QListWidget)
@@ -17,6 +18,7 @@ class ManualOrderDialog(QDialog):
         super().__init__(parent)
         self.user_id = user_id
         self.selected_product = None
+        self._async = ChargeurAsync(self)
         
         self.setWindowTitle("➕ Nouvelle Commande Libre")
         self.resize(500, 600)
@@ -92,27 +94,38 @@ class ManualOrderDialog(QDialog):
 
     def _search_products(self, query):
         if len(query) < 2: 
+            self._async.annuler('recherche')
             self.list_results.clear()
             return
-        products = Database.search_products(query)
+        # Chaque frappe remplace la recherche précédente
+        self._async.charger('recherche', Database.search_products, query, 20, ok=self._show_results)
+
+    def _show_results(self, products):
         self.list_results.clear()
         for p in products:
-            item = QListWidgetItem(f"{p['nom']} (Stock: {p['stockactuel']})")
+            item = QListWidgetItem(f"{p['nom_produit']} (Stock: {p['quantite_stock']})")
             item.setData(Qt.UserRole, p)
             self.list_results.addItem(item)
 
     def _select_product(self, item):
         self.selected_product = item.data(Qt.UserRole)
-        self.txt_search.setText(self.selected_product['nom'])
+        self.txt_search.setText(self.selected_product['nom_produit'])
         self.list_results.clear()
         self.form_frame.setEnabled(True)
         self.sb_price.setValue(float(self.selected_product.get('dernierprixachat', 0)))
 
-    def _load_suppliers(self):
+    def _load_suppliers(self, select_name=None):
+        self._async.charger('fournisseurs', Database.get_suppliers,
+                            ok=lambda sups: self._show_suppliers(sups, select_name))
+
+    def _show_suppliers(self, sups, select_name=None):
         self.cb_supplier.clear()
-        sups = Database.get_suppliers()
         for s in sups:
             self.cb_supplier.addItem(s['nom'], s['id_fournisseur'])
+        if select_name:
+            # Sélectionner le dernier ajouté (approximatif ici par nom)
+            idx = self.cb_supplier.findText(select_name)
+            if idx >= 0: self.cb_supplier.setCurrentIndex(idx)
 
     def _add_new_supplier(self):
         dlg = NewSupplierDialog(self)
@@ -120,10 +133,7 @@ class ManualOrderDialog(QDialog):
             data = dlg.get_data()
             if not data['nom']: return
             if Database.create_supplier(data['nom'], data['contact'], data['adresse']):
-                self._load_suppliers()
-                # Sélectionner le dernier ajouté (approximatif ici par nom)
-                idx = self.cb_supplier.findText(data['nom'])
-                if idx >= 0: self.cb_supplier.setCurrentIndex(idx)
+                self._load_suppliers(select_name=data['nom'])
 
     def valider(self):
         if not self.selected_product:
@@ -153,6 +163,7 @@ class SupplierOrdersScreen(QWidget):
         self.current_status = None
         self.current_period = None
         self.current_category = None
+        self._async = ChargeurAsync(self)
         self.setup_ui()
         self.charger_categories()
         self.rafraichir()
@@ -342,16 +353,22 @@ class SupplierOrdersScreen(QWidget):
     def charger_categories(self):
         self.combo_cat.clear()
         self.combo_cat.addItem("Toutes les catégories", None)
-        try:
-            categories = Database.get_all_categories()
-            for cat in categories:
-                self.combo_cat.addItem(cat['libelle'], cat['id_categorie'])
-        except: pass
+        self._async.charger('categories', Database.get_all_categories, ok=self._afficher_categories)
+
+    def _afficher_categories(self, categories):
+        self.combo_cat.blockSignals(True)
+        for cat in categories:
+            self.combo_cat.addItem(cat['libelle'], cat['id_categorie'])
+        self.combo_cat.blockSignals(False)
 
     def rafraichir(self):
+        # Un nouveau filtre annule la requête précédente
+        self._async.charger('commandes', Database.get_supplier_orders,
+                            self.current_status, self.current_period, self.current_category,
+                            ok=self._afficher_commandes)
+
+    def _afficher_commandes(self, orders):
         self.table.setRowCount(0)
-        orders = Database.get_supplier_orders(self.current_status, self.current_period, self.current_category)
-        
         self.table.setRowCount(len(orders))
         for row, order in enumerate(orders):
             status = order['statut']
@@ -413,7 +430,10 @@ class SupplierOrdersScreen(QWidget):
         id_achat = self.table.item(row, 0).data(Qt.UserRole)
         
         # Récupérer les détails depuis la DB
-        details = Database.get_order_details(id_achat)
+        self._async.charger('details', Database.get_order_details, id_achat,
+                            ok=lambda details: self._afficher_details(id_achat, details))
+
+    def _afficher_details(self, id_achat, details):
         if not details: return
         
         dlg = QDialog(self)
@@ -0,0 +1,200 @@
+"""
+Miniatures des images produits, à deux niveaux
+- mémoire : LRU de QPixmap déjà mises à l'échelle, clé (chemin, mtime, taille, mode)
+- disque : PNG par (chemin, taille, mode) dans cache/miniatures, avec la date de
+  modification de la source en métadonnée (régénéré si l'image source a changé)
+Lecture, décodage et mise à l'échelle se font dans un QThreadPool dédié, sur des QImage ;
+le thread de l'interface ne fait que convertir en QPixmap. En attendant, obtenir()
+renvoie None et l'appelant dessine un visuel provisoire ; le signal prete(chemin)
+annonce qu'une miniature est disponible.
+"""
+
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MINIATURES_CONFIG = {
+    "memoire": 600,         # miniatures gardées en mémoire (LRU)
+    "dossier": os.path.join(RACINE, "cache", "miniatures"),
+    "threads": 2,           # décodage en parallèle
+    "verification": 30,     # secondes entre deux vérifications de la date d'une source
+}
+
+
+class _Emetteur(QObject):
+    # (clé, QImage ou None) émis par le thread de travail, reçu dans le thread de l'interface
+    fini = Signal(object, object)
+
+
+class _Chargement(QRunnable):
+    def __init__(self, cle, dossier, emetteur):
+        super().__init__()
+        self.cle = cle
+        self.dossier = dossier
+        self.emetteur = emetteur
+
+    def run(self):
+        try:
+            image = ThumbnailCache.charger_image(*self.cle, self.dossier)
+        except Exception as e:
+            print(f"Erreur ThumbnailCache ({self.cle[0]}): {e}")
+            image = None
+        self.emetteur.fini.emit(self.cle, image)
+
+
+class ThumbnailCache(QObject):
+    """
+    Cache de miniatures unique du processus (à utiliser depuis le thread de l'interface)
+    obtenir(chemin, taille) -> QPixmap ou None (chargement lancé en arrière-plan)
+    prechauffer(chemins, taille) : charge à l'avance (ex. page visible du catalogue)
+    """
+
+    prete = Signal(str)
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, capacite=None, dossier=None):
+        super().__init__()
+        self.capacite = capacite or MINIATURES_CONFIG["memoire"]
+        self.dossier = dossier or MINIATURES_CONFIG["dossier"]
+        self._memoire = OrderedDict()   # clé -> QPixmap
+        self._echecs = set()            # clés illisibles (source absente ou corrompue)
+        self._en_cours = set()
+        self._mtimes = {}               # chemin -> (mtime_ns ou None, vérifié le)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(MINIATURES_CONFIG["threads"])
+        self._emetteur = _Emetteur(self)
+        self._emetteur.fini.connect(self._sur_fini)
+        self.stats = {'memoire': 0, 'manquees': 0}
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    # ---------- Accès (thread de l'interface) ----------
+
+    def obtenir(self, chemin, taille, mode=Qt.KeepAspectRatio):
+        """Miniature déjà prête, sinon None (et chargement lancé)"""
+        cle = self._cle(chemin, taille, mode)
+        if cle is None:
+            return None
+        pixmap = self._memoire.get(cle)
+        if pixmap is not None:
+            self._memoire.move_to_end(cle)
+            self.stats['memoire'] += 1
+            return pixmap
+        self.stats['manquees'] += 1
+        self._lancer(cle)
+        return None
+
+    def prechauffer(self, chemins, taille, mode=Qt.KeepAspectRatio):
+        """Lance le chargement des miniatures absentes de la mémoire"""
+        for chemin in chemins:
+            cle = self._cle(chemin, taille, mode)
+            if cle is not None and cle not in self._memoire:
+                self._lancer(cle)
+
+    def annuler_attente(self):
+        """Abandonne les chargements pas encore démarrés (ex. défilement rapide)"""
+        self._pool.clear()
+        self._en_cours.clear()
+
+    def attendre(self, delai_ms=-1):
+        """Attend la fin des chargements lancés (benchmarks)"""
+        return self._pool.waitForDone(delai_ms)
+
+    def vider(self):
+        """Vide le cache mémoire (le cache disque est conservé)"""
+        self._memoire.clear()
+        self._echecs.clear()
+        self._mtimes.clear()
+
+    @staticmethod
+    def chemin_absolu(chemin):
+        """Chemin d'image tel que signalé par prete (relatif : depuis la racine du projet)"""
+        return chemin if os.path.isabs(chemin) else os.path.normpath(os.path.join(RACINE, chemin))
+
+    def _cle(self, chemin, taille, mode):
+        if not chemin:
+            return None
+        chemin = self.chemin_absolu(chemin)
+        maintenant = time.monotonic()
+        mtime, verifie = self._mtimes.get(chemin, (None, None))
+        if verifie is None or maintenant - verifie > MINIATURES_CONFIG["verification"]:
+            try:
+                mtime = os.stat(chemin).st_mtime_ns
+            except OSError:
+                mtime = None
+            self._mtimes[chemin] = (mtime, maintenant)
+        if mtime is None:
+            return None
+        cle = (chemin, mtime, taille.width(), taille.height(), Qt.AspectRatioMode(mode).value)
+        return None if cle in self._echecs else cle
+
+    def _lancer(self, cle):
+        if cle in self._en_cours:
+            return
+        self._en_cours.add(cle)
+        self._pool.start(_Chargement(cle, self.dossier, self._emetteur))
+
+    def _sur_fini(self, cle, image):
+        self._en_cours.discard(cle)
+        if image is None:
+            self._echecs.add(cle)
+            return
+        self._memoire[cle] = QPixmap.fromImage(image)
+        self._memoire.move_to_end(cle)
+        while len(self._memoire) > self.capacite:
+            self._memoire.popitem(last=False)
+        self.prete.emit(cle[0])
+
+    # ---------- Chargement (thread de travail) ----------
+
+    @staticmethod
+    def charger_image(chemin, mtime, largeur, hauteur, mode, dossier):
+        """Miniature depuis le cache disque, sinon décodée et mise à l'échelle puis enregistrée"""
+        mode = Qt.AspectRatioMode(mode)
+        nom = hashlib.sha1(f"{chemin}|{largeur}x{hauteur}|{mode.value}".encode()).hexdigest()
+        fichier = os.path.join(dossier, f"{nom}.png")
+
+        if os.path.exists(fichier):
+            image = QImage(fichier)
+            if not image.isNull() and image.text("mtime") == str(mtime):
+                return image
+
+        reader = QImageReader(chemin)
+        reader.setAutoTransform(True)
+        taille = QSize(largeur, hauteur)
+        source = reader.size()
+        if source.isValid():
+            # Décodage réduit (JPEG) à deux fois la taille visée, puis lissage
+            cible = source.scaled(taille, mode)
+            if source.width() > 2 * cible.width():
+                reader.setScaledSize(QSize(2 * cible.width(), 2 * cible.height()))
+        image = reader.read()
+        if image.isNull():
+            return None
+        image = image.scaled(taille, mode, Qt.SmoothTransformation)
+
+        image.setText("mtime", str(mtime))
+        try:
+            os.makedirs(dossier, exist_ok=True)
+            temporaire = f"{fichier}.{threading.get_ident()}.tmp"
+            if image.save(temporaire, "PNG"):
+                os.replace(temporaire, fichier)
+        except OSError as e:
+            print(f"Erreur ThumbnailCache (écriture {fichier}): {e}")
+        return image
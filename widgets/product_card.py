@@ -1,12 +1,15 @@
 
 from PySide6.QtWidgets import QFrame, QVBoxLayout, QLabel, QGraphicsDropShadowEffect
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QPixmap, QColor
+from PySide6.QtCore import Qt, Signal, QSize
+from PySide6.QtGui import QColor
 import qtawesome as qta
 import os
 
+from views.thumbnails import ThumbnailCache
+
 class ProductCard(QFrame):
     clicked = Signal(str) # Emits product ID when clicked
+    IMAGE_SIZE = QSize(180, 140)
 
     def __init__(self, product_id, name, price, stock=0, image_path='assets/default.png'):
         super().__init__()
@@ -37,15 +40,15 @@ class ProductCard(QFrame):
         self.image_label.setAlignment(Qt.AlignCenter)
         self.image_label.setStyleSheet("border-radius: 10px; background-color: #1E1E2E;")
         
-        if not os.path.exists(image_path):
+        if not image_path or not os.path.exists(ThumbnailCache.chemin_absolu(image_path)):
             image_path = 'assets/default.png' # Fallback
-            
-        pixmap = QPixmap(image_path)
-        if pixmap.isNull():
-             # Fallback to icon if pixmap fails
-             pixmap = qta.icon('fa5s.box', color='#A0A0B0').pixmap(100, 100)
         
-        self.image_label.setPixmap(pixmap.scaled(180, 140, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
+        # Thumbnail from the shared cache; placeholder icon until it is decoded off the GUI thread
+        self.image_path = image_path
+        self._thumbnails = ThumbnailCache.instance()
+        if not self._show_thumbnail():
+            self.image_label.setPixmap(qta.icon('fa5s.box', color='#A0A0B0').pixmap(100, 100))
+            self._thumbnails.prete.connect(self._on_thumbnail_ready)
         layout.addWidget(self.image_label)
 
         # 2. Product Name
@@ -68,6 +71,17 @@ class ProductCard(QFrame):
              badge.setGeometry(165, 5, 30, 30)
              badge.setToolTip(f"Attention: Stock faible ({stock})")
 
+    def _show_thumbnail(self):
+        pixmap = self._thumbnails.obtenir(self.image_path, self.IMAGE_SIZE, Qt.KeepAspectRatioByExpanding)
+        if pixmap is None:
+            return False
+        self.image_label.setPixmap(pixmap)
+        return True
+
+    def _on_thumbnail_ready(self, path):
+        if ThumbnailCache.chemin_absolu(self.image_path) == path and self._show_thumbnail():
+            self._thumbnails.prete.disconnect(self._on_thumbnail_ready)
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             # Simple "pressed" visual effect